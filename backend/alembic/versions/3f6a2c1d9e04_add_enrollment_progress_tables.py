@@ -0,0 +1,53 @@
+"""Add enrollment content progress and study session tables
+
+Revision ID: 3f6a2c1d9e04
+Revises: bd152e2f5817
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a2c1d9e04'
+down_revision: Union[str, None] = 'bd152e2f5817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('enrollment_content_progress',
+    sa.Column('enrollment_id', sa.Integer(), nullable=False),
+    sa.Column('content_id', sa.Integer(), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('study_time', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['content_id'], ['learning_contents.id'], ),
+    sa.ForeignKeyConstraint(['enrollment_id'], ['path_enrollments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('enrollment_id', 'content_id')
+    )
+    op.create_table('study_session',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('enrollment_id', sa.Integer(), nullable=False),
+    sa.Column('content_id', sa.Integer(), nullable=True),
+    sa.Column('start_time', sa.String(), nullable=True),
+    sa.Column('end_time', sa.String(), nullable=True),
+    sa.Column('duration', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['content_id'], ['learning_contents.id'], ),
+    sa.ForeignKeyConstraint(['enrollment_id'], ['path_enrollments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_study_session_id'), 'study_session', ['id'], unique=False)
+    op.create_index('ix_study_session_enrollment_start', 'study_session', ['enrollment_id', 'start_time'], unique=False)
+    # 旧版JSON数据的迁移在线分批执行: python -m app.db.migrate_enrollment_progress
+
+
+def downgrade() -> None:
+    op.drop_index('ix_study_session_enrollment_start', table_name='study_session')
+    op.drop_index(op.f('ix_study_session_id'), table_name='study_session')
+    op.drop_table('study_session')
+    op.drop_table('enrollment_content_progress')
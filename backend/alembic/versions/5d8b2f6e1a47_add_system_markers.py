@@ -0,0 +1,35 @@
+"""Add system_markers table
+
+Revision ID: 5d8b2f6e1a47
+Revises: 3f6a2c1d9e04
+Create Date: 2026-10-19 11:30:00.000000
+
+Databases created from the models after the table was introduced (and stamped
+at 3f6a2c1d9e04) already have it, so it is only created when missing.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8b2f6e1a47'
+down_revision: Union[str, None] = '3f6a2c1d9e04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('system_markers'):
+        return
+    op.create_table('system_markers',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('value', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('system_markers')
@@ -0,0 +1,29 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: 7c2e9b4a1f30
+Revises: 5d8b2f6e1a47
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9b4a1f30'
+down_revision: Union[str, None] = '5d8b2f6e1a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_learning_contents_created', 'learning_contents', ['created_at', 'id'], unique=False)
+    op.create_index('ix_interaction_user_created', 'user_content_interactions', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_assessment_user_completed', 'learning_style_assessments', ['user_id', 'completed_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assessment_user_completed', table_name='learning_style_assessments')
+    op.drop_index('ix_interaction_user_created', table_name='user_content_interactions')
+    op.drop_index('ix_learning_contents_created', table_name='learning_contents')
@@ -0,0 +1,28 @@
+"""Add skeleton_version to learning_paths
+
+Revision ID: 9a4d3e7b2c61
+Revises: 7c2e9b4a1f30
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d3e7b2c61'
+down_revision: Union[str, None] = '7c2e9b4a1f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('learning_paths') as batch_op:
+        batch_op.add_column(sa.Column('skeleton_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('learning_paths') as batch_op:
+        batch_op.drop_column('skeleton_version')
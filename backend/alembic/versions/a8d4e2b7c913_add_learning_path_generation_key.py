@@ -0,0 +1,30 @@
+"""Add generation_key to learning_paths for persisted AI-generated paths
+
+Revision ID: a8d4e2b7c913
+Revises: f7c3d8e2a614
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d4e2b7c913'
+down_revision: Union[str, None] = 'f7c3d8e2a614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('learning_paths') as batch_op:
+        batch_op.add_column(sa.Column('generation_key', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_learning_paths_generation_key', ['generation_key'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('learning_paths') as batch_op:
+        batch_op.drop_index('ix_learning_paths_generation_key')
+        batch_op.drop_column('generation_key')
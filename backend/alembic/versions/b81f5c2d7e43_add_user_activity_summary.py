@@ -0,0 +1,40 @@
+"""Add user_activity_summary table
+
+Revision ID: b81f5c2d7e43
+Revises: 9a4d3e7b2c61
+Create Date: 2026-10-19 14:00:00.000000
+
+Existing data is backfilled with: python -m app.db.rebuild_activity_summary
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f5c2d7e43'
+down_revision: Union[str, None] = '9a4d3e7b2c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_activity_summary',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('interaction_count', sa.Integer(), nullable=False),
+    sa.Column('total_time_spent', sa.Float(), nullable=False),
+    sa.Column('completed_contents', sa.Integer(), nullable=False),
+    sa.Column('progress_sum', sa.Float(), nullable=False),
+    sa.Column('enrolled_paths', sa.Integer(), nullable=False),
+    sa.Column('active_paths', sa.Integer(), nullable=False),
+    sa.Column('completed_paths', sa.Integer(), nullable=False),
+    sa.Column('last_activity_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_activity_summary')
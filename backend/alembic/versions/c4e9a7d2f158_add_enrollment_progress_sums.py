@@ -0,0 +1,79 @@
+"""Add running progress sums to path_enrollments and required_content_count to learning_paths
+
+Revision ID: c4e9a7d2f158
+Revises: a8d4e2b7c913
+Create Date: 2026-10-19 21:00:00.000000
+
+Overall progress is derived from these sums and the path's content counters
+instead of aggregating enrollment_content_progress on every update.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a7d2f158'
+down_revision: Union[str, None] = 'a8d4e2b7c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUMS = ('required_progress_sum', 'optional_progress_sum', 'unlisted_progress_sum')
+
+CLAMPED = "CASE WHEN p.progress > 100 THEN 100 WHEN p.progress < 0 THEN 0 ELSE p.progress END"
+LISTED = """
+    SELECT 1 FROM path_content_associations a
+    WHERE a.path_id = path_enrollments.path_id AND a.content_id = p.content_id
+"""
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('learning_paths') as batch_op:
+        batch_op.add_column(sa.Column('required_content_count', sa.Integer(), server_default='0', nullable=False))
+    with op.batch_alter_table('path_enrollments') as batch_op:
+        for name in SUMS:
+            batch_op.add_column(sa.Column(name, sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('unlisted_content_count', sa.Integer(), server_default='0', nullable=False))
+
+    # 按现有数据回填
+    op.execute("""
+        UPDATE learning_paths SET required_content_count = (
+            SELECT count(*) FROM path_content_associations a
+            WHERE a.path_id = learning_paths.id AND (a.required IS NULL OR a.required = TRUE)
+        )
+    """)
+    op.execute(f"""
+        UPDATE path_enrollments SET
+            required_progress_sum = (
+                SELECT coalesce(sum({CLAMPED}), 0)
+                FROM enrollment_content_progress p JOIN path_content_associations a
+                    ON a.path_id = path_enrollments.path_id AND a.content_id = p.content_id
+                WHERE p.enrollment_id = path_enrollments.id AND (a.required IS NULL OR a.required = TRUE)
+            ),
+            optional_progress_sum = (
+                SELECT coalesce(sum({CLAMPED}), 0)
+                FROM enrollment_content_progress p JOIN path_content_associations a
+                    ON a.path_id = path_enrollments.path_id AND a.content_id = p.content_id
+                WHERE p.enrollment_id = path_enrollments.id AND a.required = FALSE
+            ),
+            unlisted_progress_sum = (
+                SELECT coalesce(sum({CLAMPED}), 0)
+                FROM enrollment_content_progress p
+                WHERE p.enrollment_id = path_enrollments.id AND NOT EXISTS ({LISTED})
+            ),
+            unlisted_content_count = (
+                SELECT count(*)
+                FROM enrollment_content_progress p
+                WHERE p.enrollment_id = path_enrollments.id AND NOT EXISTS ({LISTED})
+            )
+    """)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('path_enrollments') as batch_op:
+        batch_op.drop_column('unlisted_content_count')
+        for name in reversed(SUMS):
+            batch_op.drop_column(name)
+    with op.batch_alter_table('learning_paths') as batch_op:
+        batch_op.drop_column('required_content_count')
@@ -0,0 +1,43 @@
+"""Add interaction_daily_rollups table
+
+Revision ID: c5e8a1f4d290
+Revises: b81f5c2d7e43
+Create Date: 2026-10-19 15:00:00.000000
+
+Rollups are populated by: python -m app.db.interaction_maintenance rollup
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8a1f4d290'
+down_revision: Union[str, None] = 'b81f5c2d7e43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('interaction_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content_id', sa.Integer(), nullable=False),
+    sa.Column('interaction_count', sa.Integer(), nullable=False),
+    sa.Column('time_spent', sa.Float(), nullable=False),
+    sa.Column('progress_sum', sa.Float(), nullable=False),
+    sa.Column('completed_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Float(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('event_count', sa.Integer(), nullable=False),
+    sa.Column('event_duration', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('day', 'user_id', 'content_id')
+    )
+    op.create_index('ix_interaction_rollup_user_day', 'interaction_daily_rollups', ['user_id', 'day'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_interaction_rollup_user_day', table_name='interaction_daily_rollups')
+    op.drop_table('interaction_daily_rollups')
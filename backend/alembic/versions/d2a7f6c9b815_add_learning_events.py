@@ -0,0 +1,39 @@
+"""Add learning_events table
+
+Revision ID: d2a7f6c9b815
+Revises: c5e8a1f4d290
+Create Date: 2026-10-19 16:00:00.000000
+
+Existing interactions are converted by: python -m app.db.learning_events backfill
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7f6c9b815'
+down_revision: Union[str, None] = 'c5e8a1f4d290'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('learning_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content_id', sa.Integer(), nullable=True),
+    sa.Column('path_id', sa.Integer(), nullable=True),
+    sa.Column('event_type', sa.String(length=16), nullable=False),
+    sa.Column('value', sa.Float(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_learning_events_user_occurred', 'learning_events', ['user_id', 'occurred_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_learning_events_user_occurred', table_name='learning_events')
+    op.drop_table('learning_events')
@@ -0,0 +1,33 @@
+"""Add progress_sync_keys table
+
+Revision ID: e1f6b3a9c527
+Revises: c4e9a7d2f158
+Create Date: 2026-10-19 22:00:00.000000
+
+Idempotency keys of events applied by POST /api/v1/progress/sync.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f6b3a9c527'
+down_revision: Union[str, None] = 'c4e9a7d2f158'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('progress_sync_keys',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+    sa.Column('processed_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'idempotency_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('progress_sync_keys')
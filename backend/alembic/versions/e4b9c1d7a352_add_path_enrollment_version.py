@@ -0,0 +1,28 @@
+"""Add optimistic locking version to path_enrollments
+
+Revision ID: e4b9c1d7a352
+Revises: d2a7f6c9b815
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9c1d7a352'
+down_revision: Union[str, None] = 'd2a7f6c9b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('path_enrollments') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('path_enrollments') as batch_op:
+        batch_op.drop_column('version')
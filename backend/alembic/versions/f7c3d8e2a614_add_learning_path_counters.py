@@ -0,0 +1,55 @@
+"""Add denormalized counters to learning_paths
+
+Revision ID: f7c3d8e2a614
+Revises: e4b9c1d7a352
+Create Date: 2026-10-19 18:00:00.000000
+
+Counters can be verified with: python -m app.db.path_counters check
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c3d8e2a614'
+down_revision: Union[str, None] = 'e4b9c1d7a352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('content_count', 'total_estimated_minutes', 'enrollment_count', 'completion_count')
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('learning_paths') as batch_op:
+        for name in COUNTERS:
+            batch_op.add_column(sa.Column(name, sa.Integer(), server_default='0', nullable=False))
+
+    # 按现有数据回填
+    op.execute("""
+        UPDATE learning_paths SET
+            content_count = (
+                SELECT count(*) FROM path_content_associations a
+                WHERE a.path_id = learning_paths.id
+            ),
+            total_estimated_minutes = (
+                SELECT coalesce(sum(c.estimated_minutes), 0)
+                FROM path_content_associations a JOIN learning_contents c ON c.id = a.content_id
+                WHERE a.path_id = learning_paths.id
+            ),
+            enrollment_count = (
+                SELECT count(*) FROM path_enrollments e
+                WHERE e.path_id = learning_paths.id
+            ),
+            completion_count = (
+                SELECT count(*) FROM path_enrollments e
+                WHERE e.path_id = learning_paths.id AND e.progress >= 100
+            )
+    """)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('learning_paths') as batch_op:
+        for name in reversed(COUNTERS):
+            batch_op.drop_column(name)
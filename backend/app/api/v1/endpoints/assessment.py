@@ -1,6 +1,7 @@
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload, undefer
 import json  # 添加json导入
 from app.db.session import get_db
 from app.schemas.assessment import (
@@ -14,10 +15,18 @@ from app.schemas.assessment import (
 )
 from app.core.config import settings  # 添加settings导入
 # 添加必要导入
-from app.services.assessment_service import AssessmentService
-from app.services.ai_service import AIService
+from app.services.assessment_service import AssessmentService, build_progress_report
+from app.logging_config import LazyPayload
+from app.services.admission_control import is_degraded
+from app.services.ai_service import get_ai_service
 from app.models.learning_assessment import AssessmentQuestion, LearningStyleAssessment, UserResponse
 from app.models.user import User  # 添加User模型导入
+from app.services.question_catalog import question_catalog
+from app.services.read_models import list_assessment_history
+from app.services.user_cache import get_user_snapshot
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER, InvalidCursorError, decode_cursor, encode_cursor
+)
 import logging
 
 # 添加日志
@@ -28,28 +37,28 @@ router = APIRouter()
 
 @router.get("/questions", response_model=List[QuestionSchema])
 def get_assessment_questions(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of questions to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
     db: Session = Depends(get_db)
 ):
     """Get list of assessment questions"""
-    db_questions = (
-        db.query(AssessmentQuestion)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    # 问题表没有创建时间列，按主键升序分页，与题目录入顺序一致；题目从进程内题库缓存读取
+    try:
+        after_id = _decode_question_cursor(cursor) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return [
-        QuestionSchema(
-            id=q.id,
-            question_text=q.question_text,
-            question_type=q.question_type,
-            options=q.options,
-            category=q.category,
-            weight=q.weight
-        ) for q in db_questions
-    ]
+    questions, has_more = question_catalog.get(db).page(after_id, limit)
+    if has_more:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([questions[-1].id])
+    return questions
+
+def _decode_question_cursor(cursor: str) -> int:
+    try:
+        return int(decode_cursor(cursor, 1)[0])
+    except (TypeError, ValueError) as e:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}") from e
 
 @router.post("/questions", response_model=QuestionSchema)
 async def create_assessment_question(
@@ -69,6 +78,8 @@ async def create_assessment_question(
     db.add(db_question)
     db.commit()
     db.refresh(db_question)
+    # 题库已变化，下次读取时重新加载
+    question_catalog.invalidate()
     
     return QuestionSchema(
         id=db_question.id,
@@ -87,14 +98,24 @@ async def submit_assessment(
     """Submit assessment responses and get learning style analysis"""
     try:
         # 添加请求日志
-        logger.info(f"处理学习风格评估提交: 用户ID {submission.user_id}, {len(submission.responses)} 个回答")
+        logger.info("处理学习风格评估提交: 用户ID %s, %s 个回答", submission.user_id, len(submission.responses))
         
         # Get user
         user = db.query(User).filter(User.id == submission.user_id).first()
         if not user:
-            logger.warning(f"用户未找到: ID {submission.user_id}")
+            logger.warning("用户未找到: ID %s", submission.user_id)
             raise HTTPException(status_code=404, detail=f"User with ID {submission.user_id} not found")
         
+        # 一次取出所有回答涉及的题目，任一题目不存在时不创建任何记录
+        questions = question_catalog.lookup(db, [response.question_id for response in submission.responses])
+        for response in submission.responses:
+            if response.question_id not in questions:
+                logger.warning("问题未找到: ID %s", response.question_id)
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Question {response.question_id} not found"
+                )
+        
         # 创建学习风格评估记录
         assessment = LearningStyleAssessment(
             user_id=submission.user_id,
@@ -107,44 +128,34 @@ async def submit_assessment(
         )
         db.add(assessment)
         db.flush()  # 获取assessment.id但不提交
-        logger.debug(f"创建评估记录: ID {assessment.id}")
+        logger.debug("创建评估记录: ID %s", assessment.id)
         
-        # 解析和处理用户回答
-        responses = []
-        for response in submission.responses:
-            question = (
-                db.query(AssessmentQuestion)
-                .filter(AssessmentQuestion.id == response.question_id)
-                .first()
-            )
-            if not question:
-                logger.warning(f"问题未找到: ID {response.question_id}")
-                db.rollback()
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Question {response.question_id} not found"
-                )
-            
-            # 创建用户回答记录 - 修正字段赋值
-            db_response = UserResponse(
-                assessment_id=assessment.id,
-                question_id=question.id,
-                response_value=response.response_value,
-                response_time=response.response_time
-            )
-            db.add(db_response)
-            
-            # 构建回答数据以供分析
-            responses.append({
-                "question_id": question.id,
-                "category": question.category,
+        # 用户回答一次批量插入（Core executemany，跳过ORM逐行处理）
+        if submission.responses:
+            db.execute(insert(UserResponse.__table__), [
+                {
+                    "assessment_id": assessment.id,
+                    "question_id": response.question_id,
+                    "response_value": response.response_value,
+                    "response_time": response.response_time
+                }
+                for response in submission.responses
+            ])
+        
+        # 构建回答数据以供分析
+        responses = [
+            {
+                "question_id": response.question_id,
+                "category": questions[response.question_id].category,
                 "response_value": response.response_value,
                 "response_time": response.response_time
-            })
+            }
+            for response in submission.responses
+        ]
         
         # 分析回答
         result = AssessmentService.analyze_responses(responses)
-        logger.debug(f"风格分析完成: {result.get('dominant_style')}")
+        logger.debug("风格分析完成: %s", result.get('dominant_style'))
         
         # 更新评估记录
         assessment.visual_score = result["visual_score"]
@@ -168,7 +179,7 @@ async def submit_assessment(
         
         # 提交事务
         db.commit()
-        logger.info(f"评估提交成功: 用户ID {submission.user_id}, 主导风格 {result.get('dominant_style')}")
+        logger.info("评估提交成功: 用户ID %s, 主导风格 %s", submission.user_id, result.get('dominant_style'))
         
         # 返回结果
         return AssessmentResponse(
@@ -182,9 +193,12 @@ async def submit_assessment(
             ),
             recommendations=recommendations
         )
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"评估提交失败: {str(e)}")
+        logger.exception("评估提交失败: %s", e)
         raise HTTPException(
             status_code=500, 
             detail=f"Assessment submission failed: {str(e)}"
@@ -192,21 +206,18 @@ async def submit_assessment(
 
 @router.get("/user/{user_id}/history", response_model=List[dict])
 def get_user_assessment_history(
+    response: Response,
     user_id: int = Path(..., description="The ID of the user"),
-    skip: int = Query(0, description="Number of records to skip"),
-    limit: int = Query(10, description="Maximum number of records to return"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
     db: Session = Depends(get_db)
 ):
     """Get a user's assessment history"""
     try:
-        assessments = (
-            db.query(LearningStyleAssessment)
-            .filter(LearningStyleAssessment.user_id == user_id)
-            .order_by(LearningStyleAssessment.completed_at.desc())  # 这里也需要修改
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        # 评估记录以completed_at作为创建时间，只读取列表需要的列
+        assessments, next_cursor = list_assessment_history(db, user_id, limit=limit, cursor=cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
         if not assessments:
             return []
@@ -219,11 +230,12 @@ def get_user_assessment_history(
                 "auditory_score": assessment.auditory_score,
                 "kinesthetic_score": assessment.kinesthetic_score,
                 "reading_score": assessment.reading_score,
-                # 使用assessment_data而不是analysis_results
-                "dominant_style": assessment.assessment_data.get("dominant_style") if assessment.assessment_data else None
+                "dominant_style": assessment.dominant_style
             }
             for assessment in assessments
         ]
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -236,6 +248,7 @@ def get_assessment_details(
     try:
         assessment = (
             db.query(LearningStyleAssessment)
+            .options(undefer(LearningStyleAssessment.assessment_data))
             .filter(LearningStyleAssessment.id == assessment_id)
             .first()
         )
@@ -243,20 +256,17 @@ def get_assessment_details(
         if not assessment:
             raise HTTPException(status_code=404, detail="Assessment not found")
         
-        # Get user responses for this assessment
+        # Get user responses for this assessment, with their questions in the same query
         responses = (
             db.query(UserResponse)
+            .options(joinedload(UserResponse.question))
             .filter(UserResponse.assessment_id == assessment_id)
             .all()
         )
         
         response_details = []
         for response in responses:
-            question = (
-                db.query(AssessmentQuestion)
-                .filter(AssessmentQuestion.id == response.question_id)
-                .first()
-            )
+            question = response.question
             
             if question:
                 response_details.append({
@@ -267,21 +277,25 @@ def get_assessment_details(
                     "response_time": response.response_time
                 })
         
+        # 使用assessment_data而不是analysis_results
+        assessment_data = assessment.assessment_data or {}
         return {
             "id": assessment.id,
             "user_id": assessment.user_id,
-            "created_at": assessment.created_at,
+            "created_at": assessment.completed_at,  # 使用completed_at替代created_at
             "learning_style_result": {
                 "visual_score": assessment.visual_score,
                 "auditory_score": assessment.auditory_score,
                 "kinesthetic_score": assessment.kinesthetic_score,
                 "reading_score": assessment.reading_score,
-                "dominant_style": assessment.analysis_results.get("dominant_style") if assessment.analysis_results else None,
-                "secondary_style": assessment.analysis_results.get("secondary_style") if assessment.analysis_results else None
+                "dominant_style": assessment.dominant_style or assessment_data.get("dominant_style"),
+                "secondary_style": assessment_data.get("secondary_style")
             },
             "responses": response_details,
-            "recommendations": assessment.recommendations
+            "recommendations": assessment_data.get("recommendations", [])
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -293,90 +307,69 @@ def get_user_learning_progress(
     """Get a user's learning progress and improvement suggestions"""
     try:
         # 检查用户是否存在
-        user = db.query(User).filter(User.id == user_id).first()
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
             
-        # Get the user's most recent assessment
-        latest_assessment = (
-            db.query(LearningStyleAssessment)
-            .filter(LearningStyleAssessment.user_id == user_id)
-            .order_by(LearningStyleAssessment.completed_at.desc())
-            .first()
-        )
-        
-        # 如果用户没有评估记录，返回默认数据而不是抛出错误
-        if not latest_assessment:
-            logger.info(f"用户 {user_id} 没有评估记录，返回默认数据")
-            return {
-                "user_id": user_id,
-                "name": getattr(user, "name", None) or getattr(user, "full_name", None) or getattr(user, "username", "用户"),
-                "email": getattr(user, "email", "user@example.com"),
-                "learning_style": "未知",
-                "overall_progress": 0,
-                "completed_paths": 0,
-                "active_paths": 0,
-                "completed_tests": 0,
-                "recent_activities": []
-            }
-        
-        # Get previous assessments for comparison
-        previous_assessments = (
-            db.query(LearningStyleAssessment)
-            .filter(LearningStyleAssessment.user_id == user_id)
-            .filter(LearningStyleAssessment.id != latest_assessment.id)
-            .order_by(LearningStyleAssessment.completed_at.desc())  # 使用completed_at替代created_at
-            .limit(3)  # Get up to 3 previous assessments
-            .all()
-        )
-        
-        # Calculate progress metrics
-        progress_metrics = AssessmentService.calculate_progress_metrics(
-            latest_assessment, 
-            previous_assessments
-        )
-        
-        # Generate improvement suggestions
-        # 修复这里：使用assessment_data而不是analysis_results
-        improvement_suggestions = AssessmentService.generate_improvement_suggestions(
-            latest_assessment.assessment_data or {}
-        )
-        
-        return {
-            "user_id": user_id,
-            "latest_assessment_id": latest_assessment.id,
-            "latest_assessment_date": latest_assessment.completed_at,  # 使用completed_at而不是created_at
-            "current_learning_style": {
-                "visual_score": latest_assessment.visual_score,
-                "auditory_score": latest_assessment.auditory_score,
-                "kinesthetic_score": latest_assessment.kinesthetic_score,
-                "reading_score": latest_assessment.reading_score,
-                # 使用assessment_data而不是analysis_results
-                "dominant_style": latest_assessment.dominant_style or 
-                                  (latest_assessment.assessment_data.get("dominant_style") 
-                                   if latest_assessment.assessment_data else None)
-            },
-            "progress_metrics": progress_metrics,
-            "improvement_suggestions": improvement_suggestions
-        }
+        return build_progress_report(db, user)
     except Exception as e:
-        logger.exception(f"获取学习进度失败: {str(e)}")  # 添加详细日志
+        logger.exception("获取学习进度失败: %s", e)  # 添加详细日志
         db.rollback()
         raise HTTPException(status_code=500, detail=f"获取学习进度失败: {str(e)}")
 
+def _fallback_adaptive_test(topic: str, difficulty: str) -> Dict[str, Any]:
+    """不调用AI服务的自适应测试，AI服务失败或过载降级时使用"""
+    return {
+        "questions": [
+            {
+                "id": 1,
+                "content": f"关于{topic}，以下哪个说法是正确的？",
+                "question_type": "choice",
+                "options": ["第一个选项", "第二个选项", "第三个选项", "第四个选项"],
+                "difficulty": "beginner",
+                "topic": topic
+            },
+            {
+                "id": 2,
+                "content": f"{topic}的主要特点是什么？",
+                "question_type": "text",
+                "difficulty": "intermediate",
+                "topic": topic
+            },
+            {
+                "id": 3,
+                "content": f"{topic}在实际项目中如何应用？",
+                "question_type": "choice",
+                "options": ["应用方式一", "应用方式二", "应用方式三", "应用方式四"],
+                "difficulty": difficulty,
+                "topic": topic
+            }
+        ],
+        "adaptive_logic": {
+            "initial_difficulty": difficulty,
+            "adjustment_rules": {
+                "correct_answer": "增加难度",
+                "incorrect_answer": "降低难度"
+            }
+        },
+        "estimated_difficulty": difficulty,
+        "topics_covered": [topic]
+    }
+
 @router.post("/adaptive-test", response_model=AdaptiveTestResult)
 async def create_adaptive_test(
     request: AdaptiveTestRequest,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     """创建自适应测试，根据用户特点调整难度"""
     try:
-        logger.info(f"生成自适应测试: 用户ID {request.user_id}, 主题: {request.topic}, 难度: {request.difficulty}")
+        logger.info("生成自适应测试: 用户ID %s, 主题: %s, 难度: %s", request.user_id, request.topic, request.difficulty)
         
         # 检查用户是否存在
-        user = db.query(User).filter(User.id == request.user_id).first()
+        user = get_user_snapshot(db, request.user_id)
         if not user:
-            logger.warning(f"用户ID {request.user_id} 不存在")
+            logger.warning("用户ID %s 不存在", request.user_id)
             # 在测试环境中，即使用户不存在也继续
             if hasattr(settings, 'PRODUCTION') and not settings.PRODUCTION:
                 logger.info("测试环境：继续生成测试")
@@ -385,9 +378,6 @@ async def create_adaptive_test(
                 logger.info("临时措施：即使用户不存在也继续生成测试")
                 # raise HTTPException(status_code=404, detail=f"用户ID {request.user_id} 不存在")
         
-        # 初始化AI服务
-        ai_service = AIService()
-        
         # 清理和标准化输入数据
         subject = request.subject.strip() if request.subject else "编程"
         topic = request.topic.strip() if request.topic else subject
@@ -401,56 +391,25 @@ async def create_adaptive_test(
             "difficulty": difficulty
         }
         
-        logger.info(f"调用AI服务生成自适应测试: {json.dumps(user_data, ensure_ascii=False)}")
+        logger.info("调用AI服务生成自适应测试: %s", LazyPayload(user_data))
         
-        # 使用AI服务生成自适应测试
+        # 使用AI服务生成自适应测试；过载降级时直接使用备用测试
         try:
-            test_result = await ai_service.generate_adaptive_test(user_data)
-            logger.info("AI服务返回测试结果")
+            if is_degraded(http_request):
+                logger.info("服务繁忙，使用备用测试")
+                test_result = _fallback_adaptive_test(topic, difficulty)
+            else:
+                test_result = await get_ai_service().generate_adaptive_test(user_data)
+                logger.info("AI服务返回测试结果")
         except Exception as ai_error:
-            logger.exception(f"AI服务生成测试失败: {str(ai_error)}")
+            logger.exception("AI服务生成测试失败: %s", ai_error)
             # 使用备用方法生成模拟测试
             logger.info("使用备用模拟数据生成测试")
-            test_result = {
-                "questions": [
-                    {
-                        "id": 1,
-                        "content": f"关于{topic}，以下哪个说法是正确的？",
-                        "question_type": "choice",
-                        "options": ["第一个选项", "第二个选项", "第三个选项", "第四个选项"],
-                        "difficulty": "beginner",
-                        "topic": topic
-                    },
-                    {
-                        "id": 2,
-                        "content": f"{topic}的主要特点是什么？",
-                        "question_type": "text",
-                        "difficulty": "intermediate",
-                        "topic": topic
-                    },
-                    {
-                        "id": 3,
-                        "content": f"{topic}在实际项目中如何应用？",
-                        "question_type": "choice",
-                        "options": ["应用方式一", "应用方式二", "应用方式三", "应用方式四"],
-                        "difficulty": difficulty,
-                        "topic": topic
-                    }
-                ],
-                "adaptive_logic": {
-                    "initial_difficulty": difficulty,
-                    "adjustment_rules": {
-                        "correct_answer": "增加难度",
-                        "incorrect_answer": "降低难度"
-                    }
-                },
-                "estimated_difficulty": difficulty,
-                "topics_covered": [topic]
-            }
+            test_result = _fallback_adaptive_test(topic, difficulty)
         
         # 验证测试结果
         if not isinstance(test_result, dict):
-            logger.error(f"AI服务返回的测试结果格式不正确: {type(test_result)}")
+            logger.error("AI服务返回的测试结果格式不正确: %s", type(test_result))
             # 返回一个基本的测试结果而不是抛出异常
             test_result = {
                 "questions": [
@@ -502,15 +461,15 @@ async def create_adaptive_test(
             
         # 记录成功的测试生成
         question_count = len(test_result["questions"]) if isinstance(test_result["questions"], list) else 0
-        logger.info(f"自适应测试生成成功: {question_count} 个问题, 难度: {test_result.get('estimated_difficulty')}")
+        logger.info("自适应测试生成成功: %s 个问题, 难度: %s", question_count, test_result.get('estimated_difficulty'))
         
         return test_result
     except HTTPException as he:
         # 直接重新抛出HTTP异常
-        logger.exception(f"HTTP异常: {str(he)}")
+        logger.exception("HTTP异常: %s", he)
         raise he
     except Exception as e:
-        logger.exception(f"生成自适应测试失败: {str(e)}")
+        logger.exception("生成自适应测试失败: %s", e)
         # 返回模拟数据而不是抛出错误，确保接口不会失败
         return {
             "questions": [
@@ -1,55 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 
 from app.db.session import get_db
 from app.models.content import LearningContent, ContentTag
+from app.schemas.content import ContentBulkResult, ContentDetailResponse, ContentListItemResponse
+from app.services.content_ingest_service import ingest_content_ndjson
+from app.services.read_models import (
+    CONTENT_DETAIL_FIELDS,
+    CONTENT_LIST_FIELDS,
+    get_content_fields,
+    list_content_fields,
+    load_content_progress,
+    load_content_tags
+)
+from app.utils.fieldsets import Fieldset, InvalidFieldsetError, resolve_fieldset
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("", response_model=List[Dict[str, Any]])
+# 内容接口可以通过 include 展开的关联
+CONTENT_INCLUDES = ("tags", "resources", "progress")
+AFFINITY_FIELDS = ("visual_affinity", "auditory_affinity", "kinesthetic_affinity", "reading_affinity")
+
+def _fill_affinity_defaults(content: Dict[str, Any]) -> None:
+    for name in AFFINITY_FIELDS:
+        if name in content:
+            content[name] = content[name] or 0.0
+
+def _attach_includes(db: Session, contents: List[Dict[str, Any]], fieldset: Fieldset, user_id: Optional[int]) -> None:
+    """按 include 为一批内容附加标签和用户进度，每种关联一次查询"""
+    content_ids = [content["id"] for content in contents]
+    if fieldset.wants("tags"):
+        tags_by_content = load_content_tags(db, content_ids)
+        for content in contents:
+            content["tags"] = [tag.name for tag in tags_by_content.get(content["id"], [])]
+    if fieldset.wants("progress"):
+        progress_by_content = load_content_progress(db, user_id, content_ids)
+        for content in contents:
+            content["progress"] = progress_by_content.get(content["id"], {"progress": 0.0, "completed": False})
+
+@router.get("", response_model=List[ContentListItemResponse], response_model_exclude_unset=True)
 async def get_content(
-    skip: int = 0, 
-    limit: int = 10, 
+    response: Response,
+    limit: int = Query(10, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="上一页响应头中返回的游标"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔，如 id,title"),
+    include: Optional[str] = Query(None, description="展开的关联，逗号分隔: tags,resources,progress"),
+    user_id: Optional[int] = Query(None, description="include=progress 时必填"),
     db: Session = Depends(get_db)
 ):
-    """获取学习内容列表"""
+    """获取学习内容列表，按创建时间倒序分页，下一页游标通过 X-Next-Cursor 响应头返回
+
+    不传 fields/include 时返回完整结构（含标签）；传了之后只查询和返回请求的列与关联。
+    """
     try:
-        # 获取内容
-        contents = db.query(LearningContent).offset(skip).limit(limit).all()
+        fieldset = resolve_fieldset(
+            fields, include, CONTENT_LIST_FIELDS, CONTENT_INCLUDES, default_include=("tags",)
+        )
+        if fieldset.wants("progress") and user_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="include=progress 需要提供 user_id")
+        
+        # 只查询请求的列，标签和进度各一次查询取出
+        columns = fieldset.fields + (("resources",) if fieldset.wants("resources") else ())
+        contents, next_cursor = list_content_fields(db, columns, limit=limit, cursor=cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        _attach_includes(db, contents, fieldset, user_id)
         
-        # 准备响应，确保所有可能为NULL的字段有默认值
-        result = []
+        # 确保所有可能为NULL的亲和度字段有默认值
         for content in contents:
-            # 获取标签
-            tags = [tag.name for tag in content.tags] if hasattr(content, "tags") else []
-            
-            # 准备内容数据，确保亲和度字段有默认值
-            content_data = {
-                "id": content.id,
-                "title": content.title,
-                "description": content.description,
-                "content_type": content.content_type,
-                "subject": content.subject,
-                "difficulty_level": content.difficulty_level,
-                "content_url": content.content_url,
-                # 为可能为NULL的字段提供默认值
-                "visual_affinity": content.visual_affinity or 0.0,
-                "auditory_affinity": content.auditory_affinity or 0.0,
-                "kinesthetic_affinity": content.kinesthetic_affinity or 0.0,
-                "reading_affinity": content.reading_affinity or 0.0,
-                "tags": tags,
-                "author": content.author,
-                "is_premium": content.is_premium,
-                "created_at": content.created_at
-            }
-            result.append(content_data)
-            
-        return result
+            _fill_affinity_defaults(content)
+        return contents
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.exception(f"获取内容列表失败: {str(e)}")
+        logger.exception("获取内容列表失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"获取内容列表失败: {str(e)}"
@@ -69,20 +99,51 @@ async def create_content(
         db.refresh(new_content)
         return new_content
     except Exception as e:
-        logger.exception(f"创建内容失败: {str(e)}")
+        logger.exception("创建内容失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"创建内容失败: {str(e)}"
         )
 
-@router.get("/{content_id}", response_model=Dict[str, Any])
+@router.post("/bulk", response_model=ContentBulkResult)
+async def bulk_create_content(
+    request: Request,
+    chunk_size: Optional[int] = Query(None, ge=1, le=10000, description="每批插入的行数"),
+    db: Session = Depends(get_db)
+):
+    """批量导入学习内容
+
+    请求体为NDJSON（每行一个JSON对象，字段同 LearningContent，tags为标签名列表），
+    以流的方式逐行校验并分批插入，最后返回每行的错误信息。
+    """
+    try:
+        return await ingest_content_ndjson(db, request.stream(), chunk_size=chunk_size)
+    except Exception as e:
+        db.rollback()
+        logger.exception("批量导入内容失败: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量导入内容失败: {str(e)}"
+        )
+
+@router.get("/{content_id}", response_model=ContentDetailResponse, response_model_exclude_unset=True)
 async def get_content_by_id(
     content_id: int,
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔，如 id,title,content_data"),
+    include: Optional[str] = Query(None, description="展开的关联，逗号分隔: tags,resources,progress"),
+    user_id: Optional[int] = Query(None, description="include=progress 时必填"),
     db: Session = Depends(get_db)
 ):
-    """获取特定学习内容的详情"""
+    """获取特定学习内容的详情；不传 fields/include 时返回完整结构（含标签和资源）"""
     try:
-        content = db.query(LearningContent).filter(LearningContent.id == content_id).first()
+        fieldset = resolve_fieldset(
+            fields, include, CONTENT_DETAIL_FIELDS, CONTENT_INCLUDES, default_include=("tags", "resources")
+        )
+        if fieldset.wants("progress") and user_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="include=progress 需要提供 user_id")
+        
+        columns = fieldset.fields + (("resources",) if fieldset.wants("resources") else ())
+        content = get_content_fields(db, content_id, columns)
         
         if not content:
             raise HTTPException(
@@ -90,37 +151,19 @@ async def get_content_by_id(
                 detail=f"内容ID {content_id} 不存在"
             )
         
-        # 获取标签
-        tags = [tag.name for tag in content.tags] if hasattr(content, "tags") else []
+        _attach_includes(db, [content], fieldset, user_id)
         
-        # 返回内容详情，确保亲和度字段有默认值
-        return {
-            "id": content.id,
-            "title": content.title,
-            "description": content.description,
-            "content_type": content.content_type,
-            "content_url": content.content_url,
-            "content_data": content.content_data,
-            "subject": content.subject,
-            "difficulty_level": content.difficulty_level,
-            "estimated_minutes": content.estimated_minutes,
-            "resources": content.resources,
-            # 为可能为NULL的字段提供默认值
-            "visual_affinity": content.visual_affinity or 0.0,
-            "auditory_affinity": content.auditory_affinity or 0.0,
-            "kinesthetic_affinity": content.kinesthetic_affinity or 0.0,
-            "reading_affinity": content.reading_affinity or 0.0,
-            "author": content.author,
-            "source_url": content.source_url,
-            "is_premium": content.is_premium or False,
-            "tags": tags,
-            "created_at": content.created_at,
-            "updated_at": content.updated_at
-        }
+        # 确保亲和度等可能为NULL的字段有默认值
+        _fill_affinity_defaults(content)
+        if "is_premium" in content:
+            content["is_premium"] = content["is_premium"] or False
+        return content
+    except InvalidFieldsetError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"获取内容详情失败: {str(e)}")
+        logger.exception("获取内容详情失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"获取内容详情失败: {str(e)}"
@@ -150,7 +193,7 @@ async def update_content(
         db.refresh(db_content)
         return db_content
     except Exception as e:
-        logger.exception(f"更新内容失败: {str(e)}")
+        logger.exception("更新内容失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"更新内容失败: {str(e)}"
@@ -175,7 +218,7 @@ async def delete_content(
         db.commit()
         return {"detail": f"内容ID {content_id} 已删除"}
     except Exception as e:
-        logger.exception(f"删除内容失败: {str(e)}")
+        logger.exception("删除内容失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"删除内容失败: {str(e)}"
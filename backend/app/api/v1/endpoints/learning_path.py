@@ -4,15 +4,36 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.learning_path import LearningPath, PathEnrollment
 from app.models.content import LearningContent
-from app.models.user import User
-from app.services.ai_service import AIService
+from app.schemas.learning_path import PathDetailResponse, PathProgressResponse
+from app.services.admission_control import AdmissionRejected, admission_rejected_error, is_degraded, llm_admission
+from app.services.generated_path_service import get_or_generate_path, lookup_generated_path
+from app.services.enrollment_progress_service import (
+    get_content_progress_map,
+    get_content_study_time_map,
+    get_study_session_stats,
+    patch_personalization_settings,
+    record_content_progress,
+    record_study_session,
+    recompute_enrollment_progress,
+    lock_enrollments,
+    run_with_version_retry
+)
+from app.services.path_cache import get_path_skeleton
+from app.services.recommendation_cache import get_recommended_paths
+from app.services.user_cache import get_user_snapshot
+from app.utils.fieldsets import InvalidFieldsetError, resolve_fieldset
+from sqlalchemy.sql import func
 import logging
 
 logger = logging.getLogger(__name__)
 
-# 创建路由器和AI服务实例
+# 创建路由器，AI服务在首次使用时创建
 router = APIRouter()
-ai_service = AIService()
+
+# 路径详情可以通过 fields 选择的字段
+PATH_DETAIL_FIELDS = (
+    "id", "title", "description", "subject", "difficulty_level", "estimated_hours", "metadata", "contents"
+)
 
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_learning_path(
@@ -21,12 +42,12 @@ async def create_learning_path(
 ):
     """创建新的学习路径"""
     try:
-        logger.info(f"创建学习路径: {path_data['title']}")
+        logger.info("创建学习路径: %s", path_data['title'])
         
         # 检查创建者是否存在
         user_id = path_data.get("created_by")
         if user_id:
-            user = db.query(User).filter(User.id == user_id).first()
+            user = get_user_snapshot(db, user_id)
             if not user:
                 raise HTTPException(
                     status_code=404, 
@@ -71,7 +92,7 @@ async def create_learning_path(
         raise e
     except Exception as e:
         db.rollback()
-        logger.exception(f"创建学习路径失败: {str(e)}")
+        logger.exception("创建学习路径失败: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"创建学习路径失败: {str(e)}"
@@ -88,7 +109,7 @@ async def enroll_in_learning_path(
         path_id = enrollment_data["path_id"]
         
         # 检查用户和路径是否存在
-        user = db.query(User).filter(User.id == user_id).first()
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
             
@@ -113,7 +134,7 @@ async def enroll_in_learning_path(
                 "path_id": existing_enrollment.path_id,
                 "progress": existing_enrollment.progress,
                 "enrolled_at": existing_enrollment.enrolled_at,
-                "content_progress": existing_enrollment.content_progress or {}
+                "content_progress": get_content_progress_map(db, existing_enrollment.id)
             }
         
         # 创建新的注册
@@ -123,7 +144,6 @@ async def enroll_in_learning_path(
             user_id=user_id,
             path_id=path_id,
             progress=0.0,
-            content_progress={},
             personalization_settings=personalization_settings
         )
         
@@ -137,331 +157,234 @@ async def enroll_in_learning_path(
             "path_id": db_enrollment.path_id,
             "progress": db_enrollment.progress,
             "enrolled_at": db_enrollment.enrolled_at,
-            "content_progress": db_enrollment.content_progress or {}
+            "content_progress": {}
         }
     except HTTPException as e:
         # 重新抛出HTTP异常
         raise e
     except Exception as e:
         db.rollback()
-        logger.exception(f"注册学习路径失败: {str(e)}")
+        logger.exception("注册学习路径失败: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"注册学习路径失败: {str(e)}"
         )
 
-@router.get("/{path_id}")
+# 修改为同时支持GET和POST请求；需定义在 /{path_id} 之前，否则GET请求会被当作路径ID匹配
+@router.get("/recommended", response_model=List[Dict[str, Any]])
+@router.post("/recommended", response_model=List[Dict[str, Any]])
+async def get_recommended_learning_paths(
+    request: Request,
+    user_id: int = Query(None, description="用户ID"),
+    db: Session = Depends(get_db)
+):
+    """获取推荐给用户的学习路径
+
+    推荐按用户缓存（stale-while-revalidate），见 app/services/recommendation_cache.py。
+    """
+    try:
+        # 从POST请求体或查询参数获取用户ID
+        if request.method == "POST":
+            try:
+                body = await request.json()
+                if not user_id:
+                    user_id = body.get("user_id")
+            except:
+                pass
+                
+        if not user_id:
+            raise HTTPException(status_code=400, detail="必须提供用户ID")
+            
+        # 获取用户信息，包括学习偏好
+        user = get_user_snapshot(db, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
+
+        # 读取缓存的推荐；缓存过期时在后台刷新，只有首次访问或用户发生相关变化后才等待AI生成。
+        # 服务过载降级时不等待AI生成
+        return await get_recommended_paths(db, user_id, allow_compute=not is_degraded(request))
+            
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.exception("获取推荐学习路径失败: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取推荐学习路径失败: {str(e)}"
+        )
+
+@router.get("/{path_id}", response_model=PathDetailResponse, response_model_exclude_unset=True)
 async def get_learning_path(
     path_id: int,
+    request: Request,
     user_id: Optional[int] = None,
     subject_area: Optional[str] = Query(None, description="主题领域"),
     target_level: Optional[str] = Query(None, description="目标级别"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔，如 id,title,contents"),
+    include: Optional[str] = Query(None, description="展开的关联: progress（需要提供 user_id）"),
     db: Session = Depends(get_db)
 ):
-    """获取学习路径详情"""
+    """获取学习路径详情
+
+    不传 fields/include 时返回完整结构，提供 user_id 时附带用户进度；
+    传了 fields 后只返回请求的字段，用户进度需要 include=progress 才会查询。
+    """
     try:
+        fieldset = resolve_fieldset(
+            fields, include, PATH_DETAIL_FIELDS, ("progress",),
+            default_include=("progress",) if user_id else ()
+        )
+        if fieldset.wants("progress") and not user_id:
+            raise HTTPException(status_code=400, detail="include=progress 需要提供 user_id")
+        
         path = db.query(LearningPath).filter(LearningPath.id == path_id).first()
         
-        # 如果数据库中找不到路径，使用AI生成路径
+        # 如果数据库中找不到路径，按生成参数读取已保存的AI生成路径，没有时生成并保存
+        if not path:
+            path = lookup_generated_path(db, subject_area, target_level)
         if not path:
-            logger.info(f"学习路径ID {path_id} 不存在，使用AI生成")
+            logger.info("学习路径ID %s 不存在，使用AI生成路径", path_id)
             try:
-                # 准备参数
-                subject = subject_area or "编程与开发"  # 默认主题
-                path_name = f"Learning Path {path_id}"  # 默认路径名
-                level = target_level or "beginner"      # 默认级别
-
-                # 使用AI生成学习路径
-                ai_path = await ai_service.generate_learning_analysis({
-                    "user_id": str(path_id),
-                    "study_time": "0",
-                    "completion_rate": "0",
-                    "interactions": "0",
-                    "content_types": [subject],
-                    "learning_goals": [f"Master {subject} at {level} level"],
-                    "subject_area": subject,
-                    "target_level": level
-                })
-
-                # 转换AI生成的路径为响应格式
-                path_content = []
-                if "recommendations" in ai_path and ai_path["recommendations"]:
-                    for i, rec in enumerate(ai_path["recommendations"], 1):
-                        content_type = "video" if "watch" in rec.lower() or "video" in rec.lower() else "interactive"
-                        path_content.append({
-                            "id": i,
-                            "title": f"Step {i}",
-                            "description": rec,
-                            "content_type": content_type,
-                            "subject": subject,
-                            "difficulty_level": 1 if level == "beginner" else 2 if level == "intermediate" else 3
-                        })
-
-                return {
-                    "id": path_id,
-                    "title": f"{subject} Learning Path",
-                    "description": ai_path.get("behavior_patterns", {}).get("study_consistency", "A customized learning path"),
-                    "subject": subject,
-                    "difficulty_level": 1 if level == "beginner" else 2 if level == "intermediate" else 3,
-                    "estimated_hours": 25,
-                    "contents": path_content,
-                    "metadata": {
-                        "goals": ai_path.get("strengths", []),
-                        "prerequisites": [],
-                        "difficulty": level
-                    },
-                    "user_progress": {
-                        "overall_progress": 0,
-                        "content_progress": {},
-                        "enrolled_at": None
-                    } if user_id else None
-                }
+                # 需要调用大模型时才占用 llm 类的执行槽
+                async with llm_admission(request):
+                    path = await get_or_generate_path(db, subject_area, target_level)
+            except AdmissionRejected as e:
+                raise admission_rejected_error(e)
             except Exception as e:
-                logger.error(f"AI生成学习路径失败: {str(e)}")
+                logger.error("AI生成学习路径失败: %s", e)
                 raise HTTPException(
                     status_code=500,
                     detail=f"生成学习路径失败: {str(e)}"
                 )
         
-        # 获取路径内容
-        contents = []
-        for content in path.contents:
-            contents.append({
-                "id": content.id,
-                "title": content.title,
-                "description": content.description,
-                "content_type": content.content_type,
-                "subject": content.subject,
-                "difficulty_level": content.difficulty_level
-            })
+        # 获取路径骨架（与用户无关，按版本号缓存）
+        skeleton = get_path_skeleton(db, path)
         
-        # 如果提供了用户ID，获取用户在此路径上的进度
+        # 请求了进度时，获取用户在此路径上的进度
         user_progress = None
-        if user_id:
+        if fieldset.wants("progress"):
             enrollment = (
                 db.query(PathEnrollment)
                 .filter(
                     PathEnrollment.user_id == user_id,
-                    PathEnrollment.path_id == path_id
+                    PathEnrollment.path_id == path.id
                 )
                 .first()
             )
             if enrollment:
                 user_progress = {
                     "overall_progress": enrollment.progress,
-                    "content_progress": enrollment.content_progress or {},
+                    "content_progress": get_content_progress_map(db, enrollment.id),
                     "enrolled_at": enrollment.enrolled_at
                 }
         
         # 组装响应
-        return {
-            "id": path.id,
-            "title": path.title,
-            "description": path.description,
-            "subject": path.subject,
-            "difficulty_level": path.difficulty_level,
-            "estimated_hours": path.estimated_hours,
-            "metadata": path.path_metadata,
-            "contents": contents,
-            "user_progress": user_progress
-        }
+        result = fieldset.pick(skeleton)
+        if fieldset.wants("progress") or fields is None:
+            result["user_progress"] = user_progress
+        return result
+    except InvalidFieldsetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException as e:
         # 重新抛出HTTP异常
         raise e
     except Exception as e:
-        logger.exception(f"获取学习路径失败: {str(e)}")
+        logger.exception("获取学习路径失败: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"获取学习路径失败: {str(e)}"
         )
 
-@router.post("/{path_id}/progress")
-async def update_path_progress(
+@router.post("/{path_id}/progress", response_model=PathProgressResponse)
+def update_path_progress(
     path_id: int,
     progress_data: Dict[str, Any],
     user_id: int = Query(..., description="用户ID"),
     db: Session = Depends(get_db)
 ):
-    """更新学习路径进度和学习时间"""
+    """更新学习路径进度和学习时间
+
+    读取注册记录前先锁定，并发更新同一注册记录的请求依次执行，不会丢失更新；
+    未加锁的写入仍由版本号检测，冲突时重新读取后重试。
+    同步接口：在线程池中执行，等待锁和重试前的退避不阻塞事件循环。
+    """
     try:
-        # 检查注册记录是否存在
-        enrollment = (
-            db.query(PathEnrollment)
-            .filter(
-                PathEnrollment.user_id == user_id,
-                PathEnrollment.path_id == path_id
-            )
-            .first()
-        )
-        
-        if not enrollment:
-            raise HTTPException(
-                status_code=404,
-                detail=f"未找到用户ID {user_id} 在路径ID {path_id} 上的注册记录"
-            )
-        
         # 获取内容ID、进度和学习时间数据
         content_id = progress_data.get("content_id")
         progress = progress_data.get("progress", 0)
         study_time = progress_data.get("study_time", 0)  # 本次学习时长(分钟)
         session_start = progress_data.get("session_start")  # ISO格式时间字符串
         session_end = progress_data.get("session_end")  # ISO格式时间字符串
+        settings_changes = progress_data.get("personalization_settings")  # 只需提交修改的键
         
         if content_id:
             # 检查内容是否存在
             content = db.query(LearningContent).filter(LearningContent.id == content_id).first()
             if not content:
                 raise HTTPException(status_code=404, detail=f"内容ID {content_id} 不存在")
+        
+        def apply_update() -> PathEnrollment:
+            # 先锁定注册记录，并发写入同一注册记录的请求依次执行；再检查注册记录是否存在
+            lock_enrollments(db, user_id, [path_id])
+            enrollment = (
+                db.query(PathEnrollment)
+                .filter(
+                    PathEnrollment.user_id == user_id,
+                    PathEnrollment.path_id == path_id
+                )
+                .first()
+            )
             
-            # 更新特定内容的进度
-            content_progress = enrollment.content_progress or {}
-            content_progress[str(content_id)] = progress
-            enrollment.content_progress = content_progress
+            if not enrollment:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"未找到用户ID {user_id} 在路径ID {path_id} 上的注册记录"
+                )
             
-            # 更新学习时间记录
-            if study_time > 0:
-                # 更新内容学习时间
-                content_study_time = enrollment.content_study_time or {}
-                content_study_time[str(content_id)] = content_study_time.get(str(content_id), 0) + study_time
-                enrollment.content_study_time = content_study_time
+            if content_id:
+                # 更新特定内容的进度和学习时间（只写入该内容对应的一行）
+                record_content_progress(db, enrollment, content_id, progress, study_time)
                 
-                # 更新总学习时长(转换为小时)
-                enrollment.total_study_time = enrollment.total_study_time + (study_time / 60)
+                # 追加学习会话记录
+                if study_time > 0 and session_start and session_end:
+                    record_study_session(db, enrollment.id, content_id, session_start, session_end, study_time)
                 
-                # 添加学习会话记录
-                if session_start and session_end:
-                    study_sessions = enrollment.study_sessions or []
-                    study_sessions.append({
-                        "start_time": session_start,
-                        "end_time": session_end,
-                        "duration": study_time,
-                        "content_id": content_id
-                    })
-                    enrollment.study_sessions = study_sessions
-            
-            # 重新计算总体进度
-            if path_id in enrollment.content_progress:
-                total_progress = sum(enrollment.content_progress.values()) / len(enrollment.content_progress)
-                enrollment.progress = min(100, total_progress)
-            
-            # 更新最后活动时间
-            enrollment.last_activity_at = func.now()
+                # 重新计算总体进度
+                recompute_enrollment_progress(db, enrollment)
+                
+                # 更新最后活动时间
+                enrollment.last_activity_at = func.now()
+                db.flush()
             
-            db.commit()
-            db.refresh(enrollment)
+            if settings_changes:
+                patch_personalization_settings(db, enrollment, settings_changes)
+            return enrollment
+        
+        try:
+            enrollment = run_with_version_retry(db, apply_update)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        db.refresh(enrollment)
         
         return {
             "id": enrollment.id,
             "user_id": enrollment.user_id,
             "path_id": enrollment.path_id,
             "progress": enrollment.progress,
-            "content_progress": enrollment.content_progress or {},
-            "total_study_time": round(enrollment.total_study_time, 2),  # 返回学习总时长(小时)
-            "content_study_time": enrollment.content_study_time or {},
-            "last_activity_at": enrollment.last_activity_at
+            "content_progress": get_content_progress_map(db, enrollment.id),
+            "total_study_time": round(enrollment.total_study_time or 0, 2),  # 返回学习总时长(小时)
+            "content_study_time": get_content_study_time_map(db, enrollment.id),
+            "study_sessions": get_study_session_stats(db, enrollment.id),
+            "last_activity_at": enrollment.last_activity_at,
+            "personalization_settings": enrollment.personalization_settings
         }
     except HTTPException as e:
         # 重新抛出HTTP异常
         raise e
     except Exception as e:
         db.rollback()
-        logger.exception(f"更新路径进度失败: {str(e)}")
+        logger.exception("更新路径进度失败: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"更新路径进度失败: {str(e)}"
         )
-
-# 修改为同时支持GET和POST请求
-@router.get("/recommended", response_model=List[Dict[str, Any]])
-@router.post("/recommended", response_model=List[Dict[str, Any]])
-async def get_recommended_learning_paths(
-    request: Request,
-    user_id: int = Query(None, description="用户ID"),
-    db: Session = Depends(get_db)
-):
-    """获取推荐给用户的学习路径"""
-    try:
-        # 从POST请求体或查询参数获取用户ID
-        if request.method == "POST":
-            try:
-                body = await request.json()
-                if not user_id:
-                    user_id = body.get("user_id")
-            except:
-                pass
-                
-        if not user_id:
-            raise HTTPException(status_code=400, detail="必须提供用户ID")
-            
-        # 获取用户信息，包括学习偏好
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
-
-        # 使用AI服务生成推荐
-        try:
-            recommendations = await ai_service.generate_content_recommendations(user_id, limit=5)
-            paths = []
-            
-            for rec in recommendations:
-                content = rec["content"]
-                paths.append({
-                    "id": content["id"],
-                    "title": content["title"],
-                    "description": rec["explanation"],
-                    "subject": "programming",  # 可以根据内容类型设置
-                    "difficulty_level": 2,  # 可以从match_score推断
-                    "estimated_hours": 20,
-                    "created_at": None,
-                    "content_count": 5,
-                    "recommendation_reason": rec["approach_suggestion"]
-                })
-            
-            return paths
-            
-        except Exception as e:
-            logger.error(f"AI推荐生成失败: {str(e)}")
-            # 如果AI推荐失败，回退到数据库查询
-            
-            # 获取用户已注册的路径ID
-            enrolled_path_ids = [
-                enrollment.path_id for enrollment in 
-                db.query(PathEnrollment.path_id)
-                .filter(PathEnrollment.user_id == user_id)
-                .all()
-            ]
-            
-            # 查询未注册的路径
-            query = db.query(LearningPath)
-            if enrolled_path_ids:
-                query = query.filter(LearningPath.id.notin_(enrolled_path_ids))
-            
-            # 最多返回5条推荐
-            paths = query.limit(5).all()
-            
-            # 格式化响应
-            recommended = []
-            for path in paths:
-                content_count = len(path.contents) if path.contents else 0
-                
-                recommended.append({
-                    "id": path.id,
-                    "title": path.title,
-                    "description": path.description,
-                    "subject": path.subject,
-                    "difficulty_level": path.difficulty_level,
-                    "estimated_hours": path.estimated_hours,
-                    "created_at": path.created_at,
-                    "content_count": content_count
-                })
-            
-            return recommended
-            
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        logger.exception(f"获取推荐学习路径失败: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"获取推荐学习路径失败: {str(e)}"
-        )
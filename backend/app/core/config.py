@@ -28,12 +28,81 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")  # development, testing, production
     PRODUCTION: bool = ENVIRONMENT == "production"
     
+    # 日志设置
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json: 每条记录一行JSON；text: 文本格式
+    LOG_SAMPLING_RATES: str = os.getenv("LOG_SAMPLING_RATES", "")  # WARNING以下记录的采样率，如 "backend.access=0.1,app.services.ai_service=0.5"
+    LOG_MAX_MESSAGE_CHARS: int = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "4000"))  # 单条消息的最大字符数，超出部分截断
+    LOG_PAYLOAD_MAX_CHARS: int = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))  # 请求/响应等载荷的最大字符数
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # 等待写出的最大记录数，队列满时丢弃
+    
     # 测试相关配置
     USE_MOCK_DATA: bool = os.getenv("USE_MOCK_DATA", "False").lower() in ("true", "1", "t")
     
     # API设置
     API_TIMEOUT: float = float(os.getenv("API_TIMEOUT", "10.0"))  # API调用的默认超时时间(秒)
     
+    # 批量导入设置
+    BULK_INSERT_CHUNK_SIZE: int = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "500"))  # 每批插入的行数
+    BULK_MAX_LINE_BYTES: int = int(os.getenv("BULK_MAX_LINE_BYTES", str(1024 * 1024)))  # 单行最大字节数
+    BULK_MAX_ERRORS: int = int(os.getenv("BULK_MAX_ERRORS", "1000"))  # 响应中返回的最大错误条数
+    
+    # 学习路径骨架缓存
+    PATH_CACHE_MAX_ENTRIES: int = int(os.getenv("PATH_CACHE_MAX_ENTRIES", "1024"))  # 最多缓存的路径数
+    PATH_CACHE_MAX_BYTES: int = int(os.getenv("PATH_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))  # 缓存总大小上限(字节)
+    
+    # 交互数据汇总与归档
+    INTERACTION_ARCHIVE_PATH: str = os.getenv("INTERACTION_ARCHIVE_PATH", "./learning_path_archive.db")  # 冷数据归档库(SQLite)
+    INTERACTION_HOT_DAYS: int = int(os.getenv("INTERACTION_HOT_DAYS", "90"))  # 热库中保留的原始交互天数
+    ROLLUP_LOOKBACK_DAYS: int = int(os.getenv("ROLLUP_LOOKBACK_DAYS", "3"))  # 每次汇总时重算的最近天数，覆盖迟到的写入
+    
+    # 学习事件追加与投影
+    EVENT_APPEND_BATCH_SIZE: int = int(os.getenv("EVENT_APPEND_BATCH_SIZE", "200"))  # 缓冲满该数量即批量写入
+    EVENT_FLUSH_INTERVAL: float = float(os.getenv("EVENT_FLUSH_INTERVAL", "1.0"))  # 后台写入和投影的间隔(秒)
+    EVENT_PROJECTION_BATCH_SIZE: int = int(os.getenv("EVENT_PROJECTION_BATCH_SIZE", "1000"))  # 每批投影的事件数
+    
+    # 注册记录并发更新
+    ENROLLMENT_UPDATE_MAX_RETRIES: int = int(os.getenv("ENROLLMENT_UPDATE_MAX_RETRIES", "8"))  # 版本冲突时的最大尝试次数
+    
+    # 用户快照缓存
+    USER_CACHE_ENABLED: bool = os.getenv("USER_CACHE_ENABLED", "True").lower() in ("true", "1", "t")  # 关闭后每次都查询数据库
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "60"))  # 缓存有效期(秒)，兜底未经ORM的修改
+    USER_CACHE_MAX_ENTRIES: int = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))  # 缓存的最大用户数
+    
+    # 评估题库缓存
+    QUESTION_CATALOG_TTL: float = float(os.getenv("QUESTION_CATALOG_TTL", "300"))  # 缓存有效期(秒)，兜底其他进程新增的题目
+    
+    # 推荐学习路径缓存
+    RECOMMENDATION_CACHE_SOFT_TTL: float = float(os.getenv("RECOMMENDATION_CACHE_SOFT_TTL", "300"))  # 超过后返回旧结果并在后台刷新(秒)
+    RECOMMENDATION_CACHE_HARD_TTL: float = float(os.getenv("RECOMMENDATION_CACHE_HARD_TTL", "86400"))  # 超过后阻塞等待重新计算(秒)
+    RECOMMENDATION_CACHE_MAX_ENTRIES: int = int(os.getenv("RECOMMENDATION_CACHE_MAX_ENTRIES", "10000"))  # 缓存的最大用户数
+    RECOMMENDATION_FALLBACK_TTL: float = float(os.getenv("RECOMMENDATION_FALLBACK_TTL", "30"))  # AI失败时数据库回退结果的软TTL(秒)
+    
+    # 仪表盘聚合接口
+    DASHBOARD_SECTION_TIMEOUT: float = float(os.getenv("DASHBOARD_SECTION_TIMEOUT", "3"))  # 单个板块的超时时间(秒)，超时的板块返回空结果
+    
+    # 离线进度同步
+    PROGRESS_SYNC_MAX_EVENTS: int = int(os.getenv("PROGRESS_SYNC_MAX_EVENTS", "500"))  # 单次同步的最大事件数
+    
+    # 学习进度推送
+    PROGRESS_STREAM_HEARTBEAT: float = float(os.getenv("PROGRESS_STREAM_HEARTBEAT", "15"))  # 空闲时发送心跳的间隔(秒)
+    PROGRESS_STREAM_QUEUE_SIZE: int = int(os.getenv("PROGRESS_STREAM_QUEUE_SIZE", "100"))  # 每个推送流排队的最大通知数
+    
+    # 准入控制（按路由类别限制并发）
+    ADMISSION_CONTROL_ENABLED: bool = os.getenv("ADMISSION_CONTROL_ENABLED", "True").lower() in ("true", "1", "t")
+    ADMISSION_LLM_MAX_CONCURRENCY: int = int(os.getenv("ADMISSION_LLM_MAX_CONCURRENCY", "4"))  # 同时执行的大模型请求数
+    ADMISSION_LLM_MAX_QUEUE: int = int(os.getenv("ADMISSION_LLM_MAX_QUEUE", "16"))  # 排队等待的最大请求数
+    ADMISSION_LLM_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_LLM_QUEUE_TIMEOUT", "10"))  # 最长排队时间(秒)
+    ADMISSION_LLM_PER_USER_LIMIT: int = int(os.getenv("ADMISSION_LLM_PER_USER_LIMIT", "2"))  # 每个用户执行和排队的请求数上限
+    ADMISSION_CHEAP_MAX_CONCURRENCY: int = int(os.getenv("ADMISSION_CHEAP_MAX_CONCURRENCY", "64"))
+    ADMISSION_CHEAP_MAX_QUEUE: int = int(os.getenv("ADMISSION_CHEAP_MAX_QUEUE", "256"))
+    ADMISSION_CHEAP_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_CHEAP_QUEUE_TIMEOUT", "5"))
+    ADMISSION_CHEAP_PER_USER_LIMIT: int = int(os.getenv("ADMISSION_CHEAP_PER_USER_LIMIT", "32"))
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))  # 拒绝时建议客户端重试的间隔(秒)
+
+    # 监控指标（GET /metrics，Prometheus文本格式）
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "t")  # 关闭后不再记录请求和AI调用指标
+    
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> List[str]:
         if isinstance(v, str) and not v.startswith("["):
@@ -1,4 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+import logging
 import os
 # 确保导入顺序正确
 from app.models.user import User
@@ -6,12 +10,24 @@ from app.models.learning_assessment import AssessmentQuestion, LearningStyleAsse
 from app.models.content import LearningContent, ContentTag, UserContentInteraction
 from app.models.content_interaction import ContentInteraction
 from app.models.learning_path import LearningPath, PathEnrollment
+from app.models.system_marker import SystemMarker
+from app.models.interaction_rollup import InteractionDailyRollup
+from app.models.learning_event import LearningEvent
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.db.session import Base, engine
 
+logger = logging.getLogger(__name__)
+
+# 默认数据填充完成后写入的标记，修改默认数据时递增版本号
+SEED_MARKER_KEY = "seed_default_data"
+SEED_MARKER_VERSION = "1"
+
+# Alembic 配置文件路径
+ALEMBIC_INI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
 def init_assessment_questions(db: Session) -> None:
-    """Initialize default assessment questions"""
+    """Initialize default assessment questions（只写入会话，由调用方提交）"""
     
     questions = [
         {
@@ -72,95 +88,71 @@ def init_assessment_questions(db: Session) -> None:
         }
     ]
     
-    try:
-        # 检查是否已存在评估问题
-        existing_questions = db.query(AssessmentQuestion).all()
-        if existing_questions:
-            print(f"已有 {len(existing_questions)} 个评估问题，跳过初始化")
-            return
-            
-        # 添加新问题
-        for i, question_data in enumerate(questions, 1):
-            # 确保问题ID与测试脚本中使用的ID一致
-            db_question = AssessmentQuestion(**question_data)
-            db.add(db_question)
-            
-        db.commit()
-        print("评估问题初始化成功")
+    # 检查是否已存在评估问题
+    existing_count = db.query(AssessmentQuestion.id).count()
+    if existing_count:
+        logger.info("已有 %d 个评估问题，跳过初始化", existing_count)
+        return
         
-        # 验证问题是否已创建
-        created_questions = db.query(AssessmentQuestion).all()
-        print(f"已创建 {len(created_questions)} 个评估问题:")
-        for q in created_questions:
-            print(f"  - ID {q.id}: {q.category} ({q.question_text[:30]}...)")
-            
-    except Exception as e:
-        db.rollback()
-        print(f"Error initializing assessment questions: {e}")
-        raise
+    # 添加新问题
+    db.add_all(AssessmentQuestion(**question_data) for question_data in questions)
+    db.flush()
+    logger.info("已添加 %d 个评估问题", len(questions))
 
 def init_test_user(db: Session) -> None:
-    """Initialize test user for development"""
-    try:
-        test_user = {
-            "email": "test@example.com",
-            "hashed_password": "$2b$12$test_hash",  # Replace with proper hashed password
-            "full_name": "Test User"
-        }
+    """Initialize test user for development（只写入会话，由调用方提交）"""
+    if db.query(User.id).filter(User.email == "test@example.com").first():
+        logger.info("测试用户已存在，跳过初始化")
+        return
         
-        user = User(**test_user)
-        db.add(user)
-        db.commit()
-        print("Test user created successfully")
-    except Exception as e:
-        db.rollback()
-        print(f"Error creating test user: {e}")
-        raise
+    test_user = {
+        "email": "test@example.com",
+        "hashed_password": "$2b$12$test_hash",  # Replace with proper hashed password
+        "full_name": "Test User"
+    }
+    
+    db.add(User(**test_user))
+    db.flush()
+    logger.info("已添加测试用户")
 
 def init_learning_content(db: Session) -> None:
-    """Initialize test learning content for development"""
-    try:
-        # 检查是否已存在内容
-        existing_content = db.query(LearningContent).first()
-        if existing_content:
-            print(f"已存在学习内容，跳过初始化")
-            return
+    """Initialize test learning content for development（只写入会话，由调用方提交）"""
+    # 检查是否已存在内容
+    if db.query(LearningContent.id).first():
+        logger.info("已存在学习内容，跳过初始化")
+        return
             
-        # 首先创建一个标签
-        programming_tag = ContentTag(
-            name="Programming",
-            description="Programming related content"
-        )
-        db.add(programming_tag)
-        db.flush()  # 获取ID
-        
-        # 创建学习内容
-        content = LearningContent(
-            title="测试内容",
-            description="这是一个测试内容",
-            content_type="reading",
-            subject="programming",
-            difficulty_level=1,
-            content_data={"text": "这是测试内容的正文"},
-            # 确保添加亲和度字段的默认值
-            visual_affinity=50.0,
-            auditory_affinity=30.0,
-            kinesthetic_affinity=20.0,
-            reading_affinity=70.0,
-            # 不直接设置tags属性
-        )
-        db.add(content)
-        db.flush()  # 获取内容ID
-        
-        # 使用append方法添加标签
-        content.tags.append(programming_tag)
-        
-        db.commit()
-        print("测试学习内容创建成功")
-    except Exception as e:
-        db.rollback()
-        print(f"创建测试学习内容失败: {str(e)}")
-        raise
+    # 首先创建一个标签
+    programming_tag = ContentTag(
+        name="Programming",
+        description="Programming related content"
+    )
+    db.add(programming_tag)
+    db.flush()  # 获取ID
+    
+    # 创建学习内容
+    content = LearningContent(
+        title="测试内容",
+        description="这是一个测试内容",
+        content_type="reading",
+        subject="programming",
+        difficulty_level=1,
+        content_data={"text": "这是测试内容的正文"},
+        # 确保添加亲和度字段的默认值
+        visual_affinity=50.0,
+        auditory_affinity=30.0,
+        kinesthetic_affinity=20.0,
+        reading_affinity=70.0,
+        # 不直接设置tags属性
+    )
+    db.add(content)
+    db.flush()  # 获取内容ID
+    
+    # 使用append方法添加标签
+    content.tags.append(programming_tag)
+    
+    db.flush()
+    logger.info("已添加测试学习内容")
 
 def reset_db() -> None:
     """Reset database by removing and recreating it"""
@@ -191,8 +183,8 @@ def init_db(db: Session = None) -> None:
         # Reset database
         reset_db()
         
-        # Create new tables
-        create_tables()
+        # Create new tables（并标记为最新迁移版本，之后启动时不会被视为未受管理的数据库）
+        ensure_schema()
         
         # Create new database session if not provided
         if db is None:
@@ -200,9 +192,7 @@ def init_db(db: Session = None) -> None:
         
         try:
             # Initialize test data
-            init_test_user(db)
-            init_assessment_questions(db)
-            init_learning_content(db)
+            seed_default_data(db)
             
             print("Database initialized successfully")
         finally:
@@ -212,5 +202,118 @@ def init_db(db: Session = None) -> None:
         print(f"Error during database initialization: {e}")
         raise
 
+def get_alembic_config():
+    """不读取 alembic.ini 的日志配置（会覆盖应用的日志处理器），只指定迁移脚本目录"""
+    from alembic.config import Config
+    
+    config = Config()
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI_PATH), "alembic"))
+    return config
+
+def get_alembic_script_directory():
+    """获取Alembic迁移脚本目录"""
+    from alembic.script import ScriptDirectory
+    
+    return ScriptDirectory.from_config(get_alembic_config())
+
+def get_database_revision(bind: Engine) -> str:
+    """获取数据库当前的迁移版本号，未受Alembic管理时返回None"""
+    from alembic.runtime.migration import MigrationContext
+    
+    with bind.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+def ensure_schema(bind: Engine = None) -> bool:
+    """比较数据库与迁移脚本的版本，仅在需要时建表或升级
+
+    - 版本一致：不做任何操作
+    - 空数据库：按模型建表并标记为最新版本。基础迁移 bd152e2f5817 不包含 users 等表，
+      不能从空库执行 alembic upgrade head，建表并标记是唯一支持的初始化方式
+    - 受Alembic管理的旧版本：执行 alembic upgrade head
+    - 已有数据表但未受Alembic管理、或版本号不在迁移脚本中：无法判断结构，启动失败
+    返回是否修改了数据库结构。
+    """
+    from alembic import command
+    from alembic.runtime.migration import MigrationContext
+    
+    bind = bind or engine
+    script_directory = get_alembic_script_directory()
+    head = script_directory.get_current_head()
+    current = get_database_revision(bind)
+    
+    if current == head:
+        logger.info("数据库结构已是最新版本 %s", head)
+        return False
+    
+    if current is None:
+        tables = set(inspect(bind).get_table_names()) - {"alembic_version"}
+        if tables:
+            raise RuntimeError(
+                f"数据库已有数据表但未受迁移管理，无法确定结构版本: {sorted(tables)}。"
+                "请备份后重新创建数据库（python -m app.db.init_db），"
+                "或确认结构后执行 alembic stamp <对应版本> 再执行 alembic upgrade head"
+            )
+        logger.info("空数据库，按模型建表并标记为版本 %s", head)
+        with bind.begin() as connection:
+            Base.metadata.create_all(bind=connection)
+            MigrationContext.configure(connection).stamp(script_directory, head)
+        return True
+    
+    try:
+        script_directory.get_revision(current)
+    except Exception as e:
+        raise RuntimeError(f"数据库版本 {current} 不在迁移脚本中，请检查部署的代码版本") from e
+    
+    logger.info("数据库版本 %s 落后于迁移脚本版本 %s，执行 alembic upgrade head", current, head)
+    config = get_alembic_config()
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+    return True
+
+def seed_default_data(db: Session) -> bool:
+    """填充默认数据，由标记行保证所有进程只执行一次
+
+    返回本次是否执行了填充。
+    """
+    if db.get(SystemMarker, SEED_MARKER_KEY) is not None:
+        logger.info("默认数据已填充，跳过初始化")
+        return False
+    
+    try:
+        # 先写入标记：并发启动的其他进程会因主键冲突而放弃填充
+        db.add(SystemMarker(key=SEED_MARKER_KEY, value=SEED_MARKER_VERSION))
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        logger.info("默认数据正在由其他进程填充，跳过初始化")
+        return False
+    
+    try:
+        # 各初始化函数只写入会话，与标记行在同一事务中提交
+        init_test_user(db)
+        init_assessment_questions(db)
+        init_learning_content(db)
+        db.commit()
+        logger.info("默认数据填充完成")
+        return True
+    except Exception:
+        # 填充失败时移除标记，下次启动重试
+        db.rollback()
+        db.query(SystemMarker).filter(SystemMarker.key == SEED_MARKER_KEY).delete()
+        db.commit()
+        raise
+
+def prepare_database(bind: Engine = None) -> None:
+    """应用启动时准备数据库：检查结构并按需填充默认数据"""
+    bind = bind or engine
+    ensure_schema(bind)
+    
+    db = sessionmaker(autocommit=False, autoflush=False, bind=bind)()
+    try:
+        seed_default_data(db)
+    finally:
+        db.close()
+
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
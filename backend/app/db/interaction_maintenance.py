@@ -0,0 +1,53 @@
+"""
+交互数据维护任务：按日汇总与冷数据归档
+
+用法:
+    python -m app.db.interaction_maintenance rollup [--through YYYY-MM-DD]
+    python -m app.db.interaction_maintenance archive [--before YYYY-MM-DD] [--archive-path PATH] [--vacuum]
+
+rollup 适合每天定时执行一次；archive 会先确保汇总是最新的，再把冷数据移到归档库。
+"""
+import argparse
+from datetime import date
+from app.db.session import SessionLocal
+import app.models.user  # 确保所有模型的关系映射已加载
+from app.services.interaction_rollup_service import archive_cold_interactions, run_daily_rollup
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="交互数据汇总与归档")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rollup_parser = subparsers.add_parser("rollup", help="汇总截至指定日期(默认昨天)的交互数据")
+    rollup_parser.add_argument("--through", type=date.fromisoformat)
+
+    archive_parser = subparsers.add_parser("archive", help="将冷数据移到归档库")
+    archive_parser.add_argument("--before", type=date.fromisoformat)
+    archive_parser.add_argument("--archive-path")
+    archive_parser.add_argument("--batch-size", type=int, default=5000)
+    archive_parser.add_argument("--vacuum", action="store_true", help="归档后收缩热库文件")
+
+    args = parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        if args.command == "rollup":
+            written = run_daily_rollup(db, through=args.through)
+            print(f"汇总完成，写入 {written} 行")
+        else:
+            run_daily_rollup(db)
+            moved = archive_cold_interactions(
+                db,
+                before=args.before,
+                archive_path=args.archive_path,
+                batch_size=args.batch_size,
+                vacuum=args.vacuum
+            )
+            print(f"归档完成: {moved}")
+    except Exception as e:
+        db.rollback()
+        print(f"交互数据维护失败: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+学习事件投影维护
+
+用法:
+    python -m app.db.learning_events project    # 处理高水位之后的事件
+    python -m app.db.learning_events rebuild    # 清空读模型并从全部事件重建（建议在低峰期执行）
+    python -m app.db.learning_events backfill   # 把事件表出现之前的交互数据转换为事件，只需执行一次
+"""
+import argparse
+from app.db.session import SessionLocal
+import app.models.user  # 确保所有模型的关系映射已加载
+from app.services.learning_event_service import backfill_events, project_pending, rebuild_projections
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="学习事件投影维护")
+    parser.add_argument("command", choices=["project", "rebuild", "backfill"])
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "project":
+            print(f"投影完成，处理 {project_pending(db)} 个事件")
+        elif args.command == "rebuild":
+            print(f"重建完成，重放 {rebuild_projections(db)} 个事件")
+        else:
+            print(f"回填完成，写入 {backfill_events(db)} 个事件")
+    except Exception as e:
+        db.rollback()
+        print(f"学习事件维护失败: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+将 PathEnrollment 的旧版JSON进度字段迁移到 enrollment_content_progress / study_session 表
+
+用法: python -m app.db.migrate_enrollment_progress [batch_size]
+"""
+import sys
+from app.db.session import SessionLocal
+from app.services.enrollment_progress_service import migrate_enrollment_json
+
+def migrate(batch_size: int = 500) -> None:
+    """分批迁移所有注册记录的JSON进度数据"""
+    db = SessionLocal()
+    try:
+        migrated = migrate_enrollment_json(db, batch_size=batch_size)
+        print(f"迁移完成，共迁移 {migrated} 条注册记录")
+    except Exception as e:
+        db.rollback()
+        print(f"迁移注册进度数据失败: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
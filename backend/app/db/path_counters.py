@@ -0,0 +1,36 @@
+"""
+学习路径冗余计数的一致性检查与修复
+
+用法:
+    python -m app.db.path_counters check     # 列出计数与源表不一致的路径
+    python -m app.db.path_counters repair    # 按源表重写不一致的计数
+"""
+import argparse
+from app.db.session import SessionLocal
+import app.models.user  # 确保所有模型的关系映射已加载
+from app.services.path_counter_service import check_path_counters, repair_path_counters
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="学习路径计数检查与修复")
+    parser.add_argument("command", choices=["check", "repair"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "check":
+            mismatches = check_path_counters(db, batch_size=args.batch_size)
+            for item in mismatches:
+                print(f"路径 {item['path_id']}: {item['counters']}")
+            print(f"检查完成，{len(mismatches)} 条路径计数不一致")
+        else:
+            print(f"修复完成，共修复 {repair_path_counters(db, batch_size=args.batch_size)} 条路径计数")
+    except Exception as e:
+        db.rollback()
+        print(f"路径计数维护失败: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+基于SQLAlchemy事件的查询计数器
+
+在 count_queries() 上下文中（例如一次HTTP请求）统计所有引擎执行的SQL语句数量和耗时，
+用于发现N+1查询。
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryStats:
+    """单个作用域内的查询统计"""
+    __slots__ = ("count", "total_time", "statements", "record_statements")
+
+    def __init__(self, record_statements: bool = False):
+        self.count = 0
+        self.total_time = 0.0  # 秒
+        self.statements: List[str] = []
+        self.record_statements = record_statements
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        if self.record_statements:
+            self.statements.append(statement)
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def get_current_query_stats() -> Optional[QueryStats]:
+    """获取当前作用域的查询统计，不在计数作用域内时返回None"""
+    return _current_stats.get()
+
+@contextmanager
+def count_queries(record_statements: bool = False) -> Iterator[QueryStats]:
+    """在上下文内统计查询数量
+
+    统计对象通过contextvar传递，FastAPI在线程池中执行的同步端点和依赖项也会被计入。
+    """
+    stats = QueryStats(record_statements)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+@contextmanager
+def count_engine_queries(engine: Engine, record_statements: bool = False) -> Iterator[QueryStats]:
+    """统计指定引擎上的所有查询，不依赖调用方的上下文（适用于测试客户端等跨线程场景）"""
+    stats = QueryStats(record_statements)
+    # 开始时间记录在语句的执行上下文上，同一引擎上嵌套的统计各用一个属性名
+    attribute = f"_engine_query_start_{id(stats)}"
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        _mark_start(context, attribute)
+
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, _elapsed(context, attribute))
+
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+        event.remove(engine, "after_cursor_execute", _after)
+
+def _mark_start(context, attribute: str) -> None:
+    """在执行上下文上记录语句开始时间
+
+    不使用连接上的栈：执行失败的语句不会触发 after_cursor_execute，栈中会残留开始时间；
+    执行上下文随语句结束被回收，失败时不会遗留任何状态。
+    """
+    if context is not None:
+        setattr(context, attribute, time.perf_counter())
+
+def _elapsed(context, attribute: str) -> float:
+    """语句耗时（秒），没有执行上下文或开始时间时为0"""
+    start = getattr(context, attribute, None)
+    return time.perf_counter() - start if start is not None else 0.0
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        _mark_start(context, "_query_start_time")
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.record(statement, _elapsed(context, "_query_start_time"))
@@ -0,0 +1,28 @@
+"""
+从 user_content_interactions / path_enrollments 重建 user_activity_summary 汇总表
+
+用法: python -m app.db.rebuild_activity_summary [batch_size]
+"""
+import sys
+from app.db.session import SessionLocal
+from app.services.activity_summary_service import rebuild_activity_summaries
+from app.services.interaction_rollup_service import get_rollup_watermark, run_daily_rollup
+
+def rebuild(batch_size: int = 500) -> None:
+    """分批重建所有用户的活动汇总"""
+    db = SessionLocal()
+    try:
+        # 交互统计读取按日汇总，先把上次汇总后修改过的天重算一遍
+        if get_rollup_watermark(db):
+            run_daily_rollup(db)
+        rebuilt = rebuild_activity_summaries(db, batch_size=batch_size)
+        print(f"重建完成，共写入 {rebuilt} 条用户活动汇总")
+    except Exception as e:
+        db.rollback()
+        print(f"重建用户活动汇总失败: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -1,62 +1,211 @@
 """
 Logging configuration for the application
+
+日志在请求处理路径上只做两件事：按日志记录器的采样率决定是否保留记录，然后放入内存队列。
+格式化消息、序列化为JSON、写文件和控制台都在后台监听线程（QueueListener）中完成，
+磁盘IO和格式化不会阻塞事件循环。
+
+- 消息延迟格式化：使用 logger.info("... %s", value) 的参数形式，参数为不可变值或 LazyPayload 时
+  在监听线程中才拼接消息；其他参数（可能在之后被修改的对象）在放入队列前格式化。
+- 载荷日志使用 LazyPayload 包装，序列化同样在监听线程中进行，并截断到 LOG_PAYLOAD_MAX_CHARS。
+- LOG_SAMPLING_RATES 按日志记录器名称设置 WARNING 以下记录的采样率，例如 "backend.access=0.1"。
+- 每条记录输出为一行JSON，通过 extra 传入的字段作为独立的键。
 """
+import atexit
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+# 日志目录固定在 backend/logs，与启动时的工作目录无关
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
+
+# LogRecord 自带的属性，其余属性视为通过 extra 传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "requestId"}
+
+def truncate(text: str, limit: int) -> str:
+    """超过 limit 个字符时截断，并注明省略的字符数"""
+    if limit and len(text) > limit:
+        return f"{text[:limit]}...(省略{len(text) - limit}字符)"
+    return text
+
+class LazyPayload:
+    """延迟序列化的日志载荷：格式化消息时才转为JSON并截断
+
+    记录被采样丢弃或级别未启用时不会序列化。传入日志后不应再修改该对象。
+    """
+    __slots__ = ("payload", "max_chars")
+
+    def __init__(self, payload: Any, max_chars: Optional[int] = None):
+        self.payload = payload
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        if isinstance(self.payload, str):
+            text = self.payload
+        else:
+            text = json.dumps(self.payload, ensure_ascii=False, default=str)
+        return truncate(text, self.max_chars or settings.LOG_PAYLOAD_MAX_CHARS)
+
+# 可以留到监听线程再格式化的参数类型
+_DEFERRABLE_ARGS = (str, int, float, bool, bytes, type(None), LazyPayload)
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出为一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "requestId", "-"),
+            "message": truncate(record.getMessage(), settings.LOG_MAX_MESSAGE_CHARS)
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """文本格式，消息同样按 LOG_MAX_MESSAGE_CHARS 截断"""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message, settings.LOG_MAX_MESSAGE_CHARS)
+        if not hasattr(record, "requestId"):
+            record.requestId = "-"
+        return super().formatMessage(record)
+
+class SamplingFilter(logging.Filter):
+    """按日志记录器名称对 WARNING 以下的记录采样，使用最长的前缀匹配，未配置的记录全部保留"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+def parse_sampling_rates(value: str) -> Dict[str, float]:
+    """解析 "logger=rate,logger=rate" 格式的采样率配置"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+class DeferredQueueHandler(QueueHandler):
+    """放入队列前不格式化消息的 QueueHandler
+
+    标准的 QueueHandler 在调用线程中格式化消息；这里只在参数可能被之后的代码修改时才提前格式化，
+    异常堆栈在调用线程中转为文本（之后栈帧可能已经变化）。队列满时丢弃记录并计数，不阻塞调用方。
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.args and not (
+            isinstance(record.args, tuple) and all(isinstance(arg, _DEFERRABLE_ARGS) for arg in record.args)
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_queue_handler: Optional[DeferredQueueHandler] = None
+_listener: Optional[QueueListener] = None
 
 def setup_logging():
-    """Setup logging configuration"""
+    """Setup logging configuration：根日志记录器只挂载队列处理器，文件和控制台处理器由监听线程调用"""
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+
     # 创建logs目录（如果不存在）
-    logs_dir = os.path.join("backend", "logs")
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
-    
-    # 配置根日志记录器
-    root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    
+    os.makedirs(LOGS_DIR, exist_ok=True)
+
     # 配置格式化器
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - [%(requestId)s] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter(
+            fmt='%(asctime)s - %(name)s - %(levelname)s - [%(requestId)s] %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
     # 配置文件处理器
     file_handler = RotatingFileHandler(
-        filename=os.path.join(logs_dir, "backend_api.log"),
+        filename=os.path.join(LOGS_DIR, "backend_api.log"),
         maxBytes=10*1024*1024,  # 10MB
         backupCount=5,
         encoding="utf-8"
     )
-    file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
-    
+
     # 配置控制台处理器
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
-    
-    # 添加处理器
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
-    
-    # 配置特定模块的日志级别
-    logging.getLogger('app.services.ai_service').setLevel(logging.DEBUG)
-    logging.getLogger('app.api').setLevel(logging.INFO)
-    
-    # 配置请求ID过滤器
-    class RequestIdFilter(logging.Filter):
-        def filter(self, record):
-            if not hasattr(record, 'requestId'):
-                record.requestId = '-'
-            return True
-    
-    # 添加请求ID过滤器到所有处理器
-    request_id_filter = RequestIdFilter()
-    file_handler.addFilter(request_id_filter)
-    console_handler.addFilter(request_id_filter)
-    
+
+    # 根日志记录器只把记录放入队列
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = DeferredQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(parse_sampling_rates(settings.LOG_SAMPLING_RATES)))
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(settings.LOG_LEVEL)
+    root_logger.addHandler(_queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
     # 配置其他日志设置
     logging.getLogger('uvicorn.access').handlers = []
-    logging.getLogger('uvicorn.error').handlers = []
\ No newline at end of file
+    logging.getLogger('uvicorn.error').handlers = []
+
+def shutdown_logging():
+    """写出队列中剩余的记录并停止监听线程"""
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _queue_handler = _listener = None
@@ -1,44 +1,66 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 import traceback
-import uvicorn
 import time
 import os
 
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.db.session import engine, Base
-from app.db.init_db import init_db
-from app.db.session import get_db
+from app.db.session import engine
+from app.db.init_db import prepare_database
+from app.db.query_counter import count_queries
+from app.services.admission_control import admission_controllers, admission_middleware
+from app.services.learning_event_service import flush_and_project, run_event_pipeline
+from app.services.metrics import http_requests_in_flight, metrics_registry, observe_http_request
 from app.routers import analytics
+from app.routers import dashboard
+from app.routers import progress_sync
 from app.api.v1.endpoints import assessment as assessment_v1
 from app.api.v1.endpoints import content as content_v1
 from app.routers.learning_path import router as learning_path_router
 from app.api.v1.endpoints import learning_path
 from app.logging_config import setup_logging
+from app.utils.responses import APIJSONResponse
 from app.routers import users
 from app.routers import user_progress  # 新增用户进度路由模块
 
 # 配置日志
 setup_logging()
 logger = logging.getLogger("backend")
+access_logger = logging.getLogger("backend.access")
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时检查数据库结构并按需填充默认数据，关闭时释放连接池"""
+    start_time = time.time()
+    # 数据库初始化是同步阻塞操作，放到线程中执行
+    await asyncio.to_thread(prepare_database)
+    logger.info("数据库准备完成 (took: %.3fs)", time.time() - start_time)
+    # 学习事件的批量写入与投影在后台定期执行
+    event_task = asyncio.create_task(run_event_pipeline())
+    yield
+    event_task.cancel()
+    try:
+        await asyncio.to_thread(flush_and_project)
+    except Exception as e:
+        logger.error("关闭时写入学习事件失败: %s", e)
+    engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="学习路径平台的后端API服务",
     version="0.1.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=APIJSONResponse,
+    lifespan=lifespan
 )
 
-db = next(get_db())
-
-# Initialize database with default data
-init_db(db)
+# 准入控制：按路由类别限制并发，过载时降级或返回503（在请求日志中间件内层执行）
+app.middleware("http")(admission_middleware)
 
 # 添加日志中间件
 @app.middleware("http")
@@ -48,31 +70,49 @@ async def add_request_id(request: Request, call_next):
     # 将请求ID添加到请求对象
     request.state.request_id = request_id
     
-    # 记录请求信息
-    logger.info(f"Request: {request.method} {request.url}", extra={"requestId": request_id})
+    # 记录请求信息（参数形式，只在监听线程中格式化）
+    logger.debug("Request: %s %s", request.method, request.url.path, extra={"requestId": request_id})
     
+    # 处理请求，并统计本次请求执行的SQL查询
+    start_time = time.perf_counter()
+    http_requests_in_flight.inc()
     try:
-        # 处理请求
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
+        with count_queries() as query_stats:
+            request.state.query_stats = query_stats
+            response = await call_next(request)
+        process_time = time.perf_counter() - start_time
+        observe_http_request(request, response.status_code, process_time, query_stats)
         
-        # 记录响应信息
-        logger.info(
-            f"Response: {response.status_code} (took: {process_time:.3f}s)",
-            extra={"requestId": request_id}
+        # 每个请求一条访问日志，字段以结构化形式输出，可通过 LOG_SAMPLING_RATES 对 backend.access 采样
+        access_logger.info(
+            "%s %s -> %s (took: %.3fs, queries: %d, db: %.3fs)",
+            request.method, request.url.path, response.status_code,
+            process_time, query_stats.count, query_stats.total_time,
+            extra={
+                "requestId": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration_ms": round(process_time * 1000, 2),
+                "queries": query_stats.count,
+                "db_ms": round(query_stats.total_time * 1000, 2)
+            }
         )
         
-        # 添加请求ID到响应头
+        # 添加请求ID和查询统计到响应头
         response.headers["X-Request-ID"] = request_id
+        response.headers["X-Query-Count"] = str(query_stats.count)
         return response
         
     except Exception as e:
+        observe_http_request(request, 500, time.perf_counter() - start_time, getattr(request.state, "query_stats", None))
         logger.exception(
-            f"Request failed: {str(e)}",
+            "Request failed: %s %s: %s", request.method, request.url.path, str(e),
             extra={"requestId": request_id}
         )
         raise
+    finally:
+        http_requests_in_flight.dec()
 
 # 添加CORS middleware
 app.add_middleware(
@@ -95,7 +135,11 @@ async def api_root():
             "assessment": "/api/v1/assessment",
             "content": "/api/v1/content",
             "learning_paths": "/api/v1/learning-paths",
-            "analytics": "/api/v1/analytics"
+            "analytics": "/api/v1/analytics",
+            "dashboard": "/api/v1/dashboard",
+            "progress_sync": "/api/v1/progress/sync",
+            "progress_stream": "/api/v1/progress/stream/{user_id}",
+            "metrics": "/metrics"
         }
     }
 
@@ -105,14 +149,44 @@ async def health_check():
     """健康检查端点"""
     return {"status": "ok", "api_version": "1.0"}
 
+# 缓存统计端点
+@app.get("/cache-stats")
+async def cache_stats():
+    """进程内缓存的命中率和容量统计"""
+    from app.services.path_cache import path_skeleton_cache
+    from app.services.progress_push import progress_broker
+    from app.services.question_catalog import question_catalog
+    from app.services.recommendation_cache import recommendation_cache
+    from app.services.user_cache import user_cache
+    
+    return {
+        "path_skeleton": path_skeleton_cache.stats(),
+        "user": user_cache.stats(),
+        "question_catalog": question_catalog.stats(),
+        "recommendation": recommendation_cache.stats(),
+        "progress_push": progress_broker.stats()
+    }
+
+# 准入控制统计端点
+@app.get("/admission-stats")
+async def admission_stats():
+    """各路由类别的并发、队列深度、等待时间和拒绝次数"""
+    return {name: controller.stats() for name, controller in admission_controllers.items()}
+
+# 监控指标端点
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus文本格式的监控指标"""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # 测试ZhipuAI API连接端点
 @app.get("/api-status")
 async def api_status():
     """检查智谱API连接状态"""
-    from app.services.ai_service import AIService
+    from app.services.ai_service import get_ai_service
     
     try:
-        api_service = AIService()
+        api_service = get_ai_service()
         has_client = bool(api_service.client)
         
         return {
@@ -123,7 +197,7 @@ async def api_status():
             "environment": settings.ENVIRONMENT
         }
     except Exception as e:
-        logger.error(f"检查API状态时发生错误: {str(e)}")
+        logger.error("检查API状态时发生错误: %s", e)
         return {
             "error": str(e),
             "environment": settings.ENVIRONMENT
@@ -138,20 +212,22 @@ app.include_router(analytics.router)
 app.include_router(learning_path_router)
 app.include_router(users.router)
 app.include_router(user_progress.router)  # 注册用户进度路由
+app.include_router(dashboard.router)
+app.include_router(progress_sync.router)
 
 # 添加路由器注册日志
-logger.info(f"已注册路由: {[route.path for route in app.routes]}")
+logger.info("已注册路由: %s", [route.path for route in app.routes])
 
 # 添加全局异常处理
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     request_id = getattr(request.state, "request_id", "-")
     logger.error(
-        f"全局异常: {str(exc)}",
+        "全局异常: %s", exc,
         extra={"requestId": request_id}
     )
     logger.error(
-        f"错误堆栈:\n{traceback.format_exc()}",
+        "错误堆栈:\n%s", traceback.format_exc(),
         extra={"requestId": request_id}
     )
     
@@ -173,5 +249,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 if __name__ == "__main__":
+    import uvicorn
+    
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
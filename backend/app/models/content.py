@@ -1,11 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Text, Boolean, Table
-from sqlalchemy.orm import relationship
+from itertools import chain
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Text, Boolean, Table, Index
+from sqlalchemy import Select, event, inspect, select, update
+from sqlalchemy.orm import Session, column_property, deferred, relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
 # 添加导入以解决循环引用问题
 import app.models.content_interaction
 import app.models.learning_path
-from app.models.learning_path import path_content_association
+from app.models.learning_path import (
+    ENROLLMENT_PROGRESS_SUMS,
+    LearningPath,
+    PathEnrollment,
+    path_content_association,
+    rebuild_enrollment_progress_sums
+)
+from app.models.user_activity_summary import apply_summary_delta, attribute_change, values_before_delete
 
 # Association table for many-to-many relationship between content and tags
 content_tag_association = Table(
@@ -24,13 +33,14 @@ class LearningContent(Base):
     description = Column(String)
     content_type = Column(String, nullable=False)  # video, reading, interactive, etc.
     content_url = Column(String)
-    content_data = Column(JSON)  # 存储额外的内容数据
+    # 较大的JSON列延迟加载：读取实体时不带出，首次访问属性时单独查询，批量读取请用 read_models 中的投影
+    content_data = deferred(Column(JSON))  # 存储额外的内容数据
     
     subject = Column(String)  # 学科/主题分类
     difficulty_level = Column(Integer, default=2)  # 1-5级难度
     estimated_minutes = Column(Integer)  # 预计完成时间（分钟）
     
-    resources = Column(JSON)  # 相关学习资源
+    resources = deferred(Column(JSON))  # 相关学习资源
     
     # 添加这些字段以匹配API中的使用，并提供默认值
     visual_affinity = Column(Float, default=0.0)  # 添加默认值0.0
@@ -55,10 +65,179 @@ class LearningContent(Base):
     content_interactions = relationship("app.models.content_interaction.ContentInteraction", back_populates="content")
     # 添加标签关系
     tags = relationship("ContentTag", secondary=content_tag_association, back_populates="contents")
+
+    __table_args__ = (
+        # 内容列表按 (created_at, id) 键集分页
+        Index("ix_learning_contents_created", "created_at", "id"),
+    )
     
     def __repr__(self):
         return f"<LearningContent {self.id}: {self.title}>"
 
+# 出现在路径骨架中的内容属性
+SKELETON_CONTENT_ATTRIBUTES = ("title", "description", "content_type", "subject", "difficulty_level", "resources")
+
+def _bump_paths_containing(connection, content_id: int) -> None:
+    """递增包含该内容的所有路径的骨架版本号"""
+    connection.execute(
+        update(LearningPath)
+        .where(LearningPath.id.in_(
+            select(path_content_association.c.path_id)
+            .where(path_content_association.c.content_id == content_id)
+        ))
+        .values(skeleton_version=LearningPath.skeleton_version + 1)
+    )
+
+@event.listens_for(LearningContent, "after_update")
+def _content_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in SKELETON_CONTENT_ATTRIBUTES):
+        _bump_paths_containing(connection, target.id)
+    if state.attrs.estimated_minutes.history.has_changes():
+        refresh_path_counters(
+            connection,
+            select(path_content_association.c.path_id).where(path_content_association.c.content_id == target.id),
+            names=("total_estimated_minutes",)
+        )
+
+@event.listens_for(LearningContent, "before_delete")
+def _content_deleted(mapper, connection, target):
+    _bump_paths_containing(connection, target.id)
+
+# LearningPath 上的冗余计数列
+CONTENT_COUNTERS = ("content_count", "required_content_count", "total_estimated_minutes")
+PATH_COUNTERS = CONTENT_COUNTERS + ("enrollment_count", "completion_count")
+
+def path_counter_expressions() -> dict:
+    """每个计数列按源表计算的相关子查询，与 learning_paths 表关联"""
+    association = path_content_association
+    return {
+        "content_count": (
+            select(func.count())
+            .where(association.c.path_id == LearningPath.id)
+            .scalar_subquery()
+        ),
+        "required_content_count": (
+            select(func.count())
+            .where(association.c.path_id == LearningPath.id, association.c.required.isnot(False))
+            .scalar_subquery()
+        ),
+        "total_estimated_minutes": (
+            select(func.coalesce(func.sum(LearningContent.estimated_minutes), 0))
+            .where(association.c.path_id == LearningPath.id, association.c.content_id == LearningContent.id)
+            .scalar_subquery()
+        ),
+        "enrollment_count": (
+            select(func.count(PathEnrollment.id))
+            .where(PathEnrollment.path_id == LearningPath.id)
+            .scalar_subquery()
+        ),
+        "completion_count": (
+            select(func.count(PathEnrollment.id))
+            .where(PathEnrollment.path_id == LearningPath.id, PathEnrollment.progress >= 100)
+            .scalar_subquery()
+        )
+    }
+
+def refresh_path_counters(connection, path_ids, names=CONTENT_COUNTERS, bump_skeleton: bool = False) -> None:
+    """按源表重新计算指定路径的计数列；path_ids 为ID集合或返回路径ID的子查询，None表示全部路径
+
+    bump_skeleton 为True时在同一条UPDATE中递增骨架版本号（内容列表发生了变化）。
+    """
+    if path_ids is not None and not isinstance(path_ids, Select):
+        path_ids = [path_id for path_id in path_ids if path_id is not None]
+        if not path_ids:
+            return
+    expressions = path_counter_expressions()
+    values = {name: expressions[name] for name in names}
+    if bump_skeleton:
+        values["skeleton_version"] = LearningPath.skeleton_version + 1
+    stmt = update(LearningPath).values(values)
+    if path_ids is not None:
+        stmt = stmt.where(LearningPath.id.in_(path_ids))
+    connection.execute(stmt)
+
+# 路径内容关联的变化：ORM集合修改和通过会话执行的关联表 INSERT/DELETE
+_STALE_PATHS_KEY = "path_counters_stale"
+
+def _mark_paths_stale(session, paths) -> None:
+    session.info.setdefault(_STALE_PATHS_KEY, set()).update(paths)
+
+def _refresh_path_contents(session, path_ids) -> None:
+    """路径内容列表变化后刷新计数列、骨架版本号和这些路径上注册记录的进度累计值及总体进度；path_ids 为None表示全部路径
+
+    ORM集合修改和 session.execute 直接写关联表都经过这里，骨架缓存随版本号失效。
+    """
+    connection = session.connection()
+    refresh_path_counters(connection, path_ids, bump_skeleton=True)
+    # 内容加入或移出路径会改变已有内容进度所属的类别（必修/选修/不在路径中）和总体进度的分母
+    rebuild_enrollment_progress_sums(connection, path_ids)
+    # 让会话中已加载的对象在下次访问时重新读取
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, LearningPath) and (path_ids is None or obj.id in path_ids):
+            session.expire(obj, [*CONTENT_COUNTERS, "completion_count", "skeleton_version"])
+        elif isinstance(obj, PathEnrollment) and (path_ids is None or obj.path_id in path_ids):
+            session.expire(obj, [*ENROLLMENT_PROGRESS_SUMS, "progress", "version"])
+
+@event.listens_for(Session, "before_flush")
+def _collect_association_changes(session, flush_context, instances):
+    """记录本次flush中内容列表发生变化的路径（新对象此时还没有ID，先保存对象）"""
+    stale = []
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, LearningPath) and inspect(obj).attrs.contents.history.has_changes():
+            stale.append(obj)
+        elif isinstance(obj, LearningContent):
+            history = inspect(obj).attrs.learning_paths.history
+            stale.extend(chain(history.added, history.deleted))
+    deleted_ids = [obj.id for obj in session.deleted if isinstance(obj, LearningContent)]
+    if deleted_ids:
+        # 删除内容时关联行会被一并删除，先查出受影响的路径
+        with session.no_autoflush:
+            stale.extend(session.execute(
+                select(path_content_association.c.path_id)
+                .where(path_content_association.c.content_id.in_(deleted_ids))
+            ).scalars())
+    if stale:
+        _mark_paths_stale(session, stale)
+
+@event.listens_for(Session, "after_flush_postexec")
+def _refresh_stale_paths(session, flush_context):
+    stale = session.info.pop(_STALE_PATHS_KEY, None)
+    if not stale:
+        return
+    path_ids = {item.id if isinstance(item, LearningPath) else item for item in stale}
+    _refresh_path_contents(session, path_ids)
+
+@event.listens_for(Session, "do_orm_execute")
+def _association_statement(orm_execute_state):
+    """通过 session.execute 直接写入或删除关联行时，同步刷新相关路径的计数"""
+    statement = orm_execute_state.statement
+    if not (orm_execute_state.is_insert or orm_execute_state.is_delete):
+        return None
+    if getattr(statement, "table", None) is not path_content_association:
+        return None
+
+    session = orm_execute_state.session
+    if orm_execute_state.is_insert:
+        parameters = orm_execute_state.parameters
+        rows = parameters if isinstance(parameters, list) else [parameters] if parameters else []
+        if not rows:
+            rows = [statement.compile().params]
+        path_ids = {row.get("path_id") for row in rows}
+        if not all(isinstance(path_id, int) for path_id in path_ids):
+            # 多行VALUES的参数名带序号，from_select 没有参数，path_id 也可能是SQL表达式：读不出路径时刷新全部路径
+            path_ids = None
+    elif statement.whereclause is not None:
+        path_ids = set(session.execute(
+            select(path_content_association.c.path_id).where(statement.whereclause)
+        ).scalars())
+    else:
+        path_ids = None
+
+    result = orm_execute_state.invoke_statement()
+    _refresh_path_contents(session, path_ids)
+    return result
+
 class ContentTag(Base):
     """Model for content tags/categories"""
     __tablename__ = "learning_tags"
@@ -84,17 +263,17 @@ class UserContentInteraction(Base):
     # 交互类型：view, complete, quiz_attempt, etc.
     interaction_type = Column(String, nullable=False)
     
-    # 进度百分比 (0-100)
-    progress = Column(Float, default=0.0)
+    # 进度百分比 (0-100)；以下三列参与活动汇总的增量计算，需要保留修改前的值
+    progress = column_property(Column(Float, default=0.0), active_history=True)
     
     # 是否已完成
-    completed = Column(Boolean, default=False)
+    completed = column_property(Column(Boolean, default=False), active_history=True)
     
     # 用户评分 (1-5)
     rating = Column(Integer)
     
     # 学习时长（分钟）
-    time_spent = Column(Float, default=0.0)
+    time_spent = column_property(Column(Float, default=0.0), active_history=True)
     
     # 参与反馈评分 (1-5)
     engagement_feedback = Column(Integer)
@@ -105,6 +284,54 @@ class UserContentInteraction(Base):
     # 关系
     user = relationship("User", back_populates="content_interactions")
     content = relationship("LearningContent", back_populates="interactions")
+
+    __table_args__ = (
+        # 学习历史按 (created_at, id) 键集分页
+        Index("ix_interaction_user_created", "user_id", "created_at", "id"),
+    )
     
     def __repr__(self):
-        return f"<UserContentInteraction {self.id}: User {self.user_id} - Content {self.content_id}>"
\ No newline at end of file
+        return f"<UserContentInteraction {self.id}: User {self.user_id} - Content {self.content_id}>"
+
+@event.listens_for(UserContentInteraction, "after_insert")
+def _interaction_inserted(mapper, connection, target):
+    """新交互记录计入用户活动汇总"""
+    values = inspect(target).dict
+    apply_summary_delta(
+        connection,
+        target.user_id,
+        interaction_count=1,
+        total_time_spent=values.get("time_spent") or 0,
+        completed_contents=1 if values.get("completed") else 0,
+        progress_sum=values.get("progress") or 0
+    )
+
+@event.listens_for(UserContentInteraction, "after_update")
+def _interaction_updated(mapper, connection, target):
+    """按修改前后的差值更新用户活动汇总"""
+    deltas = {}
+    change = attribute_change(target, "time_spent")
+    if change:
+        deltas["total_time_spent"] = (change[1] or 0) - (change[0] or 0)
+    change = attribute_change(target, "progress")
+    if change:
+        deltas["progress_sum"] = (change[1] or 0) - (change[0] or 0)
+    change = attribute_change(target, "completed")
+    if change:
+        deltas["completed_contents"] = int(bool(change[1])) - int(bool(change[0]))
+    if deltas:
+        apply_summary_delta(connection, target.user_id, **deltas)
+
+@event.listens_for(UserContentInteraction, "before_delete")
+def _interaction_deleted(mapper, connection, target):
+    """删除交互记录时从用户活动汇总中扣除"""
+    values = values_before_delete(connection, target, ("user_id", "time_spent", "completed", "progress"))
+    apply_summary_delta(
+        connection,
+        values["user_id"],
+        touch=False,
+        interaction_count=-1,
+        total_time_spent=-(values["time_spent"] or 0),
+        completed_contents=-1 if values["completed"] else 0,
+        progress_sum=-(values["progress"] or 0)
+    )
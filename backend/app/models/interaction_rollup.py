@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class InteractionDailyRollup(Base):
+    """按天、用户、内容汇总的交互数据
+
+    由 interaction_rollup_service.run_daily_rollup 从 user_content_interactions 和
+    content_interactions 生成；原始行归档后，统计查询仍可从汇总表得到完整结果。
+    """
+    __tablename__ = "interaction_daily_rollups"
+    __table_args__ = (
+        Index("ix_interaction_rollup_user_day", "user_id", "day"),
+    )
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    content_id = Column(Integer, primary_key=True)
+
+    # 来自 user_content_interactions
+    interaction_count = Column(Integer, nullable=False, default=0)
+    time_spent = Column(Float, nullable=False, default=0.0)  # 分钟
+    progress_sum = Column(Float, nullable=False, default=0.0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    rating_count = Column(Integer, nullable=False, default=0)
+
+    # 来自 content_interactions
+    event_count = Column(Integer, nullable=False, default=0)
+    event_duration = Column(Float, nullable=False, default=0.0)  # 分钟
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<InteractionDailyRollup {self.day}: User {self.user_id} - Content {self.content_id}>"
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Text, Index
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
 # 添加导入以解决循环引用问题
@@ -39,13 +39,18 @@ class LearningStyleAssessment(Base):
     # 优势学习风格
     dominant_style = Column(String)
     
-    # 详细评估数据
-    assessment_data = Column(JSON)
+    # 详细评估数据（延迟加载，列表和比较只用得分列）
+    assessment_data = deferred(Column(JSON))
     completed_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # 使用app.models.user.User作为完整引用以避免循环导入问题
     user = relationship("app.models.user.User", back_populates="assessments")
     responses = relationship("UserResponse", back_populates="assessment")
+
+    __table_args__ = (
+        # 评估历史按 (completed_at, id) 键集分页
+        Index("ix_assessment_user_completed", "user_id", "completed_at", "id"),
+    )
     
     def __repr__(self):
         return f"<LearningStyleAssessment {self.id}: User {self.user_id}>"
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class LearningEvent(Base):
+    """学习事件（只追加）
+
+    学习行为的唯一写入来源。user_content_interactions、content_interactions 等读模型
+    由 learning_event_service 中的投影按事件ID顺序增量构建，可随时从事件重建。
+    """
+    __tablename__ = "learning_events"
+    __table_args__ = (
+        Index("ix_learning_events_user_occurred", "user_id", "occurred_at"),
+    )
+
+    id = Column(Integer, primary_key=True)  # 单调递增，作为投影的高水位
+    user_id = Column(Integer, nullable=False)
+    content_id = Column(Integer)
+    path_id = Column(Integer)
+
+    # 事件类型：progress, study_time, complete, rating, interaction
+    event_type = Column(String(16), nullable=False)
+    # 数值：进度百分比、学习分钟数、评分或交互时长
+    value = Column(Float)
+    # 其他数据，例如交互类型和参与度评分
+    payload = Column(JSON(none_as_null=True))
+
+    occurred_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<LearningEvent {self.id}: {self.event_type} User {self.user_id}>"
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Boolean, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Boolean, Table, Index
+from sqlalchemy import and_, case, event, exists, inspect, select, update
+from sqlalchemy.orm import column_property, deferred, relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
+from app.models.user_activity_summary import apply_summary_delta, attribute_change, values_before_delete
 from pydantic import BaseModel, Field, HttpUrl
 from typing import List, Optional, Dict, Any, Union
 
@@ -26,18 +28,31 @@ class LearningPath(Base):
     difficulty_level = Column(Integer, default=2)  # 1-5级难度
     estimated_hours = Column(Float)  # 估计完成时间
     
-    # 可包含路径设计图、前置要求、学习目标等
-    path_metadata = Column(JSON)  # 修改列名为 path_metadata
+    # 可包含路径设计图、前置要求、学习目标等（延迟加载，只在构建路径骨架时读取）
+    path_metadata = deferred(Column(JSON))  # 修改列名为 path_metadata
     
     # 是否为系统自动生成的路径
     is_ai_generated = Column(Boolean, default=False)
     # 生成自适应路径的参数
-    generation_parameters = Column(JSON)
+    generation_parameters = deferred(Column(JSON))
+    # 规范化生成参数的哈希，AI生成的路径按它查找和去重（见 generated_path_service）
+    generation_key = Column(String(64), unique=True, index=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     created_by = Column(Integer, ForeignKey("users.id"))
     
+    # 路径骨架版本号，路径或其内容变化时递增，用于使路径骨架缓存失效
+    skeleton_version = Column(Integer, nullable=False, default=1, server_default="1")
+    
+    # 冗余计数，随路径内容关联和注册记录的写入维护（见 content.py 和下方的事件监听），
+    # 不一致时可通过 python -m app.db.path_counters repair 修复
+    content_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_estimated_minutes = Column(Integer, nullable=False, default=0, server_default="0")  # 路径内所有内容的预计时间之和
+    required_content_count = Column(Integer, nullable=False, default=0, server_default="0")  # 必修内容数，总体进度的分母
+    enrollment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completion_count = Column(Integer, nullable=False, default=0, server_default="0")  # 进度达到100%的注册数
+    
     # 关系
     contents = relationship(
         "LearningContent", 
@@ -51,6 +66,19 @@ class LearningPath(Base):
     def __repr__(self):
         return f"<LearningPath {self.id}: {self.title}>"
 
+# 影响路径骨架的属性；内容列表的变化在刷新计数列时一并递增版本号（见 app/models/content.py）
+SKELETON_ATTRIBUTES = (
+    "title", "description", "subject", "difficulty_level",
+    "estimated_hours", "path_metadata"
+)
+
+@event.listens_for(LearningPath, "before_update")
+def _bump_skeleton_version(mapper, connection, target):
+    """路径本身或其内容列表变化时递增骨架版本号"""
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in SKELETON_ATTRIBUTES):
+        target.skeleton_version = LearningPath.skeleton_version + 1
+
 class PathEnrollment(Base):
     """用户学习路径的注册和进度"""
     __tablename__ = "path_enrollments"
@@ -59,15 +87,17 @@ class PathEnrollment(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     path_id = Column(Integer, ForeignKey("learning_paths.id"))
     
-    # 整体进度 (0-100%)
-    progress = Column(Float, default=0.0)
-    # 详细进度记录
+    # 整体进度 (0-100%)；参与活动汇总的增量计算，需要保留修改前的值
+    progress = column_property(Column(Float, default=0.0), active_history=True)
+    # 详细进度记录（旧版JSON字段，仅在迁移前存在数据，新数据写入 enrollment_content_progress 表）
     content_progress = Column(JSON)
     
     # 学习时间记录
     total_study_time = Column(Float, default=0.0)  # 总学习时长(小时)
-    study_sessions = Column(JSON, default=list)  # 学习会话记录 [{start_time, end_time, duration}]
-    content_study_time = Column(JSON, default=dict)  # 每个内容的学习时间记录 {content_id: duration}
+    # 旧版JSON字段，新数据写入 study_session 表
+    study_sessions = Column(JSON)  # 学习会话记录 [{start_time, end_time, duration}]
+    # 旧版JSON字段，新数据写入 enrollment_content_progress.study_time
+    content_study_time = Column(JSON)  # 每个内容的学习时间记录 {content_id: duration}
     
     enrolled_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True))
@@ -76,9 +106,244 @@ class PathEnrollment(Base):
     # 个性化设置
     personalization_settings = Column(JSON)
     
+    # 内容进度的累计值（每个内容的进度截断到0-100后求和），写入内容进度时按差值增量维护，
+    # 总体进度由它们和路径的内容计数直接算出，不扫描内容进度行（见 enrollment_progress_service.overall_progress）
+    required_progress_sum = Column(Float, nullable=False, default=0.0, server_default="0")  # 路径中的必修内容
+    optional_progress_sum = Column(Float, nullable=False, default=0.0, server_default="0")  # 路径中的选修内容
+    unlisted_progress_sum = Column(Float, nullable=False, default=0.0, server_default="0")  # 不在路径内容列表中的内容
+    unlisted_content_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # 乐观锁版本号：每次UPDATE都带上 version 条件并递增，并发修改时后提交者收到 StaleDataError 并重试
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
+    __mapper_args__ = {"version_id_col": version}
+    
     # 关系
     user = relationship("User", back_populates="path_enrollments")
     learning_path = relationship("LearningPath", back_populates="enrollments")
+    content_progress_records = relationship(
+        "EnrollmentContentProgress",
+        back_populates="enrollment",
+        cascade="all, delete-orphan",
+        lazy="noload"
+    )
+    session_records = relationship(
+        "StudySession",
+        back_populates="enrollment",
+        cascade="all, delete-orphan",
+        lazy="noload"
+    )
+
+class EnrollmentContentProgress(Base):
+    """注册记录中每个内容的进度和学习时间（每个内容一行，原地更新）"""
+    __tablename__ = "enrollment_content_progress"
+    
+    enrollment_id = Column(Integer, ForeignKey("path_enrollments.id", ondelete="CASCADE"), primary_key=True)
+    content_id = Column(Integer, ForeignKey("learning_contents.id"), primary_key=True)
+    
+    # 内容进度 (0-100%)
+    progress = Column(Float, nullable=False, default=0.0)
+    # 该内容的累计学习时间(分钟)
+    study_time = Column(Float, nullable=False, default=0.0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # 关系
+    enrollment = relationship("PathEnrollment", back_populates="content_progress_records")
+
+# 注册记录上的进度累计列
+ENROLLMENT_PROGRESS_SUMS = (
+    "required_progress_sum", "optional_progress_sum", "unlisted_progress_sum", "unlisted_content_count"
+)
+
+def clamped_progress(value):
+    """截断到0-100的进度，value 为数值或SQL列"""
+    if isinstance(value, (int, float)):
+        return min(100.0, max(0.0, float(value)))
+    return case((value > 100, 100.0), (value < 0, 0.0), else_=value)
+
+def enrollment_progress_sum_expressions() -> dict:
+    """每个进度累计列按 enrollment_content_progress 计算的相关子查询，与 path_enrollments 表关联"""
+    record = EnrollmentContentProgress
+    association = path_content_association
+    listed = and_(association.c.path_id == PathEnrollment.path_id, association.c.content_id == record.content_id)
+    progress_sum = func.coalesce(func.sum(clamped_progress(record.progress)), 0.0)
+
+    def listed_sum(required):
+        return (
+            select(progress_sum)
+            .select_from(record)
+            .join(association, listed)
+            .where(record.enrollment_id == PathEnrollment.id, required)
+            .scalar_subquery()
+        )
+
+    unlisted = select(association.c.content_id).where(listed).correlate(PathEnrollment, record)
+    return {
+        "required_progress_sum": listed_sum(association.c.required.isnot(False)),
+        "optional_progress_sum": listed_sum(association.c.required.is_(False)),
+        "unlisted_progress_sum": (
+            select(progress_sum)
+            .where(record.enrollment_id == PathEnrollment.id, ~exists(unlisted))
+            .scalar_subquery()
+        ),
+        "unlisted_content_count": (
+            select(func.count())
+            .select_from(record)
+            .where(record.enrollment_id == PathEnrollment.id, ~exists(unlisted))
+            .scalar_subquery()
+        )
+    }
+
+def overall_progress_expression(sums: dict):
+    """总体进度的SQL表达式，口径与 enrollment_progress_service.overall_progress 一致
+
+    sums 为各进度累计列的表达式；同一条UPDATE中 SET 右侧读到的是修改前的列值，
+    因此重建时传入累计值的子查询而不是列本身。路径的内容计数取 learning_paths 上的计数列。
+    """
+    def path_counter(column):
+        return func.coalesce(
+            select(column).where(LearningPath.id == PathEnrollment.path_id).scalar_subquery(), 0
+        )
+
+    def average(total, count):
+        return func.round(clamped_progress(func.coalesce(total, 0.0) / count), 4)
+
+    required_count = path_counter(LearningPath.required_content_count)
+    content_count = path_counter(LearningPath.content_count)
+    return case(
+        (required_count > 0, average(sums["required_progress_sum"], required_count)),
+        (content_count > 0, average(sums["optional_progress_sum"], content_count)),
+        (sums["unlisted_content_count"] > 0, average(sums["unlisted_progress_sum"], sums["unlisted_content_count"])),
+        else_=0.0
+    )
+
+def rebuild_enrollment_progress_sums(connection, path_ids=None, enrollment_ids=None) -> None:
+    """按内容进度行重建注册记录的进度累计列和总体进度，并递增版本号使并发的进度写入重试
+
+    path_ids / enrollment_ids 为None表示不按该条件过滤。路径的内容计数需已刷新。
+    这是Core语句，不触发注册记录的ORM事件：总体进度跨越0或100的记录在这里调整用户活动汇总和路径完成数。
+    """
+    conditions = []
+    if path_ids is not None:
+        conditions.append(PathEnrollment.path_id.in_([path_id for path_id in path_ids if path_id is not None]))
+    if enrollment_ids is not None:
+        conditions.append(PathEnrollment.id.in_(enrollment_ids))
+
+    old_progress = dict(connection.execute(select(PathEnrollment.id, PathEnrollment.progress).where(*conditions)).all())
+    sums = enrollment_progress_sum_expressions()
+    rows = connection.execute(
+        update(PathEnrollment)
+        .where(*conditions)
+        .values({**sums, "progress": overall_progress_expression(sums), "version": PathEnrollment.version + 1})
+        .returning(PathEnrollment.id, PathEnrollment.user_id, PathEnrollment.path_id, PathEnrollment.progress)
+    ).all()
+
+    for row in rows:
+        old_counts = _path_state_counts(old_progress.get(row.id))
+        new_counts = _path_state_counts(row.progress)
+        deltas = {name: new_counts[name] - old_counts[name] for name in new_counts}
+        if any(deltas.values()):
+            apply_summary_delta(connection, row.user_id, touch=False, **deltas)
+            _adjust_path_counters(connection, row.path_id, completion_count=deltas["completed_paths"])
+
+def _adjust_path_counters(connection, path_id: int, **deltas) -> None:
+    """在当前事务中把增量累加到路径的计数列"""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if path_id is None or not deltas:
+        return
+    connection.execute(
+        update(LearningPath)
+        .where(LearningPath.id == path_id)
+        .values({name: getattr(LearningPath, name) + value for name, value in deltas.items()})
+    )
+
+def _path_state_counts(progress) -> dict:
+    """按进度把注册记录归入进行中/已完成"""
+    progress = progress or 0
+    return {
+        "active_paths": 1 if 0 < progress < 100 else 0,
+        "completed_paths": 1 if progress >= 100 else 0
+    }
+
+@event.listens_for(PathEnrollment, "after_insert")
+def _enrollment_inserted(mapper, connection, target):
+    """新注册记录计入用户活动汇总和路径注册数"""
+    counts = _path_state_counts(inspect(target).dict.get("progress"))
+    apply_summary_delta(connection, target.user_id, enrolled_paths=1, **counts)
+    _adjust_path_counters(
+        connection,
+        target.path_id,
+        enrollment_count=1,
+        completion_count=counts["completed_paths"]
+    )
+
+@event.listens_for(PathEnrollment, "after_update")
+def _enrollment_updated(mapper, connection, target):
+    """进度跨越 0 或 100 时调整进行中/已完成路径数"""
+    change = attribute_change(target, "progress")
+    if not change:
+        return
+    old_counts = _path_state_counts(change[0])
+    new_counts = _path_state_counts(change[1])
+    apply_summary_delta(
+        connection,
+        target.user_id,
+        **{name: new_counts[name] - old_counts[name] for name in new_counts}
+    )
+    _adjust_path_counters(
+        connection,
+        target.path_id,
+        completion_count=new_counts["completed_paths"] - old_counts["completed_paths"]
+    )
+
+@event.listens_for(PathEnrollment, "before_delete")
+def _enrollment_deleted(mapper, connection, target):
+    """删除注册记录时从用户活动汇总和路径计数中扣除"""
+    values = values_before_delete(connection, target, ("user_id", "path_id", "progress"))
+    counts = _path_state_counts(values["progress"])
+    apply_summary_delta(
+        connection,
+        values["user_id"],
+        touch=False,
+        enrolled_paths=-1,
+        **{name: -count for name, count in counts.items()}
+    )
+    _adjust_path_counters(
+        connection,
+        values["path_id"],
+        enrollment_count=-1,
+        completion_count=-counts["completed_paths"]
+    )
+
+class StudySession(Base):
+    """学习会话记录（只追加）"""
+    __tablename__ = "study_session"
+    __table_args__ = (
+        Index("ix_study_session_enrollment_start", "enrollment_id", "start_time"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    enrollment_id = Column(Integer, ForeignKey("path_enrollments.id", ondelete="CASCADE"), nullable=False)
+    content_id = Column(Integer, ForeignKey("learning_contents.id"))
+    
+    start_time = Column(String)  # ISO格式时间字符串，保持客户端提交的原值
+    end_time = Column(String)
+    duration = Column(Float, nullable=False, default=0.0)  # 学习时长(分钟)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # 关系
+    enrollment = relationship("PathEnrollment", back_populates="session_records")
+
+class ProgressSyncKey(Base):
+    """已处理的离线同步事件的幂等键，客户端重发同一批事件时跳过已处理的事件"""
+    __tablename__ = "progress_sync_keys"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    idempotency_key = Column(String(64), primary_key=True)  # 客户端生成，同一用户内唯一
+    
+    processed_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Resource(BaseModel):
     """学习资源模型"""
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class SystemMarker(Base):
+    """系统标记，记录一次性初始化任务（如默认数据填充）是否已完成"""
+    __tablename__ = "system_markers"
+
+    key = Column(String, primary_key=True)
+    value = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<SystemMarker {self.key}: {self.value}>"
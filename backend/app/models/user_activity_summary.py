@@ -0,0 +1,129 @@
+from datetime import datetime
+import logging
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, inspect, select, update
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+logger = logging.getLogger(__name__)
+
+class UserActivitySummary(Base):
+    """用户活动汇总，随交互记录和路径进度的写入在同一事务中增量维护
+
+    读取用户摘要时只需按主键查询一行，不再扫描交互和注册记录。
+    增量维护依赖ORM的 insert/update/delete 事件：通过 session.execute(update(...)/delete(...))、
+    Query.update()/delete() 或批量方法直接修改 user_content_interactions / path_enrollments 时不会触发，
+    调用方需在同一事务中对受影响的用户执行 rebuild_user_activity_summaries。
+    交互归档有意绕过这些事件：归档的行已计入按日汇总，汇总数不应减少。
+    数据不一致时可通过 python -m app.db.rebuild_activity_summary 全量重建。
+    """
+    __tablename__ = "user_activity_summary"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # 内容交互汇总（来自 user_content_interactions）
+    interaction_count = Column(Integer, nullable=False, default=0)
+    total_time_spent = Column(Float, nullable=False, default=0.0)  # 分钟
+    completed_contents = Column(Integer, nullable=False, default=0)
+    progress_sum = Column(Float, nullable=False, default=0.0)  # 平均进度 = progress_sum / interaction_count
+
+    # 学习路径汇总（来自 path_enrollments）
+    enrolled_paths = Column(Integer, nullable=False, default=0)
+    active_paths = Column(Integer, nullable=False, default=0)  # 0 < 进度 < 100
+    completed_paths = Column(Integer, nullable=False, default=0)  # 进度 >= 100
+
+    last_activity_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    @property
+    def average_progress(self) -> float:
+        return self.progress_sum / self.interaction_count if self.interaction_count else 0.0
+
+    def __repr__(self):
+        return f"<UserActivitySummary user={self.user_id}>"
+
+# 增量累加的计数列
+SUMMARY_COUNTERS = (
+    "interaction_count", "total_time_spent", "completed_contents", "progress_sum",
+    "enrolled_paths", "active_paths", "completed_paths"
+)
+
+def apply_summary_delta(connection, user_id: int, touch: bool = True, **deltas) -> None:
+    """在当前连接（即当前事务）中把增量累加到用户汇总行，行不存在时创建
+
+    deltas 的键为 SUMMARY_COUNTERS 中的列名；touch 为True时更新最近活动时间。
+    """
+    deltas = {name: value for name, value in deltas.items() if value}
+    if user_id is None or not (deltas or touch):
+        return
+
+    table = UserActivitySummary.__table__
+    now = datetime.now() if touch else None
+    dialect = connection.dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        # 只导入当前数据库的方言模块，应用导入时不加载用不到的PostgreSQL方言
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        values = {name: deltas.get(name, 0) for name in SUMMARY_COUNTERS}
+        stmt = insert(table).values(user_id=user_id, last_activity_at=now, **values)
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in deltas}
+        set_["last_activity_at"] = func.coalesce(stmt.excluded.last_activity_at, table.c.last_activity_at)
+        set_["updated_at"] = func.now()
+        connection.execute(stmt.on_conflict_do_update(index_elements=[table.c.user_id], set_=set_))
+        return
+
+    # 其他数据库：先更新，没有行时再插入
+    values = {name: table.c[name] + value for name, value in deltas.items()}
+    if touch:
+        values["last_activity_at"] = now
+    result = connection.execute(update(table).where(table.c.user_id == user_id).values(**values))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(
+            user_id=user_id,
+            last_activity_at=now,
+            **{name: deltas.get(name, 0) for name in SUMMARY_COUNTERS}
+        ))
+
+def attribute_change(target, name: str):
+    """返回本次flush中属性的 (旧值, 新值)，未修改时返回None
+
+    属性需以 active_history=True 映射以保证旧值可用；新值为SQL表达式时无法计算增量，
+    此时记录警告并返回None，由重建命令修正。
+    """
+    history = inspect(target).attrs[name].history
+    if not history.added:
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0]
+    if not isinstance(new, (int, float, type(None))):
+        logger.warning("%s.%s 被设置为SQL表达式，活动汇总未更新", type(target).__name__, name)
+        return None
+    return old, new
+
+def values_before_delete(connection, target, names) -> dict:
+    """返回被删除对象在数据库中的属性值，在 before_delete 中调用
+
+    本次flush中修改过的属性取修改前的值（参与汇总的列以 active_history=True 映射），
+    未加载或已过期的属性在删除前从数据库读取。
+    """
+    state = inspect(target)
+    values, unloaded = {}, []
+    for name in names:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        elif history.added:
+            values[name] = None  # 修改前的值为None
+        else:
+            unloaded.append(name)
+    if unloaded:
+        table = state.mapper.local_table
+        row = connection.execute(
+            select(*[table.c[name] for name in unloaded]).where(table.c.id == state.identity[0])
+        ).one()
+        values.update(row._mapping)
+    return values
@@ -2,8 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, Path
 from typing import Dict, Any, List
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.models.user import User
-from app.models.content import UserContentInteraction
+from app.services.analytics_service import build_weakness_report
+from app.services.user_cache import get_user_snapshot
+from app.services.learning_event_service import (
+    EVENT_INTERACTION, EVENT_PROGRESS, EVENT_STUDY_TIME, event_appender
+)
 import logging
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
@@ -17,14 +20,14 @@ async def analyze_learning_behavior(
 ):
     """分析用户的学习行为数据"""
     try:
-        logger.info(f"处理学习行为分析: 用户ID {behavior_data.get('user_id')}")
+        logger.info("处理学习行为分析: 用户ID %s", behavior_data.get('user_id'))
         
         user_id = behavior_data.get("user_id")
         if user_id is None:
             raise HTTPException(status_code=400, detail="必须提供用户ID")
         
         # 检查用户是否存在
-        user = db.query(User).filter(User.id == user_id).first()
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
         
@@ -42,23 +45,26 @@ async def analyze_learning_behavior(
         # 生成改进建议
         improvement_areas = generate_improvement_suggestions(behavior_patterns, user)
         
-        # 保存分析结果
+        # 保存分析结果：交互以事件形式进入批量写入缓冲区，由后台任务写库并更新投影
         try:
-            # 将内容交互记录保存到数据库
             for interaction in interactions:
-                db_interaction = UserContentInteraction(
-                    user_id=user_id,
-                    content_id=interaction.get("content_id"),
-                    interaction_type=interaction.get("interaction_type", "view"),
-                    progress=interaction.get("progress", 0) * 100,  # 转换为百分比
-                    time_spent=interaction.get("time_spent"),
-                    engagement_feedback=calculate_engagement_score(interaction)
+                content_id = interaction.get("content_id")
+                time_spent = interaction.get("time_spent")
+                event_appender.append(
+                    user_id, EVENT_PROGRESS, content_id=content_id,
+                    value=interaction.get("progress", 0) * 100  # 转换为百分比
+                )
+                if time_spent:
+                    event_appender.append(user_id, EVENT_STUDY_TIME, content_id=content_id, value=time_spent)
+                event_appender.append(
+                    user_id, EVENT_INTERACTION, content_id=content_id, value=time_spent,
+                    payload={
+                        "interaction_type": interaction.get("interaction_type", "view"),
+                        "engagement_feedback": calculate_engagement_score(interaction)
+                    }
                 )
-                db.add(db_interaction)
-            db.commit()
         except Exception as save_error:
-            logger.error(f"保存交互数据失败: {str(save_error)}")
-            db.rollback()
+            logger.error("保存交互数据失败: %s", save_error)
             # 但继续返回分析结果
         
         return {
@@ -68,7 +74,7 @@ async def analyze_learning_behavior(
             "improvement_areas": improvement_areas
         }
     except Exception as e:
-        logger.exception(f"分析学习行为失败: {str(e)}")
+        logger.exception("分析学习行为失败: %s", e)
         raise HTTPException(status_code=500, detail=f"分析学习行为失败: {str(e)}")
 
 @router.get("/weaknesses/{user_id}", response_model=Dict[str, Any])
@@ -76,56 +82,13 @@ async def get_user_weaknesses(user_id: int, db: Session = Depends(get_db)):
     """识别用户的学习弱点和强项"""
     try:
         # 检查用户是否存在
-        user = db.query(User).filter(User.id == user_id).first()
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
         
-        # 获取用户的内容交互记录
-        interactions = (
-            db.query(UserContentInteraction)
-            .filter(UserContentInteraction.user_id == user_id)
-            .all()
-        )
-        
-        # 模拟弱点分析 - 实际应用中可能会有更复杂的算法
-        weak_areas = [
-            {
-                "topic": "数据结构",
-                "confidence_level": 0.35,
-                "suggested_resources": [
-                    {"type": "video", "title": "数据结构基础", "url": "https://example.com/ds101"}
-                ]
-            },
-            {
-                "topic": "算法复杂度",
-                "confidence_level": 0.42,
-                "suggested_resources": [
-                    {"type": "article", "title": "复杂度分析简介", "url": "https://example.com/complexity"}
-                ]
-            }
-        ]
-        
-        # 模拟强项分析
-        strength_areas = [
-            {"topic": "编程基础", "confidence_level": 0.85},
-            {"topic": "Web开发", "confidence_level": 0.78}
-        ]
-        
-        # 模拟改进计划
-        improvement_plan = {
-            "short_term_goals": ["完成数据结构基础课程", "每周解决5道算法题"],
-            "long_term_goals": ["掌握高级数据结构", "能够独立分析算法复杂度"],
-            "recommended_study_path": "先巩固基础知识，再通过实践加深理解"
-        }
-        
-        return {
-            "user_id": user_id,
-            "weak_areas": weak_areas,
-            "strength_areas": strength_areas,
-            "improvement_plan": improvement_plan
-        }
+        return build_weakness_report(db, user_id)
     except Exception as e:
-        logger.exception(f"识别弱点失败: {str(e)}")
+        logger.exception("识别弱点失败: %s", e)
         raise HTTPException(status_code=500, detail=f"识别弱点失败: {str(e)}")
 
 # 辅助函数
@@ -7,6 +7,7 @@ from app.services.ai_service import AIService
 from app.db.session import get_db
 from app.models.learning_assessment import LearningStyleAssessment, UserResponse, AssessmentQuestion
 from app.models.user import User
+from app.services.user_cache import get_user_snapshot
 
 router = APIRouter(prefix="/api/v1/assessment", tags=["assessment"])
 
@@ -127,7 +128,7 @@ async def get_learning_progress(user_id: int, db: Session = Depends(get_db)) ->
     """获取用户的学习进度和个性化建议"""
     try:
         # 检查用户是否存在
-        user = db.query(User).filter(User.id == user_id).first()
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
         
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import get_db
+from app.services.admission_control import is_degraded
+from app.services.dashboard_service import DASHBOARD_SECTIONS, build_dashboard
+from app.services.user_cache import get_user_snapshot
+from app.utils.fieldsets import InvalidFieldsetError, parse_names
+import logging
+
+router = APIRouter(prefix="/api/v1/dashboard", tags=["dashboard"])
+
+logger = logging.getLogger(__name__)
+
+@router.get("/{user_id}", response_model=Dict[str, Any])
+async def get_dashboard(
+    request: Request,
+    user_id: int = Path(..., description="用户ID"),
+    sections: Optional[str] = Query(
+        None, description=f"只获取这些板块，逗号分隔，可选: {', '.join(DASHBOARD_SECTIONS)}"
+    ),
+    db: Session = Depends(get_db)
+):
+    """一次获取仪表盘的全部板块
+
+    各板块并发获取，超时或失败的板块返回 null，原因见 errors；其余板块正常返回。
+    过载降级时推荐板块只返回已缓存的推荐（没有时返回数据库中的路径），不调用大模型。
+    """
+    try:
+        names = parse_names(sections, tuple(DASHBOARD_SECTIONS), "sections") or tuple(DASHBOARD_SECTIONS)
+        user = get_user_snapshot(db, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
+        
+        return await build_dashboard(
+            db, user, names, settings.DASHBOARD_SECTION_TIMEOUT, allow_compute=not is_degraded(request)
+        )
+    except InvalidFieldsetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.exception("获取仪表盘失败: %s", e)
+        raise HTTPException(status_code=500, detail=f"获取仪表盘失败: {str(e)}")
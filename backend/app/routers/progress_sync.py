@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import settings
+from app.db.session import get_db
+from app.schemas.learning_path import ProgressSyncRequest, ProgressSyncResponse
+from app.services.progress_push import progress_broker, progress_stream
+from app.services.progress_sync_service import sync_progress_events
+from app.services.user_cache import get_user_snapshot
+import logging
+
+router = APIRouter(prefix="/api/v1/progress", tags=["progress"])
+
+logger = logging.getLogger(__name__)
+
+@router.post("/sync", response_model=ProgressSyncResponse)
+def sync_progress(request: ProgressSyncRequest, db: Session = Depends(get_db)):
+    """批量同步客户端缓冲的进度和学习会话事件
+
+    事件按提交顺序在一个事务中应用；已应用过的幂等键计入 duplicates，无效的事件计入 rejected，
+    三者都可以从客户端缓冲中移除。返回涉及路径合并后的服务端进度。
+    同步接口：在线程池中执行，版本冲突重试前的退避不阻塞事件循环。
+    """
+    try:
+        if len(request.events) > settings.PROGRESS_SYNC_MAX_EVENTS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"单次最多同步 {settings.PROGRESS_SYNC_MAX_EVENTS} 个事件"
+            )
+        if not get_user_snapshot(db, request.user_id):
+            raise HTTPException(status_code=404, detail=f"用户ID {request.user_id} 不存在")
+        
+        return sync_progress_events(db, request.user_id, request.events)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        db.rollback()
+        logger.exception("同步学习进度失败: %s", e)
+        raise HTTPException(status_code=500, detail=f"同步学习进度失败: {str(e)}")
+
+@router.get("/stream/{user_id}")
+async def stream_progress(user_id: int = Path(..., description="用户ID"), db: Session = Depends(get_db)):
+    """订阅用户的学习进度推送（Server-Sent Events）
+
+    连接后先推送一次当前进度（progress 事件），之后进度或学习时间变化时推送涉及路径的最新进度，
+    推荐列表重新计算后推送 recommendations 事件。替代前端的定时轮询。
+    """
+    if not get_user_snapshot(db, user_id):
+        raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
+    
+    # 推送流持续时间长，不占用请求的会话，每次读取进度时使用独立的短会话
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    subscription = progress_broker.subscribe(user_id)
+    return StreamingResponse(
+        progress_stream(session_factory, subscription, settings.PROGRESS_STREAM_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -5,9 +5,10 @@ import logging
 
 from app.db.session import get_db
 # 修正导入路径，直接导入需要的模型类
-from app.models.user import User
 from app.models.learning_assessment import LearningStyleAssessment
 from app.models.learning_path import PathEnrollment, LearningPath
+from app.services.activity_summary_service import get_activity_summary
+from app.services.user_cache import get_user_snapshot
 
 router = APIRouter(
     prefix="/api/v1/assessment",
@@ -21,7 +22,7 @@ def get_user_progress(user_id: int, db: Session = Depends(get_db)):
     """获取用户的学习进度和最近活动"""
     
     # 检查用户是否存在
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_user_snapshot(db, user_id)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -33,17 +34,10 @@ def get_user_progress(user_id: int, db: Session = Depends(get_db)):
         LearningStyleAssessment.user_id == user_id
     ).order_by(LearningStyleAssessment.completed_at.desc()).first()
     
-    # 计算用户的学习路径进度
-    completed_paths = db.query(PathEnrollment).filter(
-        PathEnrollment.user_id == user_id,
-        PathEnrollment.progress >= 100
-    ).count()
-    
-    active_paths = db.query(PathEnrollment).filter(
-        PathEnrollment.user_id == user_id,
-        PathEnrollment.progress < 100,
-        PathEnrollment.progress > 0
-    ).count()
+    # 学习路径计数来自增量维护的活动汇总（主键查询）
+    summary = get_activity_summary(db, user_id)
+    completed_paths = summary.completed_paths if summary else 0
+    active_paths = summary.active_paths if summary else 0
     
     # 获取最近活动（这里简化处理，实际应该包括评估、测试和学习路径活动）
     recent_activities = []
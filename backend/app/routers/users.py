@@ -1,66 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
 from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.user import User
 from app.models.content import UserContentInteraction
+from app.schemas.user import UserHistoryItem
+from app.services.read_models import HISTORY_FIELDS, list_user_paths
+from app.services.user_cache import get_user_snapshot
 from app.services.user_service import (
-    get_user_by_id, 
     update_user_learning_style,
     get_user_learning_history,
     record_user_progress,
     get_user_activity_summary
 )
+from app.utils.fieldsets import InvalidFieldsetError, resolve_fieldset
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 import logging
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
 logger = logging.getLogger(__name__)
 
+# 用户信息接口可以通过 fields 选择的字段
+USER_FIELDS = ("id", "email", "full_name", "learning_style", "preferences")
+
 @router.get("/{user_id}", response_model=Dict[str, Any])
 async def get_user(
     user_id: int = Path(..., description="用户ID"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔，如 id,full_name"),
+    include: Optional[str] = Query(None, description="展开的关联: progress（已注册路径的进度）"),
     db: Session = Depends(get_db)
 ):
-    """获取用户信息"""
+    """获取用户信息；include=progress 时附带用户在各注册路径上的进度"""
     try:
-        user = await get_user_by_id(user_id, db)
+        fieldset = resolve_fieldset(fields, include, USER_FIELDS, ("progress",))
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
             
-        return {
+        result = fieldset.pick({
             "id": user.id,
             "email": user.email,
             "full_name": user.full_name,
             "learning_style": user.learning_style or {},
             "preferences": user.preferences or {}
-        }
+        })
+        if fieldset.wants("progress"):
+            result["progress"] = [
+                {
+                    "path_id": path.id,
+                    "title": path.title,
+                    "progress": path.progress,
+                    "last_activity_at": path.last_activity_at
+                }
+                for path in list_user_paths(db, user_id)
+            ]
+        return result
+    except InvalidFieldsetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.exception(f"获取用户信息失败: {str(e)}")
+        logger.exception("获取用户信息失败: %s", e)
         raise HTTPException(status_code=500, detail=f"获取用户信息失败: {str(e)}")
 
-@router.get("/{user_id}/history", response_model=List[Dict[str, Any]])
+@router.get("/{user_id}/history", response_model=List[UserHistoryItem], response_model_exclude_unset=True)
 async def get_history(
+    response: Response,
     user_id: int = Path(..., description="用户ID"),
-    limit: int = Query(20, description="返回记录的最大数量"),
+    limit: int = Query(20, ge=1, le=100, description="返回记录的最大数量"),
+    cursor: Optional[str] = Query(None, description="上一页响应头中返回的游标"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔，如 content_id,progress"),
     db: Session = Depends(get_db)
 ):
-    """获取用户学习历史记录"""
+    """获取用户学习历史记录，下一页游标通过 X-Next-Cursor 响应头返回"""
     try:
+        fieldset = resolve_fieldset(fields, None, HISTORY_FIELDS, always=())
+        
         # 验证用户是否存在
-        user = await get_user_by_id(user_id, db)
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
         
         # 获取学习历史
-        history = await get_user_learning_history(user_id, db)
-        return history[:limit]
+        history, next_cursor = await get_user_learning_history(
+            user_id, db, limit=limit, cursor=cursor, fields=fieldset.fields
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return history
+    except (InvalidCursorError, InvalidFieldsetError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.exception(f"获取用户学习历史失败: {str(e)}")
+        logger.exception("获取用户学习历史失败: %s", e)
         raise HTTPException(status_code=500, detail=f"获取用户学习历史失败: {str(e)}")
 
 @router.post("/{user_id}/progress", response_model=Dict[str, Any])
@@ -72,7 +106,7 @@ async def record_progress(
     """记录用户学习进度"""
     try:
         # 验证用户是否存在
-        user = await get_user_by_id(user_id, db)
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
         
@@ -97,7 +131,7 @@ async def record_progress(
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.exception(f"记录学习进度失败: {str(e)}")
+        logger.exception("记录学习进度失败: %s", e)
         raise HTTPException(status_code=500, detail=f"记录学习进度失败: {str(e)}")
 
 @router.get("/{user_id}/summary", response_model=Dict[str, Any])
@@ -108,7 +142,7 @@ async def get_summary(
     """获取用户学习活动摘要"""
     try:
         # 验证用户是否存在
-        user = await get_user_by_id(user_id, db)
+        user = get_user_snapshot(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"用户ID {user_id} 不存在")
         
@@ -118,5 +152,5 @@ async def get_summary(
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.exception(f"获取用户活动摘要失败: {str(e)}")
+        logger.exception("获取用户活动摘要失败: %s", e)
         raise HTTPException(status_code=500, detail=f"获取用户活动摘要失败: {str(e)}")
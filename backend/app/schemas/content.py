@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Optional, Any, Union
 from datetime import datetime
 
@@ -40,6 +40,39 @@ class ContentBase(BaseModel):
 class ContentCreate(ContentBase):
     tags: Optional[List[str]] = None
 
+class ContentBulkItem(BaseModel):
+    """批量导入(NDJSON)中的单行内容，字段与 LearningContent 列一致"""
+    model_config = ConfigDict(extra="forbid")
+
+    title: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    content_type: str = Field(..., min_length=1)
+    content_url: Optional[str] = None
+    content_data: Optional[Dict[str, Any]] = None
+    subject: Optional[str] = None
+    difficulty_level: int = Field(2, ge=1, le=5)
+    estimated_minutes: Optional[int] = Field(None, ge=0)
+    resources: Optional[List[Dict[str, Any]]] = None
+    visual_affinity: float = Field(0.0, ge=0, le=100)
+    auditory_affinity: float = Field(0.0, ge=0, le=100)
+    kinesthetic_affinity: float = Field(0.0, ge=0, le=100)
+    reading_affinity: float = Field(0.0, ge=0, le=100)
+    author: Optional[str] = None
+    source_url: Optional[str] = None
+    is_premium: bool = False
+    tags: List[str] = []
+
+class ContentBulkError(BaseModel):
+    line: int
+    error: str
+
+class ContentBulkResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[ContentBulkError] = []
+    errors_truncated: bool = False
+
 class ContentUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -145,4 +178,34 @@ class ContentSearchResponse(BaseModel):
     results: List[Content]
     total: int
     limit: int
-    offset: int
\ No newline at end of file
+    offset: int
+# 内容列表/详情接口的响应模型
+# 支持 fields= 稀疏字段：除id外均有默认值，路由开启 response_model_exclude_unset，只输出实际返回的字段
+class ContentProgressResponse(BaseModel):
+    progress: float
+    completed: bool
+
+class ContentListItemResponse(BaseModel):
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    content_type: Optional[str] = None
+    subject: Optional[str] = None
+    difficulty_level: Optional[int] = None
+    content_url: Optional[str] = None
+    visual_affinity: Optional[float] = None
+    auditory_affinity: Optional[float] = None
+    kinesthetic_affinity: Optional[float] = None
+    reading_affinity: Optional[float] = None
+    author: Optional[str] = None
+    is_premium: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    tags: Optional[List[str]] = None
+    resources: Optional[List[Dict[str, Any]]] = None
+    progress: Optional[ContentProgressResponse] = None
+
+class ContentDetailResponse(ContentListItemResponse):
+    content_data: Optional[Dict[str, Any]] = None
+    estimated_minutes: Optional[int] = None
+    source_url: Optional[str] = None
+    updated_at: Optional[datetime] = None
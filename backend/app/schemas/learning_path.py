@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 from datetime import datetime
 
 class ContentItem(BaseModel):
@@ -64,3 +64,82 @@ class PathEnrollment(BaseModel):
 class PathWithContents(LearningPath):
     contents: List[Dict[str, Any]]
     user_progress: Optional[Dict[str, Any]] = None
+
+# 路径详情和进度接口的响应模型
+# 路径详情支持 fields= 稀疏字段，路由开启 response_model_exclude_unset，只输出实际返回的字段
+class PathContentResponse(BaseModel):
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    content_type: Optional[str] = None
+    subject: Optional[str] = None
+    difficulty_level: Optional[int] = None
+
+class PathUserProgressResponse(BaseModel):
+    overall_progress: float
+    content_progress: Dict[str, float] = {}
+    enrolled_at: Optional[datetime] = None
+
+class PathDetailResponse(BaseModel):
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    subject: Optional[str] = None
+    difficulty_level: Optional[int] = None
+    estimated_hours: Optional[float] = None
+    metadata: Optional[Dict[str, Any]] = None
+    contents: Optional[List[PathContentResponse]] = None
+    user_progress: Optional[PathUserProgressResponse] = None
+
+class StudySessionStats(BaseModel):
+    session_count: int
+    session_minutes: float
+    last_session_end: Optional[datetime] = None
+
+class PathProgressResponse(BaseModel):
+    id: int
+    user_id: int
+    path_id: int
+    progress: float
+    content_progress: Dict[str, float] = {}
+    total_study_time: float
+    content_study_time: Dict[str, float] = {}
+    study_sessions: StudySessionStats
+    last_activity_at: Optional[datetime] = None
+    personalization_settings: Optional[Dict[str, Any]] = None
+
+# 离线进度同步：客户端在本地缓冲进度和学习会话事件，定期批量提交
+class ProgressSyncEvent(BaseModel):
+    idempotency_key: str = Field(..., min_length=1, max_length=64)  # 客户端生成，重发时保持不变
+    type: Literal["progress", "session"]
+    path_id: int
+    content_id: int
+    progress: Optional[float] = Field(None, ge=0, le=100)  # progress 事件：进度百分比
+    status: Optional[str] = None  # progress 事件：未开始/进行中/已完成，未提供 progress 时使用
+    study_time: float = Field(0, ge=0)  # session 事件：学习时长(分钟)
+    session_start: Optional[str] = None  # ISO格式时间字符串
+    session_end: Optional[str] = None
+    client_ts: datetime  # 事件在客户端发生的时间
+
+class ProgressSyncRequest(BaseModel):
+    user_id: int
+    events: List[ProgressSyncEvent]  # 按发生顺序排列
+
+class ProgressSyncRejection(BaseModel):
+    idempotency_key: str
+    reason: str
+
+class SyncedPathState(BaseModel):
+    path_id: int
+    progress: float
+    content_progress: Dict[str, float] = {}
+    total_study_time: float
+    content_study_time: Dict[str, float] = {}
+    last_activity_at: Optional[datetime] = None
+
+class ProgressSyncResponse(BaseModel):
+    user_id: int
+    applied: List[str] = []
+    duplicates: List[str] = []
+    rejected: List[ProgressSyncRejection] = []
+    paths: List[SyncedPathState] = []
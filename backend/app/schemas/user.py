@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+# 用户学习历史的响应模型
+# 支持 fields= 稀疏字段：字段均有默认值，路由开启 response_model_exclude_unset，只输出实际返回的字段
+class UserHistoryItem(BaseModel):
+    content_id: Optional[int] = None
+    title: Optional[str] = None
+    content_type: Optional[str] = None
+    interaction_type: Optional[str] = None
+    progress: Optional[float] = None
+    rating: Optional[int] = None
+    time_spent: Optional[float] = None
+    created_at: Optional[datetime] = None
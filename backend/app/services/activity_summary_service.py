@@ -0,0 +1,94 @@
+from typing import Optional
+import logging
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+from ..models.user import User
+from ..models.learning_path import PathEnrollment
+from ..models.user_activity_summary import UserActivitySummary
+from .interaction_rollup_service import get_interaction_totals
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+def get_activity_summary(db: Session, user_id: int) -> Optional[UserActivitySummary]:
+    """按主键读取用户活动汇总，用户尚无任何活动时返回None"""
+    return db.get(UserActivitySummary, user_id)
+
+def _aggregate_rows(db: Session, user_ids: list) -> list:
+    """从交互记录和注册记录重新聚合一批用户的汇总行"""
+    # 交互部分先读按日汇总，归档到冷库的原始行同样被计入
+    interactions = get_interaction_totals(db, user_ids)
+    enrollments = dict(
+        (row.user_id, row)
+        for row in db.execute(
+            select(
+                PathEnrollment.user_id,
+                func.count(PathEnrollment.id).label("enrolled_paths"),
+                func.count(case((PathEnrollment.progress >= 100, 1))).label("completed_paths"),
+                func.count(case(((PathEnrollment.progress > 0) & (PathEnrollment.progress < 100), 1))).label("active_paths"),
+                func.max(func.coalesce(PathEnrollment.last_activity_at, PathEnrollment.enrolled_at)).label("last_activity_at")
+            )
+            .where(PathEnrollment.user_id.in_(user_ids))
+            .group_by(PathEnrollment.user_id)
+        )
+    )
+
+    rows = []
+    for user_id in user_ids:
+        interaction = interactions.get(user_id)
+        enrollment = enrollments.get(user_id)
+        if interaction is None and enrollment is None:
+            continue
+        activity_times = [
+            value for value in (
+                interaction["last_activity_at"] if interaction else None,
+                enrollment.last_activity_at if enrollment else None
+            )
+            if value is not None
+        ]
+        rows.append({
+            "user_id": user_id,
+            "interaction_count": interaction["interaction_count"] if interaction else 0,
+            "total_time_spent": interaction["time_spent"] if interaction else 0.0,
+            "completed_contents": interaction["completed_count"] if interaction else 0,
+            "progress_sum": interaction["progress_sum"] if interaction else 0.0,
+            "enrolled_paths": enrollment.enrolled_paths if enrollment else 0,
+            "active_paths": enrollment.active_paths if enrollment else 0,
+            "completed_paths": enrollment.completed_paths if enrollment else 0,
+            "last_activity_at": max(activity_times) if activity_times else None
+        })
+    return rows
+
+def rebuild_user_activity_summaries(db: Session, user_ids: list) -> int:
+    """在调用方的事务中重建指定用户的汇总行，返回写入的行数
+
+    用于通过 Core 语句或批量方法修改交互/注册记录之后（这些写入不触发增量维护）。
+    """
+    rows = _aggregate_rows(db, user_ids)
+    db.execute(delete(UserActivitySummary).where(UserActivitySummary.user_id.in_(user_ids)))
+    if rows:
+        db.execute(insert(UserActivitySummary), rows)
+    return len(rows)
+
+def rebuild_activity_summaries(db: Session, batch_size: int = 500) -> int:
+    """从源表重建所有用户的活动汇总，用于首次回填或修复计数偏差
+
+    按用户ID分批，每批在一个事务中删除并重新写入汇总行，可在服务运行时执行。
+    返回写入的汇总行数量。
+    """
+    last_id = 0
+    rebuilt = 0
+
+    while True:
+        user_ids = db.scalars(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+
+        rebuilt += rebuild_user_activity_summaries(db, user_ids)
+        db.commit()
+        logger.info("已重建 %s 条用户活动汇总 (最后用户ID: %s)", rebuilt, last_id)
+
+    return rebuilt
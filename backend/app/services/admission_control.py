@@ -0,0 +1,267 @@
+"""
+准入控制与过载保护
+
+调用大模型的接口（自适应测试、推荐路径、AI生成路径）一次要等待数秒到30秒。突发请求会在上游堆积，
+占满连接和内存，连普通接口也受影响。这里按路由把请求分为两类：
+- llm：会调用大模型的接口，并发数很小；
+- cheap：其他API接口，并发数较大，防止整体过载。
+只在缓存未命中等情况下才调用大模型的接口（路径详情）由中间件按 cheap 类处理，
+接口在确实需要调用大模型时再通过 llm_admission() 申请 llm 类的执行槽。
+
+每类有独立的并发上限和有界等待队列：
+- 有空闲执行槽时直接执行；
+- 否则进入队列等待，队列按用户轮转，一个用户的大量请求不会排在其他用户前面；
+- 每个用户在一类中同时执行和排队的请求数有上限。
+队列已满、等待超时或超过用户上限时拒绝请求：可降级的接口改为执行确定性的降级逻辑（不调用大模型，
+接口通过 is_degraded(request) 判断），其余返回 503 和 Retry-After。
+队列深度、等待时间和拒绝次数见 /admission-stats。
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    """请求未被准入，reason 为 queue_full / timeout / user_limit"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class AdmissionController:
+    """一类路由的并发上限、有界队列和按用户的公平调度
+
+    只在事件循环线程中使用，不需要加锁。
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float, per_user_limit: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_user_limit = per_user_limit
+        self._active = 0
+        self._queued = 0
+        # 按用户分组的等待者，调度时轮转：取队首用户的第一个请求，再把该用户移到末尾
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        # 每个用户执行中和排队中的请求数
+        self._per_user: Dict[str, int] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.admitted = 0
+        self.waited = 0
+        self.degraded = 0
+        self.shed = {"queue_full": 0, "timeout": 0, "user_limit": 0}
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.max_queue_depth = 0
+
+    async def acquire(self, user_key: str) -> float:
+        """获取执行槽，返回排队等待的秒数；未被准入时抛出 AdmissionRejected"""
+        if self._per_user.get(user_key, 0) >= self.per_user_limit:
+            self._reject("user_limit")
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self._per_user[user_key] = self._per_user.get(user_key, 0) + 1
+            self.admitted += 1
+            return 0.0
+        if self._queued >= self.max_queue:
+            self._reject("queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_key, deque()).append(future)
+        self._queued += 1
+        self._per_user[user_key] = self._per_user.get(user_key, 0) + 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queued)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # 超时或取消的同时已分配到执行槽，交还给下一个等待者
+                self.release(user_key)
+            else:
+                self._remove_waiter(user_key, future)
+                self._decrement_user(user_key)
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("timeout")
+            raise
+        waited = time.perf_counter() - start
+        self.admitted += 1
+        self.waited += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+        return waited
+
+    def release(self, user_key: str) -> None:
+        """释放执行槽；有等待者时直接转交给轮转到的用户"""
+        self._decrement_user(user_key)
+        while self._waiters:
+            waiting_user, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._waiters.move_to_end(waiting_user)
+            else:
+                del self._waiters[waiting_user]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _remove_waiter(self, user_key: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(user_key)
+        if queue is None or future not in queue:
+            return  # 已被 release 取出
+        queue.remove(future)
+        self._queued -= 1
+        if not queue:
+            del self._waiters[user_key]
+
+    def _decrement_user(self, user_key: str) -> None:
+        remaining = self._per_user.get(user_key, 0) - 1
+        if remaining > 0:
+            self._per_user[user_key] = remaining
+        else:
+            self._per_user.pop(user_key, None)
+
+    def _reject(self, reason: str) -> None:
+        self.shed[reason] += 1
+        raise AdmissionRejected(reason)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queue_depth": self._queued,
+            "max_queue_depth": self.max_queue_depth,
+            "queued_users": len(self._waiters),
+            "admitted": self.admitted,
+            "degraded": self.degraded,
+            "shed": dict(self.shed),
+            "avg_wait_ms": round(self.wait_time_total / self.waited * 1000, 2) if self.waited else 0.0,
+            "max_wait_ms": round(self.wait_time_max * 1000, 2)
+        }
+
+admission_controllers = {
+    "llm": AdmissionController(
+        "llm",
+        settings.ADMISSION_LLM_MAX_CONCURRENCY,
+        settings.ADMISSION_LLM_MAX_QUEUE,
+        settings.ADMISSION_LLM_QUEUE_TIMEOUT,
+        settings.ADMISSION_LLM_PER_USER_LIMIT
+    ),
+    "cheap": AdmissionController(
+        "cheap",
+        settings.ADMISSION_CHEAP_MAX_CONCURRENCY,
+        settings.ADMISSION_CHEAP_MAX_QUEUE,
+        settings.ADMISSION_CHEAP_QUEUE_TIMEOUT,
+        settings.ADMISSION_CHEAP_PER_USER_LIMIT
+    )
+}
+
+# 调用大模型的路由：(方法, 路径, 是否可降级)
+# 仪表盘的推荐板块在推荐缓存未命中时调用大模型，降级时只返回缓存或数据库中的推荐
+LLM_ROUTES = (
+    ({"POST"}, re.compile(r"^/api/v1/assessment/adaptive-test$"), True),
+    ({"GET", "POST"}, re.compile(r"^/api/v1/learning-paths/recommended$"), True),
+    ({"GET"}, re.compile(r"^/api/v1/dashboard/\d+$"), True),
+)
+
+# 不受准入控制的路由：长连接的推送流
+EXEMPT_ROUTES = (
+    re.compile(r"^/api/v1/progress/stream/"),
+)
+
+def classify_request(request: Request) -> Optional[Tuple[str, bool]]:
+    """返回 (路由类别, 是否可降级)，不受控制的请求返回None"""
+    path = request.url.path
+    if not path.startswith("/api/") or any(pattern.match(path) for pattern in EXEMPT_ROUTES):
+        return None
+    for methods, pattern, degradable in LLM_ROUTES:
+        if request.method in methods and pattern.match(path):
+            return "llm", degradable
+    return "cheap", False
+
+def request_user_key(request: Request) -> str:
+    """公平调度使用的用户标识：user_id 查询参数或 X-User-ID 请求头，都没有时使用客户端地址"""
+    user_id = request.query_params.get("user_id") or request.headers.get("X-User-ID")
+    if user_id:
+        return f"user:{user_id}"
+    return f"client:{request.client.host if request.client else '-'}"
+
+def is_degraded(request: Request) -> bool:
+    """请求是否以降级模式执行（不调用大模型）"""
+    return getattr(request.state, "admission_degraded", False)
+
+def admission_rejected_error(e: AdmissionRejected) -> HTTPException:
+    """未被准入时返回给客户端的503，与中间件的拒绝响应一致"""
+    return HTTPException(
+        status_code=503,
+        detail=f"服务繁忙，请稍后重试 ({e.reason})",
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)}
+    )
+
+@asynccontextmanager
+async def llm_admission(request: Request) -> AsyncIterator[None]:
+    """在接口内部申请 llm 类的执行槽，用于只在部分情况下调用大模型的接口
+
+    未被准入时抛出 AdmissionRejected；中间件已按 llm 类准入的请求不再重复申请。
+    """
+    classified = classify_request(request) if settings.ADMISSION_CONTROL_ENABLED else None
+    if classified is None or classified[0] == "llm":
+        yield
+        return
+    controller = admission_controllers["llm"]
+    user_key = request_user_key(request)
+    try:
+        await controller.acquire(user_key)
+    except AdmissionRejected as e:
+        logger.warning("llm 类请求过载(%s)，拒绝: %s %s", e.reason, request.method, request.url.path)
+        raise
+    try:
+        yield
+    finally:
+        controller.release(user_key)
+
+async def admission_middleware(request: Request, call_next):
+    """按路由类别限制并发，过载时降级或返回503"""
+    classified = classify_request(request) if settings.ADMISSION_CONTROL_ENABLED else None
+    if classified is None:
+        return await call_next(request)
+
+    route_class, degradable = classified
+    controller = admission_controllers[route_class]
+    user_key = request_user_key(request)
+    try:
+        await controller.acquire(user_key)
+    except AdmissionRejected as e:
+        if degradable:
+            controller.degraded += 1
+            logger.warning("%s 类请求过载(%s)，降级执行: %s %s", route_class, e.reason, request.method, request.url.path)
+            request.state.admission_degraded = True
+            response = await call_next(request)
+            response.headers["X-Degraded"] = e.reason
+            return response
+        logger.warning("%s 类请求过载(%s)，拒绝: %s %s", route_class, e.reason, request.method, request.url.path)
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"服务繁忙，请稍后重试 ({e.reason})"},
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)}
+        )
+
+    try:
+        return await call_next(request)
+    finally:
+        controller.release(user_key)
@@ -1,8 +1,9 @@
 from typing import Dict, List, Any, Optional
 import json
 import asyncio
-from zhipuai import ZhipuAI
 from app.core.config import settings
+from app.logging_config import LazyPayload
+from app.services.metrics import observe_ai_request
 import logging
 import traceback
 import time
@@ -21,19 +22,24 @@ class AIService:
         self.timeout = settings.ZHIPUAI_TIMEOUT
         
         logger.info("初始化智谱AI服务...")
-        logger.info(f"使用模型: {self.model}")
-        logger.info(f"超时设置: {self.timeout}秒")
-        logger.debug(f"API密钥: {self.api_key[:8]}..." if self.api_key else "API密钥未配置")
+        logger.info("使用模型: %s", self.model)
+        logger.info("超时设置: %s秒", self.timeout)
+        if self.api_key:
+            logger.debug("API密钥: %s...", self.api_key[:8])
+        else:
+            logger.debug("API密钥未配置")
         
         if not self.api_key:
             logger.error("ZHIPUAI_API_KEY未配置")
             raise ValueError("ZHIPUAI_API_KEY未配置")
             
         try:
+            # 延迟导入SDK，避免拖慢应用启动
+            from zhipuai import ZhipuAI
             self.client = ZhipuAI(api_key=self.api_key)
             logger.info("智谱AI客户端初始化成功")
         except Exception as e:
-            logger.error(f"智谱AI客户端初始化失败: {str(e)}")
+            logger.error("智谱AI客户端初始化失败: %s", e)
             raise
             
     def _extract_json(self, text: str, request_id: str) -> Optional[str]:
@@ -44,7 +50,7 @@ class AIService:
             json.loads(text)
             return text
         except json.JSONDecodeError:
-            logger.debug(f"[{request_id}] 完整文本不是有效JSON，尝试提取...")
+            logger.debug("[%s] 完整文本不是有效JSON，尝试提取...", request_id)
         
         # 尝试使用正则表达式提取JSON部分
         patterns = [
@@ -60,7 +66,7 @@ class AIService:
                 try:
                     content = match.strip()
                     json.loads(content)  # 验证是否为有效JSON
-                    logger.info(f"[{request_id}] 成功提取JSON")
+                    logger.info("[%s] 成功提取JSON", request_id)
                     return content
                 except json.JSONDecodeError:
                     continue
@@ -71,17 +77,18 @@ class AIService:
         """调用智谱AI API的通用方法"""
         start_time = time.time()
         request_id = int(time.time() * 1000)
+        model = model or self.model
         
         try:
-            logger.info(f"[{request_id}] 开始调用智谱AI API...")
-            logger.info(f"[{request_id}] 模型: {model or self.model}")
-            logger.debug(f"[{request_id}] 提示词: {prompt[:200]}...")
+            logger.info("[%s] 开始调用智谱AI API...", request_id)
+            logger.info("[%s] 模型: %s", request_id, model)
+            logger.debug("[%s] 提示词: %s", request_id, LazyPayload(prompt, 200))
             
             try:
                 # 异步调用API
                 fn = functools.partial(
                     self.client.chat.completions.create,
-                    model=model or self.model,
+                    model=model,
                     messages=[
                         {
                             "role": "system",
@@ -102,10 +109,11 @@ class AIService:
                 # 计算耗时
                 elapsed_time = time.time() - start_time
                 raw_text = response.choices[0].message.content.strip()
-                logger.info(f"[{request_id}] 智谱AI调用成功")
-                logger.info(f"[{request_id}] 耗时: {elapsed_time:.2f}秒")
-                logger.info(f"[{request_id}] 响应长度: {len(raw_text)}")
-                logger.debug(f"[{request_id}] 原始响应:\n{raw_text[:500]}...")
+                observe_ai_request(model, "success", elapsed_time)
+                logger.info("[%s] 智谱AI调用成功", request_id)
+                logger.info("[%s] 耗时: %.2f秒", request_id, elapsed_time)
+                logger.info("[%s] 响应长度: %s", request_id, len(raw_text))
+                logger.debug("[%s] 原始响应:\n%s", request_id, LazyPayload(raw_text))
                 
                 # 尝试从响应中提取JSON
                 result_text = self._extract_json(raw_text, request_id)
@@ -113,28 +121,31 @@ class AIService:
                     return result_text
                     
                 # 如果无法提取JSON，返回原始响应
-                logger.warning(f"[{request_id}] 无法提取JSON，返回原始响应")
+                logger.warning("[%s] 无法提取JSON，返回原始响应", request_id)
                 return raw_text
                 
             except asyncio.TimeoutError as e:
                 elapsed_time = time.time() - start_time
-                logger.error(f"[{request_id}] 智谱AI API调用超时 ({self.timeout}秒)")
-                logger.error(f"[{request_id}] 耗时: {elapsed_time:.2f}秒")
-                logger.error(f"[{request_id}] 提示词长度: {len(prompt)}")
+                observe_ai_request(model, "timeout", elapsed_time)
+                logger.error("[%s] 智谱AI API调用超时 (%s秒)", request_id, self.timeout)
+                logger.error("[%s] 耗时: %.2f秒", request_id, elapsed_time)
+                logger.error("[%s] 提示词长度: %s", request_id, len(prompt))
                 raise
                 
         except Exception as e:
             elapsed_time = time.time() - start_time
-            logger.error(f"[{request_id}] 智谱AI API调用失败: {str(e)}")
-            logger.error(f"[{request_id}] 错误类型: {type(e).__name__}")
-            logger.error(f"[{request_id}] 耗时: {elapsed_time:.2f}秒")
-            logger.error(f"[{request_id}] 提示词长度: {len(prompt)}")
-            logger.error(f"[{request_id}] 完整错误追踪:\n{traceback.format_exc()}")
+            if not isinstance(e, asyncio.TimeoutError):
+                observe_ai_request(model, "error", elapsed_time)
+            logger.error("[%s] 智谱AI API调用失败: %s", request_id, e)
+            logger.error("[%s] 错误类型: %s", request_id, type(e).__name__)
+            logger.error("[%s] 耗时: %.2f秒", request_id, elapsed_time)
+            logger.error("[%s] 提示词长度: %s", request_id, len(prompt))
+            logger.error("[%s] 完整错误追踪:\n%s", request_id, traceback.format_exc())
             raise
             
     async def analyze_learning_style(self, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
         """分析用户的学习风格偏好"""
-        logger.info(f"开始分析学习风格，输入数据量: {len(responses)}")
+        logger.info("开始分析学习风格，输入数据量: %s", len(responses))
         
         prompt = f"""
         基于以下用户的评估回答，分析他们的学习风格偏好。回答应包含视觉、听觉、动觉和阅读方面的得分，
@@ -153,12 +164,12 @@ class AIService:
             
         result_text = await self._call_ai_api(prompt)
         result = json.loads(result_text)
-        logger.info(f"学习风格分析完成，主导风格: {result.get('dominant_style', 'unknown')}")
+        logger.info("学习风格分析完成，主导风格: %s", result.get('dominant_style', 'unknown'))
         return result
     
     async def generate_learning_analysis(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """分析用户学习数据并提供见解"""
-        logger.info(f"开始生成学习分析，用户数据: {json.dumps(user_data, ensure_ascii=False)}")
+        logger.info("开始生成学习分析，用户数据: %s", LazyPayload(user_data))
         
         prompt = f"""
         我有一个学生的学习行为数据，请分析并提供见解:
@@ -191,7 +202,7 @@ class AIService:
         self, user_id: int, subject: str = None, limit: int = 3
     ) -> List[Dict[str, Any]]:
         """生成内容推荐"""
-        logger.info(f"开始生成内容推荐: user_id={user_id}, subject={subject}, limit={limit}")
+        logger.info("开始生成内容推荐: user_id=%s, subject=%s, limit=%s", user_id, subject, limit)
         
         prompt = f"""
         为用户ID {user_id} 生成{limit}条学习内容推荐。
@@ -225,12 +236,12 @@ class AIService:
                 "approach_suggestion": rec.get("approach_suggestion", "建议仔细学习并做笔记")
             })
         
-        logger.info(f"内容推荐生成完成: {len(formatted_recommendations)}条推荐")
+        logger.info("内容推荐生成完成: %s条推荐", len(formatted_recommendations))
         return formatted_recommendations
     
     async def generate_adaptive_test(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """生成自适应测试，根据用户特点调整难度"""
-        logger.info(f"开始生成自适应测试: {json.dumps(user_data, ensure_ascii=False)}")
+        logger.info("开始生成自适应测试: %s", LazyPayload(user_data))
         
         # 如果明确设置了使用模拟数据，直接返回
         if hasattr(settings, 'USE_MOCK_DATA') and settings.USE_MOCK_DATA:
@@ -298,11 +309,11 @@ class AIService:
                     }
                 raise ValueError("AI返回的数据结构不正确")
                 
-            logger.info(f"自适应测试生成完成: {len(result.get('questions', []))}个问题")
+            logger.info("自适应测试生成完成: %s个问题", len(result.get('questions', [])))
             return result
             
         except json.JSONDecodeError as e:
-            logger.error(f"解析AI返回的JSON失败: {e}")
+            logger.error("解析AI返回的JSON失败: %s", e)
             # 如果JSON解析失败，尝试提取JSON部分
             import re
             json_pattern = r'```json(.*?)```|```(.*?)```|\{.*\}'
@@ -319,3 +330,11 @@ class AIService:
                         except:
                             continue
             raise ValueError("无法从AI回答中提取有效的JSON")
+
+@functools.lru_cache(maxsize=1)
+def get_ai_service() -> AIService:
+    """获取进程内共享的AI服务实例
+
+    首次调用时才创建客户端；未配置API密钥时抛出ValueError且不缓存，配置后下次调用即可成功。
+    """
+    return AIService()
@@ -0,0 +1,56 @@
+"""
+学习分析服务
+"""
+from typing import Any, Dict
+from sqlalchemy.orm import Session
+from app.services.interaction_rollup_service import get_interaction_totals
+
+def build_weakness_report(db: Session, user_id: int) -> Dict[str, Any]:
+    """识别用户的学习弱点和强项，并附带交互统计"""
+    # 交互统计先读按日汇总，只扫描尚未汇总的原始行
+    totals = get_interaction_totals(db, [user_id]).get(user_id)
+    activity_stats = {
+        "interaction_count": totals["interaction_count"] if totals else 0,
+        "total_time_spent": totals["time_spent"] if totals else 0,
+        "completed_contents": totals["completed_count"] if totals else 0,
+        "average_rating": round(totals["rating_sum"] / totals["rating_count"], 2) if totals and totals["rating_count"] else None
+    }
+
+    # 模拟弱点分析 - 实际应用中可能会有更复杂的算法
+    weak_areas = [
+        {
+            "topic": "数据结构",
+            "confidence_level": 0.35,
+            "suggested_resources": [
+                {"type": "video", "title": "数据结构基础", "url": "https://example.com/ds101"}
+            ]
+        },
+        {
+            "topic": "算法复杂度",
+            "confidence_level": 0.42,
+            "suggested_resources": [
+                {"type": "article", "title": "复杂度分析简介", "url": "https://example.com/complexity"}
+            ]
+        }
+    ]
+
+    # 模拟强项分析
+    strength_areas = [
+        {"topic": "编程基础", "confidence_level": 0.85},
+        {"topic": "Web开发", "confidence_level": 0.78}
+    ]
+
+    # 模拟改进计划
+    improvement_plan = {
+        "short_term_goals": ["完成数据结构基础课程", "每周解决5道算法题"],
+        "long_term_goals": ["掌握高级数据结构", "能够独立分析算法复杂度"],
+        "recommended_study_path": "先巩固基础知识，再通过实践加深理解"
+    }
+
+    return {
+        "user_id": user_id,
+        "weak_areas": weak_areas,
+        "strength_areas": strength_areas,
+        "improvement_plan": improvement_plan,
+        "activity_stats": activity_stats
+    }
@@ -1,6 +1,11 @@
+import logging
 from typing import Dict, List, Any, Optional
+from sqlalchemy.orm import Session, undefer
 from app.models.learning_assessment import LearningStyleAssessment
 
+# 设置日志
+logger = logging.getLogger(__name__)
+
 class AssessmentService:
     """处理学习评估相关功能的服务类"""
     
@@ -252,4 +257,71 @@ class AssessmentService:
             "为学习设定具体目标和时间表"
         ]
         
-        return suggestions + general_suggestions
\ No newline at end of file
+        return suggestions + general_suggestions
+
+def build_progress_report(db: Session, user) -> Dict[str, Any]:
+    """根据最近几次评估生成用户的学习进度和改进建议，user 为User对象或用户快照"""
+    user_id = user.id
+    # Get the user's most recent assessment
+    latest_assessment = (
+        db.query(LearningStyleAssessment)
+        .options(undefer(LearningStyleAssessment.assessment_data))
+        .filter(LearningStyleAssessment.user_id == user_id)
+        .order_by(LearningStyleAssessment.completed_at.desc())
+        .first()
+    )
+
+    # 如果用户没有评估记录，返回默认数据而不是抛出错误
+    if not latest_assessment:
+        logger.info("用户 %s 没有评估记录，返回默认数据", user_id)
+        return {
+            "user_id": user_id,
+            "name": getattr(user, "name", None) or getattr(user, "full_name", None) or getattr(user, "username", "用户"),
+            "email": getattr(user, "email", "user@example.com"),
+            "learning_style": "未知",
+            "overall_progress": 0,
+            "completed_paths": 0,
+            "active_paths": 0,
+            "completed_tests": 0,
+            "recent_activities": []
+        }
+
+    # Get previous assessments for comparison
+    previous_assessments = (
+        db.query(LearningStyleAssessment)
+        .filter(LearningStyleAssessment.user_id == user_id)
+        .filter(LearningStyleAssessment.id != latest_assessment.id)
+        .order_by(LearningStyleAssessment.completed_at.desc())  # 使用completed_at替代created_at
+        .limit(3)  # Get up to 3 previous assessments
+        .all()
+    )
+
+    # Calculate progress metrics
+    progress_metrics = AssessmentService.calculate_progress_metrics(
+        latest_assessment, 
+        previous_assessments
+    )
+
+    # Generate improvement suggestions
+    # 修复这里：使用assessment_data而不是analysis_results
+    improvement_suggestions = AssessmentService.generate_improvement_suggestions(
+        latest_assessment.assessment_data or {}
+    )
+
+    return {
+        "user_id": user_id,
+        "latest_assessment_id": latest_assessment.id,
+        "latest_assessment_date": latest_assessment.completed_at,  # 使用completed_at而不是created_at
+        "current_learning_style": {
+            "visual_score": latest_assessment.visual_score,
+            "auditory_score": latest_assessment.auditory_score,
+            "kinesthetic_score": latest_assessment.kinesthetic_score,
+            "reading_score": latest_assessment.reading_score,
+            # 使用assessment_data而不是analysis_results
+            "dominant_style": latest_assessment.dominant_style or 
+                              (latest_assessment.assessment_data.get("dominant_style") 
+                               if latest_assessment.assessment_data else None)
+        },
+        "progress_metrics": progress_metrics,
+        "improvement_suggestions": improvement_suggestions
+    }
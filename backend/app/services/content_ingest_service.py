@@ -0,0 +1,175 @@
+from typing import AsyncIterator, Dict, Any, List, Tuple
+import json
+import logging
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.models.content import LearningContent, ContentTag, content_tag_association
+from app.schemas.content import ContentBulkItem
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+class LineTooLongError(ValueError):
+    """NDJSON单行超出长度限制"""
+
+async def iter_ndjson_lines(
+    byte_stream: AsyncIterator[bytes],
+    max_line_bytes: int = None
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """将字节流按行切分，产出 (行号, 行内容)，只缓存当前未结束的一行
+
+    超长的行会产出 LineTooLongError 实例而不是行内容，并丢弃到下一个换行符为止。
+    """
+    max_line_bytes = max_line_bytes or settings.BULK_MAX_LINE_BYTES
+    buffer = bytearray()
+    line_number = 0
+    skipping = False
+
+    async for chunk in byte_stream:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline == -1:
+                if not skipping:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        buffer.clear()
+                        skipping = True
+                break
+
+            line_number += 1
+            if skipping:
+                yield line_number, LineTooLongError(f"行长度超过 {max_line_bytes} 字节")
+                skipping = False
+            else:
+                buffer += chunk[start:newline]
+                if len(buffer) > max_line_bytes:
+                    yield line_number, LineTooLongError(f"行长度超过 {max_line_bytes} 字节")
+                else:
+                    yield line_number, bytes(buffer)
+                buffer.clear()
+            start = newline + 1
+
+    if skipping:
+        yield line_number + 1, LineTooLongError(f"行长度超过 {max_line_bytes} 字节")
+    elif buffer.strip():
+        yield line_number + 1, bytes(buffer)
+
+def _upsert_tags(db: Session, tag_names: set) -> Dict[str, int]:
+    """批量获取或创建标签，返回 {标签名: 标签ID}"""
+    if not tag_names:
+        return {}
+    tag_ids = dict(
+        db.execute(select(ContentTag.name, ContentTag.id).where(ContentTag.name.in_(tag_names))).all()
+    )
+    missing = [{"name": name} for name in tag_names if name not in tag_ids]
+    if missing:
+        created = db.execute(
+            insert(ContentTag).returning(ContentTag.name, ContentTag.id),
+            missing
+        ).all()
+        tag_ids.update(dict(created))
+    return tag_ids
+
+def _insert_chunk(db: Session, rows: List[Tuple[int, ContentBulkItem]]) -> None:
+    """在一个事务中插入一批内容及其标签关联"""
+    tag_ids = _upsert_tags(db, {name for _, item in rows for name in item.tags})
+
+    values = [item.model_dump(exclude={"tags"}) for _, item in rows]
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite 只有一个写入者，同一条多行INSERT按VALUES顺序分配自增ID，排序后即可与输入行对应；
+        # sort_by_parameter_order 在SQLite上会退化为逐行插入
+        content_ids = sorted(db.scalars(insert(LearningContent).returning(LearningContent.id), values).all())
+    else:
+        # 其他数据库不保证RETURNING的顺序，也不保证并发写入时ID连续，由SQLAlchemy按参数顺序对应
+        content_ids = db.scalars(
+            insert(LearningContent).returning(LearningContent.id, sort_by_parameter_order=True),
+            values
+        ).all()
+
+    associations = [
+        {"content_id": content_id, "tag_id": tag_ids[name]}
+        for content_id, (_, item) in zip(content_ids, rows)
+        for name in dict.fromkeys(item.tags)
+    ]
+    if associations:
+        db.execute(insert(content_tag_association), associations)
+    db.commit()
+
+async def ingest_content_ndjson(
+    db: Session,
+    byte_stream: AsyncIterator[bytes],
+    chunk_size: int = None,
+    max_errors: int = None
+) -> Dict[str, Any]:
+    """流式导入NDJSON格式的学习内容
+
+    逐行校验，每满 chunk_size 行批量插入并提交一次，内存占用与上传大小无关。
+    插入和回滚是同步的数据库操作，在线程池中执行，不阻塞事件循环；读取上传流和校验仍在事件循环中。
+    某一批插入失败只回滚该批，错误按行号返回。
+    """
+    chunk_size = chunk_size or settings.BULK_INSERT_CHUNK_SIZE
+    max_errors = settings.BULK_MAX_ERRORS if max_errors is None else max_errors
+
+    received = 0
+    inserted = 0
+    failed = 0
+    errors: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, ContentBulkItem]] = []
+
+    def add_error(line_number: int, message: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append({"line": line_number, "error": message})
+
+    async def flush() -> None:
+        nonlocal inserted
+        if not pending:
+            return
+        try:
+            await run_in_threadpool(_insert_chunk, db, list(pending))
+            inserted += len(pending)
+        except Exception as e:
+            await run_in_threadpool(db.rollback)
+            logger.exception("批量插入失败 (行 %s-%s): %s", pending[0][0], pending[-1][0], e)
+            for line_number, _ in pending:
+                add_error(line_number, f"批量插入失败: {str(e)}")
+        pending.clear()
+
+    async for line_number, line in iter_ndjson_lines(byte_stream):
+        if isinstance(line, LineTooLongError):
+            received += 1
+            add_error(line_number, str(line))
+            continue
+        if not line.strip():
+            continue
+
+        received += 1
+        try:
+            pending.append((line_number, ContentBulkItem.model_validate(json.loads(line))))
+        except json.JSONDecodeError as e:
+            add_error(line_number, f"无效的JSON: {e.msg}")
+            continue
+        except ValidationError as e:
+            add_error(line_number, "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            continue
+
+        if len(pending) >= chunk_size:
+            await flush()
+
+    await flush()
+    logger.info("批量导入完成: 接收 %s 行, 插入 %s 行, 失败 %s 行", received, inserted, failed)
+
+    return {
+        "received": received,
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
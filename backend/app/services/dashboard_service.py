@@ -0,0 +1,106 @@
+"""
+仪表盘聚合服务
+
+仪表盘需要学习风格、已注册路径、推荐路径、学习进度和弱点分析五个板块。原来由前端依次请求五个接口，
+每个接口都重新校验用户；这里在一次请求内并发获取各板块，共用一次用户查询。
+
+- 数据库板块是同步查询，各自在线程池中执行，并使用独立的短生命周期会话（会话不跨线程共享），
+  多个板块的查询相互重叠；
+- 推荐板块是协程，在事件循环中等待AI生成，同时其他板块的查询在线程池中进行。
+总耗时接近最慢的板块。每个板块有独立的超时，超时或出错的板块返回 None，错误信息记录在 errors 中，
+其余板块正常返回。超时的数据库板块不能被中断：线程中的查询执行完后关闭会话，结果被丢弃。
+推荐板块超时后，共享的推荐计算仍在后台继续并写入缓存，下次加载即可读取。
+仪表盘属于准入控制的 llm 类路由；降级执行时推荐板块只返回缓存或数据库中的推荐，不调用大模型。
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Sequence
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, sessionmaker
+from app.services.analytics_service import build_weakness_report
+from app.services.assessment_service import build_progress_report
+from app.services.learning_path_service import build_user_path_list
+from app.services.recommendation_cache import get_recommended_paths
+from app.services.user_cache import UserSnapshot
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+def _learning_style(db: Session, user: UserSnapshot) -> Dict[str, Any]:
+    return user.learning_style or {}
+
+def _enrolled_paths(db: Session, user: UserSnapshot) -> Any:
+    return build_user_path_list(db, user.id)
+
+def _progress(db: Session, user: UserSnapshot) -> Dict[str, Any]:
+    return build_progress_report(db, user)
+
+def _weaknesses(db: Session, user: UserSnapshot) -> Dict[str, Any]:
+    return build_weakness_report(db, user.id)
+
+async def _recommended_paths(db: Session, user: UserSnapshot, allow_compute: bool = True) -> Any:
+    return await get_recommended_paths(db, user.id, allow_compute=allow_compute)
+
+# 在线程池中执行的数据库板块：板块名 -> 同步获取函数
+DB_SECTIONS: Dict[str, Callable[[Session, UserSnapshot], Any]] = {
+    "learning_style": _learning_style,
+    "enrolled_paths": _enrolled_paths,
+    "progress": _progress,
+    "weaknesses": _weaknesses
+}
+
+# 全部板块；推荐板块排在最前，使等待AI的时间与其他板块的查询重叠
+DASHBOARD_SECTIONS = ("recommended_paths", *DB_SECTIONS)
+
+def _run_db_section(name: str, session_factory: Callable[[], Session], user: UserSnapshot) -> Any:
+    """在线程池中执行，使用独立的会话"""
+    with session_factory() as db:
+        return DB_SECTIONS[name](db, user)
+
+async def _run_section(
+    name: str,
+    db: Session,
+    session_factory: Callable[[], Session],
+    user: UserSnapshot,
+    timeout: float,
+    allow_compute: bool
+) -> Dict[str, Any]:
+    start = time.perf_counter()
+    if name == "recommended_paths":
+        section = _recommended_paths(db, user, allow_compute)
+    else:
+        section = run_in_threadpool(_run_db_section, name, session_factory, user)
+    try:
+        data = await asyncio.wait_for(section, timeout)
+        error = None
+    except asyncio.TimeoutError:
+        data, error = None, f"超时（{timeout}秒）"
+        logger.warning("仪表盘板块 %s 超时: user_id=%s", name, user.id)
+    except Exception as e:
+        data, error = None, str(e)
+        logger.exception("仪表盘板块 %s 获取失败: %s", name, e)
+    return {"name": name, "data": data, "error": error, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+async def build_dashboard(
+    db: Session,
+    user: UserSnapshot,
+    sections: Sequence[str],
+    timeout: float,
+    allow_compute: bool = True
+) -> Dict[str, Any]:
+    """并发获取仪表盘的各板块，sections 为需要的板块名；allow_compute 为 False 时推荐板块不调用大模型
+
+    db 只由推荐板块在事件循环中使用，数据库板块按同一个连接池另开会话。
+    """
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    wanted = [name for name in DASHBOARD_SECTIONS if name in sections]
+    results = await asyncio.gather(*[
+        _run_section(name, db, session_factory, user, timeout, allow_compute) for name in wanted
+    ])
+    return {
+        "user_id": user.id,
+        "sections": {result["name"]: result["data"] for result in results},
+        "errors": {result["name"]: result["error"] for result in results if result["error"]},
+        "timings_ms": {result["name"]: result["elapsed_ms"] for result in results}
+    }
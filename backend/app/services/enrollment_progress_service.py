@@ -0,0 +1,382 @@
+from typing import Callable, Dict, Any, List, Optional, Sequence, TypeVar
+import json
+import logging
+import random
+import time
+from sqlalchemy import ARRAY, JSON, Text, cast, func, literal, null, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm.exc import StaleDataError
+from ..core.config import settings
+from ..models.learning_path import (
+    EnrollmentContentProgress,
+    LearningPath,
+    PathEnrollment,
+    StudySession,
+    clamped_progress,
+    path_content_association,
+    rebuild_enrollment_progress_sums
+)
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def run_with_version_retry(db: Session, operation: Callable[[], T], max_retries: Optional[int] = None) -> T:
+    """执行一次读-改-写并提交，注册记录版本冲突时回滚并重新执行
+
+    operation 必须在每次调用时重新读取注册记录，回滚后会话中的对象已失效。
+    冲突时以 time.sleep 退避，只能在线程池中调用（同步接口或 run_in_threadpool），不能在事件循环中直接调用。
+    """
+    max_retries = max_retries or settings.ENROLLMENT_UPDATE_MAX_RETRIES
+    for attempt in range(1, max_retries + 1):
+        try:
+            result = operation()
+            db.commit()
+            return result
+        except StaleDataError:
+            db.rollback()
+            if attempt == max_retries:
+                logger.warning("注册记录更新冲突，已重试 %s 次", max_retries)
+                raise
+            # 随机退避，避免冲突的请求再次同时提交
+            time.sleep(random.uniform(0, 0.005 * attempt))
+
+def lock_enrollments(db: Session, user_id: int, path_ids: Sequence[int]) -> None:
+    """在读取注册记录前锁定用户在这些路径上的注册记录，直到事务提交或回滚
+
+    以不改变任何值的UPDATE取得写锁（PostgreSQL为行锁，SQLite为数据库写锁），SQLite不支持 SELECT ... FOR UPDATE。
+    并发写入同一注册记录的请求在这里排队，之后读到的进度累计值和内容进度都是最新的，提交时不会发生版本冲突；
+    版本号仍然保留，用于检测未加锁的写入。
+    """
+    if not path_ids:
+        return
+    db.execute(
+        update(PathEnrollment)
+        .where(PathEnrollment.user_id == user_id, PathEnrollment.path_id.in_(path_ids))
+        .values(version=PathEnrollment.version)
+        .execution_options(synchronize_session=False)
+    )
+
+def patch_personalization_settings(db: Session, enrollment: PathEnrollment, changes: Dict[str, Any]) -> None:
+    """按键修改注册记录的个性化设置
+
+    SQLite/PostgreSQL 在数据库中用 json_set/jsonb_set 逐键修改，不读取也不回写整个文档；
+    其他数据库退回到读-改-写，由版本号检测冲突。两种方式都会递增版本号。
+    键中不能包含双引号（SQLite的JSON路径无法转义），否则抛出 ValueError。
+    """
+    if not changes:
+        return
+    invalid = [key for key in changes if not isinstance(key, str) or '"' in key]
+    if invalid:
+        raise ValueError(f"个性化设置的键不能包含双引号: {invalid}")
+    db.flush()
+    dialect = db.get_bind().dialect.name
+    column = PathEnrollment.personalization_settings
+
+    if dialect == "sqlite":
+        arguments = []
+        for key, value in changes.items():
+            # 字符串以外的值按JSON插入，避免被存成字符串
+            arguments += [f'$."{key}"', value if isinstance(value, str) else func.json(json.dumps(value))]
+        patched = func.json_set(func.coalesce(column, "{}"), *arguments)
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import JSONB
+        
+        patched = cast(func.coalesce(column, cast("{}", JSON)), JSONB)
+        for key, value in changes.items():
+            patched = func.jsonb_set(patched, literal([key], ARRAY(Text)), cast(json.dumps(value), JSONB))
+        patched = cast(patched, JSON)
+    else:
+        merged = dict(enrollment.personalization_settings or {})
+        merged.update(changes)
+        enrollment.personalization_settings = merged
+        return
+
+    result = db.execute(
+        update(PathEnrollment)
+        .where(PathEnrollment.id == enrollment.id, PathEnrollment.version == enrollment.version)
+        .values(personalization_settings=patched, version=PathEnrollment.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise StaleDataError(f"注册记录 {enrollment.id} 已被其他请求修改")
+    db.expire(enrollment, ["personalization_settings", "version"])
+
+def get_content_progress_map(db: Session, enrollment_id: int) -> Dict[str, float]:
+    """获取注册记录中每个内容的进度 {content_id: progress}"""
+    rows = (
+        db.query(EnrollmentContentProgress.content_id, EnrollmentContentProgress.progress)
+        .filter(EnrollmentContentProgress.enrollment_id == enrollment_id)
+        .all()
+    )
+    return {str(content_id): progress for content_id, progress in rows}
+
+def get_content_study_time_map(db: Session, enrollment_id: int) -> Dict[str, float]:
+    """获取注册记录中每个内容的学习时间 {content_id: minutes}"""
+    rows = (
+        db.query(EnrollmentContentProgress.content_id, EnrollmentContentProgress.study_time)
+        .filter(
+            EnrollmentContentProgress.enrollment_id == enrollment_id,
+            EnrollmentContentProgress.study_time > 0
+        )
+        .all()
+    )
+    return {str(content_id): study_time for content_id, study_time in rows}
+
+def get_study_session_stats(db: Session, enrollment_id: int) -> Dict[str, Any]:
+    """在数据库中汇总学习会话：会话数量、总时长和最近一次会话结束时间"""
+    count, total_duration, last_end = (
+        db.query(
+            func.count(StudySession.id),
+            func.coalesce(func.sum(StudySession.duration), 0.0),
+            func.max(StudySession.end_time)
+        )
+        .filter(StudySession.enrollment_id == enrollment_id)
+        .one()
+    )
+    return {
+        "session_count": count,
+        "session_minutes": round(total_duration, 2),
+        "last_session_end": last_end
+    }
+
+def get_enrollment_states(
+    db: Session,
+    user_id: int,
+    path_ids: Optional[Sequence[int]] = None
+) -> List[Dict[str, Any]]:
+    """读取用户在各路径上的进度和学习时间，path_ids 为None时返回全部注册记录"""
+    if path_ids is not None and not path_ids:
+        return []
+    query = db.query(PathEnrollment).filter(PathEnrollment.user_id == user_id)
+    if path_ids is not None:
+        query = query.filter(PathEnrollment.path_id.in_(path_ids))
+    enrollments = query.order_by(PathEnrollment.path_id).all()
+    rows = db.execute(
+        select(
+            EnrollmentContentProgress.enrollment_id,
+            EnrollmentContentProgress.content_id,
+            EnrollmentContentProgress.progress,
+            EnrollmentContentProgress.study_time
+        ).where(EnrollmentContentProgress.enrollment_id.in_([enrollment.id for enrollment in enrollments]))
+    ).all() if enrollments else []
+
+    content_progress: Dict[int, Dict[str, float]] = {}
+    content_study_time: Dict[int, Dict[str, float]] = {}
+    for enrollment_id, content_id, progress, study_time in rows:
+        content_progress.setdefault(enrollment_id, {})[str(content_id)] = progress
+        if study_time:
+            content_study_time.setdefault(enrollment_id, {})[str(content_id)] = study_time
+
+    return [
+        {
+            "path_id": enrollment.path_id,
+            "progress": enrollment.progress or 0.0,
+            "content_progress": content_progress.get(enrollment.id, {}),
+            "total_study_time": round(enrollment.total_study_time or 0, 2),  # 学习总时长(小时)
+            "content_study_time": content_study_time.get(enrollment.id, {}),
+            "last_activity_at": enrollment.last_activity_at
+        }
+        for enrollment in enrollments
+    ]
+
+def _content_role(db: Session, path_id: int, content_id: int) -> Optional[bool]:
+    """内容在路径中是否必修；不在路径的内容列表中时返回None"""
+    row = db.execute(
+        select(path_content_association.c.required)
+        .where(path_content_association.c.path_id == path_id, path_content_association.c.content_id == content_id)
+    ).first()
+    if row is None:
+        return None
+    return row.required is not False
+
+def _apply_progress_delta(
+    db: Session,
+    enrollment: PathEnrollment,
+    content_id: int,
+    old_progress: Optional[float],
+    new_progress: float
+) -> None:
+    """按内容进度的变化量更新注册记录的进度累计值"""
+    delta = clamped_progress(new_progress) - (clamped_progress(old_progress) if old_progress is not None else 0.0)
+    role = _content_role(db, enrollment.path_id, content_id)
+    if role is None:
+        name = "unlisted_progress_sum"
+        if old_progress is None:
+            enrollment.unlisted_content_count = (enrollment.unlisted_content_count or 0) + 1
+    else:
+        name = "required_progress_sum" if role else "optional_progress_sum"
+    setattr(enrollment, name, (getattr(enrollment, name) or 0.0) + delta)
+    # 增量为0时也更新注册记录，使同时写入同一内容的请求由版本号检测冲突并重试，累计值不会错位
+    flag_modified(enrollment, name)
+
+def record_content_progress(
+    db: Session,
+    enrollment: PathEnrollment,
+    content_id: int,
+    progress: Optional[float],
+    study_time: float = 0
+) -> None:
+    """写入单个内容的进度，只修改该内容对应的一行，并增量更新注册记录的进度累计值
+
+    progress 为None时只累加学习时间，保留原有进度（新内容按0记录）。
+    """
+    db.flush()  # 会话未开启autoflush，确保之前新增的记录可被查到
+    record = db.get(EnrollmentContentProgress, (enrollment.id, content_id))
+    old_progress = None if record is None else record.progress
+    if progress is None:
+        progress = old_progress if old_progress is not None else 0.0
+    if record is None:
+        record = EnrollmentContentProgress(
+            enrollment_id=enrollment.id,
+            content_id=content_id,
+            progress=progress,
+            study_time=study_time or 0.0
+        )
+        db.add(record)
+    else:
+        record.progress = progress
+        if study_time:
+            # 在数据库中累加，避免读-改-写
+            record.study_time = EnrollmentContentProgress.study_time + study_time
+
+    _apply_progress_delta(db, enrollment, content_id, old_progress, progress)
+
+    if study_time:
+        # 更新总学习时长(转换为小时)
+        enrollment.total_study_time = func.coalesce(PathEnrollment.total_study_time, 0.0) + study_time / 60
+
+def record_study_session(
+    db: Session,
+    enrollment_id: int,
+    content_id: Optional[int],
+    start_time: str,
+    end_time: str,
+    duration: float
+) -> StudySession:
+    """追加一条学习会话记录"""
+    session = StudySession(
+        enrollment_id=enrollment_id,
+        content_id=content_id,
+        start_time=start_time,
+        end_time=end_time,
+        duration=duration
+    )
+    db.add(session)
+    return session
+
+def overall_progress(enrollment: PathEnrollment, content_count: int, required_count: int) -> float:
+    """由进度累计值计算总体进度
+
+    路径有必修内容时为必修内容的平均进度，选修内容不计入；路径只有选修内容时为全部内容的平均进度；
+    路径没有内容列表时为已记录内容的平均进度。分母是路径的内容计数，未开始的内容按0计。
+    批量重建时使用同样口径的SQL表达式（见 app.models.learning_path.overall_progress_expression）。
+    """
+    if required_count:
+        total, count = enrollment.required_progress_sum, required_count
+    elif content_count:
+        total, count = enrollment.optional_progress_sum, content_count
+    else:
+        total, count = enrollment.unlisted_progress_sum, enrollment.unlisted_content_count
+    if not count:
+        return 0.0
+    return round(clamped_progress((total or 0.0) / count), 4)
+
+def recompute_enrollment_progress(db: Session, enrollment: PathEnrollment) -> None:
+    """由进度累计值和路径的内容计数重新计算总体进度，不扫描内容进度行"""
+    counts = db.execute(
+        select(LearningPath.content_count, LearningPath.required_content_count)
+        .where(LearningPath.id == enrollment.path_id)
+    ).first()
+    content_count, required_count = counts if counts is not None else (0, 0)
+    enrollment.progress = overall_progress(enrollment, content_count, required_count)
+
+def migrate_enrollment_json(db: Session, batch_size: int = 500) -> int:
+    """将 PathEnrollment 上的旧版JSON字段分批迁移到 enrollment_content_progress / study_session 表
+
+    每批单独提交，可在服务运行时执行；迁移完成的记录其JSON字段被置为NULL，重复执行是安全的。
+    返回迁移的注册记录数量。
+    """
+    last_id = 0
+    migrated = 0
+
+    while True:
+        batch = (
+            db.query(
+                PathEnrollment.id,
+                PathEnrollment.content_progress,
+                PathEnrollment.content_study_time,
+                PathEnrollment.study_sessions
+            )
+            .filter(PathEnrollment.id > last_id)
+            .order_by(PathEnrollment.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        migrated_ids = []
+        for enrollment_id, content_progress, content_study_time, study_sessions in batch:
+            if not (content_progress or content_study_time or study_sessions):
+                continue
+
+            content_progress = content_progress or {}
+            content_study_time = content_study_time or {}
+            existing = {
+                record.content_id: record
+                for record in db.query(EnrollmentContentProgress)
+                .filter(EnrollmentContentProgress.enrollment_id == enrollment_id)
+                .all()
+            }
+
+            for key in set(content_progress) | set(content_study_time):
+                try:
+                    content_id = int(key)
+                except (ValueError, TypeError):
+                    logger.warning("跳过无效的内容ID: enrollment=%s, content_id=%s", enrollment_id, key)
+                    continue
+                legacy_time = content_study_time.get(key, 0) or 0
+                record = existing.get(content_id)
+                if record is None:
+                    db.add(EnrollmentContentProgress(
+                        enrollment_id=enrollment_id,
+                        content_id=content_id,
+                        progress=content_progress.get(key, 0) or 0,
+                        study_time=legacy_time
+                    ))
+                else:
+                    # 表中已有的进度比JSON中的更新，只合并学习时间
+                    record.study_time = (record.study_time or 0) + legacy_time
+
+            for session in study_sessions or []:
+                db.add(StudySession(
+                    enrollment_id=enrollment_id,
+                    content_id=session.get("content_id"),
+                    start_time=session.get("start_time"),
+                    end_time=session.get("end_time"),
+                    duration=session.get("duration", 0) or 0
+                ))
+
+            migrated_ids.append(enrollment_id)
+
+        if migrated_ids:
+            db.flush()
+            rebuild_enrollment_progress_sums(db.connection(), enrollment_ids=migrated_ids)
+            db.execute(
+                update(PathEnrollment)
+                .where(PathEnrollment.id.in_(migrated_ids))
+                .values(
+                    content_progress=null(), content_study_time=null(), study_sessions=null(),
+                    version=PathEnrollment.version + 1
+                )
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        migrated += len(migrated_ids)
+        logger.info("已迁移 %s 条注册记录 (最后ID: %s)", migrated, last_id)
+
+    return migrated
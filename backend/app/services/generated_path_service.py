@@ -0,0 +1,149 @@
+"""
+AI生成学习路径的持久化
+
+请求的路径ID在库中不存在时，按规范化后的生成参数（主题领域、目标级别）查找已生成的路径；
+没有时调用AI生成，把路径及其内容节点写入数据库，之后相同参数的请求直接读库。
+同一参数的并发请求在进程内只触发一次生成；多个进程同时生成时，由 generation_key 的唯一约束只保留一份。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.content import LearningContent
+from app.models.learning_path import LearningPath, path_content_association
+from app.services.ai_service import get_ai_service
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBJECT = "编程与开发"
+DEFAULT_LEVEL = "beginner"
+LEVEL_DIFFICULTY = {"beginner": 1, "intermediate": 2}  # 其他级别为3
+
+# 正在生成的路径 {generation_key: 生成任务}，任务结果为路径ID
+_inflight: Dict[str, "asyncio.Future[int]"] = {}
+
+def canonical_generation_parameters(subject_area: Optional[str], target_level: Optional[str]) -> Dict[str, str]:
+    """规范化生成参数：去掉多余空白，级别统一为小写，缺省时使用默认值"""
+    return {
+        "subject_area": " ".join((subject_area or "").split()) or DEFAULT_SUBJECT,
+        "target_level": (target_level or "").strip().lower() or DEFAULT_LEVEL
+    }
+
+def generation_key(parameters: Dict[str, Any]) -> str:
+    raw = json.dumps(parameters, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def find_generated_path(db: Session, key: str) -> Optional[LearningPath]:
+    return db.query(LearningPath).filter(LearningPath.generation_key == key).first()
+
+def build_content_nodes(parameters: Dict[str, str], ai_path: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """把AI返回的学习建议转换为内容节点的列值，按建议顺序排列"""
+    subject = parameters["subject_area"]
+    difficulty = LEVEL_DIFFICULTY.get(parameters["target_level"], 3)
+    nodes = []
+    for i, rec in enumerate(ai_path.get("recommendations") or [], 1):
+        rec = str(rec)
+        nodes.append({
+            "title": f"Step {i}",
+            "description": rec,
+            "content_type": "video" if "watch" in rec.lower() or "video" in rec.lower() else "interactive",
+            "subject": subject,
+            "difficulty_level": difficulty
+        })
+    return nodes
+
+def store_generated_path(db: Session, parameters: Dict[str, str], key: str, ai_path: Dict[str, Any]) -> int:
+    """写入生成的路径和内容节点并提交，返回路径ID；其他进程已写入相同参数的路径时返回已有路径的ID"""
+    subject = parameters["subject_area"]
+    level = parameters["target_level"]
+    path = LearningPath(
+        title=f"{subject} Learning Path",
+        description=ai_path.get("behavior_patterns", {}).get("study_consistency", "A customized learning path"),
+        subject=subject,
+        difficulty_level=LEVEL_DIFFICULTY.get(level, 3),
+        estimated_hours=25,
+        path_metadata={
+            "goals": ai_path.get("strengths", []),
+            "prerequisites": [],
+            "difficulty": level
+        },
+        is_ai_generated=True,
+        generation_parameters=parameters,
+        generation_key=key
+    )
+    try:
+        db.add(path)
+        db.flush()
+        contents = [LearningContent(**node) for node in build_content_nodes(parameters, ai_path)]
+        db.add_all(contents)
+        db.flush()
+        if contents:
+            db.execute(insert(path_content_association), [
+                {"path_id": path.id, "content_id": content.id, "order_index": i, "required": True}
+                for i, content in enumerate(contents, 1)
+            ])
+        db.commit()
+        return path.id
+    except IntegrityError:
+        db.rollback()
+        existing = find_generated_path(db, key)
+        if existing is None:
+            raise
+        logger.info("生成参数相同的路径已由其他进程写入: ID %s", existing.id)
+        return existing.id
+
+async def _generate(bind: Engine, parameters: Dict[str, str], key: str) -> int:
+    ai_path = await get_ai_service().generate_learning_analysis({
+        "study_time": "0",
+        "completion_rate": "0",
+        "interactions": "0",
+        "content_types": [parameters["subject_area"]],
+        "learning_goals": [f"Master {parameters['subject_area']} at {parameters['target_level']} level"],
+        "subject_area": parameters["subject_area"],
+        "target_level": parameters["target_level"]
+    })
+    if not ai_path.get("recommendations"):
+        # 不保存没有内容的结果，下次请求重新生成
+        raise ValueError("AI未返回学习建议")
+    # 生成任务可能比发起它的请求活得更久，使用独立的会话
+    db = sessionmaker(autocommit=False, autoflush=False, bind=bind)()
+    try:
+        return store_generated_path(db, parameters, key, ai_path)
+    finally:
+        db.close()
+
+def lookup_generated_path(
+    db: Session,
+    subject_area: Optional[str] = None,
+    target_level: Optional[str] = None
+) -> Optional[LearningPath]:
+    """只读取已持久化的AI生成路径，不触发生成"""
+    return find_generated_path(db, generation_key(canonical_generation_parameters(subject_area, target_level)))
+
+async def get_or_generate_path(
+    db: Session,
+    subject_area: Optional[str] = None,
+    target_level: Optional[str] = None
+) -> LearningPath:
+    """按生成参数获取已持久化的AI生成路径，没有时生成并保存"""
+    parameters = canonical_generation_parameters(subject_area, target_level)
+    key = generation_key(parameters)
+    path = find_generated_path(db, key)
+    if path is not None:
+        return path
+
+    task = _inflight.get(key)
+    if task is None:
+        logger.info("使用AI生成学习路径: %s", parameters)
+        task = asyncio.ensure_future(_generate(db.get_bind(), parameters, key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # 单个等待者被取消时不取消共享的生成任务
+    path_id = await asyncio.shield(task)
+    return db.get(LearningPath, path_id)
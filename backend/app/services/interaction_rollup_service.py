@@ -0,0 +1,338 @@
+"""
+交互数据的按日汇总与冷数据归档
+
+- run_daily_rollup: 把原始交互行按 (天, 用户, 内容) 汇总到 interaction_daily_rollups
+- archive_cold_interactions: 把已汇总且超过保留天数的原始行移到 ATTACH 的归档库(SQLite)
+- get_interaction_totals: 统计查询先读汇总表，再补上尚未汇总的原始行
+
+进度标记保存在 system_markers 中：
+    interaction_rollup_through   已汇总的最后一天（含）
+    interaction_rollup_run_at    上次汇总开始的时间，用于找出之后被修改过的旧行
+    interaction_archived_before  早于该日期的原始行已归档
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+from sqlalchemy import String, case, delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.content import UserContentInteraction
+from app.models.content_interaction import ContentInteraction
+from app.models.interaction_rollup import InteractionDailyRollup
+from app.models.system_marker import SystemMarker
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+ROLLUP_MARKER_KEY = "interaction_rollup_through"
+ROLLUP_RUN_MARKER_KEY = "interaction_rollup_run_at"
+ARCHIVE_MARKER_KEY = "interaction_archived_before"
+
+# 参与汇总和归档的原始交互表
+RAW_INTERACTION_TABLES = (UserContentInteraction.__table__, ContentInteraction.__table__)
+
+# 汇总表中可累加的列
+ROLLUP_MEASURES = (
+    "interaction_count", "time_spent", "progress_sum", "completed_count",
+    "rating_sum", "rating_count", "event_count", "event_duration"
+)
+
+def _utc_today() -> date:
+    # created_at 由数据库 CURRENT_TIMESTAMP 生成，为UTC时间
+    return datetime.utcnow().date()
+
+def _at(value) -> Any:
+    """时间边界按文本绑定，与SQLite中存储的时间戳文本直接比较，也能被其他数据库隐式转换"""
+    if isinstance(value, datetime):
+        value = value.strftime("%Y-%m-%d %H:%M:%S")
+    elif isinstance(value, date):
+        value = value.isoformat()
+    return literal(value, String)
+
+def _get_marker(db: Session, key: str) -> Optional[str]:
+    marker = db.get(SystemMarker, key)
+    return marker.value if marker else None
+
+def _set_marker(db: Session, key: str, value: str) -> None:
+    marker = db.get(SystemMarker, key)
+    if marker is None:
+        db.add(SystemMarker(key=key, value=value))
+    else:
+        marker.value = value
+
+def get_rollup_watermark(db: Session) -> Optional[date]:
+    """已汇总的最后一天，尚未汇总过时返回None"""
+    value = _get_marker(db, ROLLUP_MARKER_KEY)
+    return date.fromisoformat(value) if value else None
+
+def get_archive_boundary(db: Session) -> Optional[date]:
+    """早于该日期的原始交互已归档"""
+    value = _get_marker(db, ARCHIVE_MARKER_KEY)
+    return date.fromisoformat(value) if value else None
+
+def _daily_source(start: date, end: date):
+    """[start, end) 内两张原始表的交互，统一成汇总列的形式"""
+    uci = UserContentInteraction
+    ci = ContentInteraction
+    user_interactions = select(
+        func.date(uci.created_at).label("day"),
+        uci.user_id.label("user_id"),
+        uci.content_id.label("content_id"),
+        literal(1).label("interaction_count"),
+        func.coalesce(uci.time_spent, 0.0).label("time_spent"),
+        func.coalesce(uci.progress, 0.0).label("progress_sum"),
+        case((uci.completed == True, 1), else_=0).label("completed_count"),
+        func.coalesce(uci.rating, 0).label("rating_sum"),
+        case((uci.rating.isnot(None), 1), else_=0).label("rating_count"),
+        literal(0).label("event_count"),
+        literal(0.0).label("event_duration")
+    ).where(
+        uci.created_at >= _at(start),
+        uci.created_at < _at(end),
+        uci.user_id.isnot(None),
+        uci.content_id.isnot(None)
+    )
+    content_events = select(
+        func.date(ci.created_at),
+        ci.user_id,
+        ci.content_id,
+        literal(0),
+        literal(0.0),
+        literal(0.0),
+        literal(0),
+        literal(0),
+        literal(0),
+        literal(1),
+        func.coalesce(ci.learning_duration, 0.0)
+    ).where(
+        ci.created_at >= _at(start),
+        ci.created_at < _at(end),
+        ci.user_id.isnot(None),
+        ci.content_id.isnot(None)
+    )
+    return union_all(user_interactions, content_events).subquery()
+
+def _rollup_days(db: Session, start: date, end: date) -> int:
+    """重算 [start, end) 内每天的汇总行"""
+    source = _daily_source(start, end)
+    db.execute(delete(InteractionDailyRollup).where(
+        InteractionDailyRollup.day >= start,
+        InteractionDailyRollup.day < end
+    ))
+    result = db.execute(
+        insert(InteractionDailyRollup).from_select(
+            ["day", "user_id", "content_id", *ROLLUP_MEASURES],
+            select(
+                source.c.day,
+                source.c.user_id,
+                source.c.content_id,
+                *[func.sum(source.c[name]) for name in ROLLUP_MEASURES]
+            ).group_by(source.c.day, source.c.user_id, source.c.content_id)
+        )
+    )
+    return result.rowcount or 0
+
+def run_daily_rollup(db: Session, through: Optional[date] = None, lookback_days: Optional[int] = None) -> int:
+    """汇总截至 through（默认昨天，UTC）的完整天数，返回写入的汇总行数
+
+    除新的天数外，还会重算最近 lookback_days 天以及上次运行后有行被修改过的天，
+    已归档的天不会重算。可重复执行。
+    """
+    through = through or _utc_today() - timedelta(days=1)
+    lookback_days = settings.ROLLUP_LOOKBACK_DAYS if lookback_days is None else lookback_days
+    run_at = datetime.utcnow()
+
+    watermark = get_rollup_watermark(db)
+    archived_before = get_archive_boundary(db)
+    if watermark is None:
+        earliest = [
+            db.scalar(select(func.min(func.date(table.c.created_at))))
+            for table in RAW_INTERACTION_TABLES
+        ]
+        earliest = [date.fromisoformat(str(value)[:10]) for value in earliest if value]
+        start = min(earliest) if earliest else through + timedelta(days=1)
+    else:
+        start = watermark + timedelta(days=1) - timedelta(days=lookback_days)
+    if archived_before:
+        start = max(start, archived_before)
+
+    ranges = []
+    if start <= through:
+        ranges.append((start, through + timedelta(days=1)))
+
+    # 学习进度是对已有行的原地更新，上次运行后修改过的旧行所在的天也要重算
+    last_run = _get_marker(db, ROLLUP_RUN_MARKER_KEY)
+    if last_run and watermark:
+        dirty_days = db.scalars(
+            select(func.date(UserContentInteraction.created_at))
+            .where(
+                UserContentInteraction.updated_at >= _at(last_run),
+                UserContentInteraction.created_at < _at(start),
+                UserContentInteraction.created_at >= _at(archived_before or date.min)
+            )
+            .distinct()
+        ).all()
+        for value in dirty_days:
+            day = date.fromisoformat(str(value)[:10])
+            ranges.append((day, day + timedelta(days=1)))
+
+    written = sum(_rollup_days(db, range_start, range_end) for range_start, range_end in ranges)
+
+    if watermark is None or through > watermark:
+        _set_marker(db, ROLLUP_MARKER_KEY, through.isoformat())
+    _set_marker(db, ROLLUP_RUN_MARKER_KEY, run_at.strftime("%Y-%m-%d %H:%M:%S"))
+    db.commit()
+    logger.info("交互汇总完成: 截至 %s, 重算 %s 个区间, 写入 %s 行", through, len(ranges), written)
+    return written
+
+def get_interaction_totals(db: Session, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """按用户统计交互总量：已汇总的天读汇总表，之后的天读原始表
+
+    返回 {user_id: {ROLLUP_MEASURES..., "last_activity_at"}}，没有任何交互的用户不在结果中。
+    """
+    if not user_ids:
+        return {}
+    watermark = get_rollup_watermark(db)
+    cutoff = watermark + timedelta(days=1) if watermark else None
+    totals: Dict[int, Dict[str, Any]] = {}
+
+    def merge(user_id: int, values: Dict[str, Any], last_activity_at) -> None:
+        entry = totals.setdefault(user_id, {name: 0 for name in ROLLUP_MEASURES} | {"last_activity_at": None})
+        for name, value in values.items():
+            entry[name] += value or 0
+        if last_activity_at is not None and (
+            entry["last_activity_at"] is None or last_activity_at > entry["last_activity_at"]
+        ):
+            entry["last_activity_at"] = last_activity_at
+
+    if cutoff:
+        rollup = InteractionDailyRollup
+        for row in db.execute(
+            select(
+                rollup.user_id,
+                *[func.sum(getattr(rollup, name)).label(name) for name in ROLLUP_MEASURES],
+                func.max(rollup.day).label("last_day")
+            )
+            .where(rollup.user_id.in_(user_ids), rollup.day < cutoff)
+            .group_by(rollup.user_id)
+        ):
+            last_day = row.last_day
+            merge(
+                row.user_id,
+                {name: getattr(row, name) for name in ROLLUP_MEASURES},
+                datetime.combine(last_day, datetime.min.time()) if last_day else None
+            )
+
+    uci = UserContentInteraction
+    query = (
+        select(
+            uci.user_id,
+            func.count(uci.id).label("interaction_count"),
+            func.sum(uci.time_spent).label("time_spent"),
+            func.sum(uci.progress).label("progress_sum"),
+            func.count(case((uci.completed == True, 1))).label("completed_count"),
+            func.sum(uci.rating).label("rating_sum"),
+            func.count(uci.rating).label("rating_count"),
+            func.max(uci.created_at).label("last_activity_at")
+        )
+        .where(uci.user_id.in_(user_ids))
+        .group_by(uci.user_id)
+    )
+    if cutoff:
+        query = query.where(uci.created_at >= _at(cutoff))
+    for row in db.execute(query):
+        merge(
+            row.user_id,
+            {name: getattr(row, name) for name in ROLLUP_MEASURES if name in row._fields},
+            row.last_activity_at
+        )
+
+    ci = ContentInteraction
+    query = (
+        select(
+            ci.user_id,
+            func.count(ci.id).label("event_count"),
+            func.sum(ci.learning_duration).label("event_duration"),
+            func.max(ci.created_at).label("last_activity_at")
+        )
+        .where(ci.user_id.in_(user_ids))
+        .group_by(ci.user_id)
+    )
+    if cutoff:
+        query = query.where(ci.created_at >= _at(cutoff))
+    for row in db.execute(query):
+        merge(row.user_id, {"event_count": row.event_count, "event_duration": row.event_duration}, row.last_activity_at)
+
+    return totals
+
+def archive_cold_interactions(
+    db: Session,
+    before: Optional[date] = None,
+    archive_path: Optional[str] = None,
+    batch_size: int = 5000,
+    vacuum: bool = False
+) -> Dict[str, int]:
+    """把早于 before 的原始交互行移动到归档库，返回每张表移动的行数
+
+    只归档已汇总的天，因此统计结果不受影响。归档库通过 SQLite ATTACH 挂载，
+    每批在一个事务中完成复制和删除；vacuum=True 时归档后收缩热库文件。
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        raise RuntimeError("交互数据归档仅支持SQLite数据库")
+
+    before = before or _utc_today() - timedelta(days=settings.INTERACTION_HOT_DAYS)
+    watermark = get_rollup_watermark(db)
+    if watermark is None:
+        logger.warning("尚未执行过交互汇总，跳过归档")
+        return {}
+    before = min(before, watermark + timedelta(days=1))
+    archive_path = archive_path or settings.INTERACTION_ARCHIVE_PATH
+    db.commit()
+
+    moved = {}
+    with bind.connect() as conn:
+        # pysqlite 只在DML前隐式开启事务，ATTACH/DETACH/VACUUM 在事务外执行
+        conn.exec_driver_sql("ATTACH DATABASE ? AS archive", (archive_path,))
+        conn.commit()
+        try:
+            for table in RAW_INTERACTION_TABLES:
+                name = table.name
+                conn.exec_driver_sql(
+                    f"CREATE TABLE IF NOT EXISTS archive.{name} AS SELECT * FROM main.{name} WHERE 0"
+                )
+                conn.commit()
+                moved[name] = 0
+                while True:
+                    ids = conn.scalars(
+                        select(table.c.id)
+                        .where(table.c.created_at < _at(before))
+                        .order_by(table.c.id)
+                        .limit(batch_size)
+                    ).all()
+                    if not ids:
+                        break
+                    id_list = ",".join(str(int(row_id)) for row_id in ids)
+                    conn.exec_driver_sql(
+                        f"INSERT INTO archive.{name} SELECT * FROM main.{name} WHERE id IN ({id_list})"
+                    )
+                    conn.exec_driver_sql(f"DELETE FROM main.{name} WHERE id IN ({id_list})")
+                    conn.commit()
+                    moved[name] += len(ids)
+                logger.info("已归档 %s: %s 行 (早于 %s)", name, moved[name], before)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.exec_driver_sql("DETACH DATABASE archive")
+            conn.commit()
+
+        if vacuum:
+            conn.exec_driver_sql("VACUUM")
+            conn.commit()
+
+    previous = get_archive_boundary(db)
+    if previous is None or before > previous:
+        _set_marker(db, ARCHIVE_MARKER_KEY, before.isoformat())
+    db.commit()
+    return moved
@@ -0,0 +1,389 @@
+"""
+学习事件的追加写入与投影
+
+学习行为只以事件形式追加到 learning_events，读模型由投影按事件ID顺序增量维护：
+    content_progress  -> user_content_interactions 的 progress / completed / rating
+                         （progress 取事件中的最大值，与改为事件写入之前的语义一致，重放顺序不影响结果）
+    study_time        -> user_content_interactions 的 time_spent
+    interaction       -> content_interactions 明细及 user_content_interactions 的交互类型
+
+每个投影的高水位（已处理的最大事件ID）保存在 system_markers 中，推进高水位与更新读模型
+在同一事务中完成，并以比较-交换的方式防止多个进程重复处理同一批事件。
+高水位依赖事件ID按提交顺序递增（SQLite单写者下成立）。
+投影只由后台任务 run_event_pipeline 和离线命令推进，请求只追加事件，读模型最多滞后一个 EVENT_FLUSH_INTERVAL。
+"""
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.content import UserContentInteraction
+from app.models.content_interaction import ContentInteraction
+from app.models.learning_event import LearningEvent
+from app.models.system_marker import SystemMarker
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+EVENT_PROGRESS = "progress"
+EVENT_STUDY_TIME = "study_time"
+EVENT_COMPLETE = "complete"
+EVENT_RATING = "rating"
+EVENT_INTERACTION = "interaction"
+
+BACKFILL_MARKER_KEY = "learning_events_backfilled"
+
+def _event_row(
+    user_id: int,
+    event_type: str,
+    content_id: Optional[int] = None,
+    path_id: Optional[int] = None,
+    value: Optional[float] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    occurred_at: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """规范化事件字段；批量插入要求每行的键一致"""
+    return {
+        "user_id": user_id,
+        "event_type": event_type,
+        "content_id": content_id,
+        "path_id": path_id,
+        "value": value,
+        "payload": payload,
+        "occurred_at": occurred_at or datetime.utcnow()
+    }
+
+def append_events(db: Session, events: Iterable[Dict[str, Any]]) -> int:
+    """在调用方的事务中批量追加事件，适用于需要立即读到写入结果的请求"""
+    rows = [_event_row(**event) for event in events]
+    if rows:
+        db.execute(insert(LearningEvent), rows)
+    return len(rows)
+
+class LearningEventAppender:
+    """进程内的事件缓冲区，攒满一批或定时批量写入，适用于不需要立即读回的高频写入"""
+
+    def __init__(self, batch_size: Optional[int] = None, session_factory=SessionLocal):
+        self.batch_size = batch_size or settings.EVENT_APPEND_BATCH_SIZE
+        self.session_factory = session_factory
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def append(self, user_id: int, event_type: str, **fields) -> None:
+        row = _event_row(user_id, event_type, **fields)
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """把缓冲区中的事件一次性写入数据库，失败时放回缓冲区"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+
+        own_session = db is None
+        db = db or self.session_factory()
+        try:
+            db.execute(insert(LearningEvent), batch)
+            db.commit()
+            return len(batch)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._buffer[:0] = batch
+            raise
+        finally:
+            if own_session:
+                db.close()
+
+event_appender = LearningEventAppender()
+
+def _interaction_rows(db: Session, events: List[Any]) -> Dict[tuple, UserContentInteraction]:
+    """一次查询取出事件涉及的 (用户, 内容) 交互行，不存在的行按首个事件时间创建"""
+    first_seen = {}
+    for event in events:
+        if event.content_id is not None:
+            first_seen.setdefault((event.user_id, event.content_id), event.occurred_at)
+    if not first_seen:
+        return {}
+
+    rows: Dict[tuple, UserContentInteraction] = {}
+    existing = (
+        db.query(UserContentInteraction)
+        .filter(
+            UserContentInteraction.user_id.in_({user_id for user_id, _ in first_seen}),
+            UserContentInteraction.content_id.in_({content_id for _, content_id in first_seen})
+        )
+        .order_by(UserContentInteraction.id)
+        .all()
+    )
+    for row in existing:
+        key = (row.user_id, row.content_id)
+        if key in first_seen:
+            rows.setdefault(key, row)
+
+    for key, occurred_at in first_seen.items():
+        if key not in rows:
+            row = UserContentInteraction(
+                user_id=key[0],
+                content_id=key[1],
+                interaction_type="view",
+                progress=0.0,
+                time_spent=0.0,
+                completed=False,
+                created_at=occurred_at
+            )
+            db.add(row)
+            rows[key] = row
+    return rows
+
+class Projection(ABC):
+    """投影基类：name 用作高水位标记，event_types 为关心的事件类型"""
+    name = ""
+    event_types: frozenset = frozenset()
+
+    @abstractmethod
+    def apply(self, db: Session, events: List[Any]) -> None:
+        """在调用方的事务中把一批事件（按ID升序）应用到读模型"""
+
+class ContentProgressProjection(Projection):
+    """进度只增不减：取已有进度与事件值中的较大者，客户端重复上报较小的进度不会覆盖"""
+    name = "content_progress"
+    event_types = frozenset({EVENT_PROGRESS, EVENT_COMPLETE, EVENT_RATING})
+
+    def apply(self, db: Session, events: List[Any]) -> None:
+        rows = _interaction_rows(db, events)
+        for event in events:
+            row = rows.get((event.user_id, event.content_id))
+            if row is None:
+                continue
+            if event.event_type == EVENT_PROGRESS:
+                row.progress = max(row.progress or 0, event.value or 0)
+            elif event.event_type == EVENT_COMPLETE:
+                row.completed = True
+            elif event.event_type == EVENT_RATING and event.value is not None:
+                row.rating = int(event.value)
+
+class StudyTimeProjection(Projection):
+    name = "study_time"
+    event_types = frozenset({EVENT_STUDY_TIME})
+
+    def apply(self, db: Session, events: List[Any]) -> None:
+        rows = _interaction_rows(db, events)
+        for event in events:
+            row = rows.get((event.user_id, event.content_id))
+            if row is not None and event.value:
+                row.time_spent = (row.time_spent or 0) + event.value
+
+class InteractionProjection(Projection):
+    name = "interaction"
+    event_types = frozenset({EVENT_INTERACTION})
+
+    def apply(self, db: Session, events: List[Any]) -> None:
+        rows = _interaction_rows(db, events)
+        for event in events:
+            payload = event.payload or {}
+            interaction_type = payload.get("interaction_type", "view")
+            db.add(ContentInteraction(
+                user_id=event.user_id,
+                content_id=event.content_id,
+                interaction_type=interaction_type,
+                interaction_data=payload,
+                learning_duration=event.value,
+                created_at=event.occurred_at
+            ))
+            row = rows.get((event.user_id, event.content_id))
+            if row is not None:
+                row.interaction_type = interaction_type
+                if payload.get("engagement_feedback") is not None:
+                    row.engagement_feedback = payload["engagement_feedback"]
+
+PROJECTIONS = (ContentProgressProjection(), StudyTimeProjection(), InteractionProjection())
+
+# 同一进程内串行执行投影，跨进程由高水位的比较-交换保证
+_projection_lock = threading.Lock()
+
+def _marker_key(projection: Projection) -> str:
+    return f"projection:{projection.name}"
+
+def get_high_water_mark(db: Session, projection: Projection) -> int:
+    marker = db.get(SystemMarker, _marker_key(projection))
+    return int(marker.value) if marker and marker.value else 0
+
+def _advance_high_water_mark(db: Session, projection: Projection, expected: int, new: int) -> bool:
+    """比较-交换推进高水位，返回False表示其他进程已处理了这批事件"""
+    key = _marker_key(projection)
+    if expected == 0 and db.get(SystemMarker, key) is None:
+        try:
+            with db.begin_nested():
+                db.add(SystemMarker(key=key, value=str(new)))
+            return True
+        except IntegrityError:
+            return False
+    result = db.execute(
+        update(SystemMarker)
+        .where(SystemMarker.key == key, SystemMarker.value == str(expected))
+        .values(value=str(new))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def project_pending(
+    db: Session,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    projections=PROJECTIONS
+) -> int:
+    """把高水位之后的事件应用到各投影，返回处理的事件数
+
+    每批事件与高水位在同一事务中提交，中途失败不会丢失或重复处理事件。
+    max_batches 限制每个投影处理的批数，用于请求内的增量追赶。
+    """
+    batch_size = batch_size or settings.EVENT_PROJECTION_BATCH_SIZE
+    processed = 0
+    with _projection_lock:
+        for projection in projections:
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                high_water_mark = get_high_water_mark(db, projection)
+                events = db.execute(
+                    select(LearningEvent.__table__)
+                    .where(
+                        LearningEvent.id > high_water_mark,
+                        LearningEvent.event_type.in_(projection.event_types)
+                    )
+                    .order_by(LearningEvent.id)
+                    .limit(batch_size)
+                ).all()
+                if not events:
+                    break
+                try:
+                    if not _advance_high_water_mark(db, projection, high_water_mark, events[-1].id):
+                        db.rollback()
+                        logger.info("投影 %s 已被其他进程推进，跳过本批", projection.name)
+                        break
+                    projection.apply(db, events)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+                processed += len(events)
+                batches += 1
+                if len(events) < batch_size:
+                    break
+    return processed
+
+def rebuild_projections(db: Session) -> int:
+    """清空读模型并从全部事件重建，返回重放的事件数
+
+    重建会重新生成已归档天数的交互行；按日汇总的统计不受影响，之后可再次执行归档。
+    """
+    from app.services.activity_summary_service import rebuild_activity_summaries
+
+    with _projection_lock:
+        db.execute(delete(ContentInteraction))
+        db.execute(delete(UserContentInteraction))
+        db.execute(delete(SystemMarker).where(SystemMarker.key.in_([_marker_key(p) for p in PROJECTIONS])))
+        db.commit()
+    replayed = project_pending(db)
+    rebuild_activity_summaries(db)
+    logger.info("读模型重建完成，共重放 %s 个事件", replayed)
+    return replayed
+
+def backfill_events(db: Session, batch_size: int = 1000) -> int:
+    """把事件表出现之前的交互数据转换为事件（只执行一次），并把投影高水位设到最新
+
+    现有读模型已包含这些数据，因此不需要重新投影。
+    """
+    if db.get(SystemMarker, BACKFILL_MARKER_KEY) is not None:
+        logger.info("学习事件已回填，跳过")
+        return 0
+
+    appended = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(UserContentInteraction)
+            .filter(UserContentInteraction.id > last_id)
+            .order_by(UserContentInteraction.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        events = []
+        for row in rows:
+            base = {"user_id": row.user_id, "content_id": row.content_id, "occurred_at": row.created_at}
+            events.append({**base, "event_type": EVENT_PROGRESS, "value": row.progress or 0})
+            if row.time_spent:
+                events.append({**base, "event_type": EVENT_STUDY_TIME, "value": row.time_spent})
+            if row.completed:
+                events.append({**base, "event_type": EVENT_COMPLETE})
+            if row.rating is not None:
+                events.append({**base, "event_type": EVENT_RATING, "value": row.rating})
+        appended += append_events(db, [event for event in events if event["user_id"] is not None])
+
+    last_id = 0
+    while True:
+        rows = (
+            db.query(ContentInteraction)
+            .filter(ContentInteraction.id > last_id)
+            .order_by(ContentInteraction.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        appended += append_events(db, [
+            {
+                "user_id": row.user_id,
+                "content_id": row.content_id,
+                "event_type": EVENT_INTERACTION,
+                "value": row.learning_duration,
+                "payload": {"interaction_type": row.interaction_type, **(row.interaction_data or {})},
+                "occurred_at": row.created_at
+            }
+            for row in rows if row.user_id is not None
+        ])
+
+    max_id = db.scalar(select(func.max(LearningEvent.id))) or 0
+    for projection in PROJECTIONS:
+        db.merge(SystemMarker(key=_marker_key(projection), value=str(max_id)))
+    db.add(SystemMarker(key=BACKFILL_MARKER_KEY, value=str(max_id)))
+    db.commit()
+    logger.info("学习事件回填完成，共 %s 个事件", appended)
+    return appended
+
+def flush_and_project() -> int:
+    """写入缓冲区中的事件并推进所有投影"""
+    event_appender.flush()
+    db = SessionLocal()
+    try:
+        return project_pending(db)
+    finally:
+        db.close()
+
+async def run_event_pipeline(interval: Optional[float] = None) -> None:
+    """后台任务：定期批量写入缓冲的事件并推进投影"""
+    interval = interval or settings.EVENT_FLUSH_INTERVAL
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(flush_and_project)
+        except Exception as e:
+            logger.exception("学习事件处理失败: %s", e)
@@ -1,5 +1,6 @@
 from typing import List, Dict, Any, Optional
 import logging
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -7,6 +8,15 @@ from ..db.session import get_db
 from ..models.learning_path import LearningPath, PathEnrollment
 from ..models.content import LearningContent
 from ..models.user import User
+from .enrollment_progress_service import (
+    get_content_progress_map,
+    record_content_progress,
+    recompute_enrollment_progress,
+    lock_enrollments,
+    run_with_version_retry
+)
+from .path_cache import get_path_skeleton, overlay_node_status
+from .read_models import list_user_paths
 
 # 设置日志
 logger = logging.getLogger(__name__)
@@ -105,7 +115,7 @@ async def get_learning_path_by_params(
     db: Session = None
 ) -> Optional[Dict[str, Any]]:
     """根据参数获取学习路径"""
-    logger.info(f"获取学习路径: 用户={user_id}, 主题={subject_area}, 路径={path_name}, 级别={target_level}")
+    logger.info("获取学习路径: 用户=%s, 主题=%s, 路径=%s, 级别=%s", user_id, subject_area, path_name, target_level)
     
     # 数据库会话管理
     close_db = False
@@ -115,7 +125,7 @@ async def get_learning_path_by_params(
             db = next(db_generator)
             close_db = True
         except Exception as e:
-            logger.error(f"无法创建数据库会话: {str(e)}")
+            logger.error("无法创建数据库会话: %s", e)
             # 如果无法创建数据库连接，回退到使用模拟数据
             return fallback_to_mock_data(user_id, subject_area, path_name, target_level)
     
@@ -141,17 +151,47 @@ async def get_learning_path_by_params(
             return await format_path_for_api(path, user_id, db)
         else:
             # 路径不存在，回退到模拟数据
-            logger.info(f"未找到匹配的学习路径，生成默认路径")
+            logger.info("未找到匹配的学习路径，生成默认路径")
             return fallback_to_mock_data(user_id, subject_area, path_name, target_level)
             
     except Exception as e:
-        logger.exception(f"获取学习路径失败: {str(e)}")
+        logger.exception("获取学习路径失败: %s", e)
         return fallback_to_mock_data(user_id, subject_area, path_name, target_level)
         
     finally:
         if close_db and db:
             db.close()
 
+def build_user_path_list(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    """用户注册的路径及进度（同步查询，出错时抛出异常）"""
+    # 一次查询获取注册路径和进度，只读取需要的列；内容数量读取路径上维护的计数列
+    rows = list_user_paths(db, user_id)
+    
+    if not rows:
+        logger.info("用户 %s 没有注册的学习路径", user_id)
+        return []
+        
+    paths = []
+    for path in rows:
+        # 构建路径数据
+        path_data = {
+            "id": path.id,
+            "title": path.title,
+            "description": path.description,
+            "subject": path.subject,
+            "difficulty_level": path.difficulty_level,
+            "estimated_hours": path.estimated_hours,
+            "progress": path.progress,
+            "content_count": path.content_count,
+            "total_estimated_minutes": path.total_estimated_minutes,
+            "last_activity": path.last_activity_at,
+            "enrolled_at": path.enrolled_at
+        }
+        
+        paths.append(path_data)
+        
+    return paths
+
 async def get_user_learning_paths(user_id: int, db: Session = None) -> List[Dict[str, Any]]:
     """获取用户的所有学习路径"""
     # 数据库会话管理
@@ -162,7 +202,7 @@ async def get_user_learning_paths(user_id: int, db: Session = None) -> List[Dict
             db = next(db_generator)
             close_db = True
         except Exception as e:
-            logger.error(f"无法创建数据库会话: {str(e)}")
+            logger.error("无法创建数据库会话: %s", e)
             # 如果无法创建数据库连接，回退到使用模拟数据
             paths = []
             for path_key, path_data in MOCK_LEARNING_PATHS.items():
@@ -171,47 +211,10 @@ async def get_user_learning_paths(user_id: int, db: Session = None) -> List[Dict
             return paths
     
     try:
-        # 获取用户注册的学习路径
-        enrollments = (
-            db.query(PathEnrollment)
-            .filter(PathEnrollment.user_id == user_id)
-            .all()
-        )
-        
-        if not enrollments:
-            logger.info(f"用户 {user_id} 没有注册的学习路径")
-            return []
-            
-        paths = []
-        for enrollment in enrollments:
-            # 获取学习路径详情
-            path = db.query(LearningPath).filter(LearningPath.id == enrollment.path_id).first()
-            if not path:
-                continue
-                
-            # 获取路径内容数量
-            content_count = len(path.contents) if path.contents else 0
-                
-            # 构建路径数据
-            path_data = {
-                "id": path.id,
-                "title": path.title,
-                "description": path.description,
-                "subject": path.subject,
-                "difficulty_level": path.difficulty_level,
-                "estimated_hours": path.estimated_hours,
-                "progress": enrollment.progress,
-                "content_count": content_count,
-                "last_activity": enrollment.last_activity_at,
-                "enrolled_at": enrollment.enrolled_at
-            }
-            
-            paths.append(path_data)
-            
-        return paths
+        return build_user_path_list(db, user_id)
         
     except Exception as e:
-        logger.exception(f"获取用户学习路径失败: {str(e)}")
+        logger.exception("获取用户学习路径失败: %s", e)
         return []
         
     finally:
@@ -226,7 +229,7 @@ async def update_learning_progress(
     db: Session = None
 ) -> bool:
     """更新用户学习进度"""
-    logger.info(f"更新学习进度: 用户={user_id}, 路径={path_id}, 节点={node_id}, 状态={status}")
+    logger.info("更新学习进度: 用户=%s, 路径=%s, 节点=%s, 状态=%s", user_id, path_id, node_id, status)
     
     # 验证状态是否有效
     valid_statuses = ["未开始", "进行中", "已完成"]
@@ -241,7 +244,7 @@ async def update_learning_progress(
             db = next(db_generator)
             close_db = True
         except Exception as e:
-            logger.error(f"无法创建数据库会话: {str(e)}")
+            logger.error("无法创建数据库会话: %s", e)
             # 如果无法创建数据库连接，回退到模拟数据进度更新
             if path_id in MOCK_LEARNING_PATHS:
                 user_progress_key = f"{user_id}:{path_id}"
@@ -257,57 +260,55 @@ async def update_learning_progress(
             path_id_int = int(path_id)
             node_id_int = int(node_id)
         except (ValueError, TypeError):
-            logger.error(f"无效的ID格式: path_id={path_id}, node_id={node_id}")
+            logger.error("无效的ID格式: path_id=%s, node_id=%s", path_id, node_id)
             return False
         
-        # 查找用户路径注册记录
-        enrollment = (
-            db.query(PathEnrollment)
-            .filter(
-                PathEnrollment.user_id == user_id,
-                PathEnrollment.path_id == path_id_int
-            )
-            .first()
-        )
-        
-        # 如果未注册，创建注册记录
-        if not enrollment:
-            enrollment = PathEnrollment(
-                user_id=user_id,
-                path_id=path_id_int,
-                progress=0,
-                content_progress={},
-                enrolled_at=datetime.now()
-            )
-            db.add(enrollment)
-        
-        # 更新内容进度
-        content_progress = enrollment.content_progress or {}
-        
         # 根据状态设置进度值
         progress_value = 0
         if status == "进行中":
             progress_value = 50
         elif status == "已完成":
             progress_value = 100
-            
-        content_progress[str(node_id_int)] = progress_value
-        enrollment.content_progress = content_progress
-        
-        # 更新整体进度
-        if content_progress:
-            total_progress = sum(progress_value for progress_value in content_progress.values())
-            enrollment.progress = min(100, total_progress / len(content_progress))
         
-        # 更新最后活动时间
-        enrollment.last_activity_at = datetime.now()
+        def apply_update() -> None:
+            # 锁定后查找用户路径注册记录，并发写入同一注册记录的请求依次执行
+            lock_enrollments(db, user_id, [path_id_int])
+            enrollment = (
+                db.query(PathEnrollment)
+                .filter(
+                    PathEnrollment.user_id == user_id,
+                    PathEnrollment.path_id == path_id_int
+                )
+                .first()
+            )
+            
+            # 如果未注册，创建注册记录
+            if not enrollment:
+                enrollment = PathEnrollment(
+                    user_id=user_id,
+                    path_id=path_id_int,
+                    progress=0,
+                    enrolled_at=datetime.now()
+                )
+                db.add(enrollment)
+                db.flush()  # 获取ID
+            
+            # 更新内容进度
+            record_content_progress(db, enrollment, node_id_int, progress_value)
+            
+            # 更新整体进度
+            recompute_enrollment_progress(db, enrollment)
+            
+            # 更新最后活动时间
+            enrollment.last_activity_at = datetime.now()
         
-        db.commit()
+        # 冲突重试会以 time.sleep 退避，在线程池中执行
+        await run_in_threadpool(run_with_version_retry, db, apply_update)
         return True
         
     except Exception as e:
         db.rollback()
-        logger.exception(f"更新学习进度失败: {str(e)}")
+        logger.exception("更新学习进度失败: %s", e)
         return False
         
     finally:
@@ -317,18 +318,8 @@ async def update_learning_progress(
 async def format_path_for_api(path, user_id, db):
     """将数据库路径对象格式化为API响应格式"""
     try:
-        # 基本路径数据
-        path_data = {
-            "path_id": str(path.id),
-            "title": path.title,
-            "description": path.description,
-            "estimated_duration": f"{path.estimated_hours or 10}-{(path.estimated_hours or 10) * 2}小时",
-            "nodes": [],
-            "connections": []
-        }
-        
-        # 获取路径内容
-        path_contents = path.contents
+        # 与用户无关的路径骨架（带缓存）
+        skeleton = get_path_skeleton(db, path)
         
         # 获取用户进度
         user_progress = {}
@@ -341,65 +332,21 @@ async def format_path_for_api(path, user_id, db):
                 )
                 .first()
             )
-            if enrollment and enrollment.content_progress:
-                user_progress = enrollment.content_progress
+            if enrollment:
+                user_progress = get_content_progress_map(db, enrollment.id)
         
-        # 创建节点
-        nodes = []
-        for i, content in enumerate(path_contents):
-            # 确定节点状态
-            status = "未开始"
-            content_id_str = str(content.id)
-            if content_id_str in user_progress:
-                progress = user_progress[content_id_str]
-                if progress >= 100:
-                    status = "已完成"
-                elif progress > 0:
-                    status = "进行中"
-            
-            # 映射难度级别
-            level_map = {1: "初级", 2: "中级", 3: "高级", 4: "专家"}
-            level = level_map.get(content.difficulty_level, "中级")
-            
-            # 创建节点
-            node = {
-                "id": content_id_str,
-                "title": content.title,
-                "description": content.description or "",
-                "type": content.content_type or "topic",
-                "level": level,
-                "status": status
-            }
-            
-            # 添加资源
-            if hasattr(content, 'resources') and content.resources:
-                resources = []
-                for resource in content.resources:
-                    resources.append({
-                        "title": resource.get('title', "学习资源"),
-                        "url": resource.get('url', "#"),
-                        "type": resource.get('type', "链接")
-                    })
-                node["resources"] = resources
-            
-            nodes.append(node)
-            
-        path_data["nodes"] = nodes
-        
-        # 创建连接
-        connections = []
-        for i in range(len(nodes) - 1):
-            connections.append({
-                "source": nodes[i]["id"],
-                "target": nodes[i+1]["id"]
-            })
-        
-        path_data["connections"] = connections
-        
-        return path_data
+        return {
+            "path_id": str(path.id),
+            "title": skeleton["title"],
+            "description": skeleton["description"],
+            "estimated_duration": skeleton["estimated_duration"],
+            # 节点状态根据用户进度叠加
+            "nodes": overlay_node_status(skeleton, user_progress),
+            "connections": skeleton["connections"]
+        }
     
     except Exception as e:
-        logger.exception(f"格式化学习路径失败: {str(e)}")
+        logger.exception("格式化学习路径失败: %s", e)
         return generate_default_path(path.subject, path.title, "中级")
 
 def fallback_to_mock_data(user_id, subject_area, path_name, target_level):
@@ -0,0 +1,343 @@
+"""
+Prometheus 格式的监控指标
+
+原来只有请求日志中的一行耗时。这里维护一个进程内的指标注册表，GET /metrics 按 Prometheus 文本格式
+(0.0.4) 输出，不依赖外部服务和 prometheus_client：
+- 按路由模板和状态码统计的请求数和耗时直方图，以及执行中的请求数（流式响应只统计到开始返回为止）；
+- 每个请求的SQL查询数和数据库耗时（来自 count_queries）；
+- 智谱AI接口的调用耗时，按模型和结果区分；
+- 各进程内缓存的命中情况、准入控制的队列状态和日志队列丢弃数，在抓取时从各自的 stats() 读取。
+
+请求路径上只做几次字典查找和计数器累加：直方图按桶边界二分查找，标签组合首次出现时才创建子指标，
+格式化全部在抓取时进行。开销见 scripts/benchmark_metrics.py。
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from fastapi import Request
+from app.core.config import settings
+
+# 请求和数据库耗时的桶边界(秒)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 每个请求的SQL查询数的桶边界
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# 大模型调用耗时的桶边界(秒)
+AI_LATENCY_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# 未匹配到路由的请求使用同一个标签，避免路径中的任意值产生大量时间序列
+UNMATCHED_ROUTE = "<unmatched>"
+
+Sample = Tuple[str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+class _Metric(ABC):
+    """指标族：按标签值组合保存子指标，所有子指标共用一把锁"""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str):
+        """返回标签值组合对应的子指标，首次出现时创建"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """创建一个子指标，子指标与指标族共用 self._lock"""
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+            if not self.labelnames:
+                self._default = self._children.setdefault((), self._new_child())
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            yield from child.samples(self.name, dict(zip(self.labelnames, values)))
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, labels: Dict[str, str]) -> Iterable[Sample]:
+        yield f"{name}_total", labels, self.value
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self, name: str, labels: Dict[str, str]) -> Iterable[Sample]:
+        yield name, labels, self.value
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "_counts", "sum", "count")
+
+    def __init__(self, lock: threading.Lock, bounds: Tuple[float, ...]):
+        self._lock = lock
+        self._bounds = bounds
+        # 各桶的非累积计数，最后一个为 +Inf 桶
+        self._counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, name: str, labels: Dict[str, str]) -> Iterable[Sample]:
+        with self._lock:
+            counts, total, count = list(self._counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip((*self._bounds, math.inf), counts):
+            cumulative += bucket_count
+            yield f"{name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+        yield f"{name}_sum", labels, total
+        yield f"{name}_count", labels, count
+
+class Counter(_Metric):
+    """只增不减的计数器，输出时名称加 _total 后缀"""
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild(self._lock)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild(self._lock)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+class Histogram(_Metric):
+    """按桶边界统计分布，桶计数在输出时转为累积值"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self._lock, self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+class MetricsRegistry:
+    """进程内的指标注册表
+
+    除了直接注册的指标，还可以注册采集函数：抓取时调用，返回 (名称, 类型, 说明, 样本列表)，
+    用于从已有的 stats() 读取的指标。
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"指标 {metric.name} 已注册")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        self._collectors.append(collector)
+
+    def clear(self) -> None:
+        """清空直接注册的指标的数值（用于测试）"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        """按 Prometheus 文本格式输出全部指标"""
+        families = [
+            (metric.name, metric.kind, metric.documentation, list(metric.samples()))
+            for metric in self._metrics.values()
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {_escape(documentation)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+metrics_registry = MetricsRegistry()
+
+# HTTP请求
+http_requests = metrics_registry.counter(
+    "pathmind_http_requests", "HTTP请求数", ("method", "route", "status")
+)
+http_request_duration = metrics_registry.histogram(
+    "pathmind_http_request_duration_seconds", "HTTP请求处理耗时(秒)", ("method", "route", "status")
+)
+http_requests_in_flight = metrics_registry.gauge(
+    "pathmind_http_requests_in_flight", "正在处理的HTTP请求数"
+)
+http_request_db_queries = metrics_registry.histogram(
+    "pathmind_http_request_db_queries", "每个HTTP请求执行的SQL查询数", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+http_request_db_duration = metrics_registry.histogram(
+    "pathmind_http_request_db_duration_seconds", "每个HTTP请求的SQL执行耗时(秒)", ("method", "route")
+)
+
+# 智谱AI接口
+ai_request_duration = metrics_registry.histogram(
+    "pathmind_ai_request_duration_seconds", "智谱AI接口调用耗时(秒)", ("model", "outcome"), AI_LATENCY_BUCKETS
+)
+
+def request_route(request: Request) -> str:
+    """请求匹配到的路由模板，例如 /api/v1/users/{user_id}"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+def observe_http_request(request: Request, status: int, duration: float, query_stats: Optional[Any] = None) -> None:
+    """记录一个已完成的HTTP请求；需要在路由匹配之后调用"""
+    if not settings.METRICS_ENABLED:
+        return
+    method = request.method
+    route = request_route(request)
+    status_label = str(status)
+    http_requests.labels(method, route, status_label).inc()
+    http_request_duration.labels(method, route, status_label).observe(duration)
+    if query_stats is not None:
+        http_request_db_queries.labels(method, route).observe(query_stats.count)
+        http_request_db_duration.labels(method, route).observe(query_stats.total_time)
+
+def observe_ai_request(model: str, outcome: str, duration: float) -> None:
+    """记录一次智谱AI调用，outcome 为 success / timeout / error"""
+    if settings.METRICS_ENABLED:
+        ai_request_duration.labels(model, outcome).observe(duration)
+
+def _collect_caches():
+    """进程内缓存的查找次数和命中率，与 /cache-stats 一致"""
+    from app.services.path_cache import path_skeleton_cache
+    from app.services.question_catalog import question_catalog
+    from app.services.recommendation_cache import recommendation_cache
+    from app.services.user_cache import user_cache
+
+    caches = {
+        "path_skeleton": path_skeleton_cache.stats(),
+        "user": user_cache.stats(),
+        "question_catalog": question_catalog.stats(),
+        "recommendation": recommendation_cache.stats()
+    }
+    lookups, ratios = [], []
+    for cache, stats in caches.items():
+        for result in ("hits", "stale_hits", "misses"):
+            if result in stats:
+                lookups.append(("pathmind_cache_lookups_total", {"cache": cache, "result": result}, stats[result]))
+        ratios.append(("pathmind_cache_hit_ratio", {"cache": cache}, stats["hit_rate"]))
+    yield "pathmind_cache_lookups", "counter", "进程内缓存的查找次数，按结果区分", lookups
+    yield "pathmind_cache_hit_ratio", "gauge", "进程内缓存的命中率（旧结果也计为命中）", ratios
+
+def _collect_admission():
+    """准入控制的执行数、队列深度和拒绝次数，与 /admission-stats 一致"""
+    from app.services.admission_control import admission_controllers
+
+    active, queued, admitted, degraded, shed = [], [], [], [], []
+    for name, controller in admission_controllers.items():
+        stats = controller.stats()
+        labels = {"route_class": name}
+        active.append(("pathmind_admission_active", labels, stats["active"]))
+        queued.append(("pathmind_admission_queue_depth", labels, stats["queue_depth"]))
+        admitted.append(("pathmind_admission_admitted_total", labels, stats["admitted"]))
+        degraded.append(("pathmind_admission_degraded_total", labels, stats["degraded"]))
+        for reason, count in stats["shed"].items():
+            shed.append(("pathmind_admission_shed_total", {**labels, "reason": reason}, count))
+    yield "pathmind_admission_active", "gauge", "各路由类别正在执行的请求数", active
+    yield "pathmind_admission_queue_depth", "gauge", "各路由类别排队等待的请求数", queued
+    yield "pathmind_admission_admitted", "counter", "各路由类别准入的请求数", admitted
+    yield "pathmind_admission_degraded", "counter", "各路由类别降级执行的请求数", degraded
+    yield "pathmind_admission_shed", "counter", "各路由类别未被准入的请求数，按原因区分", shed
+
+def _collect_logging():
+    """日志队列已满时丢弃的记录数"""
+    from app import logging_config
+
+    handler = logging_config._queue_handler
+    dropped = handler.dropped if handler is not None else 0
+    yield "pathmind_log_records_dropped", "counter", "日志队列已满时丢弃的记录数", [
+        ("pathmind_log_records_dropped_total", {}, dropped)
+    ]
+
+metrics_registry.register_collector(_collect_caches)
+metrics_registry.register_collector(_collect_admission)
+metrics_registry.register_collector(_collect_logging)
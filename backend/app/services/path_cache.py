@@ -0,0 +1,179 @@
+"""
+学习路径骨架缓存
+
+路径骨架是与用户无关的部分：路径基本信息、按顺序排列的内容节点、节点间连接和学习资源。
+骨架按 (路径ID, skeleton_version) 缓存，路径或其内容被修改时版本号递增（见模型中的事件监听），
+旧版本的缓存项在下次读取时被替换。用户进度在每次请求时叠加到骨架上，不写入缓存。
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.content import LearningContent
+from app.models.learning_path import LearningPath, path_content_association
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 难度级别到节点级别的映射
+LEVEL_MAP = {1: "初级", 2: "中级", 3: "高级", 4: "专家"}
+
+# 路径详情接口中每个内容返回的字段
+DETAIL_CONTENT_FIELDS = ("id", "title", "description", "content_type", "subject", "difficulty_level")
+
+class PathSkeletonCache:
+    """按条目数和字节数双重限制的LRU缓存，线程安全"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[int, Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path_id: int, version: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(path_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path_id: int, version: int, skeleton: Dict[str, Any]) -> None:
+        size = len(json.dumps(skeleton, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            logger.debug("路径 %s 的骨架大小 %s 字节超过缓存上限，不缓存", path_id, size)
+            return
+        with self._lock:
+            self._remove(path_id)
+            self._entries[path_id] = (version, skeleton, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, path_id: int) -> None:
+        with self._lock:
+            self._remove(path_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def _remove(self, path_id: int) -> None:
+        entry = self._entries.pop(path_id, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+path_skeleton_cache = PathSkeletonCache(settings.PATH_CACHE_MAX_ENTRIES, settings.PATH_CACHE_MAX_BYTES)
+
+def build_path_skeleton(db: Session, path: LearningPath) -> Dict[str, Any]:
+    """从数据库构建路径骨架，内容按order_index排序，只查询需要的列"""
+    rows = db.execute(
+        select(
+            LearningContent.id,
+            LearningContent.title,
+            LearningContent.description,
+            LearningContent.content_type,
+            LearningContent.subject,
+            LearningContent.difficulty_level,
+            LearningContent.resources
+        )
+        .join(path_content_association, path_content_association.c.content_id == LearningContent.id)
+        .where(path_content_association.c.path_id == path.id)
+        .order_by(path_content_association.c.order_index)
+    ).all()
+
+    contents = []
+    nodes = []
+    for row in rows:
+        contents.append({field: getattr(row, field) for field in DETAIL_CONTENT_FIELDS})
+
+        node = {
+            "id": str(row.id),
+            "title": row.title,
+            "description": row.description or "",
+            "type": row.content_type or "topic",
+            "level": LEVEL_MAP.get(row.difficulty_level, "中级"),
+            "status": "未开始"
+        }
+        if row.resources:
+            node["resources"] = [
+                {
+                    "title": resource.get('title', "学习资源"),
+                    "url": resource.get('url', "#"),
+                    "type": resource.get('type', "链接")
+                }
+                for resource in row.resources
+            ]
+        nodes.append(node)
+
+    estimated_hours = path.estimated_hours or 10
+    return {
+        "id": path.id,
+        "title": path.title,
+        "description": path.description,
+        "subject": path.subject,
+        "difficulty_level": path.difficulty_level,
+        "estimated_hours": path.estimated_hours,
+        "estimated_duration": f"{estimated_hours}-{estimated_hours * 2}小时",
+        "metadata": path.path_metadata,
+        "contents": contents,
+        "nodes": nodes,
+        "connections": [
+            {"source": nodes[i]["id"], "target": nodes[i + 1]["id"]}
+            for i in range(len(nodes) - 1)
+        ]
+    }
+
+def get_path_skeleton(db: Session, path: LearningPath) -> Dict[str, Any]:
+    """读穿缓存获取路径骨架
+
+    返回的字典为缓存共享对象，调用方不得修改，叠加用户数据时应复制需要改动的部分。
+    """
+    version = path.skeleton_version or 1
+    skeleton = path_skeleton_cache.get(path.id, version)
+    if skeleton is None:
+        skeleton = build_path_skeleton(db, path)
+        path_skeleton_cache.put(path.id, version, skeleton)
+    return skeleton
+
+def overlay_node_status(skeleton: Dict[str, Any], content_progress: Dict[str, float]) -> list:
+    """将用户的内容进度叠加到骨架节点上，只复制状态发生变化的节点"""
+    if not content_progress:
+        return skeleton["nodes"]
+
+    nodes = []
+    for node in skeleton["nodes"]:
+        progress = content_progress.get(node["id"])
+        if progress is None or progress <= 0:
+            nodes.append(node)
+        else:
+            nodes.append({**node, "status": "已完成" if progress >= 100 else "进行中"})
+    return nodes
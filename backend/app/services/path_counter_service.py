@@ -0,0 +1,61 @@
+from typing import Any, Dict, List
+import logging
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..models.content import PATH_COUNTERS, path_counter_expressions, refresh_path_counters
+from ..models.learning_path import LearningPath
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+def _inconsistent_in_batch(db: Session, last_id: int, batch_size: int):
+    """返回 (本批最后的路径ID, 计数不一致的路径列表)"""
+    expressions = path_counter_expressions()
+    rows = db.execute(
+        select(
+            LearningPath.id,
+            *(getattr(LearningPath, name) for name in PATH_COUNTERS),
+            *(expressions[name].label(f"actual_{name}") for name in PATH_COUNTERS)
+        )
+        .where(LearningPath.id > last_id)
+        .order_by(LearningPath.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None, []
+
+    mismatches = []
+    for row in rows:
+        values = row._mapping
+        diff = {
+            name: {"stored": values[name], "actual": values[f"actual_{name}"]}
+            for name in PATH_COUNTERS
+            if values[name] != values[f"actual_{name}"]
+        }
+        if diff:
+            mismatches.append({"path_id": row.id, "counters": diff})
+    return rows[-1].id, mismatches
+
+def check_path_counters(db: Session, batch_size: int = 500) -> List[Dict[str, Any]]:
+    """按路径ID分批比较计数列与源表，返回所有不一致的路径"""
+    mismatches = []
+    last_id = 0
+    while True:
+        last_id, batch = _inconsistent_in_batch(db, last_id, batch_size)
+        if last_id is None:
+            return mismatches
+        mismatches.extend(batch)
+
+def repair_path_counters(db: Session, batch_size: int = 500) -> int:
+    """只重写不一致的路径的计数列，每批一个事务，返回修复的路径数量"""
+    repaired = 0
+    last_id = 0
+    while True:
+        last_id, batch = _inconsistent_in_batch(db, last_id, batch_size)
+        if last_id is None:
+            return repaired
+        if batch:
+            refresh_path_counters(db.connection(), [item["path_id"] for item in batch], names=PATH_COUNTERS)
+            db.commit()
+            repaired += len(batch)
+            logger.info("已修复 %s 条路径计数 (最后路径ID: %s)", repaired, last_id)
@@ -16,7 +16,7 @@ class PersonalizationService:
         
     def get_recommendations_for_user(self, user_id: int) -> List[lp_models.LearningPath]:
         """根据用户学习风格和历史获取推荐学习路径"""
-        logger.info(f"为用户 {user_id} 生成个性化推荐")
+        logger.info("为用户 %s 生成个性化推荐", user_id)
         
         try:
             # 获取用户的学习风格
@@ -39,7 +39,7 @@ class PersonalizationService:
             # 如果有学习风格评估，根据学习风格进行个性化推荐
             if user_assessment:
                 dominant_style = user_assessment.dominant_style
-                logger.info(f"用户 {user_id} 的主要学习风格: {dominant_style}")
+                logger.info("用户 %s 的主要学习风格: %s", user_id, dominant_style)
                 
                 # 这里假设学习路径的metadata中包含适合的学习风格
                 # 实际实现可能需要根据具体数据模型调整
@@ -48,11 +48,11 @@ class PersonalizationService:
                 # 返回3个推荐路径
                 return query.limit(3).all()
             else:
-                logger.info(f"用户 {user_id} 没有学习风格评估，返回通用推荐")
+                logger.info("用户 %s 没有学习风格评估，返回通用推荐", user_id)
                 # 如果没有学习风格评估，返回通用推荐
                 return query.limit(3).all()
                 
         except Exception as e:
-            logger.error(f"生成用户 {user_id} 的推荐时出错: {str(e)}")
+            logger.error("生成用户 %s 的推荐时出错: %s", user_id, e)
             # 发生错误时，返回空列表
             return []
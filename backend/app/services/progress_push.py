@@ -0,0 +1,228 @@
+"""
+学习进度的服务端推送（SSE）
+
+前端原来定时轮询进度和学习时长，每次轮询都重新执行进度查询。现在每个页面会话订阅
+GET /api/v1/progress/stream/{user_id}，进度变化时由服务端推送：
+- 注册记录的进度、学习时间或最后活动时间在事务中被修改，提交后通知该用户的订阅者
+  （会话的 after_flush 收集变化，after_commit 发布，回滚时丢弃）；
+- 内容交互记录（user_content_interactions）的进度、学习时长或完成状态变化时同样在提交后通知。
+  通过 /users/{user_id}/progress 写入的进度只追加学习事件，由后台投影写入交互记录，
+  因此在投影提交时推送，比写入请求晚最多一个 EVENT_FLUSH_INTERVAL；
+- 推荐列表重新计算完成后，直接推送新的推荐结果。
+
+通知只包含路径ID或内容ID，推送流收到通知后读取一次最新进度；短时间内的多次通知合并为一次查询。
+订阅队列有容量上限，客户端处理不及时时丢弃最旧的通知，进度读取的总是最新状态，不影响正确性。
+"""
+import asyncio
+import json
+import logging
+import threading
+from itertools import chain
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.content import UserContentInteraction
+from app.models.learning_path import ENROLLMENT_PROGRESS_SUMS, PathEnrollment
+from app.services.enrollment_progress_service import get_enrollment_states
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 这些字段变化时推送进度；任何内容进度写入都会更新进度累计值
+PUSHED_ENROLLMENT_FIELDS = ("progress", "total_study_time", "last_activity_at", *ENROLLMENT_PROGRESS_SUMS)
+# 内容交互记录的这些字段变化时推送内容进度
+PUSHED_INTERACTION_FIELDS = ("progress", "time_spent", "completed")
+
+class Subscription:
+    """一个推送流的通知队列，记录所属事件循环，供其他线程提交的事务投递通知"""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: Dict[str, Any]) -> None:
+        """在所属事件循环中调用；队列已满时丢弃最旧的通知"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+class ProgressBroker:
+    """按用户ID管理推送订阅并投递通知"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id: int) -> bool:
+        with self._lock:
+            return user_id in self._subscribers
+
+    def publish(self, user_id: int, message: Dict[str, Any]) -> None:
+        """向用户的所有订阅者投递通知，可在任意线程调用"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+            self.published += 1
+            self.delivered += len(subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # 事件循环已关闭，推送流随之结束
+                self.unsubscribe(subscription)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._subscribers.clear()
+            self.published = self.delivered = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscriptions = [s for subscribers in self._subscribers.values() for s in subscribers]
+            return {
+                "users": len(self._subscribers),
+                "subscriptions": len(subscriptions),
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": sum(s.dropped for s in subscriptions)
+            }
+
+progress_broker = ProgressBroker(settings.PROGRESS_STREAM_QUEUE_SIZE)
+
+def _sse(event_name: str, data: Any) -> str:
+    return f"event: {event_name}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def get_content_states(db: Session, user_id: int, content_ids: List[int]) -> List[Dict[str, Any]]:
+    """读取用户在指定内容上的进度、学习时长和完成状态（每个内容取最早的交互记录，与投影一致）"""
+    rows = db.execute(
+        select(
+            UserContentInteraction.content_id,
+            UserContentInteraction.progress,
+            UserContentInteraction.time_spent,
+            UserContentInteraction.completed
+        )
+        .where(UserContentInteraction.user_id == user_id, UserContentInteraction.content_id.in_(content_ids))
+        .order_by(UserContentInteraction.id)
+    ).all()
+    states: Dict[int, Dict[str, Any]] = {}
+    for content_id, progress, time_spent, completed in rows:
+        states.setdefault(content_id, {
+            "content_id": content_id,
+            "progress": progress,
+            "time_spent": time_spent,
+            "completed": bool(completed)
+        })
+    return [states[content_id] for content_id in sorted(states)]
+
+def _read_in_session(session_factory: Callable[[], Session], read: Callable[..., Any], *args) -> Any:
+    """在短生命周期的会话中执行一次同步读取，在线程池中调用"""
+    with session_factory() as db:
+        return read(db, *args)
+
+async def progress_stream(
+    session_factory: Callable[[], Session],
+    subscription: Subscription,
+    heartbeat: float
+) -> AsyncIterator[str]:
+    """推送流：先发送当前进度，之后按通知推送变化；空闲时发送注释行保持连接
+
+    每次读取进度使用短生命周期的会话，推送流空闲时不占用数据库连接；
+    读取是同步的数据库操作，在线程池中执行，不阻塞事件循环。
+    """
+    user_id = subscription.user_id
+    try:
+        yield _sse("progress", await run_in_threadpool(
+            _read_in_session, session_factory, get_enrollment_states, user_id
+        ))
+        while True:
+            try:
+                messages = [await asyncio.wait_for(subscription.queue.get(), heartbeat)]
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            # 合并已排队的通知
+            while not subscription.queue.empty():
+                messages.append(subscription.queue.get_nowait())
+
+            path_ids = sorted({m["path_id"] for m in messages if m["type"] == "progress"})
+            content_ids = sorted({m["content_id"] for m in messages if m["type"] == "content_progress"})
+            recommendations = [m["data"] for m in messages if m["type"] == "recommendations"]
+            if path_ids:
+                yield _sse("progress", await run_in_threadpool(
+                    _read_in_session, session_factory, get_enrollment_states, user_id, path_ids
+                ))
+            if content_ids:
+                yield _sse("content_progress", await run_in_threadpool(
+                    _read_in_session, session_factory, get_content_states, user_id, content_ids
+                ))
+            if recommendations:
+                yield _sse("recommendations", recommendations[-1])
+    finally:
+        progress_broker.unsubscribe(subscription)
+
+def publish_recommendations(user_id: int, recommendations: List[Dict[str, Any]]) -> None:
+    """推荐列表重新计算完成后推送给用户"""
+    progress_broker.publish(user_id, {"type": "recommendations", "data": recommendations})
+
+def _fields_changed(obj, names) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in names)
+
+# 进度写入提交后通知订阅者
+_CHANGED_ENROLLMENTS_KEY = "progress_push_changed"
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_enrollments(session, flush_context):
+    enrollments = chain(
+        (obj for obj in session.new if isinstance(obj, PathEnrollment)),
+        (obj for obj in session.dirty
+         if isinstance(obj, PathEnrollment) and _fields_changed(obj, PUSHED_ENROLLMENT_FIELDS))
+    )
+    interactions = chain(
+        (obj for obj in session.new if isinstance(obj, UserContentInteraction)),
+        (obj for obj in session.dirty
+         if isinstance(obj, UserContentInteraction) and _fields_changed(obj, PUSHED_INTERACTION_FIELDS))
+    )
+    # (用户ID, 通知类型, 路径ID或内容ID)
+    changed = {
+        (obj.user_id, "progress", obj.path_id) for obj in enrollments
+        if obj.user_id is not None and progress_broker.has_subscribers(obj.user_id)
+    }
+    changed.update(
+        (obj.user_id, "content_progress", obj.content_id) for obj in interactions
+        if obj.user_id is not None and obj.content_id is not None and progress_broker.has_subscribers(obj.user_id)
+    )
+    if changed:
+        session.info.setdefault(_CHANGED_ENROLLMENTS_KEY, set()).update(changed)
+
+@event.listens_for(Session, "after_commit")
+def _publish_changed_enrollments(session):
+    changed: Optional[Set] = session.info.pop(_CHANGED_ENROLLMENTS_KEY, None)
+    for user_id, message_type, target_id in sorted(changed or ()):
+        key = "path_id" if message_type == "progress" else "content_id"
+        progress_broker.publish(user_id, {"type": message_type, key: target_id})
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_enrollments(session):
+    session.info.pop(_CHANGED_ENROLLMENTS_KEY, None)
@@ -0,0 +1,146 @@
+"""
+离线进度同步服务
+
+学习路径页面原来每次节点状态变化、每次结束学习都单独发送一次请求。客户端改为在本地缓冲这些事件，
+定期把一批事件提交到 POST /api/v1/progress/sync，服务端在一个事务中按顺序应用并返回合并后的进度。
+
+每个事件带客户端生成的幂等键，已应用的键记录在 progress_sync_keys 表中并与进度在同一事务提交：
+网络失败后客户端重发整批事件，已应用的事件只会被跳过，学习时间不会重复累加。
+总体进度在整批事件应用后按注册记录各计算一次。
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence
+import logging
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.content import LearningContent
+from app.models.learning_path import LearningPath, PathEnrollment, ProgressSyncKey
+from app.schemas.learning_path import ProgressSyncEvent
+from app.services.enrollment_progress_service import (
+    get_enrollment_states,
+    record_content_progress,
+    record_study_session,
+    recompute_enrollment_progress,
+    lock_enrollments,
+    run_with_version_retry
+)
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 节点状态对应的进度，与 /api/v1/learning/update-progress 一致
+STATUS_PROGRESS = {"未开始": 0, "进行中": 50, "已完成": 100}
+
+def _as_utc(value: datetime) -> datetime:
+    """客户端时间未带时区时按UTC处理"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _event_progress(event: ProgressSyncEvent) -> float:
+    if event.progress is not None:
+        return event.progress
+    if event.status in STATUS_PROGRESS:
+        return STATUS_PROGRESS[event.status]
+    raise ValueError(f"无效的进度事件: 需要 progress 或有效的 status ({', '.join(STATUS_PROGRESS)})")
+
+def _apply_events(db: Session, user_id: int, events: Sequence[ProgressSyncEvent]) -> Dict[str, Any]:
+    """在当前事务中按顺序应用未处理过的事件，返回各事件的处理结果（不提交）"""
+    keys = {event.idempotency_key for event in events}
+    seen = set(db.scalars(
+        select(ProgressSyncKey.idempotency_key)
+        .where(ProgressSyncKey.user_id == user_id, ProgressSyncKey.idempotency_key.in_(keys))
+    ))
+
+    applied: List[str] = []
+    duplicates: List[str] = []
+    rejected: List[Dict[str, str]] = []
+    pending = []
+    for event in events:
+        # 已应用过的键，以及同一批中重复的键都跳过
+        if event.idempotency_key in seen:
+            duplicates.append(event.idempotency_key)
+            continue
+        seen.add(event.idempotency_key)
+        pending.append(event)
+
+    path_ids = {event.path_id for event in pending}
+    content_ids = {event.content_id for event in pending}
+    known_paths = set(db.scalars(select(LearningPath.id).where(LearningPath.id.in_(path_ids)))) if path_ids else set()
+    known_contents = (
+        set(db.scalars(select(LearningContent.id).where(LearningContent.id.in_(content_ids)))) if content_ids else set()
+    )
+    # 锁定后读取注册记录，并发写入同一注册记录的请求依次执行
+    lock_enrollments(db, user_id, sorted(known_paths))
+    enrollments = {
+        enrollment.path_id: enrollment
+        for enrollment in db.query(PathEnrollment).filter(
+            PathEnrollment.user_id == user_id,
+            PathEnrollment.path_id.in_(known_paths)
+        )
+    } if known_paths else {}
+
+    now = datetime.now(timezone.utc)
+    last_activity: Dict[int, datetime] = {}
+    for event in pending:
+        try:
+            if event.path_id not in known_paths:
+                raise ValueError(f"学习路径ID {event.path_id} 不存在")
+            if event.content_id not in known_contents:
+                raise ValueError(f"内容ID {event.content_id} 不存在")
+            progress = _event_progress(event) if event.type == "progress" else None
+        except ValueError as e:
+            rejected.append({"idempotency_key": event.idempotency_key, "reason": str(e)})
+            continue
+
+        enrollment = enrollments.get(event.path_id)
+        if enrollment is None:
+            # 与节点状态更新接口一致，未注册时自动注册
+            enrollment = PathEnrollment(user_id=user_id, path_id=event.path_id, progress=0)
+            db.add(enrollment)
+            db.flush()
+            enrollments[event.path_id] = enrollment
+
+        if event.type == "progress":
+            record_content_progress(db, enrollment, event.content_id, progress)
+        else:
+            # 学习会话只累加学习时间，不改变内容进度
+            record_content_progress(db, enrollment, event.content_id, None, event.study_time)
+            if event.study_time > 0 and event.session_start and event.session_end:
+                record_study_session(
+                    db, enrollment.id, event.content_id, event.session_start, event.session_end, event.study_time
+                )
+
+        db.add(ProgressSyncKey(user_id=user_id, idempotency_key=event.idempotency_key))
+        applied.append(event.idempotency_key)
+        # 最后活动时间取客户端时间，不晚于服务端当前时间
+        occurred_at = min(_as_utc(event.client_ts), now)
+        last_activity[event.path_id] = max(last_activity.get(event.path_id, occurred_at), occurred_at)
+
+    for path_id, occurred_at in last_activity.items():
+        enrollment = enrollments[path_id]
+        recompute_enrollment_progress(db, enrollment)
+        enrollment.last_activity_at = occurred_at
+
+    return {"applied": applied, "duplicates": duplicates, "rejected": rejected}
+
+def sync_progress_events(db: Session, user_id: int, events: Sequence[ProgressSyncEvent]) -> Dict[str, Any]:
+    """在一个事务中按顺序应用一批离线事件，返回处理结果和涉及路径合并后的进度
+
+    注册记录版本冲突时整批重新执行；同一批事件被并发重发时，后提交的请求因幂等键冲突回滚，
+    重新执行时这些事件被识别为重复事件。
+    """
+    for attempt in range(2):
+        try:
+            result = run_with_version_retry(db, lambda: _apply_events(db, user_id, events))
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise
+            logger.info("进度同步的幂等键冲突，重新执行: user_id=%s", user_id)
+
+    path_ids = sorted({event.path_id for event in events})
+    logger.info(
+        "进度同步: user_id=%s, 应用 %s 个事件, 重复 %s 个, 拒绝 %s 个", user_id, len(result['applied']), len(result['duplicates']), len(result['rejected'])
+    )
+    return {"user_id": user_id, **result, "paths": get_enrollment_states(db, user_id, path_ids)}
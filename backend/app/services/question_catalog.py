@@ -0,0 +1,133 @@
+"""
+评估题库的进程内缓存
+
+题库只在管理员新增题目时变化，但获取题目和提交评估都要读取它。这里把整个题库按ID排序
+缓存为一个只读快照：新增题目的接口提交后调用 invalidate()，TTL兜底其他进程或未经接口的修改。
+提交评估时一次取出所有回答涉及的题目，快照中没有的ID再用一次查询确认。
+"""
+import bisect
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.learning_assessment import AssessmentQuestion
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True, slots=True)
+class CatalogQuestion:
+    """题目的只读快照，属性名与AssessmentQuestion模型一致"""
+    id: int
+    question_text: str
+    question_type: str
+    options: Optional[Dict[str, Any]]
+    category: str
+    weight: Optional[float]
+
+CATALOG_COLUMNS = (
+    AssessmentQuestion.id,
+    AssessmentQuestion.question_text,
+    AssessmentQuestion.question_type,
+    AssessmentQuestion.options,
+    AssessmentQuestion.category,
+    AssessmentQuestion.weight
+)
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    questions: Tuple[CatalogQuestion, ...]  # 按ID升序
+    ids: Tuple[int, ...]
+    by_id: Dict[int, CatalogQuestion]
+
+    def page(self, after_id: Optional[int], limit: int) -> Tuple[List[CatalogQuestion], bool]:
+        """返回ID大于 after_id 的前 limit 道题，以及之后是否还有题目"""
+        start = bisect.bisect_right(self.ids, after_id) if after_id is not None else 0
+        return list(self.questions[start:start + limit]), start + limit < len(self.questions)
+
+def _build_snapshot(questions: Iterable[CatalogQuestion]) -> CatalogSnapshot:
+    questions = tuple(sorted(questions, key=lambda question: question.id))
+    return CatalogSnapshot(
+        questions=questions,
+        ids=tuple(question.id for question in questions),
+        by_id={question.id: question for question in questions}
+    )
+
+class QuestionCatalog:
+    """整个题库的快照缓存，线程安全"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        # 每次失效递增；加载期间发生过失效的结果不写入缓存，避免把旧数据放回去
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        with self._lock:
+            if self._snapshot is not None and self._expires_at >= time.monotonic():
+                self.hits += 1
+                return self._snapshot
+            self.misses += 1
+            epoch = self._epoch
+
+        rows = db.execute(select(*CATALOG_COLUMNS)).all()
+        snapshot = _build_snapshot(CatalogQuestion(*row) for row in rows)
+        with self._lock:
+            if epoch == self._epoch:
+                self._snapshot = snapshot
+                self._expires_at = time.monotonic() + self.ttl
+        logger.debug("题库已加载: %s 道题", len(snapshot.questions))
+        return snapshot
+
+    def lookup(self, db: Session, question_ids: Iterable[int]) -> Dict[int, CatalogQuestion]:
+        """批量取出题目 {question_id: 题目}，不存在的ID不在结果中
+
+        快照中找不到的ID可能是其他进程刚新增的，用一次查询确认；确实存在时说明快照已过时，使其失效。
+        """
+        wanted = set(question_ids)
+        by_id = self.get(db).by_id
+        found = {question_id: by_id[question_id] for question_id in wanted if question_id in by_id}
+        missing = wanted.difference(found)
+        if missing:
+            rows = db.execute(select(*CATALOG_COLUMNS).where(AssessmentQuestion.id.in_(missing))).all()
+            if rows:
+                self.invalidate()
+                found.update((row.id, CatalogQuestion(*row)) for row in rows)
+        return found
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            if self._snapshot is not None:
+                self._snapshot = None
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._snapshot = None
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "loaded": self._snapshot is not None,
+                "questions": len(self._snapshot.questions) if self._snapshot is not None else 0,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+question_catalog = QuestionCatalog(settings.QUESTION_CATALOG_TTL)
@@ -0,0 +1,292 @@
+"""
+轻量读取层
+
+读接口只需要部分列时，用Core的 select() 只查询这些列，把结果行映射为带 __slots__ 的只读数据类：
+不构造ORM实体、不进入会话的identity map，也不会读取大的JSON列（content_data、resources、path_metadata 等）。
+这些JSON列在模型上设为延迟加载，通过ORM读取实体时同样不会被带出。
+数据类的字段名与模型的属性名一致，列由字段名推导，需要表达式的字段单独指定。
+接口按 fields= 只返回部分字段时，用 select_fields 只查询这些列，结果行转为字典。
+"""
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import Select, case, func, select
+from sqlalchemy.orm import Session
+from app.models.content import LearningContent, ContentTag, UserContentInteraction, content_tag_association
+from app.models.learning_assessment import LearningStyleAssessment
+from app.models.learning_path import LearningPath, PathEnrollment
+from app.utils.pagination import paginate_keyset
+
+def columns_for(row_type, model, **expressions) -> list:
+    """按数据类字段顺序取模型上同名的列，expressions 中的字段改用给定的表达式"""
+    return [
+        expressions[field.name].label(field.name) if field.name in expressions else getattr(model, field.name)
+        for field in fields(row_type)
+    ]
+
+def select_rows(row_type, model, **expressions) -> Select:
+    return select(*columns_for(row_type, model, **expressions))
+
+def to_rows(row_type, rows) -> list:
+    return [row_type(*row) for row in rows]
+
+def select_fields(model, names: Sequence[str], **expressions) -> Select:
+    """只查询 names 中的列，expressions 中的名称改用给定的表达式"""
+    return select(*[
+        expressions[name].label(name) if name in expressions else getattr(model, name)
+        for name in names
+    ])
+
+def to_dicts(names: Sequence[str], rows) -> List[Dict[str, Any]]:
+    """把结果行按 names 的顺序转为字典；分页只查一列时结果是标量"""
+    if len(names) == 1:
+        return [{names[0]: row[0] if isinstance(row, tuple) else row} for row in rows]
+    return [dict(zip(names, row)) for row in rows]
+
+@dataclass(frozen=True, slots=True)
+class ContentListItem:
+    id: int
+    title: str
+    description: Optional[str]
+    content_type: str
+    subject: Optional[str]
+    difficulty_level: Optional[int]
+    content_url: Optional[str]
+    visual_affinity: Optional[float]
+    auditory_affinity: Optional[float]
+    kinesthetic_affinity: Optional[float]
+    reading_affinity: Optional[float]
+    author: Optional[str]
+    is_premium: Optional[bool]
+    created_at: Optional[datetime]
+
+@dataclass(frozen=True, slots=True)
+class ContentDetail:
+    id: int
+    title: str
+    description: Optional[str]
+    content_type: str
+    content_url: Optional[str]
+    content_data: Optional[Dict[str, Any]]
+    subject: Optional[str]
+    difficulty_level: Optional[int]
+    estimated_minutes: Optional[int]
+    resources: Optional[List[Dict[str, Any]]]
+    visual_affinity: Optional[float]
+    auditory_affinity: Optional[float]
+    kinesthetic_affinity: Optional[float]
+    reading_affinity: Optional[float]
+    author: Optional[str]
+    source_url: Optional[str]
+    is_premium: Optional[bool]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+@dataclass(frozen=True, slots=True)
+class ContentTagRow:
+    content_id: int
+    id: int
+    name: str
+    description: Optional[str]
+
+@dataclass(frozen=True, slots=True)
+class RecommendationCandidate:
+    id: int
+    title: str
+    description: Optional[str]
+    content_type: str
+    subject: Optional[str]
+    difficulty_level: Optional[int]
+    visual_affinity: Optional[float]
+    auditory_affinity: Optional[float]
+    kinesthetic_affinity: Optional[float]
+    reading_affinity: Optional[float]
+
+@dataclass(frozen=True, slots=True)
+class UserPathItem:
+    id: int
+    title: str
+    description: Optional[str]
+    subject: str
+    difficulty_level: Optional[int]
+    estimated_hours: Optional[float]
+    content_count: int
+    total_estimated_minutes: int
+    progress: Optional[float]
+    last_activity_at: Optional[datetime]
+    enrolled_at: Optional[datetime]
+
+@dataclass(frozen=True, slots=True)
+class AssessmentHistoryItem:
+    id: int
+    completed_at: Optional[datetime]
+    visual_score: Optional[float]
+    auditory_score: Optional[float]
+    kinesthetic_score: Optional[float]
+    reading_score: Optional[float]
+    dominant_style: Optional[str]
+
+# 内容列表/详情接口可以通过 fields 选择的字段；resources 较大，通过 include 展开
+CONTENT_LIST_FIELDS = tuple(field.name for field in fields(ContentListItem))
+CONTENT_DETAIL_FIELDS = tuple(field.name for field in fields(ContentDetail) if field.name != "resources")
+
+# 学习历史接口的字段及对应的列
+HISTORY_COLUMNS = {
+    "content_id": UserContentInteraction.content_id,
+    "title": LearningContent.title,
+    "content_type": LearningContent.content_type,
+    "interaction_type": UserContentInteraction.interaction_type,
+    "progress": UserContentInteraction.progress,
+    "rating": UserContentInteraction.rating,
+    "time_spent": UserContentInteraction.time_spent,
+    "created_at": UserContentInteraction.created_at
+}
+HISTORY_FIELDS = tuple(HISTORY_COLUMNS)
+
+def load_content_tags(db: Session, content_ids: Sequence[int]) -> Dict[int, List[ContentTagRow]]:
+    """一次查询取出多个内容的标签 {content_id: [标签]}"""
+    tags: Dict[int, List[ContentTagRow]] = {}
+    if not content_ids:
+        return tags
+    rows = db.execute(
+        select(content_tag_association.c.content_id, ContentTag.id, ContentTag.name, ContentTag.description)
+        .join(ContentTag, ContentTag.id == content_tag_association.c.tag_id)
+        .where(content_tag_association.c.content_id.in_(content_ids))
+        .order_by(content_tag_association.c.content_id, ContentTag.id)
+    )
+    for row in to_rows(ContentTagRow, rows):
+        tags.setdefault(row.content_id, []).append(row)
+    return tags
+
+def list_content_fields(
+    db: Session,
+    names: Sequence[str],
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """按创建时间倒序分页读取内容列表，只查询 names 中的列，返回 (本页内容字典, 下一页游标)"""
+    rows, next_cursor = paginate_keyset(
+        select_fields(LearningContent, names),
+        [LearningContent.created_at, LearningContent.id],
+        cursor=cursor,
+        limit=limit,
+        session=db
+    )
+    return to_dicts(names, rows), next_cursor
+
+def get_content_fields(db: Session, content_id: int, names: Sequence[str]) -> Optional[Dict[str, Any]]:
+    row = db.execute(select_fields(LearningContent, names).where(LearningContent.id == content_id)).first()
+    return dict(zip(names, row)) if row else None
+
+def load_content_progress(db: Session, user_id: int, content_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """一次查询取出用户在多个内容上的进度 {content_id: {"progress", "completed"}}"""
+    if not content_ids:
+        return {}
+    rows = db.execute(
+        select(
+            UserContentInteraction.content_id,
+            func.max(UserContentInteraction.progress),
+            func.max(case((UserContentInteraction.completed.is_(True), 1), else_=0))
+        )
+        .where(
+            UserContentInteraction.user_id == user_id,
+            UserContentInteraction.content_id.in_(content_ids)
+        )
+        .group_by(UserContentInteraction.content_id)
+    )
+    return {
+        content_id: {"progress": progress or 0.0, "completed": bool(completed)}
+        for content_id, progress, completed in rows
+    }
+
+def load_content_details(db: Session, content_ids: Sequence[int]) -> Dict[int, ContentDetail]:
+    """一次查询取出多个内容的详情 {content_id: 详情}"""
+    if not content_ids:
+        return {}
+    rows = db.execute(select_rows(ContentDetail, LearningContent).where(LearningContent.id.in_(content_ids)))
+    return {content.id: content for content in to_rows(ContentDetail, rows)}
+
+def list_recommendation_candidates(
+    db: Session,
+    subject: Optional[str] = None,
+    content_type: Optional[str] = None,
+    difficulty_range: Optional[List[int]] = None,
+    exclude_ids: Optional[Sequence[int]] = None,
+    limit: int = 50
+) -> List[RecommendationCandidate]:
+    """按过滤条件读取推荐候选内容，只包含推荐打分需要的列"""
+    stmt = select_rows(RecommendationCandidate, LearningContent)
+    if subject:
+        stmt = stmt.where(LearningContent.subject == subject)
+    if content_type:
+        stmt = stmt.where(LearningContent.content_type == content_type)
+    if difficulty_range:
+        stmt = stmt.where(
+            LearningContent.difficulty_level >= difficulty_range[0],
+            LearningContent.difficulty_level <= difficulty_range[1]
+        )
+    if exclude_ids:
+        stmt = stmt.where(LearningContent.id.notin_(exclude_ids))
+    return to_rows(RecommendationCandidate, db.execute(stmt.limit(limit)))
+
+def list_user_paths(db: Session, user_id: int) -> List[UserPathItem]:
+    """用户注册的路径及进度，一次查询"""
+    stmt = (
+        select(*columns_for(
+            UserPathItem,
+            LearningPath,
+            progress=PathEnrollment.progress,
+            last_activity_at=PathEnrollment.last_activity_at,
+            enrolled_at=PathEnrollment.enrolled_at
+        ))
+        .join(PathEnrollment, PathEnrollment.path_id == LearningPath.id)
+        .where(PathEnrollment.user_id == user_id)
+    )
+    return to_rows(UserPathItem, db.execute(stmt))
+
+def list_user_history(
+    db: Session,
+    user_id: int,
+    names: Sequence[str] = HISTORY_FIELDS,
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """按时间倒序分页读取用户的内容交互记录，只查询 names 中的列"""
+    stmt = (
+        select(*[HISTORY_COLUMNS[name].label(name) for name in names])
+        .select_from(UserContentInteraction)
+        .join(LearningContent, LearningContent.id == UserContentInteraction.content_id)
+        .where(UserContentInteraction.user_id == user_id)
+    )
+    rows, next_cursor = paginate_keyset(
+        stmt,
+        [UserContentInteraction.created_at, UserContentInteraction.id],
+        cursor=cursor,
+        limit=limit,
+        session=db
+    )
+    return to_dicts(names, rows), next_cursor
+
+def list_assessment_history(
+    db: Session,
+    user_id: int,
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> Tuple[List[AssessmentHistoryItem], Optional[str]]:
+    """按完成时间倒序分页读取评估历史；优势风格优先取列值，旧记录从 assessment_data 中取出"""
+    stmt = select_rows(
+        AssessmentHistoryItem,
+        LearningStyleAssessment,
+        dominant_style=func.coalesce(
+            LearningStyleAssessment.dominant_style,
+            LearningStyleAssessment.assessment_data["dominant_style"].as_string()
+        )
+    ).where(LearningStyleAssessment.user_id == user_id)
+    rows, next_cursor = paginate_keyset(
+        stmt,
+        [LearningStyleAssessment.completed_at, LearningStyleAssessment.id],
+        cursor=cursor,
+        limit=limit,
+        session=db
+    )
+    return to_rows(AssessmentHistoryItem, rows), next_cursor
@@ -0,0 +1,274 @@
+"""
+推荐学习路径的缓存（stale-while-revalidate）
+
+推荐由AI生成，一次调用要数秒，而仪表盘每次加载都会请求。这里按用户ID缓存最近一次计算的推荐列表：
+- 软TTL内直接返回；
+- 超过软TTL仍返回旧结果，同时在后台重新计算；
+- 超过硬TTL、没有缓存或用户发生相关变化（学习风格、注册路径）后，才阻塞等待计算。
+同一用户同时只有一个计算任务，并发请求共享它的结果。计算使用独立的会话，不依赖发起请求的会话。
+AI失败时回退到数据库查询，回退结果只以 RECOMMENDATION_FALLBACK_TTL 作为软TTL缓存，很快会在后台重新尝试AI。
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import settings
+from app.models.learning_path import LearningPath, PathEnrollment
+from app.models.user import User
+from app.services.ai_service import get_ai_service
+from app.services.progress_push import publish_recommendations
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 计算推荐的协程函数，返回 (推荐列表, 软TTL)；软TTL为None时使用缓存的默认值
+Loader = Callable[[], Awaitable[Tuple[List[Dict[str, Any]], Optional[float]]]]
+
+class RecommendationCache:
+    """按用户缓存推荐列表，软TTL后后台刷新，硬TTL后阻塞刷新"""
+
+    def __init__(self, soft_ttl: float, hard_ttl: float, max_entries: int):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.max_entries = max_entries
+        # {user_id: (计算完成时间, 软TTL, 推荐列表)}
+        self._entries: "OrderedDict[int, Tuple[float, float, List[Dict[str, Any]]]]" = OrderedDict()
+        # 正在计算的任务 {user_id: 任务}
+        self._loading: Dict[int, "asyncio.Task[List[Dict[str, Any]]]"] = {}
+        self._lock = threading.Lock()
+        # 按用户的失效代数，计算期间该用户发生过失效的结果不写入缓存，避免把旧数据放回去；
+        # 只有正在计算的用户需要记录，计算结束后移除
+        self._generations: Dict[int, int] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, user_id: int, load: Loader) -> List[Dict[str, Any]]:
+        """返回用户的推荐列表，load 为计算推荐的协程函数"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            age = time.monotonic() - entry[0] if entry is not None else None
+            if age is not None and age < self.hard_ttl:
+                self._entries.move_to_end(user_id)
+                if age < entry[1]:
+                    self.hits += 1
+                    return entry[2]
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+
+        task = self._start_load(user_id, load)
+        if age is not None and age < self.hard_ttl:
+            # 后台刷新，本次返回旧结果
+            return entry[2]
+        # 单个等待者被取消时不取消共享的计算任务
+        return await asyncio.shield(task)
+
+    def _start_load(self, user_id: int, load: Loader) -> "asyncio.Task[List[Dict[str, Any]]]":
+        with self._lock:
+            task = self._loading.get(user_id)
+            if task is not None:
+                return task
+            generation = self._generations.setdefault(user_id, 0)
+            self.refreshes += 1
+            task = asyncio.ensure_future(self._load(user_id, load, generation))
+            self._loading[user_id] = task
+        task.add_done_callback(lambda t: self._finish_load(user_id, t))
+        return task
+
+    async def _load(self, user_id: int, load: Loader, generation: int) -> List[Dict[str, Any]]:
+        result, soft_ttl = await load()
+        self.put(user_id, result, generation, soft_ttl)
+        return result
+
+    def _finish_load(self, user_id: int, task: "asyncio.Task") -> None:
+        with self._lock:
+            if self._loading.get(user_id) is task:
+                del self._loading[user_id]
+                self._generations.pop(user_id, None)
+            if not task.cancelled() and task.exception() is not None:
+                self.refresh_failures += 1
+                # 后台刷新失败时保留旧结果；阻塞等待的请求会收到异常
+                logger.warning("推荐计算失败: user_id=%s, %s", user_id, task.exception())
+
+    def generation(self, user_id: int) -> int:
+        """用户当前的失效代数，put 时传回"""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(
+        self,
+        user_id: int,
+        recommendations: List[Dict[str, Any]],
+        generation: int,
+        soft_ttl: Optional[float] = None
+    ) -> None:
+        """写入推荐列表；generation 与当前代数不同（期间发生过失效）时丢弃，soft_ttl 默认为缓存的软TTL"""
+        with self._lock:
+            if generation != self._generations.get(user_id, 0):
+                return
+            soft_ttl = self.soft_ttl if soft_ttl is None else min(soft_ttl, self.soft_ttl)
+            self._entries[user_id] = (time.monotonic(), soft_ttl, recommendations)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def peek(self, user_id: int) -> Optional[List[Dict[str, Any]]]:
+        """返回缓存的推荐列表（不论是否过期），不触发计算"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return entry[2] if entry is not None else None
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        """移除用户的缓存，下次请求阻塞等待重新计算"""
+        with self._lock:
+            for user_id in user_ids:
+                # 只有正在计算的用户需要递增代数，使计算结果作废
+                if user_id in self._loading:
+                    self._generations[user_id] += 1
+                if self._entries.pop(user_id, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            # 仍在进行的计算结果作废；代数在这些用户下一次计算结束时移除
+            for user_id in self._loading:
+                self._generations[user_id] += 1
+            self._entries.clear()
+            self._loading.clear()
+            self.hits = self.stale_hits = self.misses = 0
+            self.refreshes = self.refresh_failures = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "soft_ttl": self.soft_ttl,
+                "hard_ttl": self.hard_ttl,
+                "loading": len(self._loading),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+            }
+
+recommendation_cache = RecommendationCache(
+    settings.RECOMMENDATION_CACHE_SOFT_TTL,
+    settings.RECOMMENDATION_CACHE_HARD_TTL,
+    settings.RECOMMENDATION_CACHE_MAX_ENTRIES
+)
+
+def _fallback_recommended_paths(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    """AI推荐失败时，从数据库取用户未注册的路径"""
+    enrolled_path_ids = db.query(PathEnrollment.path_id).filter(PathEnrollment.user_id == user_id)
+    paths = (
+        db.query(LearningPath)
+        .filter(LearningPath.id.notin_(enrolled_path_ids))
+        .limit(5)
+        .all()
+    )
+    return [
+        {
+            "id": path.id,
+            "title": path.title,
+            "description": path.description,
+            "subject": path.subject,
+            "difficulty_level": path.difficulty_level,
+            "estimated_hours": path.estimated_hours,
+            "created_at": path.created_at,
+            "content_count": path.content_count,
+            "total_estimated_minutes": path.total_estimated_minutes,
+            "enrollment_count": path.enrollment_count,
+            "completion_count": path.completion_count
+        }
+        for path in paths
+    ]
+
+async def compute_recommended_paths(db: Session, user_id: int) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+    """调用AI服务生成推荐路径，失败时回退到数据库查询
+
+    返回 (推荐列表, 软TTL)：AI结果使用缓存默认的软TTL（None），数据库回退使用 RECOMMENDATION_FALLBACK_TTL。
+    """
+    try:
+        recommendations = await get_ai_service().generate_content_recommendations(user_id, limit=5)
+        return [
+            {
+                "id": rec["content"]["id"],
+                "title": rec["content"]["title"],
+                "description": rec["explanation"],
+                "subject": "programming",  # 可以根据内容类型设置
+                "difficulty_level": 2,  # 可以从match_score推断
+                "estimated_hours": 20,
+                "created_at": None,
+                "content_count": 5,
+                "recommendation_reason": rec["approach_suggestion"]
+            }
+            for rec in recommendations
+        ], None
+    except Exception as e:
+        logger.error("AI推荐生成失败: %s", e)
+        return _fallback_recommended_paths(db, user_id), settings.RECOMMENDATION_FALLBACK_TTL
+
+async def get_recommended_paths(db: Session, user_id: int, allow_compute: bool = True) -> List[Dict[str, Any]]:
+    """通过缓存获取用户的推荐路径
+
+    allow_compute 为False时（服务过载降级）不调用AI服务：返回缓存的推荐，即使已过期；没有缓存时查询数据库。
+    """
+    if not allow_compute:
+        cached = recommendation_cache.peek(user_id)
+        return cached if cached is not None else _fallback_recommended_paths(db, user_id)
+
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+
+    async def load() -> Tuple[List[Dict[str, Any]], Optional[float]]:
+        # 计算可能在请求结束后仍在后台进行，使用独立的会话
+        with session_factory() as session:
+            recommendations, soft_ttl = await compute_recommended_paths(session, user_id)
+        # 新的推荐结果推送给正在浏览的页面
+        publish_recommendations(user_id, recommendations)
+        return recommendations, soft_ttl
+
+    return await recommendation_cache.get(user_id, load)
+
+# 用户的学习风格、偏好或注册路径变化后，推荐需要重新计算
+_CHANGED_USERS_KEY = "recommendation_cache_changed_ids"
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = {
+        obj.id for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    # 注册记录的进度更新很频繁且不影响推荐，只关心新增和删除
+    changed.update(
+        obj.user_id for obj in chain(session.new, session.deleted)
+        if isinstance(obj, PathEnrollment) and obj.user_id is not None
+    )
+    if changed:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).update(changed)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    changed = session.info.pop(_CHANGED_USERS_KEY, None)
+    if changed:
+        recommendation_cache.invalidate(changed)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop(_CHANGED_USERS_KEY, None)
@@ -9,6 +9,7 @@ from app.models.user import User
 from app.core.config import settings
 from app.schemas.content import Content, RecommendationItem
 from app.services.ai_service import AIService
+from app.services.read_models import list_recommendation_candidates, load_content_details, load_content_tags
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -55,24 +56,15 @@ class RecommendationService:
         # 合并排除ID列表
         exclude_content_ids = list(set(viewed_content_ids + (exclude_ids or [])))
         
-        # 查询可能的推荐内容
-        query = db.query(LearningContent)
-        
-        # 应用过滤条件
-        if subject:
-            query = query.filter(LearningContent.subject == subject)
-        if content_type:
-            query = query.filter(LearningContent.content_type == content_type)
-        if difficulty_range:
-            query = query.filter(
-                LearningContent.difficulty_level >= difficulty_range[0],
-                LearningContent.difficulty_level <= difficulty_range[1]
-            )
-        if exclude_content_ids:
-            query = query.filter(LearningContent.id.notin_(exclude_content_ids))
-        
-        # 获取可能的推荐内容
-        potential_contents = query.limit(50).all()  # 获取多一些内容供AI选择
+        # 查询可能的推荐内容，只读取打分需要的列（获取多一些内容供AI选择）
+        potential_contents = list_recommendation_candidates(
+            db,
+            subject=subject,
+            content_type=content_type,
+            difficulty_range=difficulty_range,
+            exclude_ids=exclude_content_ids,
+            limit=50
+        )
         
         if not potential_contents:
             # 如果没有找到可能的内容，返回空结果
@@ -89,9 +81,10 @@ class RecommendationService:
             }
         
         # 准备AI分析的内容数据
+        tags_by_content = load_content_tags(db, [content.id for content in potential_contents])
         content_data = []
         for content in potential_contents:
-            content_tags = [tag.name for tag in content.tags]
+            content_tags = [tag.name for tag in tags_by_content.get(content.id, [])]
             content_data.append({
                 "id": content.id,
                 "title": content.title,
@@ -114,12 +107,17 @@ class RecommendationService:
             limit=limit
         )
         
-        # 处理推荐结果
+        # 处理推荐结果：只为最终选中的内容读取详情（含较大的JSON列）
+        candidate_ids = {content.id for content in potential_contents}
+        contents_by_id = load_content_details(
+            db,
+            [rec.get("content_id") for rec in ai_recommendations if rec.get("content_id") in candidate_ids]
+        )
         recommendations = []
         for rec in ai_recommendations:
             # 查找对应的完整内容对象
             content_id = rec.get("content_id")
-            content = next((c for c in potential_contents if c.id == content_id), None)
+            content = contents_by_id.get(content_id)
             
             if content:
                 content_dict = {
@@ -139,7 +137,10 @@ class RecommendationService:
                     "created_at": content.created_at,
                     "updated_at": content.updated_at,
                     "is_premium": content.is_premium,
-                    "tags": [{"id": tag.id, "name": tag.name, "description": tag.description} for tag in content.tags]
+                    "tags": [
+                        {"id": tag.id, "name": tag.name, "description": tag.description}
+                        for tag in tags_by_content.get(content.id, [])
+                    ]
                 }
                 
                 recommendations.append({
@@ -0,0 +1,156 @@
+"""
+用户存在性与资料快照缓存
+
+几乎每个接口都要先确认用户存在，部分接口还需要学习风格和偏好。用户行只在提交评估或修改资料时变化，
+因此在进程内按用户ID缓存一个只读快照（包括"用户不存在"的结果），带TTL和LRU上限。
+会话提交时，本次事务中新增、修改或删除的用户会从缓存中移除（见文件末尾的会话事件监听）。
+需要修改用户时仍应通过ORM查询User对象，快照只用于读取。
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.user import User
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """用户的只读快照，属性名与User模型一致"""
+    id: int
+    email: Optional[str]
+    full_name: Optional[str]
+    is_active: Optional[bool]
+    learning_style: Optional[Dict[str, Any]]
+    preferences: Optional[Dict[str, Any]]
+
+SNAPSHOT_COLUMNS = (User.id, User.email, User.full_name, User.is_active, User.learning_style, User.preferences)
+
+# 缓存中没有该用户（区别于缓存了"用户不存在"）
+MISSING = object()
+
+class UserCache:
+    """带TTL的LRU缓存，线程安全"""
+
+    def __init__(self, max_entries: int, ttl: float, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[int, Tuple[float, Optional[UserSnapshot]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每次失效递增；读库期间发生过失效的结果不写入缓存，避免把旧数据放回去
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def get(self, user_id: int):
+        """返回快照、None（用户不存在）或 MISSING"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: int, snapshot: Optional[UserSnapshot], epoch: int) -> None:
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._epoch += 1
+            for user_id in user_ids:
+                if self._entries.pop(user_id, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    @contextmanager
+    def bypassed(self) -> Iterator[None]:
+        """在代码块内跳过缓存，直接查询数据库"""
+        enabled, self.enabled = self.enabled, False
+        try:
+            yield
+        finally:
+            self.enabled = enabled
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+user_cache = UserCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL, settings.USER_CACHE_ENABLED)
+
+def _load_snapshot(db: Session, user_id: int) -> Optional[UserSnapshot]:
+    row = db.execute(select(*SNAPSHOT_COLUMNS).where(User.id == user_id)).first()
+    return UserSnapshot(*row) if row else None
+
+def get_user_snapshot(db: Session, user_id: int) -> Optional[UserSnapshot]:
+    """获取用户快照，用户不存在时返回None"""
+    if not user_cache.enabled:
+        return _load_snapshot(db, user_id)
+    cached = user_cache.get(user_id)
+    if cached is not MISSING:
+        return cached
+    epoch = user_cache.epoch
+    snapshot = _load_snapshot(db, user_id)
+    user_cache.put(user_id, snapshot, epoch)
+    return snapshot
+
+def user_exists(db: Session, user_id: int) -> bool:
+    return get_user_snapshot(db, user_id) is not None
+
+# 会话提交或回滚时使本次事务中写过的用户失效
+_CHANGED_USERS_KEY = "user_cache_changed_ids"
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = {
+        obj.id for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    if changed:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).update(changed)
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_changed_users(session):
+    changed = session.info.pop(_CHANGED_USERS_KEY, None)
+    if changed:
+        user_cache.invalidate(changed)
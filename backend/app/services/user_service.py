@@ -1,7 +1,9 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.db.session import get_db
+from app.services.read_models import HISTORY_FIELDS, list_user_history
+from app.utils.pagination import InvalidCursorError
 
 async def get_user_by_id(user_id: int, db: Session = None) -> Optional[User]:
     """根据ID获取用户"""
@@ -42,8 +44,14 @@ async def update_user_learning_style(user_id: int, learning_style: Dict[str, Any
         if close_db:
             db.close()
 
-async def get_user_learning_history(user_id: int, db: Session = None) -> List[Dict[str, Any]]:
-    """获取用户的学习历史"""
+async def get_user_learning_history(
+    user_id: int,
+    db: Session = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """按时间倒序分页获取用户的学习历史，返回 (本页记录, 下一页游标)；fields 为空时返回全部字段"""
     if db is None:
         db_generator = get_db()
         db = next(db_generator)
@@ -52,38 +60,13 @@ async def get_user_learning_history(user_id: int, db: Session = None) -> List[Di
         close_db = False
     
     try:
-        # 获取用户内容交互记录
-        from app.models.content import UserContentInteraction, LearningContent
-        
-        interactions = (
-            db.query(
-                UserContentInteraction, 
-                LearningContent.title, 
-                LearningContent.content_type
-            )
-            .join(LearningContent)
-            .filter(UserContentInteraction.user_id == user_id)
-            .order_by(UserContentInteraction.created_at.desc())
-            .all()
-        )
-        
-        history = []
-        for interaction, title, content_type in interactions:
-            history.append({
-                "content_id": interaction.content_id,
-                "title": title,
-                "content_type": content_type,
-                "interaction_type": interaction.interaction_type,
-                "progress": interaction.progress,
-                "rating": interaction.rating,
-                "time_spent": interaction.time_spent,
-                "created_at": interaction.created_at
-            })
-        
-        return history
+        # 只查询需要返回的列，不构造交互记录实体
+        return list_user_history(db, user_id, fields or HISTORY_FIELDS, limit=limit, cursor=cursor)
+    except InvalidCursorError:
+        raise
     except Exception as e:
         print(f"获取用户历史记录错误: {str(e)}")
-        return []  # 返回空列表而不是None
+        return [], None  # 返回空列表而不是None
     finally:
         if close_db:
             db.close()
@@ -94,7 +77,10 @@ async def record_user_progress(
     progress_data: Dict[str, Any],
     db: Session = None
 ) -> bool:
-    """记录用户的学习进度"""
+    """记录用户的学习进度
+
+    只在请求内追加学习事件，交互记录由后台任务 run_event_pipeline 投影，最多滞后一个 EVENT_FLUSH_INTERVAL。
+    """
     if db is None:
         db_generator = get_db()
         db = next(db_generator)
@@ -103,7 +89,7 @@ async def record_user_progress(
         close_db = False
     
     try:
-        from app.models.content import UserContentInteraction, LearningContent
+        from app.models.content import LearningContent
         
         # 检查内容是否存在
         content = db.query(LearningContent).filter(LearningContent.id == content_id).first()
@@ -111,43 +97,27 @@ async def record_user_progress(
             print(f"内容ID {content_id} 不存在")
             return False
         
-        # 获取现有交互记录，如果有的话
-        interaction = (
-            db.query(UserContentInteraction)
-            .filter(
-                UserContentInteraction.user_id == user_id,
-                UserContentInteraction.content_id == content_id
-            )
-            .first()
-        )
-        
         # 解析进度数据
         progress = progress_data.get("progress", 0)
         time_spent = progress_data.get("time_spent", 0)
         rating = progress_data.get("rating")
         completed = progress_data.get("completed", False)
         
-        if interaction:
-            # 更新现有记录
-            interaction.progress = max(interaction.progress, progress)
-            interaction.time_spent = (interaction.time_spent or 0) + time_spent
-            if rating is not None:
-                interaction.rating = rating
-            interaction.completed = completed or interaction.completed
-            
-        else:
-            # 创建新记录
-            interaction = UserContentInteraction(
-                user_id=user_id,
-                content_id=content_id,
-                interaction_type="view",
-                progress=progress,
-                time_spent=time_spent,
-                rating=rating,
-                completed=completed
-            )
-            db.add(interaction)
-        
+        # 只追加事件，交互记录由后台投影维护，不在请求中执行投影
+        from app.services.learning_event_service import (
+            EVENT_COMPLETE, EVENT_PROGRESS, EVENT_RATING, EVENT_STUDY_TIME,
+            append_events
+        )
+        events = [{"event_type": EVENT_PROGRESS, "value": progress}]
+        if time_spent:
+            events.append({"event_type": EVENT_STUDY_TIME, "value": time_spent})
+        if rating is not None:
+            events.append({"event_type": EVENT_RATING, "value": rating})
+        if completed:
+            events.append({"event_type": EVENT_COMPLETE})
+        append_events(db, [
+            {"user_id": user_id, "content_id": content_id, **event} for event in events
+        ])
         db.commit()
         return True
     
@@ -170,43 +140,18 @@ async def get_user_activity_summary(user_id: int, db: Session = None) -> Dict[st
         close_db = False
     
     try:
-        from app.models.content import UserContentInteraction
-        from sqlalchemy import func
-        
-        # 获取总学习时间
-        total_time_result = (
-            db.query(func.sum(UserContentInteraction.time_spent))
-            .filter(UserContentInteraction.user_id == user_id)
-            .first()
-        )
-        total_time = total_time_result[0] if total_time_result[0] else 0
+        from app.services.activity_summary_service import get_activity_summary
         
-        # 获取完成的内容数量
-        completed_count = (
-            db.query(func.count())
-            .filter(
-                UserContentInteraction.user_id == user_id,
-                UserContentInteraction.completed == True
-            )
-            .scalar()
-        )
-        
-        # 获取平均进度
-        avg_progress_result = (
-            db.query(func.avg(UserContentInteraction.progress))
-            .filter(UserContentInteraction.user_id == user_id)
-            .first()
-        )
-        avg_progress = avg_progress_result[0] if avg_progress_result[0] else 0
+        # 汇总数据随写入增量维护，这里只按主键读取一行
+        summary = get_activity_summary(db, user_id)
         
         # 获取最近的活动
-        recent_activities = await get_user_learning_history(user_id, db=db)
-        recent_activities = recent_activities[:5]  # 只返回最近5条
+        recent_activities, _ = await get_user_learning_history(user_id, db=db, limit=5)  # 只返回最近5条
         
         return {
-            "total_study_time": total_time,
-            "completed_contents": completed_count,
-            "average_progress": avg_progress,
+            "total_study_time": summary.total_time_spent if summary else 0,
+            "completed_contents": summary.completed_contents if summary else 0,
+            "average_progress": summary.average_progress if summary else 0,
             "recent_activities": recent_activities
         }
         
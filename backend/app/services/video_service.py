@@ -1,7 +1,6 @@
 import logging
 import json
 import os
-import httpx
 from typing import Dict, List, Optional
 import asyncio
 from ..models.learning_path import VideoSearchRequest, VideoSearchResponse, Video
@@ -70,14 +69,14 @@ async def search_videos(search_request: VideoSearchRequest) -> VideoSearchRespon
     query = search_request.query.lower()
     max_results = search_request.max_results
     
-    logger.info(f"搜索视频: 查询={query}, 最大结果={max_results}")
+    logger.info("搜索视频: 查询=%s, 最大结果=%s", query, max_results)
     
     # 如果有YouTube API密钥，使用真实API
     if YOUTUBE_API_KEY:
         try:
             return await search_youtube_videos(search_request)
         except Exception as e:
-            logger.error(f"YouTube API调用失败: {str(e)}，使用模拟数据")
+            logger.error("YouTube API调用失败: %s，使用模拟数据", e)
     
     # 否则使用模拟数据
     logger.info("使用模拟视频数据")
@@ -103,6 +102,9 @@ async def search_videos(search_request: VideoSearchRequest) -> VideoSearchRespon
 
 async def search_youtube_videos(search_request: VideoSearchRequest) -> VideoSearchResponse:
     """使用YouTube API搜索视频"""
+    # httpx 只在调用YouTube API时需要，延迟导入以缩短应用的导入时间
+    import httpx
+    
     if not YOUTUBE_API_KEY:
         raise ValueError("未设置YouTube API密钥")
     
@@ -14,19 +14,19 @@ class ErrorTracker:
         error_id = id(error)  # 生成唯一错误ID用于引用
         
         # 记录错误详情
-        logger.error(f"[ERROR-{error_id}] 请求 '{endpoint}' 失败")
+        logger.error("[ERROR-%s] 请求 '%s' 失败", error_id, endpoint)
         
         try:
             # 尝试序列化请求数据
             request_str = json.dumps(request_data, ensure_ascii=False)
-            logger.error(f"[ERROR-{error_id}] 请求数据: {request_str[:500]}")
+            logger.error("[ERROR-%s] 请求数据: %s", error_id, request_str[:500])
         except:
-            logger.error(f"[ERROR-{error_id}] 请求数据无法序列化")
+            logger.error("[ERROR-%s] 请求数据无法序列化", error_id)
         
         # 记录异常栈
-        logger.error(f"[ERROR-{error_id}] 异常类型: {type(error).__name__}")
-        logger.error(f"[ERROR-{error_id}] 异常信息: {str(error)}")
-        logger.error(f"[ERROR-{error_id}] 异常栈:\n{traceback.format_exc()}")
+        logger.error("[ERROR-%s] 异常类型: %s", error_id, type(error).__name__)
+        logger.error("[ERROR-%s] 异常信息: %s", error_id, error)
+        logger.error("[ERROR-%s] 异常栈:\n%s", error_id, traceback.format_exc())
         
         # 返回诊断信息
         return {
@@ -0,0 +1,64 @@
+"""
+稀疏字段集(fields=)与关联展开(include=)
+
+不传参数时接口返回原有的完整结构；传 fields=id,title 时只返回这些字段，
+传 include=tags,resources,progress 时才附带对应的关联数据。
+解析结果直接决定SQL中查询哪些列、是否执行关联查询，未请求的列不会被读取，也不会被序列化。
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Sequence, Tuple
+
+class InvalidFieldsetError(ValueError):
+    """fields 或 include 中包含接口不支持的名称"""
+
+def parse_names(value: Optional[str], allowed: Sequence[str], param: str) -> Optional[Tuple[str, ...]]:
+    """解析逗号分隔的名称列表，保持顺序并去重；未传参数时返回None"""
+    if value is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise InvalidFieldsetError(
+            f"{param} 包含不支持的名称: {', '.join(unknown)}（可选: {', '.join(allowed)}）"
+        )
+    return names
+
+@dataclass(frozen=True)
+class Fieldset:
+    fields: Tuple[str, ...]  # 需要返回的字段，按接口默认顺序排列
+    include: FrozenSet[str]  # 需要展开的关联
+
+    def wants(self, name: str) -> bool:
+        return name in self.include
+
+    def pick(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """从完整结构中取出请求的字段，用于数据本身已缓存、只需裁剪的接口"""
+        return {name: payload[name] for name in self.fields if name in payload}
+
+def resolve_fieldset(
+    fields: Optional[str],
+    include: Optional[str],
+    allowed_fields: Sequence[str],
+    allowed_include: Iterable[str] = (),
+    default_include: Iterable[str] = (),
+    always: Sequence[str] = ("id",)
+) -> Fieldset:
+    """解析 fields/include 查询参数
+
+    未传 fields 时返回全部字段；传了 fields 时总会带上 always 中的字段（通常是主键）。
+    未传 include 时，若也未传 fields 则使用 default_include，保持原有响应结构不变；
+    传了 fields 就只展开 include 中明确列出的关联。
+    """
+    allowed_include = tuple(allowed_include)
+    selected = parse_names(fields, allowed_fields, "fields")
+    expansions = parse_names(include, allowed_include, "include")
+    if selected is None:
+        selected = tuple(allowed_fields)
+    else:
+        requested = set(selected) | set(always)
+        selected = tuple(name for name in allowed_fields if name in requested)
+        if expansions is None:
+            expansions = ()
+    if expansions is None:
+        expansions = tuple(default_include)
+    return Fieldset(fields=selected, include=frozenset(expansions))
@@ -0,0 +1,90 @@
+"""
+基于键集(keyset)的游标分页
+
+按 (created_at, id) 这类唯一且有序的键分页，查询条件直接落在索引上，
+翻到第N页的开销与第一页相同；游标对客户端是不透明的字符串。
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import Select, String, and_, literal, or_, type_coerce
+from sqlalchemy.orm import Query, Session
+
+# 响应中返回下一页游标的HTTP头
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursorError(ValueError):
+    """游标无法解析或与当前排序键不匹配"""
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """将排序键的值编码为不透明游标"""
+    payload = [
+        value.isoformat() if isinstance(value, (datetime, date)) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, key_count: int) -> List[Any]:
+    """解析游标，返回排序键的值列表"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}") from e
+    if not isinstance(values, list) or len(values) != key_count:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}")
+    return values
+
+def _after(keys: Sequence[Any], values: Sequence[Any], descending: bool):
+    """构造 (k1, k2, ...) 严格位于 (v1, v2, ...) 之后的条件
+
+    展开为 k1 < v1 OR (k1 = v1 AND k2 < v2) ... 的形式，各数据库都能用上复合索引。
+    """
+    clauses = []
+    for i, key in enumerate(keys):
+        value = literal(values[i])
+        step = key < value if descending else key > value
+        clauses.append(and_(*[keys[j] == literal(values[j]) for j in range(i)], step))
+    return or_(*clauses)
+
+def paginate_keyset(
+    query: Union[Query, Select],
+    keys: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    descending: bool = True,
+    session: Optional[Session] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """对查询做键集分页，返回 (本页结果, 下一页游标)
+
+    keys 必须能唯一确定一行（最后一个键通常是主键）。多取一行判断是否还有下一页，
+    没有下一页时游标为None。排序键按数据库中的原始值取出并写入游标，
+    避免日期时间在Python与数据库之间往返时格式不一致（如SQLite的文本时间戳）。
+    query 也可以是Core的 select()，此时需要传入 session 执行。
+    """
+    key_count = len(keys)
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, key_count), descending))
+
+    raw_keys = [type_coerce(key, String).label(f"_cursor_key_{i}") for i, key in enumerate(keys)]
+    query = (
+        query.add_columns(*raw_keys)
+        .order_by(*[key.desc() if descending else key.asc() for key in keys])
+        .limit(limit + 1)
+    )
+    if isinstance(query, Select):
+        if session is None:
+            raise ValueError("分页Core查询需要提供session")
+        rows = session.execute(query).all()
+    else:
+        rows = query.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-key_count:])
+
+    items = [row[0] if len(row) == key_count + 1 else tuple(row[:-key_count]) for row in rows]
+    return items, next_cursor
@@ -0,0 +1,15 @@
+"""
+默认的JSON响应类
+
+使用orjson编码响应体，比标准库json快数倍。路由声明了具体的 response_model 时，
+FastAPI 由 pydantic-core 直接把返回值转为JSON兼容的数据，再由这里一次编码。
+"""
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+class APIJSONResponse(ORJSONResponse):
+    """允许非字符串的字典键（如以内容ID为键的进度映射），与标准库json的行为一致"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
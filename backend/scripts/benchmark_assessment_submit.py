@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+评估提交基准测试
+
+在临时SQLite库中填充题库，分别提交包含 10 到 500 个回答的评估，报告每次提交的耗时中位数和SQL查询数。
+题目通过进程内题库一次取出、回答批量插入，查询数不随回答数增长；
+500个回答与10个回答的耗时比超出 --max-ratio 时以非零状态码退出。
+
+用法: python scripts/benchmark_assessment_submit.py [--runs 20] [--max-ratio 4.0]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base, get_db
+from app.db.query_counter import count_engine_queries
+import app.models.content
+import app.models.content_interaction
+import app.models.learning_path
+import app.models.system_marker
+import app.models.user_activity_summary
+import app.models.interaction_rollup
+import app.models.learning_event
+from app.models.learning_assessment import AssessmentQuestion
+from app.models.user import User
+from app.api.v1.endpoints import assessment as assessment_v1
+
+RESPONSE_COUNTS = (10, 50, 100, 250, 500)
+CATEGORIES = ("visual", "auditory", "kinesthetic", "reading")
+
+def seed(session_factory, questions: int) -> int:
+    """填充题库和一个用户，返回用户ID"""
+    with session_factory() as db:
+        user = User(email="benchmark@example.com", full_name="Benchmark User")
+        db.add(user)
+        db.add_all([
+            AssessmentQuestion(question_text=f"问题{i}", question_type="scale", category=CATEGORIES[i % 4])
+            for i in range(questions)
+        ])
+        db.commit()
+        return user.id
+
+def build_client(session_factory) -> TestClient:
+    app = FastAPI()
+    app.include_router(assessment_v1.router, prefix="/api/v1/assessment")
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+def submission(user_id: int, count: int) -> dict:
+    return {
+        "user_id": user_id,
+        "responses": [
+            {"question_id": i + 1, "response_value": {"value": i % 5 + 1}, "response_time": 2.0}
+            for i in range(count)
+        ]
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="评估提交基准测试")
+    parser.add_argument("--runs", type=int, default=20, help="每种回答数的重复次数")
+    parser.add_argument("--max-ratio", type=float, default=4.0, help="500个与10个回答的耗时比上限")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'submit.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        user_id = seed(session_factory, max(RESPONSE_COUNTS))
+
+        with build_client(session_factory) as client:
+            # 预热：加载题库并写入一次学习风格
+            client.post("/api/v1/assessment/submit", json=submission(user_id, 1)).raise_for_status()
+            for count in RESPONSE_COUNTS:
+                payload = submission(user_id, count)
+                timings = []
+                for _ in range(args.runs):
+                    with count_engine_queries(engine) as stats:
+                        start = time.perf_counter()
+                        client.post("/api/v1/assessment/submit", json=payload).raise_for_status()
+                        timings.append(time.perf_counter() - start)
+                results[count] = (statistics.median(timings) * 1000, stats.count)
+        engine.dispose()
+
+    print("=" * 50)
+    print("评估提交基准测试")
+    print(f"每种回答数重复 {args.runs} 次")
+    print("=" * 50)
+    for count, (median_ms, queries) in results.items():
+        print(f"{count:>4} 个回答:  中位数 {median_ms:7.2f}ms  查询 {queries} 条")
+
+    ratio = results[RESPONSE_COUNTS[-1]][0] / results[RESPONSE_COUNTS[0]][0]
+    if ratio > args.max_ratio:
+        print(f"\n❌ 耗时随回答数增长过快: {ratio:.1f}x > {args.max_ratio:.1f}x")
+        return 1
+    print(f"\n✓ {RESPONSE_COUNTS[-1]} 与 {RESPONSE_COUNTS[0]} 个回答的耗时比 {ratio:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+监控指标开销基准测试
+
+1. 记录开销: 直接调用 observe_http_request（请求数、耗时直方图、SQL查询数和耗时）以及执行中请求数的增减，
+   报告每个请求增加的耗时；
+2. 端到端: 同一个最小的FastAPI应用，中间件分别关闭和开启指标记录，通过ASGI直接调用，
+   报告每个请求耗时的中位数和差值；
+3. 抓取: 按给定的路由数填充指标后，报告一次 /metrics 输出的耗时和大小。
+
+用法: python scripts/benchmark_metrics.py [--runs 2000] [--routes 50]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import httpx
+from fastapi import FastAPI, Request
+
+from app.core.config import settings
+from app.db.query_counter import QueryStats, count_queries
+from app.services.metrics import http_requests_in_flight, metrics_registry, observe_http_request
+
+def fake_request(route_path: str) -> SimpleNamespace:
+    """只包含 observe_http_request 读取的属性"""
+    return SimpleNamespace(method="GET", scope={"route": SimpleNamespace(path=route_path)})
+
+def measure_record(runs: int) -> float:
+    """每个请求的记录开销(纳秒)"""
+    request = fake_request("/api/v1/users/{user_id}")
+    query_stats = QueryStats()
+    query_stats.count, query_stats.total_time = 3, 0.002
+    start = time.perf_counter_ns()
+    for i in range(runs):
+        http_requests_in_flight.inc()
+        observe_http_request(request, 200, 0.001 * (i % 50), query_stats)
+        http_requests_in_flight.dec()
+    return (time.perf_counter_ns() - start) / runs
+
+def build_app() -> FastAPI:
+    """与 app.main 的 add_request_id 相同的计时和查询统计，指标记录由 METRICS_ENABLED 控制"""
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def timing(request: Request, call_next):
+        start_time = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            with count_queries() as query_stats:
+                response = await call_next(request)
+            observe_http_request(request, response.status_code, time.perf_counter() - start_time, query_stats)
+            return response
+        finally:
+            http_requests_in_flight.dec()
+
+    @app.get("/api/v1/users/{user_id}")
+    async def read_user(user_id: int):
+        return {"id": user_id, "email": "bench@example.com"}
+
+    return app
+
+def measure_requests(app: FastAPI, runs: int, enabled: bool) -> float:
+    """每个请求耗时的中位数(微秒)"""
+    settings.METRICS_ENABLED = enabled
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for i in range(50):
+                await client.get(f"/api/v1/users/{i}")
+            timings = []
+            for i in range(runs):
+                start = time.perf_counter()
+                await client.get(f"/api/v1/users/{i}")
+                timings.append(time.perf_counter() - start)
+            return timings
+
+    return statistics.median(asyncio.run(run())) * 1_000_000
+
+def measure_render(routes: int) -> tuple:
+    """填充指标后一次输出的耗时(毫秒)和大小(KB)"""
+    query_stats = QueryStats()
+    for i in range(routes):
+        for status in (200, 404, 500):
+            observe_http_request(fake_request(f"/api/v1/route{i}/{{id}}"), status, 0.01, query_stats)
+    # 第一次输出时采集函数才导入各缓存模块，不计入耗时
+    metrics_registry.render()
+    start = time.perf_counter()
+    text = metrics_registry.render()
+    return (time.perf_counter() - start) * 1000, len(text.encode()) / 1024
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="监控指标开销基准测试")
+    parser.add_argument("--runs", type=int, default=2000, help="请求次数")
+    parser.add_argument("--routes", type=int, default=50, help="抓取测试中的路由数")
+    args = parser.parse_args()
+    enabled = settings.METRICS_ENABLED
+
+    print("=" * 72)
+    print("监控指标开销基准测试")
+    print("=" * 72)
+
+    settings.METRICS_ENABLED = True
+    record_ns = measure_record(args.runs * 10)
+    print(f"记录开销: {record_ns / 1000:.2f} 微秒/请求")
+
+    app = build_app()
+    # 关闭和开启交替执行两轮，各取较快的一轮，减少预热和系统抖动的影响
+    rounds = [(measure_requests(app, args.runs, False), measure_requests(app, args.runs, True)) for _ in range(2)]
+    disabled_us = min(disabled for disabled, _ in rounds)
+    enabled_us = min(enabled for _, enabled in rounds)
+    overhead = enabled_us - disabled_us
+    print(f"端到端(中位数): 关闭 {disabled_us:.1f} 微秒, 开启 {enabled_us:.1f} 微秒, "
+          f"差值 {overhead:.1f} 微秒 ({overhead / disabled_us * 100:.1f}%)")
+
+    metrics_registry.clear()
+    settings.METRICS_ENABLED = True
+    render_ms, size_kb = measure_render(args.routes)
+    print(f"抓取: {args.routes} 个路由 x 3 个状态码, 输出 {size_kb:.1f} KB, 耗时 {render_ms:.2f} 毫秒")
+
+    settings.METRICS_ENABLED = enabled
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
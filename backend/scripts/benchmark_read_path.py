@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+读路径基准测试
+
+在临时SQLite库中填充带较大 content_data/resources 的内容，对比两种读取内容列表的方式:
+1. ORM实体: 查询完整的 LearningContent 实体（包含全部JSON列）并预加载标签
+2. 列投影: read_models.list_content_fields 只查询列表需要的列，标签一次查询取出
+
+报告每次请求的CPU时间(time.process_time)和内存分配峰值(tracemalloc)。
+
+用法: python scripts/benchmark_read_path.py [--contents 2000] [--limit 100] [--payload-kb 8] [--runs 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, selectinload, undefer
+
+from app.db.session import Base
+import app.models.user
+import app.models.content_interaction
+import app.models.learning_assessment
+import app.models.learning_path
+import app.models.system_marker
+import app.models.user_activity_summary
+import app.models.interaction_rollup
+import app.models.learning_event
+from app.models.content import LearningContent, ContentTag
+from app.services.read_models import CONTENT_LIST_FIELDS, list_content_fields, load_content_tags
+from app.utils.pagination import paginate_keyset
+
+def seed(session_factory, contents: int, payload_kb: int) -> None:
+    """填充内容和标签，每条内容带约 payload_kb KB 的JSON"""
+    body = "x" * (payload_kb * 1024)
+    with session_factory() as db:
+        tags = [ContentTag(name=f"tag{i}") for i in range(20)]
+        db.add_all(tags)
+        for i in range(contents):
+            content = LearningContent(
+                title=f"内容{i}",
+                content_type="article",
+                subject="python",
+                difficulty_level=i % 5 + 1,
+                content_data={"body": body},
+                resources=[{"type": "link", "url": f"https://example.com/{i}", "note": body[:256]}]
+            )
+            content.tags.extend(tags[i % 20:i % 20 + 3])
+            db.add(content)
+        db.commit()
+
+def read_orm(db, limit: int) -> list:
+    """原有方式：完整实体 + 预加载标签"""
+    contents, _ = paginate_keyset(
+        db.query(LearningContent).options(
+            selectinload(LearningContent.tags),
+            undefer(LearningContent.content_data),
+            undefer(LearningContent.resources)
+        ),
+        [LearningContent.created_at, LearningContent.id],
+        limit=limit
+    )
+    return [(content.id, content.title, [tag.name for tag in content.tags]) for content in contents]
+
+def read_projection(db, limit: int) -> list:
+    """列投影方式"""
+    contents, _ = list_content_fields(db, CONTENT_LIST_FIELDS, limit=limit)
+    tags = load_content_tags(db, [content["id"] for content in contents])
+    return [
+        (content["id"], content["title"], [tag.name for tag in tags.get(content["id"], [])])
+        for content in contents
+    ]
+
+def measure(session_factory, reader, limit: int, runs: int) -> dict:
+    """每次请求使用新会话，分别测量CPU时间和分配峰值"""
+    cpu_times = []
+    peaks = []
+    for _ in range(runs):
+        with session_factory() as db:
+            start = time.process_time()
+            reader(db, limit)
+            cpu_times.append(time.process_time() - start)
+        with session_factory() as db:
+            tracemalloc.start()
+            reader(db, limit)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return {"cpu_ms": statistics.median(cpu_times) * 1000, "peak_kb": statistics.median(peaks) / 1024}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="读路径基准测试")
+    parser.add_argument("--contents", type=int, default=2000, help="填充的内容数量")
+    parser.add_argument("--limit", type=int, default=100, help="每页条数")
+    parser.add_argument("--payload-kb", type=int, default=8, help="每条内容JSON的大小(KB)")
+    parser.add_argument("--runs", type=int, default=50, help="重复次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'read_path.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        seed(session_factory, args.contents, args.payload_kb)
+
+        # 预热，排除首次编译SQL的开销
+        for reader in (read_orm, read_projection):
+            with session_factory() as db:
+                assert len(reader(db, args.limit)) == min(args.limit, args.contents)
+
+        orm = measure(session_factory, read_orm, args.limit, args.runs)
+        projection = measure(session_factory, read_projection, args.limit, args.runs)
+        engine.dispose()
+
+    print("=" * 50)
+    print("读路径基准测试")
+    print(f"内容 {args.contents} 条，每页 {args.limit} 条，JSON约 {args.payload_kb}KB/条，重复 {args.runs} 次")
+    print("=" * 50)
+    print(f"ORM实体:  CPU 中位数 {orm['cpu_ms']:.2f}ms  分配峰值 {orm['peak_kb']:.1f}KB")
+    print(f"列投影:   CPU 中位数 {projection['cpu_ms']:.2f}ms  分配峰值 {projection['peak_kb']:.1f}KB")
+    if projection["cpu_ms"] > 0 and projection["peak_kb"] > 0:
+        print(f"\nCPU {orm['cpu_ms'] / projection['cpu_ms']:.1f}x，内存 {orm['peak_kb'] / projection['peak_kb']:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
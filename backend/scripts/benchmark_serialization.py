@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+响应序列化基准测试
+
+对热点接口的典型响应，分别按原有方式和当前方式走一遍FastAPI的响应处理:
+1. 原有: response_model=Dict[str, Any]（或未声明）+ jsonable_encoder + 标准库json的JSONResponse
+2. 当前: 具体的pydantic响应模型（exclude_unset）+ orjson的 APIJSONResponse
+
+两种方式输出的JSON先做一致性校验，再报告每次序列化的耗时中位数。
+
+用法: python scripts/benchmark_serialization.py [--runs 200] [--items 100]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加项目根目录到Python路径
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.schemas.content import ContentDetailResponse, ContentListItemResponse
+from app.schemas.learning_path import PathDetailResponse, PathProgressResponse
+from app.schemas.user import UserHistoryItem
+from app.utils.responses import APIJSONResponse
+
+NOW = datetime(2024, 1, 1, 8, 30)
+
+def content_item(i: int) -> Dict[str, Any]:
+    return {
+        "id": i,
+        "title": f"内容{i}",
+        "description": "一段用于列表展示的内容简介" * 3,
+        "content_type": "video",
+        "subject": "python",
+        "difficulty_level": i % 5 + 1,
+        "content_url": f"https://example.com/content/{i}",
+        "visual_affinity": 0.4,
+        "auditory_affinity": 0.3,
+        "kinesthetic_affinity": 0.2,
+        "reading_affinity": 0.1,
+        "tags": ["python", "入门", "视频"],
+        "author": "作者",
+        "is_premium": False,
+        "created_at": NOW - timedelta(minutes=i)
+    }
+
+def content_detail() -> Dict[str, Any]:
+    return {
+        **content_item(1),
+        "content_data": {"sections": [{"title": f"第{i}节", "body": "正文" * 50} for i in range(20)]},
+        "estimated_minutes": 30,
+        "resources": [{"type": "link", "title": f"资源{i}", "url": f"https://example.com/r/{i}"} for i in range(10)],
+        "source_url": "https://example.com/source",
+        "updated_at": NOW
+    }
+
+def path_detail(items: int) -> Dict[str, Any]:
+    return {
+        "id": 1,
+        "title": "Python从入门到精通",
+        "description": "路径简介",
+        "subject": "python",
+        "difficulty_level": 2,
+        "estimated_hours": 40.0,
+        "metadata": {"goals": ["掌握基础语法", "完成项目"], "prerequisites": [], "difficulty": "beginner"},
+        "contents": [
+            {
+                "id": i,
+                "title": f"内容{i}",
+                "description": "节点简介",
+                "content_type": "video",
+                "subject": "python",
+                "difficulty_level": 2
+            }
+            for i in range(items)
+        ],
+        "user_progress": {
+            "overall_progress": 42.5,
+            "content_progress": {str(i): float(i % 100) for i in range(items)},
+            "enrolled_at": NOW
+        }
+    }
+
+def path_progress(items: int) -> Dict[str, Any]:
+    return {
+        "id": 1,
+        "user_id": 1,
+        "path_id": 1,
+        "progress": 42.5,
+        "content_progress": {str(i): float(i % 100) for i in range(items)},
+        "total_study_time": 12.5,
+        "content_study_time": {str(i): 15.0 for i in range(items)},
+        "study_sessions": {"session_count": 12, "session_minutes": 750.0, "last_session_end": NOW},
+        "last_activity_at": NOW,
+        "personalization_settings": {"pace": "normal", "reminders": True}
+    }
+
+def history(items: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "content_id": i,
+            "title": f"内容{i}",
+            "content_type": "video",
+            "interaction_type": "view",
+            "progress": 50.0,
+            "rating": 4,
+            "time_spent": 12.5,
+            "created_at": NOW - timedelta(minutes=i)
+        }
+        for i in range(items)
+    ]
+
+def build_cases(items: int) -> list:
+    """(名称, 响应内容, 原有的response_model, 当前的response_model)"""
+    return [
+        ("GET /content", [content_item(i) for i in range(items)], List[Dict[str, Any]], List[ContentListItemResponse]),
+        ("GET /content/{id}", content_detail(), Dict[str, Any], ContentDetailResponse),
+        ("GET /learning-paths/{id}", path_detail(items), None, PathDetailResponse),
+        ("POST /learning-paths/{id}/progress", path_progress(items), None, PathProgressResponse),
+        ("GET /users/{id}/history", history(items), List[Dict[str, Any]], List[UserHistoryItem])
+    ]
+
+def response_field(model: Any):
+    """与路由注册时相同，响应字段只创建一次"""
+    return create_response_field(name="Response", type_=model, mode="serialization") if model else None
+
+async def render(content: Any, field: Any, response_class, exclude_unset: bool) -> bytes:
+    """按FastAPI路由的处理顺序：校验/转换返回值，再由响应类编码"""
+    data = await serialize_response(field=field, response_content=content, exclude_unset=exclude_unset)
+    return response_class(content=data).body
+
+def measure(content: Any, field: Any, response_class, exclude_unset: bool, runs: int) -> float:
+    async def run() -> List[float]:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await render(content, field, response_class, exclude_unset)
+            timings.append(time.perf_counter() - start)
+        return timings
+    return statistics.median(asyncio.run(run())) * 1_000_000
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="响应序列化基准测试")
+    parser.add_argument("--runs", type=int, default=200, help="每个接口的重复次数")
+    parser.add_argument("--items", type=int, default=100, help="列表类响应的条目数")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("响应序列化基准测试")
+    print(f"列表条目 {args.items}，每个接口重复 {args.runs} 次，单位: 微秒/次（中位数）")
+    print("=" * 72)
+    print(f"{'接口':<36}{'原有':>10}{'当前':>10}{'加速':>10}")
+    for name, content, old_model, new_model in build_cases(args.items):
+        old_field, new_field = response_field(old_model), response_field(new_model)
+        old_body = asyncio.run(render(content, old_field, JSONResponse, False))
+        new_body = asyncio.run(render(content, new_field, APIJSONResponse, True))
+        if json.loads(old_body) != json.loads(new_body):
+            print(f"\n❌ {name}: 两种方式输出的JSON不一致")
+            return 1
+        old_us = measure(content, old_field, JSONResponse, False, args.runs)
+        new_us = measure(content, new_field, APIJSONResponse, True, args.runs)
+        print(f"{name:<36}{old_us:>10.1f}{new_us:>10.1f}{old_us / new_us:>9.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+应用启动时间基准测试
+
+在独立子进程中测量:
+1. 导入 app.main 的耗时（冷启动导入时间，超出预算时以非零状态码退出）
+2. 生命周期启动耗时：首次启动（建表+填充默认数据）与再次启动（仅版本检查）
+
+用法: python scripts/benchmark_startup.py [--runs 5] [--import-budget 1.5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import app.main
+print(json.dumps({"import_seconds": time.perf_counter() - start}))
+"""
+
+LIFESPAN_SNIPPET = """
+import json, time
+from fastapi.testclient import TestClient
+from app.main import app
+timings = []
+for _ in range(2):
+    start = time.perf_counter()
+    with TestClient(app):
+        timings.append(time.perf_counter() - start)
+print(json.dumps({"cold_startup_seconds": timings[0], "warm_startup_seconds": timings[1]}))
+"""
+
+def run_snippet(snippet: str, database_path: str) -> dict:
+    """在干净的子进程中执行代码片段，返回其输出的最后一行JSON"""
+    env = dict(os.environ)
+    env["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{database_path}"
+    env["PYTHONPATH"] = str(ROOT_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=tempfile.gettempdir(),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="应用启动时间基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数")
+    parser.add_argument("--import-budget", type=float, default=1.5, help="导入时间预算(秒)")
+    args = parser.parse_args()
+
+    import_times = []
+    cold_times = []
+    warm_times = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for i in range(args.runs):
+            database_path = os.path.join(tmp_dir, f"startup_{i}.db")
+            import_times.append(run_snippet(IMPORT_SNIPPET, database_path)["import_seconds"])
+            lifespan = run_snippet(LIFESPAN_SNIPPET, database_path)
+            cold_times.append(lifespan["cold_startup_seconds"])
+            warm_times.append(lifespan["warm_startup_seconds"])
+
+    import_median = statistics.median(import_times)
+    print("=" * 50)
+    print("应用启动时间基准测试")
+    print("=" * 50)
+    print(f"导入 app.main:   中位数 {import_median:.3f}s  最大 {max(import_times):.3f}s  (预算 {args.import_budget:.3f}s)")
+    print(f"首次启动(建表+填充): 中位数 {statistics.median(cold_times):.3f}s")
+    print(f"再次启动(仅检查):   中位数 {statistics.median(warm_times):.3f}s")
+
+    if import_median > args.import_budget:
+        print(f"\n❌ 导入时间超出预算: {import_median:.3f}s > {args.import_budget:.3f}s")
+        return 1
+    print("\n✓ 导入时间在预算之内")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
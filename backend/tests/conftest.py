@@ -2,6 +2,9 @@ import pytest
 import asyncio
 import sys
 from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # 将项目根目录添加到路径
 ROOT_DIR = Path(__file__).parent.parent
@@ -9,17 +12,28 @@ sys.path.append(str(ROOT_DIR))
 
 from app.core.config import settings
 from app.services.ai_service import AIService
+from app.db.session import Base
+# 导入所有模型，确保关系映射完整
+import app.models.user
+import app.models.content
+import app.models.content_interaction
+import app.models.learning_assessment
+import app.models.learning_path
+import app.models.system_marker
+import app.models.user_activity_summary
+import app.models.interaction_rollup
+import app.models.learning_event
 
 # 跳过条件 - 如果没有配置API密钥
 skip_if_no_api_key = pytest.mark.skipif(
-    not settings.ZHIPU_API_KEY,
+    not settings.ZHIPUAI_API_KEY,
     reason="ZhipuAI API key not configured"
 )
 
 @pytest.fixture
 def ai_service():
     """提供AI服务实例"""
-    return AIService(settings.ZHIPU_API_KEY)
+    return AIService(settings.ZHIPUAI_API_KEY)
 
 @pytest.fixture
 def event_loop():
@@ -27,3 +41,86 @@ def event_loop():
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
+
+@pytest.fixture
+def db_engine():
+    """提供独立的内存SQLite数据库引擎"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    # 进程内缓存以主键为键，每个测试数据库都从空缓存开始
+    from app.services.path_cache import path_skeleton_cache
+    from app.services.progress_push import progress_broker
+    from app.services.question_catalog import question_catalog
+    from app.services.recommendation_cache import recommendation_cache
+    from app.services.user_cache import user_cache
+    path_skeleton_cache.clear()
+    progress_broker.clear()
+    question_catalog.clear()
+    recommendation_cache.clear()
+    user_cache.clear()
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db_session(db_engine):
+    """提供连接到内存数据库的会话"""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    yield session
+    session.close()
+
+@pytest.fixture
+def client(db_engine):
+    """提供连接到内存数据库的API测试客户端"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.db.session import get_db
+    from app.api.v1.endpoints import assessment as assessment_v1
+    from app.api.v1.endpoints import content as content_v1
+    from app.api.v1.endpoints import learning_path as learning_path_v1
+    from app.routers import dashboard, progress_sync, users
+
+    test_app = FastAPI()
+    test_app.include_router(assessment_v1.router, prefix="/api/v1/assessment")
+    test_app.include_router(content_v1.router, prefix="/api/v1/content")
+    test_app.include_router(learning_path_v1.router, prefix="/api/v1/learning-paths")
+    test_app.include_router(users.router)
+    test_app.include_router(dashboard.router)
+    test_app.include_router(progress_sync.router)
+
+    testing_session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db():
+        db = testing_session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    test_app.dependency_overrides[get_db] = override_get_db
+    with TestClient(test_app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def query_budget(db_engine):
+    """断言代码块内执行的SQL查询数量不超过预算，用于发现N+1查询
+
+    用法:
+        with query_budget(3):
+            client.get("/api/v1/content")
+    """
+    from contextlib import contextmanager
+    from app.db.query_counter import count_engine_queries
+
+    @contextmanager
+    def _budget(max_queries: int):
+        with count_engine_queries(db_engine, record_statements=True) as stats:
+            yield stats
+        assert stats.count <= max_queries, (
+            f"执行了 {stats.count} 条查询，超出预算 {max_queries}:\n" + "\n".join(stats.statements)
+        )
+
+    return _budget
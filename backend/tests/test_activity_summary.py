@@ -0,0 +1,113 @@
+import asyncio
+from app.models.user import User
+from app.models.content import LearningContent
+from app.models.learning_path import LearningPath, PathEnrollment
+from app.models.user_activity_summary import UserActivitySummary
+from app.routers.user_progress import get_user_progress
+from app.services.activity_summary_service import rebuild_activity_summaries
+from app.services.learning_event_service import project_pending
+from app.services.user_service import record_user_progress
+
+def _snapshot(db, user_id):
+    db.expire_all()
+    summary = db.get(UserActivitySummary, user_id)
+    return {
+        "interaction_count": summary.interaction_count,
+        "total_time_spent": summary.total_time_spent,
+        "completed_contents": summary.completed_contents,
+        "progress_sum": summary.progress_sum,
+        "enrolled_paths": summary.enrolled_paths,
+        "active_paths": summary.active_paths,
+        "completed_paths": summary.completed_paths
+    }
+
+def test_summary_maintained_on_writes_and_matches_rebuild(client, db_session, query_budget):
+    user = User(email="summary@example.com", full_name="Summary User")
+    contents = [LearningContent(title=f"内容{i}", content_type="video") for i in range(2)]
+    paths = [LearningPath(title=f"路径{i}", subject="programming") for i in range(2)]
+    db_session.add_all([user, *contents, *paths])
+    db_session.commit()
+
+    asyncio.run(record_user_progress(user.id, contents[0].id, {"progress": 40, "time_spent": 10}, db_session))
+    asyncio.run(record_user_progress(user.id, contents[0].id, {"progress": 100, "time_spent": 5, "completed": True}, db_session))
+    asyncio.run(record_user_progress(user.id, contents[1].id, {"progress": 20, "time_spent": 3}, db_session))
+    # 请求只追加事件，交互记录由后台投影写入
+    assert db_session.get(UserActivitySummary, user.id) is None
+    assert project_pending(db_session) == 7
+
+    enrollments = [PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0) for path in paths]
+    db_session.add_all(enrollments)
+    db_session.commit()
+    enrollments[0].progress = 50.0
+    enrollments[1].progress = 100.0
+    db_session.commit()
+
+    incremental = _snapshot(db_session, user.id)
+    assert incremental == {
+        "interaction_count": 2,
+        "total_time_spent": 18.0,
+        "completed_contents": 1,
+        "progress_sum": 120.0,
+        "enrolled_paths": 2,
+        "active_paths": 1,
+        "completed_paths": 1
+    }
+
+    # 重建结果与增量维护的结果一致
+    assert rebuild_activity_summaries(db_session) == 1
+    assert _snapshot(db_session, user.id) == incremental
+
+    progress = get_user_progress(user.id, db_session)
+    assert (progress["active_paths"], progress["completed_paths"]) == (1, 1)
+
+    with query_budget(3):
+        response = client.get(f"/api/v1/users/{user.id}/summary")
+    assert response.json()["average_progress"] == 60.0
+    assert response.json()["total_study_time"] == 18.0
+
+def test_deletes_subtract_from_summary_and_core_updates_need_rebuild(db_session):
+    from sqlalchemy import update
+    from app.models.content import UserContentInteraction
+    from app.services.activity_summary_service import rebuild_user_activity_summaries
+
+    user = User(email="summary-delete@example.com", full_name="Summary Delete")
+    contents = [LearningContent(title=f"内容{i}", content_type="video") for i in range(2)]
+    paths = [LearningPath(title=f"路径{i}", subject="programming") for i in range(2)]
+    db_session.add_all([user, *contents, *paths])
+    db_session.flush()
+    interactions = [
+        UserContentInteraction(user_id=user.id, content_id=content.id, interaction_type="view",
+                               progress=progress, time_spent=10.0, completed=progress >= 100)
+        for content, progress in zip(contents, (100.0, 40.0))
+    ]
+    enrollments = [
+        PathEnrollment(user_id=user.id, path_id=path.id, progress=progress)
+        for path, progress in zip(paths, (100.0, 30.0))
+    ]
+    db_session.add_all([*interactions, *enrollments])
+    db_session.commit()
+
+    # 修改后在同一次flush中删除，扣除的是数据库中的旧值；过期的对象删除前从数据库读取
+    interactions[0].progress = 50.0
+    db_session.delete(interactions[0])
+    db_session.expire(enrollments[0])
+    db_session.delete(enrollments[0])
+    db_session.commit()
+    assert _snapshot(db_session, user.id) == {
+        "interaction_count": 1,
+        "total_time_spent": 10.0,
+        "completed_contents": 0,
+        "progress_sum": 40.0,
+        "enrolled_paths": 1,
+        "active_paths": 1,
+        "completed_paths": 0
+    }
+    assert db_session.get(LearningPath, paths[0].id).enrollment_count == 0
+
+    # Core语句不触发增量维护，需要对受影响的用户重建
+    db_session.execute(update(PathEnrollment).where(PathEnrollment.user_id == user.id).values(progress=100.0))
+    assert _snapshot(db_session, user.id)["completed_paths"] == 0
+    rebuild_user_activity_summaries(db_session, [user.id])
+    db_session.commit()
+    snapshot = _snapshot(db_session, user.id)
+    assert (snapshot["active_paths"], snapshot["completed_paths"]) == (0, 1)
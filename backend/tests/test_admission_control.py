@@ -0,0 +1,157 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from app.models.learning_path import LearningPath
+from app.models.user import User
+from app.services import admission_control
+from app.services.admission_control import (
+    AdmissionController,
+    AdmissionRejected,
+    admission_middleware,
+    admission_rejected_error,
+    classify_request,
+    is_degraded,
+    llm_admission
+)
+from app.services.recommendation_cache import get_recommended_paths, recommendation_cache
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_queue_is_bounded_and_served_round_robin_across_users():
+    controller = AdmissionController("llm", max_concurrency=1, max_queue=3, queue_timeout=1, per_user_limit=5)
+    order = []
+
+    async def job(user, name):
+        await controller.acquire(user)
+        order.append(name)
+        await asyncio.sleep(0)
+        controller.release(user)
+
+    async def run():
+        await controller.acquire("running")
+        # 用户a先排队两个请求，用户b后排队一个
+        tasks = [asyncio.ensure_future(job(user, name)) for user, name in [("a", "a1"), ("a", "a2"), ("b", "b1")]]
+        await _settle()
+        assert controller.stats()["queue_depth"] == 3
+        with pytest.raises(AdmissionRejected) as e:
+            await controller.acquire("c")
+        assert e.value.reason == "queue_full"
+        controller.release("running")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["a1", "b1", "a2"]
+    stats = controller.stats()
+    assert (stats["active"], stats["queue_depth"], stats["admitted"]) == (0, 0, 4)
+    assert stats["shed"]["queue_full"] == 1
+
+def test_queue_timeout_and_per_user_limit():
+    controller = AdmissionController("llm", max_concurrency=1, max_queue=5, queue_timeout=0.01, per_user_limit=2)
+
+    async def run():
+        await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as e:
+            await controller.acquire("b")
+        assert e.value.reason == "timeout"
+
+        waiter = asyncio.ensure_future(controller.acquire("a"))
+        await _settle()
+        with pytest.raises(AdmissionRejected) as e:
+            await controller.acquire("a")
+        assert e.value.reason == "user_limit"
+        # 排队中被取消的请求不占用队列和用户名额
+        waiter.cancel()
+        await _settle()
+        assert controller.stats()["queue_depth"] == 0
+        controller.release("a")
+        assert await controller.acquire("a") == 0.0
+
+    asyncio.run(run())
+    assert controller.stats()["shed"] == {"queue_full": 0, "timeout": 1, "user_limit": 1}
+
+def _app():
+    app = FastAPI()
+    app.middleware("http")(admission_middleware)
+    gate = asyncio.Event()
+
+    @app.post("/api/v1/assessment/adaptive-test")
+    async def adaptive_test(request: Request):
+        if not is_degraded(request):
+            await gate.wait()
+        return {"degraded": is_degraded(request)}
+
+    @app.get("/api/v1/learning-paths/{path_id}")
+    async def path_detail(path_id: int, request: Request):
+        # 路径不存在时才调用大模型生成
+        if path_id != 1:
+            try:
+                async with llm_admission(request):
+                    await gate.wait()
+            except AdmissionRejected as e:
+                raise admission_rejected_error(e)
+        return {"id": path_id}
+
+    return app, gate
+
+def test_overloaded_routes_degrade_or_shed(monkeypatch):
+    monkeypatch.setattr(admission_control, "admission_controllers", {
+        "llm": AdmissionController("llm", max_concurrency=1, max_queue=0, queue_timeout=1, per_user_limit=5),
+        "cheap": AdmissionController("cheap", max_concurrency=10, max_queue=10, queue_timeout=1, per_user_limit=10)
+    })
+    app, gate = _app()
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            running = asyncio.ensure_future(client.post("/api/v1/assessment/adaptive-test", params={"user_id": 1}))
+            await asyncio.sleep(0.05)
+
+            # 可降级的接口执行降级逻辑
+            degraded = await client.post("/api/v1/assessment/adaptive-test", params={"user_id": 2})
+            assert degraded.json() == {"degraded": True}
+            assert degraded.headers["X-Degraded"] == "queue_full"
+
+            # 已有的路径不占用 llm 类的执行槽
+            assert (await client.get("/api/v1/learning-paths/1")).status_code == 200
+            # 路径不存在、需要生成时不可降级，返回503（不论是否带生成参数）
+            shed = await client.get("/api/v1/learning-paths/5")
+            assert shed.status_code == 503
+            assert shed.headers["Retry-After"]
+
+            gate.set()
+            assert (await running).json() == {"degraded": False}
+            assert (await client.get("/api/v1/learning-paths/5")).status_code == 200
+
+    asyncio.run(run())
+    stats = {name: controller.stats() for name, controller in admission_control.admission_controllers.items()}
+    assert stats["llm"]["degraded"] == 1
+    assert stats["llm"]["shed"]["queue_full"] == 2
+    assert stats["llm"]["active"] == 0
+    assert stats["llm"]["admitted"] == 2
+    assert stats["cheap"]["admitted"] == 3
+
+def test_degraded_recommendations_do_not_call_ai(db_session, monkeypatch):
+    def fail():
+        raise AssertionError("降级时不应调用AI服务")
+
+    monkeypatch.setattr("app.services.recommendation_cache.get_ai_service", fail)
+    user = User(email="degraded@example.com", full_name="Degraded User")
+    db_session.add_all([user, LearningPath(title="数据库兜底", subject="programming")])
+    db_session.commit()
+
+    paths = asyncio.run(get_recommended_paths(db_session, user.id, allow_compute=False))
+    assert [path["title"] for path in paths] == ["数据库兜底"]
+
+    # 有缓存时返回缓存的推荐，即使已经过期
+    recommendation_cache.put(user.id, [{"title": "缓存推荐"}], recommendation_cache.generation(user.id))
+    paths = asyncio.run(get_recommended_paths(db_session, user.id, allow_compute=False))
+    assert paths == [{"title": "缓存推荐"}]
+
+def test_dashboard_is_a_degradable_llm_route():
+    def request(method, path):
+        return Request({"type": "http", "method": method, "path": path, "query_string": b"", "headers": []})
+
+    assert classify_request(request("GET", "/api/v1/dashboard/3")) == ("llm", True)
+    assert classify_request(request("GET", "/api/v1/learning-paths/3")) == ("cheap", False)
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import threading
+from app.models.content import LearningContent, ContentTag, content_tag_association
+from app.services import content_ingest_service
+from app.services.content_ingest_service import ingest_content_ndjson, iter_ndjson_lines
+
+def _ndjson(rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row, ensure_ascii=False) for row in rows) + "\n"
+
+def test_bulk_create_content_inserts_rows_and_reports_errors(client, db_session, query_budget):
+    db_session.add(ContentTag(name="Python"))
+    db_session.commit()
+    rows = [
+        {"title": f"内容{i}", "content_type": "video", "tags": ["Python", f"tag-{i % 3}"]}
+        for i in range(25)
+    ]
+    rows.insert(3, "{not json")
+    rows.insert(7, {"content_type": "video"})
+    rows.insert(9, {"title": "未知字段", "content_type": "video", "unknown": 1})
+
+    # 每批: 查询已有标签 + 插入新标签 + 插入内容 + 插入关联，批数越多查询越多，但与行数无关
+    with query_budget(4 * 3 + 2):
+        response = client.post(
+            "/api/v1/content/bulk",
+            params={"chunk_size": 10},
+            content=_ndjson(rows).encode("utf-8"),
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["received"] == 28
+    assert result["inserted"] == 25
+    assert result["failed"] == 3
+    assert [error["line"] for error in result["errors"]] == [4, 8, 10]
+
+    assert db_session.query(LearningContent).count() == 25
+    assert db_session.query(ContentTag).count() == 4
+    assert db_session.query(content_tag_association).count() == 50
+
+def test_iter_ndjson_lines_handles_split_chunks_and_long_lines():
+    async def stream():
+        for chunk in [b'{"a"', b': 1}\n{"b": 2}', b"\n" + b"x" * 50, b"x" * 50 + b"\n", b'{"c": 3}']:
+            yield chunk
+
+    async def collect():
+        return [item async for item in iter_ndjson_lines(stream(), max_line_bytes=64)]
+
+    lines = asyncio.run(collect())
+    assert lines[0] == (1, b'{"a": 1}')
+    assert lines[1] == (2, b'{"b": 2}')
+    assert isinstance(lines[2][1], ValueError)
+    assert lines[3] == (4, b'{"c": 3}')
+
+def test_ingest_inserts_chunks_off_the_event_loop(db_session, monkeypatch):
+    insert_threads = []
+    insert_chunk = content_ingest_service._insert_chunk
+
+    def recording_insert_chunk(db, rows):
+        insert_threads.append(threading.get_ident())
+        return insert_chunk(db, rows)
+
+    monkeypatch.setattr(content_ingest_service, "_insert_chunk", recording_insert_chunk)
+    rows = [{"title": f"内容{i}", "content_type": "video", "tags": [f"tag-{i}"]} for i in range(5)]
+
+    async def stream():
+        yield _ndjson(rows).encode("utf-8")
+
+    async def run():
+        return threading.get_ident(), await ingest_content_ndjson(db_session, stream(), chunk_size=2)
+
+    loop_thread, result = asyncio.run(run())
+    assert result["inserted"] == 5
+    assert len(insert_threads) == 3
+    assert loop_thread not in insert_threads
+
+    # 每条内容关联到自己的标签，ID与输入行一一对应
+    contents = db_session.query(LearningContent).order_by(LearningContent.id).all()
+    assert [[tag.name for tag in content.tags] for content in contents] == [[f"tag-{i}"] for i in range(5)]
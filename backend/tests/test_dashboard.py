@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.models.learning_path import LearningPath, PathEnrollment
+from app.models.user import User
+from app.services import recommendation_cache as recommendation_cache_module
+
+SECTIONS = {"learning_style", "enrolled_paths", "recommended_paths", "progress", "weaknesses"}
+
+class FakeAIService:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    async def generate_content_recommendations(self, user_id, limit=3):
+        await asyncio.sleep(self.delay)
+        return [{"content": {"id": 7, "title": "推荐内容"}, "explanation": "适合你", "approach_suggestion": "多练习"}]
+
+def _seed(db_session):
+    user = User(
+        email="dashboard@example.com",
+        full_name="Dashboard User",
+        learning_style={"visual": 80, "auditory": 40, "kinesthetic": 60, "reading": 50, "dominant_style": "visual"}
+    )
+    path = LearningPath(title="Python基础", subject="programming")
+    db_session.add_all([user, path])
+    db_session.commit()
+    db_session.add(PathEnrollment(user_id=user.id, path_id=path.id, progress=35.0))
+    db_session.commit()
+    return user
+
+def test_dashboard_returns_all_sections(client, db_session, monkeypatch, query_budget):
+    monkeypatch.setattr(recommendation_cache_module, "get_ai_service", lambda: FakeAIService())
+    user_id = _seed(db_session).id
+
+    with query_budget(12) as stats:
+        response = client.get(f"/api/v1/dashboard/{user_id}")
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["sections"]) == SECTIONS
+    assert body["errors"] == {}
+    assert body["sections"]["learning_style"]["visual"] == 80
+    assert [p["title"] for p in body["sections"]["enrolled_paths"]] == ["Python基础"]
+    assert body["sections"]["recommended_paths"][0]["title"] == "推荐内容"
+    assert body["sections"]["progress"]["learning_style"] == "未知"
+    assert "weak_areas" in body["sections"]["weaknesses"]
+    # 用户只查询一次
+    assert sum(1 for statement in stats.statements if "FROM users" in statement) == 1
+
+def test_slow_section_times_out_without_failing_dashboard(client, db_session, monkeypatch):
+    monkeypatch.setattr(recommendation_cache_module, "get_ai_service", lambda: FakeAIService(delay=0.3))
+    monkeypatch.setattr(settings, "DASHBOARD_SECTION_TIMEOUT", 0.05)
+    user = _seed(db_session)
+
+    body = client.get(f"/api/v1/dashboard/{user.id}").json()
+    assert body["sections"]["recommended_paths"] is None
+    assert set(body["errors"]) == {"recommended_paths"}
+    assert body["sections"]["enrolled_paths"][0]["progress"] == 35.0
+
+@pytest.mark.parametrize("sections,status", [("progress,weaknesses", 200), ("unknown", 400)])
+def test_dashboard_sections_param(client, db_session, sections, status):
+    user = _seed(db_session)
+    response = client.get(f"/api/v1/dashboard/{user.id}", params={"sections": sections})
+    assert response.status_code == status
+    if status == 200:
+        assert set(response.json()["sections"]) == {"progress", "weaknesses"}
+
+def test_dashboard_unknown_user(client):
+    assert client.get("/api/v1/dashboard/999").status_code == 404
+
+def test_degraded_dashboard_does_not_call_ai(db_session, monkeypatch):
+    from app.services.dashboard_service import build_dashboard
+    from app.services.user_cache import get_user_snapshot
+
+    def fail():
+        raise AssertionError("降级时不应调用AI服务")
+
+    monkeypatch.setattr(recommendation_cache_module, "get_ai_service", fail)
+    user = _seed(db_session)
+    db_session.add(LearningPath(title="数据库兜底", subject="programming"))
+    db_session.commit()
+    body = asyncio.run(build_dashboard(
+        db_session, get_user_snapshot(db_session, user.id), ["recommended_paths"], 1.0, allow_compute=False
+    ))
+    assert body["errors"] == {}
+    # 没有缓存时返回数据库中未注册的路径
+    assert [path["title"] for path in body["sections"]["recommended_paths"]] == ["数据库兜底"]
+
+def test_blocking_db_sections_overlap_and_time_out(client, db_session, monkeypatch):
+    import time
+    from app.services import dashboard_service
+
+    def slow_progress(db, user):
+        time.sleep(0.5)
+        return {}
+
+    def slow_weaknesses(db, user):
+        time.sleep(0.2)
+        return {"weak_areas": []}
+
+    monkeypatch.setitem(dashboard_service.DB_SECTIONS, "progress", slow_progress)
+    monkeypatch.setitem(dashboard_service.DB_SECTIONS, "weaknesses", slow_weaknesses)
+    monkeypatch.setattr(settings, "DASHBOARD_SECTION_TIMEOUT", 0.3)
+    user = _seed(db_session)
+
+    start = time.perf_counter()
+    body = client.get(
+        f"/api/v1/dashboard/{user.id}", params={"sections": "progress,weaknesses,enrolled_paths"}
+    ).json()
+    elapsed = time.perf_counter() - start
+
+    # 阻塞的查询在线程池中执行，超时后立即返回，未超时的板块相互重叠
+    assert elapsed < 0.45
+    assert set(body["errors"]) == {"progress"}
+    assert body["sections"]["weaknesses"] == {"weak_areas": []}
+    assert body["sections"]["enrolled_paths"][0]["progress"] == 35.0
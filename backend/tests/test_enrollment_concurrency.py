@@ -0,0 +1,151 @@
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.session import Base
+from app.models.user import User
+from app.models.learning_path import LearningPath, PathEnrollment
+from app.services.enrollment_progress_service import patch_personalization_settings, run_with_version_retry
+
+WORKERS = 16
+UPDATES_PER_WORKER = 10
+
+def test_concurrent_enrollment_updates_are_not_lost(tmp_path):
+    # 需要真正的并发连接，使用文件数据库而不是共享连接的内存库
+    engine = create_engine(f"sqlite:///{tmp_path / 'concurrency.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    with session_factory() as db:
+        user = User(email="concurrency@example.com", full_name="Concurrency User")
+        path = LearningPath(title="并发路径", subject="programming")
+        db.add_all([user, path])
+        db.flush()
+        enrollment = PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0, total_study_time=0.0)
+        db.add(enrollment)
+        db.commit()
+        enrollment_id = enrollment.id
+
+    barrier = threading.Barrier(WORKERS)
+    errors = []
+
+    def worker(index: int) -> None:
+        db = session_factory()
+        try:
+            barrier.wait()
+            for step in range(UPDATES_PER_WORKER):
+                def increment():
+                    # 故意在Python中读-改-写，依赖版本号发现并发修改
+                    enrollment = db.get(PathEnrollment, enrollment_id, populate_existing=True)
+                    total = enrollment.total_study_time
+                    time.sleep(0.001)  # 扩大读与写之间的窗口
+                    enrollment.total_study_time = total + 1
+
+                def patch_settings():
+                    enrollment = db.get(PathEnrollment, enrollment_id, populate_existing=True)
+                    patch_personalization_settings(db, enrollment, {f"worker{index}": step})
+
+                run_with_version_retry(db, increment, max_retries=1000)
+                run_with_version_retry(db, patch_settings, max_retries=1000)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    with session_factory() as db:
+        enrollment = db.get(PathEnrollment, enrollment_id)
+        assert enrollment.total_study_time == WORKERS * UPDATES_PER_WORKER
+        # ORM写入和JSON修改各递增一次版本号
+        assert enrollment.version == 1 + 2 * WORKERS * UPDATES_PER_WORKER
+        assert enrollment.personalization_settings == {
+            f"worker{index}": UPDATES_PER_WORKER - 1 for index in range(WORKERS)
+        }
+    engine.dispose()
+
+def test_concurrent_progress_requests_through_endpoint(tmp_path):
+    import asyncio
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy import insert
+    from app.api.v1.endpoints import learning_path as learning_path_v1
+    from app.db.session import get_db
+    from app.models.content import LearningContent
+    from app.models.learning_path import path_content_association
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'endpoint.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with session_factory() as db:
+        user = User(email="endpoint@example.com", full_name="Endpoint User")
+        path = LearningPath(title="并发接口路径", subject="programming")
+        contents = [LearningContent(title=f"内容{i}", content_type="video", subject="python") for i in range(WORKERS)]
+        db.add_all([user, path, *contents])
+        db.flush()
+        db.execute(insert(path_content_association), [
+            {"path_id": path.id, "content_id": content.id, "order_index": i, "required": True}
+            for i, content in enumerate(contents)
+        ])
+        db.add(PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0))
+        db.commit()
+        user_id, path_id = user.id, path.id
+        content_ids = [content.id for content in contents]
+
+    app = FastAPI()
+    app.include_router(learning_path_v1.router, prefix="/api/v1/learning-paths")
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            # 每个请求写入不同的内容，都修改同一条注册记录的进度累计值和学习时间；使用默认的重试次数
+            return await asyncio.gather(*[
+                client.post(
+                    f"/api/v1/learning-paths/{path_id}/progress",
+                    params={"user_id": user_id},
+                    json={"content_id": content_id, "progress": 100, "study_time": 6}
+                )
+                for content_id in content_ids
+            ])
+
+    responses = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200] * WORKERS
+
+    with session_factory() as db:
+        enrollment = db.query(PathEnrollment).filter(PathEnrollment.path_id == path_id).one()
+        assert enrollment.required_progress_sum == 100 * WORKERS
+        assert enrollment.progress == 100
+        assert round(enrollment.total_study_time, 6) == round(WORKERS * 6 / 60, 6)
+    engine.dispose()
+
+def test_personalization_keys_with_quotes_are_rejected(db_session):
+    import pytest
+
+    user = User(email="quotes@example.com", full_name="Quotes User")
+    path = LearningPath(title="引号路径", subject="programming")
+    db_session.add_all([user, path])
+    db_session.flush()
+    enrollment = PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0)
+    db_session.add(enrollment)
+    db_session.commit()
+
+    with pytest.raises(ValueError):
+        patch_personalization_settings(db_session, enrollment, {'a"b': 1})
+    patch_personalization_settings(db_session, enrollment, {"a.b": 1})
+    db_session.commit()
+    db_session.refresh(enrollment)
+    assert enrollment.personalization_settings == {"a.b": 1}
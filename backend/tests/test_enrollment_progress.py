@@ -0,0 +1,79 @@
+from app.models.user import User
+from app.models.content import LearningContent
+from app.models.learning_path import LearningPath, PathEnrollment, EnrollmentContentProgress, StudySession
+from app.services.enrollment_progress_service import (
+    get_content_progress_map,
+    get_content_study_time_map,
+    get_study_session_stats,
+    record_content_progress,
+    record_study_session,
+    recompute_enrollment_progress,
+    migrate_enrollment_json
+)
+
+def _create_enrollment(db, **kwargs):
+    user = User(email="progress@example.com", full_name="Progress User")
+    path = LearningPath(title="测试路径", subject="programming")
+    contents = [LearningContent(title=f"内容{i}", content_type="reading") for i in range(3)]
+    db.add_all([user, path, *contents])
+    db.flush()
+    enrollment = PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0, **kwargs)
+    db.add(enrollment)
+    db.commit()
+    return enrollment, contents
+
+def test_record_content_progress_updates_single_row(db_session):
+    enrollment, contents = _create_enrollment(db_session)
+
+    record_content_progress(db_session, enrollment, contents[0].id, 40, study_time=30)
+    record_content_progress(db_session, enrollment, contents[0].id, 80, study_time=15)
+    record_content_progress(db_session, enrollment, contents[1].id, 20)
+    record_study_session(db_session, enrollment.id, contents[0].id, "2026-01-01T10:00:00", "2026-01-01T10:15:00", 15)
+    recompute_enrollment_progress(db_session, enrollment)
+    db_session.commit()
+    db_session.refresh(enrollment)
+
+    assert db_session.query(EnrollmentContentProgress).count() == 2
+    assert get_content_progress_map(db_session, enrollment.id) == {
+        str(contents[0].id): 80,
+        str(contents[1].id): 20
+    }
+    assert get_content_study_time_map(db_session, enrollment.id) == {str(contents[0].id): 45}
+    assert enrollment.total_study_time == 0.75
+    assert enrollment.progress == 50
+    stats = get_study_session_stats(db_session, enrollment.id)
+    assert stats["session_count"] == 1
+    assert stats["session_minutes"] == 15
+
+def test_migrate_enrollment_json_is_idempotent(db_session):
+    enrollment, contents = _create_enrollment(
+        db_session,
+        content_progress={"1": 50, "2": 50},
+        content_study_time={"1": 10},
+        study_sessions=[{"start_time": "a", "end_time": "b", "duration": 10, "content_id": 1}]
+    )
+
+    assert migrate_enrollment_json(db_session, batch_size=1) == 1
+    assert migrate_enrollment_json(db_session, batch_size=1) == 0
+
+    db_session.refresh(enrollment)
+    assert enrollment.content_progress is None
+    assert get_content_progress_map(db_session, enrollment.id) == {"1": 50, "2": 50}
+    assert get_content_study_time_map(db_session, enrollment.id) == {"1": 10}
+    assert db_session.query(StudySession).count() == 1
+
+def test_progress_endpoint_patches_settings_by_key(client, db_session):
+    enrollment, contents = _create_enrollment(db_session, personalization_settings={"pace": "slow", "theme": "dark"})
+
+    response = client.post(
+        f"/api/v1/learning-paths/{enrollment.path_id}/progress",
+        params={"user_id": enrollment.user_id},
+        json={"content_id": contents[0].id, "progress": 60, "personalization_settings": {"pace": "fast", "goals": [1, 2]}}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["progress"] == 60
+    assert body["personalization_settings"] == {"pace": "fast", "theme": "dark", "goals": [1, 2]}
+    db_session.refresh(enrollment)
+    assert enrollment.version == 3
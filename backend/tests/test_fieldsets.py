@@ -0,0 +1,102 @@
+import pytest
+from app.models.user import User
+from app.models.content import LearningContent, ContentTag, UserContentInteraction
+from app.models.learning_path import LearningPath, PathEnrollment
+from app.utils.fieldsets import InvalidFieldsetError, resolve_fieldset
+
+def _seed(db_session):
+    user = User(email="fields@example.com", full_name="Fields User")
+    content = LearningContent(
+        title="内容",
+        content_type="article",
+        content_data={"body": "x" * 100},
+        resources=[{"type": "link", "url": "https://example.com"}],
+        tags=[ContentTag(name="python")]
+    )
+    db_session.add_all([user, content])
+    db_session.flush()
+    db_session.add(UserContentInteraction(
+        user_id=user.id, content_id=content.id, interaction_type="view", progress=40.0
+    ))
+    db_session.commit()
+    return user, content
+
+def test_resolve_fieldset_defaults_and_validation():
+    full = resolve_fieldset(None, None, ("id", "title", "subject"), ("tags",), default_include=("tags",))
+    assert full.fields == ("id", "title", "subject")
+    assert full.wants("tags")
+
+    # 传了 fields 时按默认顺序返回并总是带上 id，未列出的关联不展开
+    sparse = resolve_fieldset("title, id,title", None, ("id", "title", "subject"), ("tags",), default_include=("tags",))
+    assert sparse.fields == ("id", "title")
+    assert not sparse.wants("tags")
+
+    with pytest.raises(InvalidFieldsetError):
+        resolve_fieldset("id,password", None, ("id", "title"))
+    with pytest.raises(InvalidFieldsetError):
+        resolve_fieldset(None, "author", ("id",), ("tags",))
+
+def test_content_list_sparse_fields_skip_columns_and_tags(client, db_session, query_budget):
+    _seed(db_session)
+
+    with query_budget(1) as stats:
+        response = client.get("/api/v1/content", params={"fields": "title"})
+    assert response.status_code == 200
+    assert response.json()[0].keys() == {"id", "title"}
+    sql = stats.statements[0]
+    assert "content_data" not in sql and "visual_affinity" not in sql
+
+def test_content_list_include_expansions(client, db_session):
+    user, content = _seed(db_session)
+
+    response = client.get(
+        "/api/v1/content",
+        params={"fields": "title", "include": "tags,resources,progress", "user_id": user.id}
+    )
+    assert response.status_code == 200
+    item = response.json()[0]
+    assert item["tags"] == ["python"]
+    assert item["resources"] == [{"type": "link", "url": "https://example.com"}]
+    assert item["progress"] == {"progress": 40.0, "completed": False}
+
+    assert client.get("/api/v1/content", params={"include": "progress"}).status_code == 400
+    assert client.get("/api/v1/content", params={"fields": "password"}).status_code == 400
+
+def test_content_detail_fields(client, db_session):
+    _, content = _seed(db_session)
+
+    full = client.get(f"/api/v1/content/{content.id}").json()
+    assert full["tags"] == ["python"] and full["resources"] and full["content_data"]
+
+    sparse = client.get(f"/api/v1/content/{content.id}", params={"fields": "title,content_data"}).json()
+    assert sparse == {"id": content.id, "title": "内容", "content_data": {"body": "x" * 100}}
+
+def test_path_detail_progress_only_when_included(client, db_session, query_budget):
+    user, _ = _seed(db_session)
+    path = LearningPath(title="路径", subject="python")
+    db_session.add(path)
+    db_session.flush()
+    db_session.add(PathEnrollment(user_id=user.id, path_id=path.id, progress=25.0))
+    db_session.commit()
+
+    full = client.get(f"/api/v1/learning-paths/{path.id}", params={"user_id": user.id}).json()
+    assert full["user_progress"]["overall_progress"] == 25.0
+
+    client.get(f"/api/v1/learning-paths/{path.id}")  # 预热骨架缓存
+    with query_budget(1):
+        sparse = client.get(
+            f"/api/v1/learning-paths/{path.id}", params={"user_id": user.id, "fields": "title"}
+        ).json()
+    assert sparse == {"id": path.id, "title": "路径"}
+
+def test_user_fields_and_history_projection(client, db_session):
+    user, content = _seed(db_session)
+
+    assert client.get(f"/api/v1/users/{user.id}", params={"fields": "full_name"}).json() == {
+        "id": user.id, "full_name": "Fields User"
+    }
+    with_progress = client.get(f"/api/v1/users/{user.id}", params={"fields": "id", "include": "progress"}).json()
+    assert with_progress == {"id": user.id, "progress": []}
+
+    history = client.get(f"/api/v1/users/{user.id}/history", params={"fields": "content_id,progress"}).json()
+    assert history == [{"content_id": content.id, "progress": 40.0}]
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from app.models.learning_path import LearningPath
+from app.services import generated_path_service
+from app.services.generated_path_service import (
+    canonical_generation_parameters,
+    generation_key,
+    get_or_generate_path
+)
+
+class FakeAIService:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def generate_learning_analysis(self, data):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {
+            "strengths": ["基础扎实"],
+            "behavior_patterns": {"study_consistency": "每天学习"},
+            "recommendations": ["Watch the intro video", "Build a small project", "Review the notes"]
+        }
+
+@pytest.fixture
+def fake_ai(monkeypatch):
+    service = FakeAIService(delay=0.01)
+    monkeypatch.setattr(generated_path_service, "get_ai_service", lambda: service)
+    return service
+
+def test_generation_key_uses_canonical_parameters():
+    assert generation_key(canonical_generation_parameters("  Python   编程 ", "Beginner ")) == \
+        generation_key(canonical_generation_parameters("Python 编程", "beginner"))
+    assert generation_key(canonical_generation_parameters(None, None)) == \
+        generation_key(canonical_generation_parameters("编程与开发", "beginner"))
+    assert generation_key(canonical_generation_parameters("Python", "advanced")) != \
+        generation_key(canonical_generation_parameters("Python", "beginner"))
+
+def test_generated_path_persisted_and_reused(client, db_session, fake_ai):
+    first = client.get("/api/v1/learning-paths/999", params={"subject_area": "Python", "target_level": "beginner"})
+    assert first.status_code == 200
+    body = first.json()
+    assert [c["description"] for c in body["contents"]] == [
+        "Watch the intro video", "Build a small project", "Review the notes"
+    ]
+    assert body["contents"][0]["content_type"] == "video"
+
+    # 参数写法不同但规范化后相同，直接读取已保存的路径
+    second = client.get("/api/v1/learning-paths/1000", params={"subject_area": " Python", "target_level": "BEGINNER"})
+    assert second.status_code == 200
+    assert second.json()["id"] == body["id"]
+    assert fake_ai.calls == 1
+
+    path = db_session.get(LearningPath, body["id"])
+    assert path.is_ai_generated
+    assert path.generation_parameters == {"subject_area": "Python", "target_level": "beginner"}
+
+def test_concurrent_requests_generate_once(db_session, fake_ai):
+    async def run():
+        return await asyncio.gather(*[
+            get_or_generate_path(db_session, "Rust", "intermediate") for _ in range(5)
+        ])
+
+    paths = asyncio.run(run())
+    assert fake_ai.calls == 1
+    assert len({path.id for path in paths}) == 1
+    assert db_session.query(LearningPath).filter(LearningPath.is_ai_generated.is_(True)).count() == 1
+
+def test_empty_generation_not_persisted(client, db_session, monkeypatch):
+    class EmptyAIService:
+        async def generate_learning_analysis(self, data):
+            return {"recommendations": []}
+
+    monkeypatch.setattr(generated_path_service, "get_ai_service", lambda: EmptyAIService())
+    response = client.get("/api/v1/learning-paths/999", params={"subject_area": "Go"})
+    assert response.status_code == 500
+    assert db_session.query(LearningPath).count() == 0
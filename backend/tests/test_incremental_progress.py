@@ -0,0 +1,189 @@
+import random
+import threading
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from app.db.session import Base
+from app.models.content import LearningContent
+from app.models.learning_path import (
+    ENROLLMENT_PROGRESS_SUMS,
+    LearningPath,
+    PathEnrollment,
+    enrollment_progress_sum_expressions,
+    path_content_association
+)
+from app.models.user import User
+from app.services.enrollment_progress_service import (
+    record_content_progress,
+    recompute_enrollment_progress,
+    run_with_version_retry
+)
+
+def _create_path(db, required_flags):
+    """创建路径及内容，required_flags 为每个内容是否必修；另外创建一个不在路径中的内容"""
+    user = User(email="incremental@example.com", full_name="Incremental User")
+    path = LearningPath(title="增量进度", subject="programming")
+    contents = [LearningContent(title=f"内容{i}", content_type="reading") for i in range(len(required_flags) + 1)]
+    db.add_all([user, path, *contents])
+    db.flush()
+    db.execute(insert(path_content_association), [
+        {"path_id": path.id, "content_id": content.id, "order_index": i, "required": required}
+        for i, (content, required) in enumerate(zip(contents, required_flags))
+    ])
+    enrollment = PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0)
+    db.add(enrollment)
+    db.commit()
+    return enrollment, contents
+
+def _write(db, enrollment, content_id, progress):
+    record_content_progress(db, enrollment, content_id, progress)
+    recompute_enrollment_progress(db, enrollment)
+    db.commit()
+    return enrollment.progress
+
+def _rebuilt_sums(db, enrollment_id):
+    expressions = enrollment_progress_sum_expressions()
+    row = db.execute(
+        select(*(expressions[name].label(name) for name in ENROLLMENT_PROGRESS_SUMS))
+        .where(PathEnrollment.id == enrollment_id)
+    ).one()
+    return dict(row._mapping)
+
+def _stored_sums(db, enrollment_id):
+    enrollment = db.get(PathEnrollment, enrollment_id, populate_existing=True)
+    return {name: getattr(enrollment, name) for name in ENROLLMENT_PROGRESS_SUMS}
+
+def test_optional_content_does_not_count_towards_required_progress(db_session, query_budget):
+    enrollment, contents = _create_path(db_session, [True, True, False])
+
+    assert _write(db_session, enrollment, contents[0].id, 100) == 50
+    assert _write(db_session, enrollment, contents[2].id, 100) == 50  # 选修内容不影响总体进度
+    assert _write(db_session, enrollment, contents[1].id, 50) == 75
+    with query_budget(10) as stats:
+        assert _write(db_session, enrollment, contents[0].id, 80) == 65
+    # 总体进度不再聚合内容进度行
+    assert not any("avg(" in statement or "sum(" in statement for statement in stats.statements)
+    # 超出范围的进度截断后计入
+    assert _write(db_session, enrollment, contents[1].id, 150) == 90
+    assert _stored_sums(db_session, enrollment.id) == _rebuilt_sums(db_session, enrollment.id)
+
+def test_path_with_only_optional_content_averages_all_content(db_session):
+    enrollment, contents = _create_path(db_session, [False, False, False, False])
+
+    assert _write(db_session, enrollment, contents[0].id, 100) == 25
+    assert _write(db_session, enrollment, contents[1].id, 60) == 40
+
+def test_path_content_changes_rebuild_progress_sums(db_session):
+    enrollment, contents = _create_path(db_session, [True, True])
+    unlisted = contents[-1]
+    # 该内容在其他路径中，但不在本路径中
+    other = LearningPath(title="其他路径", subject="programming")
+    db_session.add(other)
+    db_session.flush()
+    db_session.execute(insert(path_content_association), {
+        "path_id": other.id, "content_id": unlisted.id, "order_index": 1, "required": True
+    })
+    db_session.add(PathEnrollment(user_id=enrollment.user_id, path_id=other.id, progress=0.0))
+    db_session.commit()
+
+    assert _write(db_session, enrollment, contents[0].id, 100) == 50
+    # 不在路径中的内容单独累计，不影响总体进度
+    assert _write(db_session, enrollment, unlisted.id, 60) == 50
+    assert _stored_sums(db_session, enrollment.id)["unlisted_progress_sum"] == 60
+
+    # 路径新增一个选修内容，重建后各类累计值不变
+    extra = LearningContent(title="新增选修", content_type="reading")
+    db_session.add(extra)
+    db_session.flush()
+    db_session.execute(insert(path_content_association), {
+        "path_id": enrollment.path_id, "content_id": extra.id, "order_index": 8, "required": False
+    })
+    db_session.commit()
+    assert _stored_sums(db_session, enrollment.id) == {
+        "required_progress_sum": 100,
+        "optional_progress_sum": 0,
+        "unlisted_progress_sum": 60,
+        "unlisted_content_count": 1
+    }
+
+    # 内容加入路径后，已有进度归入必修累计，下次写入按新的必修内容数计算
+    db_session.execute(insert(path_content_association), {
+        "path_id": enrollment.path_id, "content_id": unlisted.id, "order_index": 9, "required": True
+    })
+    db_session.commit()
+    assert _stored_sums(db_session, enrollment.id) == {
+        "required_progress_sum": 160,
+        "optional_progress_sum": 0,
+        "unlisted_progress_sum": 0,
+        "unlisted_content_count": 0
+    }
+    # 总体进度在同一条UPDATE中按新的必修内容数重新计算，不必等到下次写入
+    assert db_session.get(PathEnrollment, enrollment.id).progress == round(160 / 3, 4)
+    assert _write(db_session, enrollment, contents[1].id, 0) == round(160 / 3, 4)
+
+def test_removing_unfinished_content_completes_enrollment(db_session):
+    from app.models.user_activity_summary import UserActivitySummary
+
+    enrollment, contents = _create_path(db_session, [True, True])
+    assert _write(db_session, enrollment, contents[0].id, 100) == 50
+    path_id = enrollment.path_id
+
+    # 移除未完成的必修内容后总体进度变为100，完成数和用户活动汇总随之调整
+    db_session.execute(
+        path_content_association.delete().where(
+            path_content_association.c.path_id == path_id,
+            path_content_association.c.content_id == contents[1].id
+        )
+    )
+    db_session.commit()
+    db_session.expire_all()
+    assert db_session.get(PathEnrollment, enrollment.id).progress == 100
+    assert db_session.get(LearningPath, path_id).completion_count == 1
+    summary = db_session.get(UserActivitySummary, enrollment.user_id)
+    assert (summary.active_paths, summary.completed_paths) == (0, 1)
+
+def test_concurrent_progress_writes_keep_sums_consistent(tmp_path):
+    # 需要真正的并发连接，使用文件数据库而不是共享连接的内存库
+    engine = create_engine(f"sqlite:///{tmp_path / 'progress.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as db:
+        enrollment, contents = _create_path(db, [True, True, False])
+        enrollment_id = enrollment.id
+        content_ids = [content.id for content in contents]
+
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        db = session_factory()
+        try:
+            barrier.wait()
+            for _ in range(10):
+                content_id = rng.choice(content_ids)
+                progress = rng.choice([0, 30, 70, 100])
+
+                def write():
+                    enrollment = db.get(PathEnrollment, enrollment_id, populate_existing=True)
+                    record_content_progress(db, enrollment, content_id, progress)
+                    recompute_enrollment_progress(db, enrollment)
+
+                run_with_version_retry(db, write, max_retries=1000)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    with session_factory() as db:
+        stored = _stored_sums(db, enrollment_id)
+        assert stored == _rebuilt_sums(db, enrollment_id)
+        enrollment = db.get(PathEnrollment, enrollment_id)
+        assert enrollment.progress == round(stored["required_progress_sum"] / 2, 4)
+    engine.dispose()
@@ -0,0 +1,67 @@
+import sqlite3
+from datetime import date, datetime
+from app.models.user import User
+from app.models.content import LearningContent, UserContentInteraction
+from app.models.content_interaction import ContentInteraction
+from app.services.interaction_rollup_service import (
+    archive_cold_interactions,
+    get_interaction_totals,
+    run_daily_rollup
+)
+
+def _seed(db):
+    user = User(email="rollup@example.com", full_name="Rollup User")
+    contents = [LearningContent(title=f"内容{i}", content_type="video") for i in range(2)]
+    db.add_all([user, *contents])
+    db.flush()
+    for day in range(1, 6):
+        for content in contents:
+            db.add(UserContentInteraction(
+                user_id=user.id,
+                content_id=content.id,
+                interaction_type="view",
+                progress=10.0 * day,
+                time_spent=5.0,
+                completed=day == 5,
+                rating=4,
+                created_at=datetime(2024, 3, day, 12, 0)
+            ))
+        db.add(ContentInteraction(
+            user_id=user.id,
+            content_id=contents[0].id,
+            interaction_type="quiz_attempt",
+            learning_duration=2.0,
+            created_at=datetime(2024, 3, day, 9, 0)
+        ))
+    db.commit()
+    return user.id
+
+def test_rollup_then_archive_keeps_totals(db_session, tmp_path):
+    user_id = _seed(db_session)
+    before = get_interaction_totals(db_session, [user_id])[user_id]
+    assert before["interaction_count"] == 10 and before["event_count"] == 5
+
+    # 汇总到3月3日：前三天读汇总表，之后读原始行，结果不变
+    assert run_daily_rollup(db_session, through=date(2024, 3, 3)) == 6
+    assert run_daily_rollup(db_session, through=date(2024, 3, 3), lookback_days=1) == 2
+    rolled = get_interaction_totals(db_session, [user_id])[user_id]
+    assert {k: v for k, v in rolled.items() if k != "last_activity_at"} == \
+        {k: v for k, v in before.items() if k != "last_activity_at"}
+
+    # 只能归档已汇总的天
+    archive_path = tmp_path / "archive.db"
+    moved = archive_cold_interactions(db_session, before=date(2024, 3, 10), archive_path=str(archive_path))
+    assert moved == {"user_content_interactions": 6, "content_interactions": 3}
+    assert db_session.query(UserContentInteraction).count() == 4
+
+    archived = get_interaction_totals(db_session, [user_id])[user_id]
+    assert archived["interaction_count"] == 10
+    assert archived["time_spent"] == before["time_spent"]
+    assert archived["progress_sum"] == before["progress_sum"]
+
+    with sqlite3.connect(archive_path) as archive:
+        assert archive.execute("SELECT COUNT(*) FROM user_content_interactions").fetchone()[0] == 6
+
+    # 归档过的天不会被重算成空
+    run_daily_rollup(db_session, through=date(2024, 3, 5), lookback_days=5)
+    assert get_interaction_totals(db_session, [user_id])[user_id]["interaction_count"] == 10
@@ -0,0 +1,78 @@
+from sqlalchemy.orm import sessionmaker
+from app.models.user import User
+from app.models.content import LearningContent, UserContentInteraction
+from app.models.content_interaction import ContentInteraction
+from app.models.user_activity_summary import UserActivitySummary
+from app.services.learning_event_service import (
+    EVENT_COMPLETE, EVENT_INTERACTION, EVENT_PROGRESS, EVENT_STUDY_TIME,
+    LearningEventAppender, append_events, project_pending, rebuild_projections
+)
+
+def _views(db):
+    rows = db.query(UserContentInteraction).order_by(UserContentInteraction.content_id).all()
+    return (
+        [(r.content_id, r.progress, r.time_spent, r.completed, r.engagement_feedback) for r in rows],
+        db.query(ContentInteraction).count()
+    )
+
+def test_events_project_incrementally_and_rebuild(db_engine, db_session):
+    user = User(email="events@example.com", full_name="Event User")
+    contents = [LearningContent(title=f"内容{i}", content_type="video") for i in range(2)]
+    db_session.add_all([user, *contents])
+    db_session.commit()
+    first, second = (content.id for content in contents)
+
+    append_events(db_session, [
+        {"user_id": user.id, "content_id": first, "event_type": EVENT_PROGRESS, "value": 40},
+        {"user_id": user.id, "content_id": first, "event_type": EVENT_STUDY_TIME, "value": 10},
+        {"user_id": user.id, "content_id": first, "event_type": EVENT_PROGRESS, "value": 30},
+    ])
+    db_session.commit()
+    assert project_pending(db_session, batch_size=2) == 3
+
+    # 缓冲区攒满一批才写库
+    appender = LearningEventAppender(batch_size=3, session_factory=sessionmaker(bind=db_engine))
+    appender.append(user.id, EVENT_STUDY_TIME, content_id=first, value=5)
+    appender.append(user.id, EVENT_COMPLETE, content_id=second)
+    assert appender.pending() == 2
+    appender.append(
+        user.id, EVENT_INTERACTION, content_id=second, value=3,
+        payload={"interaction_type": "quiz_attempt", "engagement_feedback": 4}
+    )
+    assert appender.pending() == 0
+
+    assert project_pending(db_session) == 3
+    # 高水位之后没有新事件，再次执行不会重复累加
+    assert project_pending(db_session) == 0
+
+    views = _views(db_session)
+    assert views == ([(first, 40, 15, False, None), (second, 0, 0, True, 4)], 1)
+    summary = db_session.get(UserActivitySummary, user.id)
+    assert (summary.interaction_count, summary.total_time_spent, summary.completed_contents) == (2, 15, 1)
+
+    assert rebuild_projections(db_session) == 6
+    db_session.expire_all()
+    assert _views(db_session) == views
+    summary = db_session.get(UserActivitySummary, user.id)
+    assert (summary.interaction_count, summary.total_time_spent, summary.completed_contents) == (2, 15, 1)
+
+def test_progress_request_reaches_read_model_after_projection(client, db_session):
+    user = User(email="lag@example.com", full_name="Lag User")
+    content = LearningContent(title="投影内容", content_type="video")
+    db_session.add_all([user, content])
+    db_session.commit()
+
+    response = client.post(f"/api/v1/users/{user.id}/progress", json={
+        "content_id": content.id, "progress": 60, "time_spent": 8
+    })
+    assert response.status_code == 200
+
+    # 请求只追加事件，投影执行前读模型中还没有这次进度
+    assert _views(db_session) == ([], 0)
+    assert db_session.get(UserActivitySummary, user.id) is None
+
+    assert project_pending(db_session) == 2
+    db_session.expire_all()
+    assert _views(db_session) == ([(content.id, 60, 8, False, None)], 0)
+    summary = db_session.get(UserActivitySummary, user.id)
+    assert (summary.interaction_count, summary.total_time_spent) == (1, 8)
@@ -0,0 +1,99 @@
+import json
+import logging
+import queue
+import threading
+from logging.handlers import QueueListener
+from app.core.config import settings
+from app.logging_config import DeferredQueueHandler, JsonFormatter, LazyPayload, SamplingFilter, parse_sampling_rates
+
+class CountingPayload(LazyPayload):
+    calls = []
+
+    def __str__(self):
+        CountingPayload.calls.append(threading.current_thread().name)
+        return super().__str__()
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.format(record)))
+
+def _pipeline(*filters):
+    log_queue = queue.Queue(maxsize=100)
+    handler = DeferredQueueHandler(log_queue)
+    for f in filters:
+        handler.addFilter(f)
+    capture = CapturingHandler()
+    listener = QueueListener(log_queue, capture)
+    logger = logging.getLogger("test.logging_pipeline")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger, handler, listener, capture
+
+def test_messages_are_formatted_on_listener_thread(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_MAX_CHARS", 20)
+    logger, handler, listener, capture = _pipeline()
+    CountingPayload.calls.clear()
+    try:
+        logger.info("响应: %s", CountingPayload({"text": "x" * 100}), extra={"requestId": "r1", "status": 200})
+        # 放入队列时尚未序列化
+        assert CountingPayload.calls == []
+        mutable = {"a": 1}
+        logger.info("参数: %s", mutable)
+        mutable["a"] = 2  # 可变参数在放入队列前已格式化
+        listener.start()
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+    assert CountingPayload.calls and "MainThread" not in CountingPayload.calls
+    first, second = capture.lines
+    assert first["message"].startswith('响应: {"text": "xxxxxxx')
+    assert first["message"].endswith("...(省略92字符)")
+    assert (first["request_id"], first["status"], first["level"]) == ("r1", 200, "INFO")
+    assert second["message"] == "参数: {'a': 1}"
+
+def test_exceptions_and_long_messages(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_MAX_MESSAGE_CHARS", 10)
+    logger, handler, listener, capture = _pipeline()
+    try:
+        try:
+            raise ValueError("出错了")
+        except ValueError:
+            logger.exception("失败 %s", "y" * 30)
+        listener.start()
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+    [line] = capture.lines
+    assert line["message"] == "失败 yyyyyyy...(省略23字符)"
+    assert "ValueError: 出错了" in line["exc_info"]
+    assert line["request_id"] == "-"
+
+def test_sampling_uses_longest_prefix_and_keeps_warnings(monkeypatch):
+    rates = parse_sampling_rates("test=0.0, test.logging_pipeline.keep=1")
+    assert rates == {"test": 0.0, "test.logging_pipeline.keep": 1.0}
+    logger, handler, listener, capture = _pipeline(SamplingFilter(rates))
+    try:
+        logger.info("丢弃")
+        logger.warning("保留警告")
+        logging.getLogger("test.logging_pipeline.keep").info("保留")
+        listener.start()
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+    assert [line["message"] for line in capture.lines] == ["保留警告", "保留"]
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DeferredQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "消息", (), None)
+    handler.handle(record)
+    handler.handle(record)
+    assert handler.dropped == 1
@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.models.user import User
+from app.services.metrics import MetricsRegistry, http_request_duration, metrics_registry
+
+def _sample_lines(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+def test_registry_renders_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests", "请求数", ("route",))
+    in_flight = registry.gauge("demo_in_flight", "执行中")
+    latency = registry.histogram("demo_seconds", "耗时", ("route",), buckets=(0.1, 1.0))
+
+    requests.labels('/a/"{id}"').inc()
+    requests.labels('/a/"{id}"').inc(2)
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.labels("/a").observe(value)
+
+    text = registry.render()
+    assert "# TYPE demo_requests counter" in text
+    assert 'demo_requests_total{route="/a/\\"{id}\\""} 3' in text
+    assert "demo_in_flight 1" in text
+    # 桶计数为累积值，边界上的值计入该桶
+    assert _sample_lines(text, "demo_seconds") == [
+        'demo_seconds_bucket{route="/a",le="0.1"} 2',
+        'demo_seconds_bucket{route="/a",le="1"} 3',
+        'demo_seconds_bucket{route="/a",le="+Inf"} 4',
+        'demo_seconds_sum{route="/a"} 3.65',
+        'demo_seconds_count{route="/a"} 4'
+    ]
+    with pytest.raises(ValueError):
+        registry.counter("demo_requests", "重复注册")
+    with pytest.raises(ValueError):
+        latency.labels("/a", "多余的标签")
+
+def test_metric_family_requires_child_factory():
+    from app.services.metrics import _Metric
+
+    class Incomplete(_Metric):
+        kind = "untyped"
+
+    with pytest.raises(TypeError):
+        Incomplete("demo_incomplete", "未实现子指标")
+
+@pytest.fixture
+def app_client(db_engine):
+    from fastapi.testclient import TestClient
+    from app.db.session import get_db
+    from app.main import app
+
+    testing_session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db():
+        db = testing_session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    metrics_registry.clear()
+    yield TestClient(app), testing_session
+    app.dependency_overrides.pop(get_db, None)
+
+def test_requests_are_recorded_by_route_template(app_client):
+    client, testing_session = app_client
+    with testing_session() as db:
+        user = User(email="metrics@example.com", full_name="Metrics User")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    assert client.get(f"/api/v1/users/{user_id}").status_code == 200
+    assert client.get(f"/api/v1/users/{user_id + 1}").status_code == 404
+    client.get("/no-such-page")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    # 路径参数不会出现在标签中
+    assert 'pathmind_http_requests_total{method="GET",route="/api/v1/users/{user_id}",status="200"} 1' in text
+    assert 'pathmind_http_requests_total{method="GET",route="/api/v1/users/{user_id}",status="404"} 1' in text
+    assert 'pathmind_http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in text
+    assert f"/api/v1/users/{user_id}\"" not in text
+    # 抓取请求本身在输出时仍在执行中
+    assert "pathmind_http_requests_in_flight 1" in text
+
+    db_count = _sample_lines(
+        text, 'pathmind_http_request_db_queries_count{method="GET",route="/api/v1/users/{user_id}"}'
+    )
+    assert db_count == ['pathmind_http_request_db_queries_count{method="GET",route="/api/v1/users/{user_id}"} 2']
+    assert 'pathmind_cache_lookups_total{cache="user",result="misses"}' in text
+    assert 'pathmind_cache_hit_ratio{cache="recommendation"}' in text
+    assert 'pathmind_admission_shed_total{route_class="cheap",reason="queue_full"} 0' in text
+
+def test_metrics_can_be_disabled(app_client, monkeypatch):
+    from app.core.config import settings
+
+    client, _ = app_client
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    client.get("/no-such-page")
+    assert not list(http_request_duration.samples())
@@ -0,0 +1,65 @@
+from datetime import datetime
+from app.models.user import User
+from app.models.content import LearningContent, UserContentInteraction
+from app.models.learning_assessment import AssessmentQuestion
+
+def _walk(client, url, limit, **params):
+    """沿着 X-Next-Cursor 依次取完所有页"""
+    pages = []
+    cursor = None
+    while True:
+        query = {"limit": limit, **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(url, params=query)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+def test_content_keyset_pages_cover_all_rows_once(client, db_session):
+    # 同一秒内创建的多行依靠id打破平局
+    db_session.add_all([LearningContent(title=f"内容{i}", content_type="video") for i in range(7)])
+    db_session.commit()
+
+    pages = _walk(client, "/api/v1/content", limit=3)
+    ids = [item["id"] for page in pages for item in page]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 7
+
+def test_user_history_keyset_pagination(client, db_session):
+    user = User(email="history@example.com", full_name="History User")
+    content = LearningContent(title="内容", content_type="video")
+    db_session.add_all([user, content])
+    db_session.flush()
+    db_session.add_all([
+        UserContentInteraction(
+            user_id=user.id,
+            content_id=content.id,
+            interaction_type="view",
+            created_at=datetime(2024, 1, 1 + i // 2)
+        )
+        for i in range(5)
+    ])
+    db_session.commit()
+
+    pages = _walk(client, f"/api/v1/users/{user.id}/history", limit=2)
+    created = [item["created_at"] for page in pages for item in page]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert created == sorted(created, reverse=True)
+
+def test_assessment_questions_cursor(client, db_session):
+    db_session.add_all([
+        AssessmentQuestion(question_text=f"问题{i}", question_type="scale", category="visual")
+        for i in range(5)
+    ])
+    db_session.commit()
+
+    pages = _walk(client, "/api/v1/assessment/questions", limit=2)
+    ids = [item["id"] for page in pages for item in page]
+    assert ids == sorted(ids) and len(ids) == 5
+
+    response = client.get("/api/v1/assessment/questions", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,108 @@
+from sqlalchemy import literal, select
+from app.models.content import LearningContent
+from app.models.learning_path import LearningPath, path_content_association
+from app.services.path_cache import PathSkeletonCache, path_skeleton_cache
+
+def _seed_path(db, count=3):
+    path = LearningPath(title="缓存路径", subject="programming")
+    contents = [
+        LearningContent(title=f"内容{i}", content_type="video", resources=[{"title": "文档", "url": "https://example.com"}])
+        for i in range(count)
+    ]
+    db.add_all([path, *contents])
+    db.flush()
+    db.execute(path_content_association.insert(), [
+        {"path_id": path.id, "content_id": content.id, "order_index": index}
+        for index, content in enumerate(contents)
+    ])
+    db.commit()
+    return path.id, [content.id for content in contents]
+
+def test_path_detail_served_from_cache_until_content_changes(client, db_session, query_budget):
+    path_id, content_ids = _seed_path(db_session)
+    url = f"/api/v1/learning-paths/{path_id}"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert [c["id"] for c in first.json()["contents"]] == content_ids
+
+    # 命中缓存时只查询路径本身
+    with query_budget(1):
+        second = client.get(url)
+    assert second.json() == first.json()
+    assert path_skeleton_cache.stats()["hits"] == 1
+
+    # 修改内容会递增所属路径的版本号，下一次读取得到新数据
+    content = db_session.get(LearningContent, content_ids[0])
+    content.title = "新标题"
+    db_session.commit()
+    third = client.get(url)
+    assert third.json()["contents"][0]["title"] == "新标题"
+
+def test_core_association_writes_invalidate_skeleton(client, db_session):
+    path_id, content_ids = _seed_path(db_session)
+    url = f"/api/v1/learning-paths/{path_id}"
+    assert len(client.get(url).json()["contents"]) == 3
+    version = db_session.get(LearningPath, path_id).skeleton_version
+
+    extra = LearningContent(title="新增内容", content_type="video")
+    db_session.add(extra)
+    db_session.flush()
+    db_session.execute(path_content_association.insert(), [{"path_id": path_id, "content_id": extra.id, "order_index": 3}])
+    db_session.commit()
+    assert db_session.get(LearningPath, path_id).skeleton_version == version + 1
+    assert [c["id"] for c in client.get(url).json()["contents"]] == [*content_ids, extra.id]
+
+    db_session.execute(
+        path_content_association.delete().where(path_content_association.c.content_id == content_ids[0])
+    )
+    db_session.commit()
+    assert db_session.get(LearningPath, path_id).skeleton_version == version + 2
+    assert [c["id"] for c in client.get(url).json()["contents"]] == [*content_ids[1:], extra.id]
+
+def test_multi_row_values_insert_refreshes_counters(db_session):
+    path_id, content_ids = _seed_path(db_session)
+    version = db_session.get(LearningPath, path_id).skeleton_version
+
+    extras = [LearningContent(title=f"新增{i}", content_type="video") for i in range(2)]
+    db_session.add_all(extras)
+    db_session.flush()
+    # 多行VALUES的绑定参数名带序号，读不出 path_id
+    db_session.execute(path_content_association.insert().values([
+        {"path_id": path_id, "content_id": extra.id, "order_index": 3 + i} for i, extra in enumerate(extras)
+    ]))
+    db_session.commit()
+    path = db_session.get(LearningPath, path_id)
+    assert path.content_count == len(content_ids) + 2
+    assert path.skeleton_version == version + 1
+
+def test_insert_from_select_refreshes_counters(db_session):
+    path_id, content_ids = _seed_path(db_session)
+    other = LearningPath(title="复制路径", subject="programming")
+    db_session.add(other)
+    db_session.commit()
+    version = other.skeleton_version
+
+    source = path_content_association
+    db_session.execute(source.insert().from_select(
+        ["path_id", "content_id", "order_index"],
+        select(literal(other.id), source.c.content_id, source.c.order_index).where(source.c.path_id == path_id)
+    ))
+    db_session.commit()
+    other = db_session.get(LearningPath, other.id)
+    assert other.content_count == len(content_ids)
+    assert other.skeleton_version == version + 1
+
+def test_cache_bounded_by_entries_and_bytes():
+    cache = PathSkeletonCache(max_entries=2, max_bytes=100)
+    for path_id in range(3):
+        cache.put(path_id, 1, {"title": "x" * 10})
+    assert cache.get(0, 1) is None
+    assert cache.get(2, 1) is not None
+    assert cache.get(2, 2) is None  # 版本不匹配视为未命中
+
+    cache.put(3, 1, {"title": "x" * 80})
+    stats = cache.stats()
+    assert stats["bytes"] <= 100
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 3
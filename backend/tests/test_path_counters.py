@@ -0,0 +1,53 @@
+from sqlalchemy import delete, update
+from app.models.user import User
+from app.models.content import LearningContent
+from app.models.learning_path import LearningPath, PathEnrollment, path_content_association
+from app.services.path_counter_service import check_path_counters, repair_path_counters
+
+def _counters(db, path_id):
+    db.expire_all()
+    path = db.get(LearningPath, path_id)
+    return (path.content_count, path.total_estimated_minutes, path.enrollment_count, path.completion_count)
+
+def test_path_counters_follow_association_and_enrollment_writes(db_session):
+    users = [User(email=f"counter{i}@example.com") for i in range(2)]
+    path = LearningPath(title="计数路径", subject="programming")
+    contents = [LearningContent(title=f"内容{i}", content_type="video", estimated_minutes=10 * (i + 1)) for i in range(3)]
+    db_session.add_all([*users, path, *contents])
+    db_session.flush()
+
+    # 直接写入关联表
+    db_session.execute(path_content_association.insert(), [
+        {"path_id": path.id, "content_id": content.id, "order_index": index}
+        for index, content in enumerate(contents[:2])
+    ])
+    db_session.commit()
+    assert _counters(db_session, path.id) == (2, 30, 0, 0)
+
+    # 修改内容时长、删除关联行
+    contents[0].estimated_minutes = 15
+    db_session.commit()
+    db_session.execute(delete(path_content_association).where(path_content_association.c.content_id == contents[1].id))
+    db_session.commit()
+    assert _counters(db_session, path.id) == (1, 15, 0, 0)
+
+    # 注册、完成、删除注册
+    enrollments = [PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0) for user in users]
+    db_session.add_all(enrollments)
+    db_session.commit()
+    enrollments[0].progress = 100.0
+    db_session.commit()
+    assert _counters(db_session, path.id) == (1, 15, 2, 1)
+    db_session.delete(enrollments[0])
+    db_session.commit()
+    assert _counters(db_session, path.id) == (1, 15, 1, 0)
+
+    # 绕过维护逻辑的写入由检查命令发现并修复
+    db_session.execute(update(LearningPath).values(content_count=99, enrollment_count=0))
+    db_session.commit()
+    mismatches = check_path_counters(db_session)
+    assert [item["path_id"] for item in mismatches] == [path.id]
+    assert mismatches[0]["counters"]["content_count"] == {"stored": 99, "actual": 1}
+    assert repair_path_counters(db_session, batch_size=1) == 1
+    assert check_path_counters(db_session) == []
+    assert _counters(db_session, path.id) == (1, 15, 1, 0)
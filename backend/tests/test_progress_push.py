@@ -0,0 +1,169 @@
+import asyncio
+import json
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from app.models.content import LearningContent
+from app.models.learning_path import LearningPath, PathEnrollment, path_content_association
+from app.models.user import User
+from app.services import recommendation_cache as recommendation_cache_module
+from app.services.enrollment_progress_service import record_content_progress, recompute_enrollment_progress
+from app.services.progress_push import progress_broker, progress_stream
+from app.services.recommendation_cache import get_recommended_paths
+
+class FakeAIService:
+    async def generate_content_recommendations(self, user_id, limit=3):
+        return [{"content": {"id": 7, "title": "推荐内容"}, "explanation": "适合你", "approach_suggestion": "多练习"}]
+
+def _seed(db_session):
+    user = User(email="push@example.com", full_name="Push User")
+    path = LearningPath(title="实时推送", subject="programming")
+    contents = [LearningContent(title=f"内容{i}", content_type="reading") for i in range(2)]
+    db_session.add_all([user, path, *contents])
+    db_session.flush()
+    db_session.execute(insert(path_content_association), [
+        {"path_id": path.id, "content_id": content.id, "order_index": i, "required": True}
+        for i, content in enumerate(contents)
+    ])
+    enrollment = PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0)
+    db_session.add(enrollment)
+    db_session.commit()
+    return enrollment, [content.id for content in contents]
+
+def _write(db_session, enrollment, content_id, progress, study_time=0):
+    record_content_progress(db_session, enrollment, content_id, progress, study_time)
+    recompute_enrollment_progress(db_session, enrollment)
+    db_session.commit()
+
+def _parse(chunk):
+    lines = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_commits_notify_subscribers_and_rollbacks_do_not(db_session):
+    enrollment, content_ids = _seed(db_session)
+    user_id, path_id = enrollment.user_id, enrollment.path_id
+
+    async def run():
+        subscription = progress_broker.subscribe(user_id)
+        record_content_progress(db_session, enrollment, content_ids[0], 100)
+        db_session.flush()
+        db_session.rollback()
+        await _settle()
+        assert subscription.queue.empty()
+
+        _write(db_session, enrollment, content_ids[0], 100)
+        await _settle()
+        assert subscription.queue.get_nowait() == {"type": "progress", "path_id": path_id}
+        progress_broker.unsubscribe(subscription)
+
+    asyncio.run(run())
+    assert progress_broker.stats()["published"] == 1
+
+def test_stream_sends_snapshot_then_coalesced_updates(db_engine, db_session, query_budget):
+    enrollment, content_ids = _seed(db_session)
+    user_id = enrollment.user_id
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    async def run():
+        subscription = progress_broker.subscribe(user_id)
+        stream = progress_stream(session_factory, subscription, heartbeat=0.05)
+
+        event_name, data = _parse(await stream.__anext__())
+        assert event_name == "progress" and data[0]["progress"] == 0
+
+        # 空闲时只发送心跳
+        assert await stream.__anext__() == ": keep-alive\n\n"
+
+        _write(db_session, enrollment, content_ids[0], 100, study_time=30)
+        _write(db_session, enrollment, content_ids[1], 50)
+        await _settle()
+        with query_budget(2):
+            event_name, data = _parse(await stream.__anext__())
+        assert event_name == "progress"
+        [state] = data
+        assert state["progress"] == 75
+        assert state["total_study_time"] == 0.5
+        assert state["content_progress"] == {str(content_ids[0]): 100, str(content_ids[1]): 50}
+
+        await stream.aclose()
+        assert not progress_broker.has_subscribers(user_id)
+
+    asyncio.run(run())
+
+def test_stream_reads_run_off_the_event_loop(db_engine, db_session, monkeypatch):
+    import threading
+    from app.services import progress_push
+
+    enrollment, content_ids = _seed(db_session)
+    user_id = enrollment.user_id
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    read_threads = []
+
+    def get_enrollment_states(db, *args):
+        read_threads.append(threading.current_thread())
+        return []
+
+    monkeypatch.setattr(progress_push, "get_enrollment_states", get_enrollment_states)
+
+    async def run():
+        subscription = progress_broker.subscribe(user_id)
+        stream = progress_stream(session_factory, subscription, heartbeat=1)
+        await stream.__anext__()
+        _write(db_session, enrollment, content_ids[0], 100)
+        await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(run())
+    # 快照和通知后的读取都在线程池中执行，不阻塞事件循环
+    assert len(read_threads) == 2
+    assert threading.main_thread() not in read_threads
+
+def test_new_recommendations_are_pushed(db_engine, db_session, monkeypatch):
+    monkeypatch.setattr(recommendation_cache_module, "get_ai_service", lambda: FakeAIService())
+    enrollment, _ = _seed(db_session)
+    user_id = enrollment.user_id
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    async def run():
+        subscription = progress_broker.subscribe(user_id)
+        stream = progress_stream(session_factory, subscription, heartbeat=1)
+        await stream.__anext__()
+
+        await get_recommended_paths(db_session, user_id)
+        event_name, data = _parse(await stream.__anext__())
+        assert event_name == "recommendations"
+        assert data[0]["title"] == "推荐内容"
+        await stream.aclose()
+
+    asyncio.run(run())
+
+def test_projected_content_progress_is_pushed(db_engine, db_session):
+    from app.services.learning_event_service import project_pending
+    from app.services.user_service import record_user_progress
+
+    enrollment, content_ids = _seed(db_session)
+    user_id = enrollment.user_id
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    async def run():
+        subscription = progress_broker.subscribe(user_id)
+        stream = progress_stream(session_factory, subscription, heartbeat=1)
+        await stream.__anext__()
+
+        # 请求只追加事件，投影提交后才推送内容进度
+        await record_user_progress(user_id, content_ids[0], {"progress": 40, "time_spent": 12}, db_session)
+        await _settle()
+        assert subscription.queue.empty()
+        project_pending(db_session)
+        event_name, data = _parse(await stream.__anext__())
+        assert event_name == "content_progress"
+        assert data == [{"content_id": content_ids[0], "progress": 40, "time_spent": 12, "completed": False}]
+        await stream.aclose()
+
+    asyncio.run(run())
+
+def test_stream_unknown_user(client):
+    assert client.get("/api/v1/progress/stream/999").status_code == 404
@@ -0,0 +1,96 @@
+from sqlalchemy import func, insert, select
+from app.core.config import settings
+from app.models.content import LearningContent
+from app.models.learning_path import (
+    LearningPath,
+    PathEnrollment,
+    ProgressSyncKey,
+    StudySession,
+    path_content_association
+)
+from app.models.user import User
+
+def _seed(db_session):
+    user = User(email="sync@example.com", full_name="Sync User")
+    path = LearningPath(title="离线同步", subject="programming")
+    contents = [LearningContent(title=f"内容{i}", content_type="reading") for i in range(2)]
+    db_session.add_all([user, path, *contents])
+    db_session.flush()
+    db_session.execute(insert(path_content_association), [
+        {"path_id": path.id, "content_id": content.id, "order_index": i, "required": True}
+        for i, content in enumerate(contents)
+    ])
+    db_session.commit()
+    return user.id, path.id, [content.id for content in contents]
+
+def _events(path_id, content_ids):
+    first, second = content_ids
+    return [
+        {"idempotency_key": "k1", "type": "progress", "path_id": path_id, "content_id": first,
+         "status": "进行中", "client_ts": "2026-10-19T08:00:00Z"},
+        {"idempotency_key": "k2", "type": "session", "path_id": path_id, "content_id": first, "study_time": 30,
+         "session_start": "2026-10-19T08:00:00Z", "session_end": "2026-10-19T08:30:00Z",
+         "client_ts": "2026-10-19T08:30:00Z"},
+        {"idempotency_key": "k3", "type": "progress", "path_id": path_id, "content_id": first,
+         "status": "已完成", "client_ts": "2026-10-19T08:31:00Z"},
+        {"idempotency_key": "k4", "type": "progress", "path_id": path_id, "content_id": second,
+         "progress": 40, "client_ts": "2026-10-19T08:32:00Z"}
+    ]
+
+def test_sync_applies_events_in_order_and_returns_merged_state(client, db_session):
+    user_id, path_id, content_ids = _seed(db_session)
+
+    response = client.post("/api/v1/progress/sync", json={"user_id": user_id, "events": _events(path_id, content_ids)})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] == ["k1", "k2", "k3", "k4"]
+    assert body["duplicates"] == [] and body["rejected"] == []
+    # 未注册时自动注册；会话事件不改变内容进度，后到的状态覆盖先到的
+    [state] = body["paths"]
+    assert state["path_id"] == path_id
+    assert state["content_progress"] == {str(content_ids[0]): 100, str(content_ids[1]): 40}
+    assert state["progress"] == 70
+    assert state["content_study_time"] == {str(content_ids[0]): 30}
+    assert state["total_study_time"] == 0.5
+    assert state["last_activity_at"].startswith("2026-10-19T08:32:00")
+
+def test_resending_a_batch_does_not_double_count(client, db_session):
+    user_id, path_id, content_ids = _seed(db_session)
+    events = _events(path_id, content_ids)
+    client.post("/api/v1/progress/sync", json={"user_id": user_id, "events": events[:2]})
+
+    # 网络失败后客户端重发整批，并附带新的事件；同一批内重复的键也只应用一次
+    body = client.post(
+        "/api/v1/progress/sync", json={"user_id": user_id, "events": events + [events[3]]}
+    ).json()
+    assert body["applied"] == ["k3", "k4"]
+    assert body["duplicates"] == ["k1", "k2", "k4"]
+    assert body["paths"][0]["total_study_time"] == 0.5
+    assert db_session.scalar(select(func.count()).select_from(StudySession)) == 1
+    assert db_session.scalar(select(func.count()).select_from(ProgressSyncKey)) == 4
+
+def test_invalid_events_are_rejected_without_failing_batch(client, db_session):
+    user_id, path_id, content_ids = _seed(db_session)
+    events = [
+        {"idempotency_key": "bad-path", "type": "progress", "path_id": 999, "content_id": content_ids[0],
+         "progress": 10, "client_ts": "2026-10-19T08:00:00Z"},
+        {"idempotency_key": "bad-status", "type": "progress", "path_id": path_id, "content_id": content_ids[0],
+         "status": "未知", "client_ts": "2026-10-19T08:01:00Z"},
+        {"idempotency_key": "ok", "type": "progress", "path_id": path_id, "content_id": content_ids[0],
+         "progress": 100, "client_ts": "2026-10-19T08:02:00Z"}
+    ]
+
+    body = client.post("/api/v1/progress/sync", json={"user_id": user_id, "events": events}).json()
+    assert body["applied"] == ["ok"]
+    assert [item["idempotency_key"] for item in body["rejected"]] == ["bad-path", "bad-status"]
+    assert body["paths"][0]["progress"] == 50
+    enrollment = db_session.query(PathEnrollment).filter(PathEnrollment.user_id == user_id).one()
+    assert enrollment.progress == 50
+
+def test_sync_limits(client, db_session, monkeypatch):
+    user_id, path_id, content_ids = _seed(db_session)
+    assert client.post("/api/v1/progress/sync", json={"user_id": 999, "events": []}).status_code == 404
+
+    monkeypatch.setattr(settings, "PROGRESS_SYNC_MAX_EVENTS", 2)
+    response = client.post("/api/v1/progress/sync", json={"user_id": user_id, "events": _events(path_id, content_ids)})
+    assert response.status_code == 413
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.db.query_counter import count_engine_queries, count_queries
+from app.models.user import User
+from app.models.content import LearningContent, ContentTag
+from app.models.learning_assessment import AssessmentQuestion, LearningStyleAssessment, UserResponse
+from app.models.learning_path import LearningPath, PathEnrollment, path_content_association
+from app.services.learning_path_service import get_user_learning_paths
+
+def _seed(db, count=5):
+    user = User(email="budget@example.com", full_name="Budget User")
+    tags = [ContentTag(name=f"tag-{i}") for i in range(3)]
+    contents = [
+        LearningContent(title=f"内容{i}", content_type="video", tags=tags)
+        for i in range(count)
+    ]
+    questions = [
+        AssessmentQuestion(question_text=f"问题{i}", question_type="scale", category="visual")
+        for i in range(count)
+    ]
+    db.add_all([user, *tags, *contents, *questions])
+    db.flush()
+
+    assessment = LearningStyleAssessment(user_id=user.id, visual_score=50.0, assessment_data={})
+    db.add(assessment)
+    db.flush()
+    db.add_all([
+        UserResponse(assessment_id=assessment.id, question_id=q.id, response_value={"answer": "3"})
+        for q in questions
+    ])
+
+    for i in range(count):
+        path = LearningPath(title=f"路径{i}", subject="programming")
+        db.add(path)
+        db.flush()
+        db.execute(path_content_association.insert(), [
+            {"path_id": path.id, "content_id": content.id, "order_index": index}
+            for index, content in enumerate(contents)
+        ])
+        db.add(PathEnrollment(user_id=user.id, path_id=path.id, progress=0.0))
+    db.commit()
+    return user, contents, assessment
+
+def test_content_list_query_budget(client, db_session, query_budget):
+    _seed(db_session, count=10)
+    with query_budget(2):
+        response = client.get("/api/v1/content", params={"limit": 10})
+    assert response.status_code == 200
+    assert all(len(item["tags"]) == 3 for item in response.json())
+
+def test_content_detail_query_budget(client, db_session, query_budget):
+    _, contents, _ = _seed(db_session)
+    url = f"/api/v1/content/{contents[0].id}"
+    with query_budget(2):
+        response = client.get(url)
+    assert response.status_code == 200
+
+def test_assessment_details_query_budget(client, db_session, query_budget):
+    _, _, assessment = _seed(db_session, count=10)
+    url = f"/api/v1/assessment/assessment/{assessment.id}"
+    with query_budget(2):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.json()["responses"]) == 10
+
+def test_user_learning_paths_query_budget(db_session, query_budget):
+    user, _, _ = _seed(db_session, count=10)
+    user_id = user.id
+    with query_budget(1):
+        paths = asyncio.run(get_user_learning_paths(user_id, db_session))
+    assert len(paths) == 10
+    assert all(path["content_count"] == 10 for path in paths)
+
+def test_failed_statements_do_not_leave_timing_state(db_engine):
+    with db_engine.connect() as conn:
+        with count_queries() as stats, count_engine_queries(db_engine) as engine_stats:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+        # 失败的语句不计数，也不在连接上遗留开始时间
+        assert (stats.count, engine_stats.count) == (1, 1)
+        assert not any("start" in key for key in conn.info)
+        assert 0 <= stats.total_time < 1
@@ -0,0 +1,71 @@
+from app.models.user import User
+from app.models.learning_assessment import AssessmentQuestion, LearningStyleAssessment, UserResponse
+from app.services.question_catalog import question_catalog
+
+CATEGORIES = ("visual", "auditory", "kinesthetic", "reading")
+
+def _seed(db_session, count):
+    user = User(email="catalog@example.com", full_name="Catalog User")
+    db_session.add(user)
+    db_session.add_all([
+        AssessmentQuestion(question_text=f"问题{i}", question_type="scale", category=CATEGORIES[i % 4])
+        for i in range(count)
+    ])
+    db_session.commit()
+    return user, [q.id for q in db_session.query(AssessmentQuestion.id).order_by(AssessmentQuestion.id)]
+
+def _submission(user_id, question_ids):
+    return {
+        "user_id": user_id,
+        "responses": [
+            {"question_id": question_id, "response_value": {"value": 4}, "response_time": 1.5}
+            for question_id in question_ids
+        ]
+    }
+
+def test_questions_served_from_catalog_and_invalidated_on_create(client, db_session, query_budget):
+    _seed(db_session, 3)
+
+    assert len(client.get("/api/v1/assessment/questions").json()) == 3
+    with query_budget(0):
+        assert len(client.get("/api/v1/assessment/questions").json()) == 3
+
+    created = client.post("/api/v1/assessment/questions", json={
+        "question_text": "新问题", "question_type": "scale", "options": {}, "category": "visual", "weight": 1.0
+    })
+    assert created.status_code == 200
+    questions = client.get("/api/v1/assessment/questions").json()
+    assert [q["question_text"] for q in questions][-1] == "新问题"
+
+def test_submit_query_count_independent_of_response_count(client, db_session, query_budget):
+    user, question_ids = _seed(db_session, 100)
+    # 预热题库；首次提交还会写入用户的学习风格，不计入比较
+    client.post("/api/v1/assessment/submit", json=_submission(user.id, question_ids[:1]))
+
+    with query_budget(100) as small:
+        assert client.post("/api/v1/assessment/submit", json=_submission(user.id, question_ids[:10])).status_code == 200
+    with query_budget(100) as large:
+        assert client.post("/api/v1/assessment/submit", json=_submission(user.id, question_ids)).status_code == 200
+    assert large.count == small.count
+    assert db_session.query(UserResponse).count() == 111
+
+def test_submit_unknown_question_creates_nothing(client, db_session):
+    user, question_ids = _seed(db_session, 2)
+
+    response = client.post("/api/v1/assessment/submit", json=_submission(user.id, question_ids + [9999]))
+    assert response.status_code == 404
+    assert db_session.query(LearningStyleAssessment).count() == 0
+    assert db_session.query(UserResponse).count() == 0
+
+def test_lookup_sees_questions_added_outside_the_catalog(db_session):
+    _, question_ids = _seed(db_session, 2)
+    assert set(question_catalog.lookup(db_session, question_ids)) == set(question_ids)
+
+    # 其他进程新增的题目不在快照中，查询确认后快照失效
+    extra = AssessmentQuestion(question_text="外部新增", question_type="scale", category="visual")
+    db_session.add(extra)
+    db_session.commit()
+    found = question_catalog.lookup(db_session, question_ids + [extra.id, 9999])
+    assert set(found) == set(question_ids) | {extra.id}
+    assert question_catalog.stats()["loaded"] is False
+    assert extra.id in question_catalog.get(db_session).by_id
@@ -0,0 +1,79 @@
+from sqlalchemy import inspect
+from app.models.content import LearningContent, ContentTag
+from app.models.learning_path import LearningPath
+from app.services.read_models import (
+    CONTENT_DETAIL_FIELDS, CONTENT_LIST_FIELDS, get_content_fields, list_content_fields, load_content_tags
+)
+
+def _seed_contents(db_session, count):
+    tag = ContentTag(name="python")
+    contents = [
+        LearningContent(
+            title=f"内容{i}",
+            content_type="article",
+            content_data={"body": "x" * 1000},
+            resources=[{"type": "link", "url": f"https://example.com/{i}"}]
+        )
+        for i in range(count)
+    ]
+    contents[0].tags.append(tag)
+    db_session.add_all(contents)
+    db_session.commit()
+    return contents
+
+def test_list_content_fields_pages_through_select(db_session):
+    _seed_contents(db_session, 5)
+
+    first, cursor = list_content_fields(db_session, CONTENT_LIST_FIELDS, limit=3)
+    second, last_cursor = list_content_fields(db_session, CONTENT_LIST_FIELDS, limit=3, cursor=cursor)
+    assert all(tuple(item) == CONTENT_LIST_FIELDS for item in first)
+    assert [len(first), len(second)] == [3, 2]
+    assert last_cursor is None
+    ids = [item["id"] for item in first + second]
+    assert ids == sorted(ids, reverse=True)
+    # 投影行不进入会话
+    assert not any(isinstance(obj, LearningContent) for obj in db_session.identity_map.values())
+
+def test_content_detail_and_tags(db_session):
+    contents = _seed_contents(db_session, 2)
+    content_id = contents[0].id
+
+    columns = CONTENT_DETAIL_FIELDS + ("resources",)
+    detail = get_content_fields(db_session, content_id, columns)
+    assert detail["content_data"] == {"body": "x" * 1000}
+    assert detail["resources"][0]["url"] == "https://example.com/0"
+    assert get_content_fields(db_session, 9999, columns) is None
+    # 只查询请求的列
+    assert get_content_fields(db_session, content_id, ("id", "title")) == {"id": content_id, "title": "内容0"}
+
+    tags = load_content_tags(db_session, [c.id for c in contents])
+    assert [tag.name for tag in tags[content_id]] == ["python"]
+    assert contents[1].id not in tags
+
+def test_heavy_json_columns_are_deferred(db_session):
+    contents = _seed_contents(db_session, 1)
+    db_session.add(LearningPath(title="路径", subject="python", path_metadata={"big": "y" * 1000}))
+    db_session.commit()
+    db_session.expire_all()
+
+    content = db_session.query(LearningContent).get(contents[0].id)
+    assert "content_data" not in inspect(content).dict
+    assert "resources" not in inspect(content).dict
+    path = db_session.query(LearningPath).first()
+    assert "path_metadata" not in inspect(path).dict
+    # 访问时才按需加载
+    assert content.content_data == {"body": "x" * 1000}
+
+def test_content_endpoints_keep_response_shape(client, db_session):
+    contents = _seed_contents(db_session, 2)
+
+    listing = client.get("/api/v1/content", params={"limit": 10})
+    assert listing.status_code == 200
+    item = next(i for i in listing.json() if i["id"] == contents[0].id)
+    assert item["tags"] == ["python"]
+
+    detail = client.get(f"/api/v1/content/{contents[0].id}")
+    assert detail.status_code == 200
+    body = detail.json()
+    assert body["content_data"] == {"body": "x" * 1000}
+    assert body["tags"] == ["python"]
@@ -0,0 +1,148 @@
+import asyncio
+from app.models.learning_path import LearningPath
+from app.models.user import User
+from app.services import recommendation_cache as recommendation_cache_module
+from app.services.recommendation_cache import RecommendationCache, recommendation_cache
+
+class CountingLoader:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("AI不可用")
+        return [{"version": self.calls}], None
+
+def _age(cache, user_id, seconds):
+    """把缓存条目的计算时间提前 seconds 秒"""
+    computed_at, soft_ttl, value = cache._entries[user_id]
+    cache._entries[user_id] = (computed_at - seconds, soft_ttl, value)
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_soft_ttl_serves_stale_and_refreshes_in_background():
+    cache = RecommendationCache(soft_ttl=60, hard_ttl=3600, max_entries=10)
+    load = CountingLoader()
+
+    async def run():
+        assert await cache.get(1, load) == [{"version": 1}]
+        assert await cache.get(1, load) == [{"version": 1}]
+        assert load.calls == 1
+
+        # 超过软TTL：立即返回旧结果，后台刷新
+        _age(cache, 1, 120)
+        assert await cache.get(1, load) == [{"version": 1}]
+        await _settle()
+        assert load.calls == 2
+        assert await cache.get(1, load) == [{"version": 2}]
+
+        # 超过硬TTL：阻塞等待重新计算
+        _age(cache, 1, 7200)
+        assert await cache.get(1, load) == [{"version": 3}]
+
+    asyncio.run(run())
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (2, 1, 2)
+
+def test_concurrent_misses_share_one_load():
+    cache = RecommendationCache(soft_ttl=60, hard_ttl=3600, max_entries=10)
+    load = CountingLoader(delay=0.01)
+
+    async def run():
+        return await asyncio.gather(*[cache.get(1, load) for _ in range(5)])
+
+    assert asyncio.run(run()) == [[{"version": 1}]] * 5
+    assert load.calls == 1
+
+def test_failed_background_refresh_keeps_stale_entry():
+    cache = RecommendationCache(soft_ttl=60, hard_ttl=3600, max_entries=10)
+
+    async def run():
+        await cache.get(1, CountingLoader())
+        _age(cache, 1, 120)
+        assert await cache.get(1, CountingLoader(fail=True)) == [{"version": 1}]
+        await _settle()
+
+    asyncio.run(run())
+    assert cache.stats()["refresh_failures"] == 1
+    assert cache.stats()["entries"] == 1
+
+def test_invalidation_only_discards_that_users_inflight_load():
+    cache = RecommendationCache(soft_ttl=60, hard_ttl=3600, max_entries=10)
+    loads = {user_id: CountingLoader(delay=0.01) for user_id in (1, 2)}
+
+    async def run():
+        pending = [asyncio.ensure_future(cache.get(user_id, load)) for user_id, load in loads.items()]
+        await asyncio.sleep(0)
+        # 用户1在计算期间发生变化：结果照常返回给等待者，但不写入缓存；用户2不受影响
+        cache.invalidate([1])
+        assert await asyncio.gather(*pending) == [[{"version": 1}]] * 2
+
+    asyncio.run(run())
+    assert cache.peek(1) is None
+    assert cache.peek(2) == [{"version": 1}]
+    assert cache._generations == {}
+
+def test_short_soft_ttl_entry_refreshes_sooner():
+    cache = RecommendationCache(soft_ttl=60, hard_ttl=3600, max_entries=10)
+    load = CountingLoader()
+
+    async def run():
+        async def fallback():
+            return [{"version": "fallback"}], 5
+
+        assert await cache.get(1, fallback) == [{"version": "fallback"}]
+        _age(cache, 1, 10)
+        # 回退结果超过自己的软TTL：先返回它，后台重新计算
+        assert await cache.get(1, load) == [{"version": "fallback"}]
+        await _settle()
+        assert await cache.get(1, load) == [{"version": 1}]
+
+    asyncio.run(run())
+    assert load.calls == 1
+
+def test_ai_failure_falls_back_with_short_ttl(db_session, monkeypatch):
+    class FailingAIService:
+        async def generate_content_recommendations(self, user_id, limit=3):
+            raise RuntimeError("AI不可用")
+
+    monkeypatch.setattr(recommendation_cache_module, "get_ai_service", lambda: FailingAIService())
+    user = User(email="fallback@example.com", full_name="Fallback User")
+    db_session.add_all([user, LearningPath(title="数据库兜底", subject="programming")])
+    db_session.commit()
+
+    paths = asyncio.run(recommendation_cache_module.get_recommended_paths(db_session, user.id))
+    assert [path["title"] for path in paths] == ["数据库兜底"]
+    assert recommendation_cache._entries[user.id][1] == recommendation_cache_module.settings.RECOMMENDATION_FALLBACK_TTL
+
+def test_endpoint_cached_and_invalidated_on_enrollment(client, db_session, monkeypatch):
+    class FakeAIService:
+        calls = 0
+
+        async def generate_content_recommendations(self, user_id, limit=3):
+            FakeAIService.calls += 1
+            return [{"content": {"id": 7, "title": "推荐内容"}, "explanation": "适合你", "approach_suggestion": "多练习"}]
+
+    monkeypatch.setattr(recommendation_cache_module, "get_ai_service", lambda: FakeAIService())
+    user = User(email="rec@example.com", full_name="Rec User")
+    path = LearningPath(title="路径", subject="programming")
+    db_session.add_all([user, path])
+    db_session.commit()
+
+    for _ in range(3):
+        response = client.get("/api/v1/learning-paths/recommended", params={"user_id": user.id})
+        assert response.status_code == 200
+        assert response.json()[0]["title"] == "推荐内容"
+    assert FakeAIService.calls == 1
+
+    # 注册新路径后推荐失效，下次请求重新计算
+    assert client.post("/api/v1/learning-paths/enroll", json={"user_id": user.id, "path_id": path.id}).status_code == 200
+    assert recommendation_cache.stats()["invalidations"] == 1
+    client.get("/api/v1/learning-paths/recommended", params={"user_id": user.id})
+    assert FakeAIService.calls == 2
@@ -0,0 +1,25 @@
+from app.models.learning_path import LearningPath
+from app.utils.responses import APIJSONResponse
+
+def test_app_uses_orjson_response_by_default():
+    from app.main import app
+    assert app.router.default_response_class is APIJSONResponse
+
+def test_orjson_response_accepts_non_string_keys():
+    response = APIJSONResponse(content={1: 50.0, "ok": True})
+    assert response.body == b'{"1":50.0,"ok":true}'
+    assert response.media_type == "application/json"
+
+def test_path_detail_response_model_keeps_shape(client, db_session):
+    path = LearningPath(title="路径", subject="python", path_metadata={"goals": ["目标"]})
+    db_session.add(path)
+    db_session.commit()
+
+    body = client.get(f"/api/v1/learning-paths/{path.id}").json()
+    # 骨架中的内部字段（节点、预计时长文本）不会出现在响应中
+    assert set(body) == {
+        "id", "title", "description", "subject", "difficulty_level",
+        "estimated_hours", "metadata", "contents", "user_progress"
+    }
+    assert body["metadata"] == {"goals": ["目标"]}
+    assert body["user_progress"] is None
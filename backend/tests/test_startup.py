@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+from app.db.init_db import (
+    ensure_schema,
+    get_alembic_config,
+    get_alembic_script_directory,
+    get_database_revision,
+    seed_default_data
+)
+from app.models.user import User
+from app.models.learning_assessment import AssessmentQuestion
+from app.models.system_marker import SystemMarker
+
+def test_ensure_schema_creates_and_stamps_new_database():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    head = get_alembic_script_directory().get_current_head()
+
+    assert ensure_schema(engine) is True
+    assert get_database_revision(engine) == head
+    # 第二次启动只比较版本，不再建表
+    assert ensure_schema(engine) is False
+
+def test_seed_default_data_runs_once(db_session):
+    assert seed_default_data(db_session) is True
+    assert seed_default_data(db_session) is False
+
+    assert db_session.query(SystemMarker).count() == 1
+    assert db_session.query(User).count() == 1
+    assert db_session.query(AssessmentQuestion).count() == 4
+
+def test_ensure_schema_rejects_unmanaged_database_with_tables():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE learning_contents (id INTEGER PRIMARY KEY, title VARCHAR)"))
+
+    # 旧的数据库不能按模型建表后直接标记为最新版本，create_all 不会补充已有表的列
+    with pytest.raises(RuntimeError):
+        ensure_schema(engine)
+    assert get_database_revision(engine) is None
+
+def test_ensure_schema_upgrades_managed_database(tmp_path):
+    from alembic import command
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'upgrade.db'}")
+    head = get_alembic_script_directory().get_current_head()
+    ensure_schema(engine)
+    config = get_alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.downgrade(config, "-1")
+    assert get_database_revision(engine) != head
+    assert "progress_sync_keys" not in inspect(engine).get_table_names()
+
+    assert ensure_schema(engine) is True
+    assert get_database_revision(engine) == head
+    assert "progress_sync_keys" in inspect(engine).get_table_names()
+    engine.dispose()
+
+def test_seed_default_data_is_atomic(db_session, monkeypatch):
+    from app.db import init_db
+
+    def fail(db):
+        raise RuntimeError("填充失败")
+
+    monkeypatch.setattr(init_db, "init_learning_content", fail)
+    with pytest.raises(RuntimeError):
+        seed_default_data(db_session)
+
+    # 已写入的测试用户和评估问题随标记行一起回滚
+    assert db_session.query(SystemMarker).count() == 0
+    assert db_session.query(User).count() == 0
+    assert db_session.query(AssessmentQuestion).count() == 0
+
+def test_baseline_database_upgrades_to_model_schema(tmp_path):
+    from alembic import command
+    from alembic.autogenerate import compare_metadata
+    from alembic.runtime.migration import MigrationContext
+    from sqlalchemy.orm import Session
+    from app.db.session import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    ensure_schema(engine)
+    config = get_alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.downgrade(config, "bd152e2f5817")
+    assert "system_markers" not in inspect(engine).get_table_names()
+
+    # 从基础版本升级后，数据库结构与模型一致
+    assert ensure_schema(engine) is True
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    # 默认数据填充依赖 system_markers 表
+    with Session(engine) as db:
+        assert seed_default_data(db) is True
+    engine.dispose()
@@ -0,0 +1,40 @@
+import asyncio
+from app.models.user import User
+from app.services.user_cache import get_user_snapshot, user_cache
+from app.services.user_service import update_user_learning_style
+
+def test_user_lookups_are_cached_and_invalidated_on_commit(client, db_session, query_budget):
+    user = User(email="cache@example.com", full_name="Cache User", learning_style={"visual": 60})
+    db_session.add(user)
+    db_session.commit()
+
+    assert client.get(f"/api/v1/users/{user.id}").status_code == 200
+    # 第二次请求不再查询users表
+    with query_budget(0):
+        response = client.get(f"/api/v1/users/{user.id}")
+    assert response.json()["learning_style"] == {"visual": 60}
+
+    # 不存在的用户同样缓存；提交新用户后对应ID失效
+    missing_id = user.id + 1
+    assert client.get(f"/api/v1/users/{missing_id}").status_code == 404
+    db_session.add(User(id=missing_id, email="late@example.com"))
+    db_session.commit()
+    assert client.get(f"/api/v1/users/{missing_id}").status_code == 200
+
+    # 通过ORM修改并提交后，下一次读取拿到新值
+    assert asyncio.run(update_user_learning_style(user.id, {"visual": 90}, db_session))
+    assert client.get(f"/api/v1/users/{user.id}").json()["learning_style"] == {"visual": 90}
+
+    # 事务内读到的未提交数据在回滚后失效
+    db_session.get(User, user.id).full_name = "Rolled Back"
+    db_session.flush()
+    user_cache.invalidate([user.id])
+    assert get_user_snapshot(db_session, user.id).full_name == "Rolled Back"
+    db_session.rollback()
+    assert get_user_snapshot(db_session, user.id).full_name == "Cache User"
+
+    stats = user_cache.stats()
+    assert stats["hits"] >= 1 and stats["invalidations"] >= 4
+
+    with user_cache.bypassed(), query_budget(1):
+        assert get_user_snapshot(db_session, user.id).email == "cache@example.com"
@@ -1,7 +1,6 @@
 import logging
 import httpx
-import json
-from datetime import datetime
+from utils.log_utils import LazyPayload
 
 # 设置日志
 logger = logging.getLogger("api_service")
@@ -11,8 +10,8 @@ class ApiService:
     def __init__(self, base_url):
         self.base_url = base_url
         
-    async def request(self, method, endpoint, data=None, params=None, timeout=30.0):
-        """执行API请求，与test_full_flow.py保持一致的格式"""
+    def _build_url(self, endpoint):
+        """根据endpoint构建完整URL"""
         # 确保endpoint没有前导斜杠
         if endpoint.startswith('/'):
             endpoint = endpoint[1:]
@@ -37,20 +36,34 @@ class ApiService:
         while '//' in url:
             url = url.replace('//', '/')
         url = url.replace(':@@', '://')  # 恢复协议的双斜杠
+        return url
+
+    async def request(self, method, endpoint, data=None, params=None, timeout=30.0):
+        """执行API请求，与test_full_flow.py保持一致的格式"""
+        if endpoint.startswith('/'):
+            endpoint = endpoint[1:]
+        url = self._build_url(endpoint)
         
-        # 日志输出请求信息
-        logger.info(f"请求 {method} {url}")
+        # 日志输出请求信息（参数形式，载荷只在日志输出时序列化并截断）
+        logger.info("请求 %s %s", method, url)
         if data:
-            logger.info(f"请求数据: {json.dumps(data, ensure_ascii=False)[:200]}")
+            logger.debug("请求数据: %s", LazyPayload(data, 200))
         if params:
-            logger.info(f"请求参数: {params}")
+            logger.debug("请求参数: %s", LazyPayload(params))
+        
+        # 后端按用户公平调度大模型请求，请求体中的用户ID通过请求头传递
+        headers = {}
+        user_id = (data or {}).get("user_id") if isinstance(data, dict) else None
+        if user_id is None and params:
+            user_id = params.get("user_id")
+        if user_id is not None:
+            headers["X-User-ID"] = str(user_id)
         
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
+            async with httpx.AsyncClient(timeout=timeout, headers=headers) as client:
                 # 添加更详细的日志记录，特别是对adaptive-test端点
                 if endpoint == "assessment/adaptive-test":
-                    logger.info(f"发送自适应测试请求: URL={url}, 数据={json.dumps(data, ensure_ascii=False)}")
-                    logger.info(f"自适应测试请求开始时间: {datetime.now().isoformat()}")
+                    logger.info("发送自适应测试请求: URL=%s, 数据=%s", url, LazyPayload(data))
                 
                 if method.upper() == "GET":
                     response = await client.get(url, params=params)
@@ -61,18 +74,22 @@ class ApiService:
                 
                 # 特别记录自适应测试的响应结果
                 if endpoint == "assessment/adaptive-test":
-                    logger.info(f"收到自适应测试响应: 状态码={response.status_code}, 时间={datetime.now().isoformat()}")
+                    logger.info("收到自适应测试响应: 状态码=%s", response.status_code)
                     if response.status_code < 400:
                         try:
                             resp_data = response.json()
-                            logger.info(f"自适应测试题目数量: {len(resp_data.get('questions', []))}")
-                            logger.info(f"自适应测试响应类型: {type(resp_data)}")
-                            logger.info(f"自适应测试响应内容前100字符: {str(resp_data)[:100]}...")
+                            logger.info("自适应测试题目数量: %d", len(resp_data.get('questions', [])))
                         except Exception as e:
-                            logger.warning(f"无法解析自适应测试响应为JSON: {str(e)}")
-                            logger.warning(f"响应内容前100字符: {response.text[:100]}...")
+                            logger.warning("无法解析自适应测试响应为JSON: %s", str(e))
+                            logger.warning("响应内容: %s", LazyPayload(response.text, 100))
                 
-                logger.info(f"响应状态: {response.status_code}")
+                logger.info("响应状态: %s", response.status_code)
+                
+                if response.status_code == 503 and "Retry-After" in response.headers:
+                    # 后端过载，稍后重试
+                    retry_after = response.headers["Retry-After"]
+                    logger.warning(f"服务繁忙，{retry_after}秒后重试: {url}")
+                    return {"error": f"服务繁忙，请{retry_after}秒后重试", "retry_after": int(retry_after)}
                 
                 if response.status_code >= 400:
                     error_msg = f"HTTP错误 {response.status_code}"
@@ -86,11 +103,8 @@ class ApiService:
                 # 尝试解析JSON响应
                 try:
                     json_data = response.json()
-                    # 对adaptive-test端点记录完整响应
-                    if endpoint == "assessment/adaptive-test":
-                        logger.info(f"自适应测试完整响应: {json.dumps(json_data, ensure_ascii=False)}")
-                    else:
-                        logger.info(f"响应JSON: {json.dumps(json_data, ensure_ascii=False)[:200]}...")
+                    # 响应内容只在DEBUG级别记录，直接使用响应文本，不重新序列化
+                    logger.debug("响应JSON: %s", LazyPayload(response.text))
                     return json_data
                 except ValueError:
                     logger.warning(f"响应不是JSON格式: {response.text[:200]}...")
@@ -101,6 +115,43 @@ class ApiService:
             logger.error(traceback.format_exc())
             return {"error": f"API请求异常: {str(e)}"}
 
+    async def request_pages(self, endpoint, params=None, page_size=100, max_pages=20, timeout=30.0):
+        """按游标分页获取列表端点的全部数据
+
+        后端通过 X-Next-Cursor 响应头返回下一页游标，没有该响应头即为最后一页；
+        max_pages 防止意外的无限翻页。
+        """
+        url = self._build_url(endpoint)
+        query = dict(params or {}, limit=page_size)
+        items = []
+        
+        try:
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                for _ in range(max_pages):
+                    logger.info(f"请求 GET {url} 参数: {query}")
+                    response = await client.get(url, params=query)
+                    if response.status_code >= 400:
+                        logger.error(f"HTTP错误 {response.status_code}: {response.text[:500]}")
+                        return {"error": f"HTTP错误 {response.status_code}"}
+                    
+                    page = response.json()
+                    if not isinstance(page, list):
+                        return page
+                    items.extend(page)
+                    
+                    next_cursor = response.headers.get("X-Next-Cursor")
+                    if not next_cursor:
+                        break
+                    query["cursor"] = next_cursor
+                else:
+                    logger.warning(f"分页请求达到最大页数 {max_pages}，结果可能不完整")
+        except Exception as e:
+            logger.error(f"API分页请求异常: {str(e)}")
+            return {"error": f"API请求异常: {str(e)}"}
+        
+        logger.info(f"分页请求完成: {url}, 共 {len(items)} 条")
+        return items
+
     def diagnose_api(self):
         """诊断API状态 - 减少不必要的404日志"""
         results = {}
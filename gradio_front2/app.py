@@ -18,15 +18,16 @@ from pages import (
 # 添加学习路径页面的导入
 from pages.learning_path import create_learning_path_tab
 from utils import format_api_status_html
+from utils.log_utils import setup_queue_logging
 
 # 添加调试工具导入
 from utils.debug_tools import create_debug_entry_point
 from datetime import datetime
 
-# 设置日志
-logging.basicConfig(
+# 设置日志（写入控制台和文件在后台线程中进行）
+setup_queue_logging(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
         logging.FileHandler("gradio_front2.log", encoding="utf-8")
@@ -275,7 +276,7 @@ def create_app():
                 # 步骤2: 获取评估问题
                 logger.info("测试步骤2: 获取评估问题")
                 questions_result = loop.run_until_complete(
-                    api_service.request("GET", "assessment/questions")
+                    api_service.request_pages("assessment/questions")
                 )
                 if "error" in questions_result:
                     logger.warning(f"获取评估问题失败: {questions_result['error']}")
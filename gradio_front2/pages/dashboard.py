@@ -70,87 +70,6 @@ def create_dashboard_tab(api_service, user_id):
         try:
             results = {}
             
-            # 1. 获取用户学习风格数据
-            try:
-                style_result = asyncio.run(api_service.request("GET", f"assessment/user/{user_id}"))
-                if "error" not in style_result and "learning_style_result" in style_result:
-                    ls = style_result["learning_style_result"]
-                    chart = create_learning_style_chart(
-                        visual=ls.get("visual", 70),
-                        auditory=ls.get("auditory", 50),
-                        kinesthetic=ls.get("kinesthetic", 80),
-                        reading=ls.get("reading", 40)
-                    )
-                    results["style_chart"] = chart
-                    logger.info("成功获取学习风格数据")
-                else:
-                    chart = create_learning_style_chart()
-                    results["style_chart"] = chart
-                    logger.warning("未获取到学习风格数据，使用默认值")
-            except Exception as e:
-                logger.error(f"获取学习风格数据失败: {str(e)}")
-                chart = create_learning_style_chart()
-                results["style_chart"] = chart
-            
-            # 2. 获取学习路径 - 只保留异常处理和返回部分，减少代码量
-            try:
-                enrolled_result = asyncio.run(api_service.request(
-                    "GET", "learning-paths", 
-                    params={"user_id": user_id, "enrolled": "true"}
-                ))
-                
-                if "error" not in enrolled_result and isinstance(enrolled_result, list):
-                    paths_data = [
-                        [path.get("title", "未知路径"), 
-                        f"{path.get('progress', 0)}%", 
-                        path.get("last_activity", "未知").split("T")[0]]
-                        for path in enrolled_result
-                    ]
-                    results["enrolled_paths"] = paths_data
-                else:
-                    # 使用测试数据
-                    paths = api_service._get_test_enrolled_paths()
-                    paths_data = [
-                        [path.get("title", "未知路径"), 
-                        f"{path.get('progress', 0)}%", 
-                        path.get("last_activity", "未知").split("T")[0]]
-                        for path in paths
-                    ]
-                    results["enrolled_paths"] = paths_data
-            except Exception as e:
-                logger.error(f"获取已注册路径失败: {str(e)}")
-                results["enrolled_paths"] = enrolled_paths.value
-            
-            # 3. 获取推荐路径 - 类似操作
-            try:
-                recommended_result = asyncio.run(api_service.request(
-                    "GET", "learning-paths/recommended", 
-                    params={"user_id": user_id}
-                ))
-                
-                if "error" not in recommended_result and isinstance(recommended_result, list):
-                    rec_data = [
-                        [path.get("title", "未知路径"), 
-                        f"{path.get('match_score', 0)}%", 
-                        f"{path.get('estimated_hours', 0)}小时"]
-                        for path in recommended_result
-                    ]
-                    results["recommended_paths"] = rec_data
-                else:
-                    # 使用测试数据
-                    paths = api_service._get_test_recommended_paths()
-                    rec_data = [
-                        [path.get("title", "未知路径"), 
-                        f"{path.get('match_score', 0)}%", 
-                        f"{path.get('estimated_hours', 0)}小时"]
-                        for path in paths
-                    ]
-                    results["recommended_paths"] = rec_data
-            except Exception as e:
-                logger.error(f"获取推荐路径失败: {str(e)}")
-                results["recommended_paths"] = recommended_paths.value
-            
-            # 4 & 5. 获取学习进度和弱点分析 - 简化错误处理
             progress_html = """<div style="padding:15px;background:#f8f9fa;border-radius:5px;">
                 <h4>学习进度分析</h4>
                 <p>未能获取进度数据，请稍后再试</p>
@@ -161,32 +80,71 @@ def create_dashboard_tab(api_service, user_id):
                 <p>未能获取弱点数据，请稍后再试</p>
             </div>"""
             
-            try:
-                progress_result = asyncio.run(api_service.request(
-                    "GET", f"assessment/progress/{user_id}"
-                ))
-                if "error" not in progress_result:
-                    # 创建学习进度HTML
-                    progress_metrics = progress_result.get("progress_metrics", {})
-                    progress_html = create_progress_html(progress_metrics, 
-                                                       progress_result.get("improvement_suggestions", []))
-                    results["progress_info"] = progress_html
-            except Exception as e:
-                logger.error(f"获取学习进度数据失败: {str(e)}")
-                
-            try:
-                weaknesses_result = asyncio.run(api_service.request(
-                    "GET", f"analytics/weaknesses/{user_id}"
-                ))
-                if "error" not in weaknesses_result:
-                    weaknesses_html = create_weaknesses_html(
-                        weaknesses_result.get("weak_areas", []),
-                        weaknesses_result.get("strength_areas", []),
-                        weaknesses_result.get("improvement_plan", {})
-                    )
-                    results["weaknesses_info"] = weaknesses_html
-            except Exception as e:
-                logger.error(f"获取学习弱点数据失败: {str(e)}")
+            # 一次请求获取全部板块，后端并发查询；超时或失败的板块为None，使用默认值
+            dashboard = asyncio.run(api_service.request("GET", f"dashboard/{user_id}"))
+            if "error" in dashboard:
+                logger.error(f"获取仪表盘数据失败: {dashboard['error']}")
+                sections = {}
+            else:
+                sections = dashboard.get("sections", {})
+                for name, error in dashboard.get("errors", {}).items():
+                    logger.warning(f"仪表盘板块 {name} 不可用: {error}")
+            
+            # 1. 学习风格
+            ls = sections.get("learning_style")
+            if ls:
+                chart = create_learning_style_chart(
+                    visual=ls.get("visual", 70),
+                    auditory=ls.get("auditory", 50),
+                    kinesthetic=ls.get("kinesthetic", 80),
+                    reading=ls.get("reading", 40)
+                )
+                logger.info("成功获取学习风格数据")
+            else:
+                chart = create_learning_style_chart()
+                logger.warning("未获取到学习风格数据，使用默认值")
+            results["style_chart"] = chart
+            
+            # 2. 已注册路径
+            enrolled_result = sections.get("enrolled_paths")
+            if not isinstance(enrolled_result, list):
+                # 使用测试数据
+                enrolled_result = api_service._get_test_enrolled_paths()
+            results["enrolled_paths"] = [
+                [path.get("title", "未知路径"), 
+                f"{path.get('progress', 0)}%", 
+                (path.get("last_activity") or "未知").split("T")[0]]
+                for path in enrolled_result
+            ]
+            
+            # 3. 推荐路径
+            recommended_result = sections.get("recommended_paths")
+            if not isinstance(recommended_result, list):
+                # 使用测试数据
+                recommended_result = api_service._get_test_recommended_paths()
+            results["recommended_paths"] = [
+                [path.get("title", "未知路径"), 
+                f"{path.get('match_score', 0)}%", 
+                f"{path.get('estimated_hours', 0)}小时"]
+                for path in recommended_result
+            ]
+            
+            # 4. 学习进度
+            progress_result = sections.get("progress")
+            if progress_result:
+                results["progress_info"] = create_progress_html(
+                    progress_result.get("progress_metrics", {}),
+                    progress_result.get("improvement_suggestions", [])
+                )
+            
+            # 5. 学习弱点
+            weaknesses_result = sections.get("weaknesses")
+            if weaknesses_result:
+                results["weaknesses_info"] = create_weaknesses_html(
+                    weaknesses_result.get("weak_areas", []),
+                    weaknesses_result.get("strength_areas", []),
+                    weaknesses_result.get("improvement_plan", {})
+                )
             
             # 返回所有结果
             return (
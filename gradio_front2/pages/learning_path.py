@@ -99,23 +99,81 @@ def create_learning_path_tab(api_service, user_id):
                         studyTimer = setInterval(updateStudyDuration, 60000); // 每分钟更新一次
                     }
                     
+                    // 进度和学习会话事件先缓冲在本地，定期批量同步到后端；
+                    // 每个事件带幂等键，同步失败后重发不会重复计入
+                    const SYNC_BUFFER_KEY = 'pathmind-progress-buffer';
+                    const SYNC_INTERVAL = 30000; // 同步间隔(毫秒)
+                    let syncing = false;
+                    
+                    function loadSyncBuffer() {
+                        try {
+                            return JSON.parse(localStorage.getItem(SYNC_BUFFER_KEY)) || [];
+                        } catch (e) {
+                            return [];
+                        }
+                    }
+                    
+                    function saveSyncBuffer(events) {
+                        localStorage.setItem(SYNC_BUFFER_KEY, JSON.stringify(events));
+                    }
+                    
+                    function queueProgressEvent(event) {
+                        const events = loadSyncBuffer();
+                        events.push(Object.assign({
+                            idempotency_key: Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 10),
+                            path_id: Number(pathId),
+                            client_ts: new Date().toISOString()
+                        }, event));
+                        saveSyncBuffer(events);
+                    }
+                    
+                    // 节点状态变化：未开始/进行中/已完成
+                    function markNodeStatus(contentId, status) {
+                        if (pathId && contentId) {
+                            queueProgressEvent({ type: 'progress', content_id: Number(contentId), status: status });
+                        }
+                    }
+                    
+                    async function flushProgress() {
+                        const events = loadSyncBuffer();
+                        if (syncing || events.length === 0) {
+                            return;
+                        }
+                        syncing = true;
+                        try {
+                            const response = await fetch('/api/v1/progress/sync', {
+                                method: 'POST',
+                                headers: { 'Content-Type': 'application/json' },
+                                body: JSON.stringify({ user_id: userId, events: events.slice(0, 500) })
+                            });
+                            if (response.ok) {
+                                const result = await response.json();
+                                // 已应用、重复和被拒绝的事件都不再重发
+                                const done = new Set(result.applied.concat(
+                                    result.duplicates, result.rejected.map(item => item.idempotency_key)
+                                ));
+                                saveSyncBuffer(loadSyncBuffer().filter(event => !done.has(event.idempotency_key)));
+                            }
+                        } catch (e) {
+                            // 离线或请求失败时保留缓冲，下次再同步
+                        } finally {
+                            syncing = false;
+                        }
+                    }
+                    
                     function endStudy() {
                         if (studyStartTime) {
                             const endTime = Date.now();
                             const duration = Math.floor((endTime - studyStartTime) / 60000);
                             
-                            // 将学习记录发送到后端
-                            if (currentContentId) {
-                                fetch('/api/v1/learning-paths/' + pathId + '/progress', {
-                                    method: 'POST',
-                                    headers: { 'Content-Type': 'application/json' },
-                                    body: JSON.stringify({
-                                        user_id: userId,
-                                        content_id: currentContentId,
-                                        study_time: duration,
-                                        session_start: new Date(studyStartTime).toISOString(),
-                                        session_end: new Date(endTime).toISOString()
-                                    })
+                            // 学习记录加入本地缓冲，随下次同步发送到后端
+                            if (currentContentId && pathId) {
+                                queueProgressEvent({
+                                    type: 'session',
+                                    content_id: Number(currentContentId),
+                                    study_time: duration,
+                                    session_start: new Date(studyStartTime).toISOString(),
+                                    session_end: new Date(endTime).toISOString()
                                 });
                             }
                             
@@ -126,7 +184,37 @@ def create_learning_path_tab(api_service, user_id):
                         }
                     }
                     
-                    window.addEventListener('beforeunload', endStudy);
+                    // 进度和学习时长由服务端在变化时推送，不再轮询
+                    window.pathProgress = {};
+                    if (window.EventSource) {
+                        const progressSource = new EventSource('/api/v1/progress/stream/' + userId);
+                        progressSource.addEventListener('progress', (e) => {
+                            JSON.parse(e.data).forEach(state => {
+                                window.pathProgress[state.path_id] = state;
+                                if (String(state.path_id) === String(pathId)) {
+                                    document.getElementById('total-duration').textContent = state.total_study_time;
+                                }
+                            });
+                        });
+                        progressSource.addEventListener('recommendations', (e) => {
+                            window.recommendedPaths = JSON.parse(e.data);
+                        });
+                    }
+                    
+                    setInterval(flushProgress, SYNC_INTERVAL);
+                    window.addEventListener('online', flushProgress);
+                    window.addEventListener('beforeunload', () => {
+                        endStudy();
+                        const events = loadSyncBuffer();
+                        if (events.length > 0) {
+                            // 页面关闭时用 sendBeacon 尽量发出；未确认的事件保留在缓冲中，下次打开页面时重发
+                            navigator.sendBeacon('/api/v1/progress/sync', new Blob(
+                                [JSON.stringify({ user_id: userId, events: events.slice(0, 500) })],
+                                { type: 'application/json' }
+                            ));
+                        }
+                    });
+                    flushProgress();
                     </script>
                     """)
 
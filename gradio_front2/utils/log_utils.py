@@ -0,0 +1,66 @@
+"""
+日志工具
+
+根日志记录器只把记录放入队列，由后台监听线程格式化并写入控制台和文件，界面回调不等待磁盘IO。
+请求和响应内容使用 LazyPayload 包装：只有日志真正输出时才序列化，并截断到 LOG_PAYLOAD_MAX_CHARS 个字符。
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_PAYLOAD_MAX_CHARS = int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", 500))
+
+class LazyPayload:
+    """延迟序列化的日志载荷，传入日志后不应再修改该对象"""
+    __slots__ = ("payload", "max_chars")
+
+    def __init__(self, payload, max_chars=None):
+        self.payload = payload
+        self.max_chars = max_chars or LOG_PAYLOAD_MAX_CHARS
+
+    def __str__(self):
+        if isinstance(self.payload, str):
+            text = self.payload
+        else:
+            text = json.dumps(self.payload, ensure_ascii=False, default=str)
+        if len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}...(省略{len(text) - self.max_chars}字符)"
+        return text
+
+# 可以留到监听线程再格式化的参数类型
+_DEFERRABLE_ARGS = (str, int, float, bool, bytes, type(None), LazyPayload)
+
+class _DeferredQueueHandler(QueueHandler):
+    """参数都是不可变值或 LazyPayload 时，把消息格式化留给监听线程"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.args and not (
+            isinstance(record.args, tuple) and all(isinstance(arg, _DEFERRABLE_ARGS) for arg in record.args)
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_queue_logging(level, fmt, handlers):
+    """通过队列和监听线程输出日志，替代直接挂载处理器的 logging.basicConfig"""
+    formatter = logging.Formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(_DeferredQueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener